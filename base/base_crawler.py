@@ -56,6 +56,14 @@ class AbstractCrawler(ABC):
         # 默认实现：回退到标准模式
         return await self.launch_browser(playwright.chromium, playwright_proxy, user_agent, headless)
 
+    async def close_proxy_pool(self):
+        """
+        停止代理池的后台预取任务，爬虫关闭时调用
+        """
+        ip_proxy_pool = getattr(self, "ip_proxy_pool", None)
+        if ip_proxy_pool is not None:
+            await ip_proxy_pool.stop_prefetch()
+
 
 class AbstractLogin(ABC):
     @abstractmethod
@@ -36,6 +36,8 @@ class AbstractCache(ABC):
         """
         将键的值设置到缓存中。
         这是一个抽象方法。子类必须实现这个方法。
+        需要序列化的实现（redis 等）读出来的值必须和写入时的类型一致，不能把 tuple 变成 list 之类，
+        见 cache.serializer.CacheSerializer
         :param key: 键
         :param value: 值
         :param expire_time: 过期时间
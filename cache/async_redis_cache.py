@@ -0,0 +1,167 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 基于 redis.asyncio 的异步 RedisCache 实现
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from redis.asyncio import ConnectionPool, Redis
+
+from cache.abs_cache import AbstractCache
+from cache.serializer import CacheSerializer
+from config import db_config
+
+
+class AsyncRedisCache(AbstractCache):
+    """
+    异步 Redis 缓存，所有方法都是协程，不会阻塞事件循环
+    - 连接池复用连接
+    - mget / mset 通过 pipeline 批量读写
+    - keys / scan_iter 基于 SCAN 命令，避免 KEYS 阻塞 redis
+    """
+
+    def __init__(self, redis_client: Optional[Redis] = None, serializer: Optional[CacheSerializer] = None,
+                 scan_count: int = 500) -> None:
+        """
+        :param redis_client: 外部传入的异步 redis 客户端，为空时按配置创建连接池
+        :param serializer: 值序列化器
+        :param scan_count: SCAN 每次迭代的 COUNT 参数
+        """
+        self._redis_client = redis_client or self._connect_redis()
+        self._serializer = serializer or CacheSerializer()
+        self._scan_count = scan_count
+
+    @staticmethod
+    def _connect_redis() -> Redis:
+        """
+        通过连接池连接redis, 返回异步redis客户端
+        :return:
+        """
+        pool = ConnectionPool(
+            host=db_config.REDIS_DB_HOST,
+            port=db_config.REDIS_DB_PORT,
+            db=db_config.REDIS_DB_NUM,
+            password=db_config.REDIS_DB_PWD,
+            max_connections=db_config.REDIS_MAX_CONNECTIONS,
+        )
+        return Redis(connection_pool=pool)
+
+    @property
+    def client(self) -> Redis:
+        return self._redis_client
+
+    async def get(self, key: str) -> Any:
+        """
+        从缓存中获取键的值, 并且反序列化
+        :param key:
+        :return:
+        """
+        return self._serializer.loads(await self._redis_client.get(key))
+
+    async def set(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        将键的值设置到缓存中, 并且序列化
+        :param key:
+        :param value:
+        :param expire_time: 过期时间(秒), 小于等于0表示不过期
+        :return:
+        """
+        await self._redis_client.set(key, self._serializer.dumps(value), ex=expire_time if expire_time > 0 else None)
+
+    async def delete(self, *keys: str) -> int:
+        """
+        删除键
+        :param keys:
+        :return: 删除的数量
+        """
+        if not keys:
+            return 0
+        return await self._redis_client.delete(*keys)
+
+    async def mget(self, keys: List[str]) -> List[Any]:
+        """
+        批量获取, 返回值与 keys 顺序一一对应, 不存在的 key 为 None
+        :param keys:
+        :return:
+        """
+        if not keys:
+            return []
+        values = await self._redis_client.mget(keys)
+        return [self._serializer.loads(value) for value in values]
+
+    async def mget_with_ttl(self, keys: List[str]) -> List[Tuple[Any, int]]:
+        """
+        批量获取值及其剩余过期时间(毫秒), 一次 pipeline 往返
+        :param keys:
+        :return: [(value, pttl)], key 不存在时为 (None, -2), 没有过期时间时 pttl 为 -1
+        """
+        if not keys:
+            return []
+        async with self._redis_client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.get(key)
+                pipe.pttl(key)
+            results = await pipe.execute()
+        return [(self._serializer.loads(results[i]), results[i + 1]) for i in range(0, len(results), 2)]
+
+    async def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        """
+        批量设置, 通过 pipeline 一次往返写入所有键及其过期时间
+        :param mapping:
+        :param expire_time: 过期时间(秒), 小于等于0表示不过期
+        :return:
+        """
+        if not mapping:
+            return
+        async with self._redis_client.pipeline(transaction=False) as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, self._serializer.dumps(value), ex=expire_time if expire_time > 0 else None)
+            await pipe.execute()
+
+    async def scan_iter(self, pattern: str) -> AsyncIterator[str]:
+        """
+        基于 SCAN 迭代所有符合pattern的key
+        :param pattern: 匹配模式
+        :return:
+        """
+        async for key in self._redis_client.scan_iter(match=pattern, count=self._scan_count):
+            yield key.decode() if isinstance(key, bytes) else key
+
+    async def keys(self, pattern: str) -> List[str]:
+        """
+        获取所有符合pattern的key, 使用 SCAN 代替 KEYS
+        :param pattern: 匹配模式
+        :return:
+        """
+        return list({key async for key in self.scan_iter(pattern)})
+
+    async def close(self) -> None:
+        """
+        关闭客户端并断开连接池
+        :return:
+        """
+        await self._redis_client.close()
+        await self._redis_client.connection_pool.disconnect()
+
+
+if __name__ == '__main__':
+    async def _demo():
+        redis_cache = AsyncRedisCache()
+        await redis_cache.set("name", "程序员阿江-Relakkes", 1)
+        print(await redis_cache.get("name"))  # 程序员阿江-Relakkes
+        await redis_cache.mset({"k1": [1, 2, 3], "k2": {"a": 1}}, 10)
+        print(await redis_cache.mget(["k1", "k2", "k3"]))  # [[1, 2, 3], {'a': 1}, None]
+        print(await redis_cache.keys("k*"))  # ['k1', 'k2']
+        await redis_cache.close()
+
+    asyncio.run(_demo())
@@ -17,6 +17,7 @@
 
 import asyncio
 import time
+from collections import OrderedDict
 from typing import Any, Dict, List, Optional, Tuple
 
 from cache.abs_cache import AbstractCache
@@ -119,6 +120,82 @@ class ExpiringLocalCache(AbstractCache):
             await asyncio.sleep(self._cron_interval)
 
 
+class BoundedLocalCache(AbstractCache):
+    """
+    有容量上限的本地缓存, 超出容量时按 LRU 淘汰, 过期键在访问时惰性删除,
+    不依赖事件循环, 适合作为多级缓存的 L1
+    """
+
+    def __init__(self, max_size: int = 1024):
+        """
+        :param max_size: 最多缓存的键数量
+        """
+        self._max_size = max_size
+        self._cache_container: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._cache_container)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        从缓存中获取键的值, 命中时移动到 LRU 队尾
+        :param key:
+        :return:
+        """
+        item = self._cache_container.get(key)
+        if item is None:
+            return None
+        value, expire_at = item
+        if expire_at < time.time():
+            del self._cache_container[key]
+            return None
+        self._cache_container.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, expire_time: float) -> None:
+        """
+        将键的值设置到缓存中
+        :param key:
+        :param value:
+        :param expire_time: 过期时间(秒)
+        :return:
+        """
+        if expire_time <= 0:
+            self.delete(key)
+            return
+        self._cache_container[key] = (value, time.time() + expire_time)
+        self._cache_container.move_to_end(key)
+        while len(self._cache_container) > self._max_size:
+            self._cache_container.popitem(last=False)
+
+    def ttl(self, key: str) -> float:
+        """
+        获取键剩余的过期时间(秒), 不存在或已过期返回0
+        :param key:
+        :return:
+        """
+        item = self._cache_container.get(key)
+        if item is None:
+            return 0
+        return max(item[1] - time.time(), 0)
+
+    def delete(self, key: str) -> None:
+        self._cache_container.pop(key, None)
+
+    def clear(self) -> None:
+        self._cache_container.clear()
+
+    def keys(self, pattern: str) -> List[str]:
+        """
+        获取所有符合pattern的key
+        :param pattern: 匹配模式
+        :return:
+        """
+        now = time.time()
+        pattern = pattern.replace('*', '')
+        return [key for key, (_, expire_at) in self._cache_container.items() if expire_at >= now and pattern in key]
+
+
 if __name__ == '__main__':
     cache = ExpiringLocalCache(cron_interval=2)
     cache.set('name', '程序员阿江-Relakkes', 3)
@@ -14,13 +14,13 @@
 # @Name    : 程序员阿江-Relakkes
 # @Time    : 2024/5/29 22:57
 # @Desc    : RedisCache实现
-import pickle
 import time
 from typing import Any, List
 
 from redis import Redis
 
 from cache.abs_cache import AbstractCache
+from cache.serializer import CacheSerializer
 from config import db_config
 
 
@@ -29,6 +29,7 @@ class RedisCache(AbstractCache):
     def __init__(self) -> None:
         # 连接redis, 返回redis客户端
         self._redis_client = self._connet_redis()
+        self._serializer = CacheSerializer()
 
     @staticmethod
     def _connet_redis() -> Redis:
@@ -49,10 +50,7 @@ class RedisCache(AbstractCache):
         :param key:
         :return:
         """
-        value = self._redis_client.get(key)
-        if value is None:
-            return None
-        return pickle.loads(value)
+        return self._serializer.loads(self._redis_client.get(key))
 
     def set(self, key: str, value: Any, expire_time: int) -> None:
         """
@@ -62,13 +60,13 @@ class RedisCache(AbstractCache):
         :param expire_time:
         :return:
         """
-        self._redis_client.set(key, pickle.dumps(value), ex=expire_time)
+        self._redis_client.set(key, self._serializer.dumps(value), ex=expire_time)
 
     def keys(self, pattern: str) -> List[str]:
         """
-        获取所有符合pattern的key
+        获取所有符合pattern的key, 使用 SCAN 代替会阻塞 redis 的 KEYS
         """
-        return [key.decode() for key in self._redis_client.keys(pattern)]
+        return [key.decode() for key in self._redis_client.scan_iter(match=pattern, count=500)]
 
 
 if __name__ == '__main__':
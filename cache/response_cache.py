@@ -0,0 +1,291 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 平台接口响应缓存, 对幂等的详情类接口按 method + uri + 未签名参数缓存原始响应
+import fnmatch
+import hashlib
+import json
+import os
+import time
+import uuid
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import aiofiles
+import httpx
+
+import config
+from cache.abs_cache import AbstractCache
+from cache.serializer import CacheSerializer
+from tools import utils
+
+RESPONSE_CACHE_MODE_OFF = "off"
+RESPONSE_CACHE_MODE_READ_WRITE = "read_write"
+RESPONSE_CACHE_MODE_CACHE_ONLY = "cache_only"
+
+
+class ResponseCacheMissError(Exception):
+    """cache_only 模式下缓存未命中"""
+
+
+class ResponseCacheStorage(ABC):
+    """
+    响应缓存存储, 值为 zlib 压缩后的字节
+    """
+
+    @abstractmethod
+    async def get(self, key: str, ignore_expire: bool = False) -> Optional[bytes]:
+        """
+        读取缓存
+        :param key:
+        :param ignore_expire: 是否忽略过期时间, cache_only 模式下使用
+        :return: 不存在或已过期时返回 None
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, expire_time: int) -> None:
+        """
+        写入缓存
+        :param key:
+        :param value:
+        :param expire_time: 过期时间(秒)
+        :return:
+        """
+        raise NotImplementedError
+
+
+class DiskResponseStorage(ResponseCacheStorage):
+    """
+    磁盘存储, 过期后文件不会被删除, 以便 cache_only 模式下离线重放
+    文件格式: [过期时间戳(8 bytes)][payload]
+    先写临时文件再原子替换, 进程中途退出或其他进程同时读取时不会看到写了一半的文件
+    """
+
+    def __init__(self, cache_dir: str):
+        self._cache_dir = cache_dir
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._cache_dir, key[:2], f"{key}.bin")
+
+    async def get(self, key: str, ignore_expire: bool = False) -> Optional[bytes]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        async with aiofiles.open(path, "rb") as f:
+            data = await f.read()
+        if len(data) <= 8:
+            return None
+        expire_at = int.from_bytes(data[:8], "big")
+        if not ignore_expire and expire_at < time.time():
+            return None
+        return data[8:]
+
+    async def set(self, key: str, value: bytes, expire_time: int) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        expire_at = int(time.time() + expire_time)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            async with aiofiles.open(tmp_path, "wb") as f:
+                await f.write(expire_at.to_bytes(8, "big") + value)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+class CacheResponseStorage(ResponseCacheStorage):
+    """
+    基于 AbstractCache 的存储(如 AsyncRedisCache), 多进程共享
+    """
+
+    def __init__(self, cache_client: AbstractCache, key_prefix: str = "response_cache:"):
+        self._cache_client = cache_client
+        self._key_prefix = key_prefix
+
+    async def get(self, key: str, ignore_expire: bool = False) -> Optional[bytes]:
+        return await self._cache_client.get(self._key_prefix + key)
+
+    async def set(self, key: str, value: bytes, expire_time: int) -> None:
+        await self._cache_client.set(self._key_prefix + key, value, expire_time)
+
+
+class ResponseCache:
+    """
+    接口响应缓存
+    - 只缓存 endpoint_ttls 中配置过的接口, 每个接口单独的过期时间
+    - 缓存 key 不包含签名类的易变参数(a_bogus、w_rid、X-s...), 签名每次不同也能命中
+    - cache_only 模式只读缓存, 未命中抛出 ResponseCacheMissError, 用于离线重新处理
+    """
+
+    def __init__(self, mode: str, storage: ResponseCacheStorage, endpoint_ttls: Dict[str, int],
+                 volatile_params: List[str]):
+        """
+        :param mode: off | read_write | cache_only
+        :param storage: 存储实现
+        :param endpoint_ttls: 接口匹配模式 -> 过期时间(秒), 匹配模式为 fnmatch 通配, 作用于 "平台:路径[#graphql操作名]"
+        :param volatile_params: 不参与缓存 key 计算的参数名
+        """
+        self.mode = mode
+        self._storage = storage
+        self._endpoint_ttls = endpoint_ttls
+        self._volatile_params = {param.lower() for param in volatile_params}
+        self._serializer = CacheSerializer()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != RESPONSE_CACHE_MODE_OFF
+
+    @property
+    def cache_only(self) -> bool:
+        return self.mode == RESPONSE_CACHE_MODE_CACHE_ONLY
+
+    @staticmethod
+    def _normalize_body(data: Any) -> Any:
+        if isinstance(data, (bytes, str)):
+            try:
+                return json.loads(data)
+            except ValueError:
+                return data if isinstance(data, str) else data.decode("utf-8", "ignore")
+        return data
+
+    def endpoint_of(self, platform: str, url: str, data: Any = None) -> str:
+        """
+        计算接口标识, graphql 请求会带上 operationName
+        :param platform:
+        :param url:
+        :param data:
+        :return:
+        """
+        endpoint = f"{platform}:{urlsplit(url).path}"
+        body = self._normalize_body(data)
+        if isinstance(body, dict) and body.get("operationName"):
+            endpoint += f"#{body['operationName']}"
+        return endpoint
+
+    def match_ttl(self, endpoint: str) -> Optional[int]:
+        """
+        获取接口的缓存时间, 没有配置返回 None
+        :param endpoint:
+        :return:
+        """
+        for pattern, ttl in self._endpoint_ttls.items():
+            if fnmatch.fnmatchcase(endpoint, pattern):
+                return ttl
+        return None
+
+    def build_key(self, platform: str, method: str, url: str, params: Optional[Dict] = None,
+                  data: Any = None) -> str:
+        """
+        根据 method + uri + 去掉签名参数后的请求参数计算缓存 key
+        :param platform:
+        :param method:
+        :param url:
+        :param params:
+        :param data:
+        :return:
+        """
+        split_url = urlsplit(url)
+        query: List[Tuple[str, str]] = parse_qsl(split_url.query, keep_blank_values=True)
+        if params:
+            query.extend((str(k), str(v)) for k, v in params.items())
+        query = sorted((k, v) for k, v in query if k.lower() not in self._volatile_params)
+
+        body = self._normalize_body(data)
+        if isinstance(body, dict):
+            body = {k: v for k, v in body.items() if k.lower() not in self._volatile_params}
+
+        raw_key = json.dumps(
+            [platform, method.upper(), split_url.netloc, split_url.path, query, body],
+            sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha1(raw_key.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str, method: str, url: str) -> Optional[httpx.Response]:
+        """
+        读取缓存的响应
+        :param key:
+        :param method:
+        :param url:
+        :return:
+        """
+        data = await self._storage.get(key, ignore_expire=self.cache_only)
+        if data is None:
+            return None
+        try:
+            item: Dict = self._serializer.loads(zlib.decompress(data))
+            return httpx.Response(
+                status_code=item["status_code"],
+                headers=item.get("headers") or {},
+                content=item["content"],
+                request=httpx.Request(method, url),
+            )
+        except Exception as e:
+            # 损坏的缓存(如旧版本写了一半的文件)按未命中处理, 重新请求后会被覆盖
+            utils.logger.warning(f"[ResponseCache.get] drop corrupt cache entry {key}: {e}")
+            return None
+
+    async def set(self, key: str, response: Any, expire_time: int) -> None:
+        """
+        缓存响应, 兼容 httpx / requests 的 Response
+        :param key:
+        :param response:
+        :param expire_time:
+        :return:
+        """
+        content_type = response.headers.get("content-type")
+        item = {
+            "status_code": response.status_code,
+            "headers": {"content-type": content_type} if content_type else {},
+            "content": response.content,
+        }
+        await self._storage.set(key, zlib.compress(self._serializer.dumps(item)), expire_time)
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    按配置懒加载全局的响应缓存实例
+    :return:
+    """
+    global _response_cache
+    if _response_cache is None:
+        if config.RESPONSE_CACHE_STORAGE in ("redis", "tiered"):
+            from cache.cache_factory import CacheFactory
+            cache_type = config.CACHE_TYPE_TIERED if config.RESPONSE_CACHE_STORAGE == "tiered" \
+                else config.CACHE_TYPE_ASYNC_REDIS
+            storage: ResponseCacheStorage = CacheResponseStorage(CacheFactory.create_cache(cache_type))
+        else:
+            storage = DiskResponseStorage(config.RESPONSE_CACHE_DIR)
+        _response_cache = ResponseCache(
+            mode=config.RESPONSE_CACHE_MODE,
+            storage=storage,
+            endpoint_ttls=config.RESPONSE_CACHE_ENDPOINT_TTLS,
+            volatile_params=config.RESPONSE_CACHE_VOLATILE_PARAMS,
+        )
+    return _response_cache
+
+
+def set_response_cache(response_cache: Optional[ResponseCache]) -> None:
+    """
+    替换全局的响应缓存实例, 主要用于测试
+    :param response_cache:
+    :return:
+    """
+    global _response_cache
+    _response_cache = response_cache
@@ -0,0 +1,134 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 缓存值的序列化器，带版本头，优先使用 msgpack / orjson，不可用时回退到 pickle
+
+import math
+import pickle
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - 可选依赖
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+# 序列化格式版本号，格式调整时递增
+SERIALIZER_VERSION = 1
+
+CODEC_PICKLE = 0
+CODEC_MSGPACK = 1
+CODEC_ORJSON = 2
+
+
+class CacheSerializer:
+    """
+    缓存序列化器
+
+    序列化后的字节格式为: [版本号(1 byte)][编码类型(1 byte)][payload]
+    msgpack / orjson 只用来编码 dict/list/str/bytes/int/float/bool/None 组成的值，
+    其他类型（如 tuple、set、datetime、自定义对象）会回退到 pickle，读出来的值和写入时的类型一致，
+    没有版本头的数据视为旧版 RedisCache 写入的 pickle 数据，保证向前兼容。
+    """
+
+    def __init__(self, prefer_codec: Optional[int] = None):
+        """
+        :param prefer_codec: 优先使用的编码类型，默认按 msgpack > orjson > pickle 自动选择
+        """
+        self._codecs: Dict[int, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+            CODEC_PICKLE: (self._pickle_dumps, pickle.loads),
+        }
+        if msgpack is not None:
+            self._codecs[CODEC_MSGPACK] = (self._msgpack_dumps, self._msgpack_loads)
+        if orjson is not None:
+            self._codecs[CODEC_ORJSON] = (self._orjson_dumps, orjson.loads)
+
+        if prefer_codec is None:
+            prefer_codec = next(
+                codec for codec in (CODEC_MSGPACK, CODEC_ORJSON, CODEC_PICKLE) if codec in self._codecs
+            )
+        if prefer_codec not in self._codecs:
+            raise ValueError(f"Serializer codec {prefer_codec} is not available")
+        self._prefer_codec = prefer_codec
+
+    @property
+    def codec(self) -> int:
+        return self._prefer_codec
+
+    def dumps(self, value: Any) -> bytes:
+        """
+        序列化
+        :param value:
+        :return:
+        """
+        codec = self._prefer_codec
+        try:
+            payload = self._codecs[codec][0](value)
+        except (TypeError, ValueError, OverflowError):
+            codec = CODEC_PICKLE
+            payload = self._pickle_dumps(value)
+        return bytes((SERIALIZER_VERSION, codec)) + payload
+
+    def loads(self, data: Optional[bytes]) -> Any:
+        """
+        反序列化
+        :param data:
+        :return:
+        """
+        if data is None:
+            return None
+        if len(data) < 2 or data[0] != SERIALIZER_VERSION:
+            # 没有版本头，按旧版 pickle 格式解析
+            return pickle.loads(data)
+        codec = data[1]
+        if codec not in self._codecs:
+            raise ValueError(f"Serializer codec {codec} is not available, please install the dependency")
+        return self._codecs[codec][1](data[2:])
+
+    @staticmethod
+    def _pickle_dumps(value: Any) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _msgpack_dumps(value: Any) -> bytes:
+        # strict_types: tuple 和各种子类不按 list/基础类型编码，抛出 TypeError 后回退到 pickle
+        return msgpack.packb(value, use_bin_type=True, strict_types=True)
+
+    @staticmethod
+    def _orjson_dumps(value: Any) -> bytes:
+        # orjson 会把 tuple、datetime、NaN 等编码成 JSON 里的近似值，读出来类型就变了，这些值交给 pickle
+        if not _is_json_plain(value):
+            raise TypeError(f"value of type {type(value).__name__} is not json plain")
+        return orjson.dumps(value)
+
+    @staticmethod
+    def _msgpack_loads(data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+def _is_json_plain(value: Any) -> bool:
+    """值是否只由 JSON 原生类型组成，编解码之后类型不变"""
+    value_type = type(value)
+    if value_type in (str, int, bool) or value is None:
+        return True
+    if value_type is float:
+        return math.isfinite(value)
+    if value_type is list:
+        return all(_is_json_plain(item) for item in value)
+    if value_type is dict:
+        return all(type(k) is str and _is_json_plain(v) for k, v in value.items())
+    return False
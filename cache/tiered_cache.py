@@ -0,0 +1,193 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 二级缓存, L1 为进程内有界缓存, L2 为多进程共享的 redis
+import asyncio
+import json
+import uuid
+from typing import Any, Dict, List, Optional
+
+from cache.abs_cache import AbstractCache
+from cache.async_redis_cache import AsyncRedisCache
+from cache.local_cache import BoundedLocalCache
+from config import db_config
+from tools import utils
+
+
+class TieredCache(AbstractCache):
+    """
+    二级缓存
+    - 读: 先查 L1, 未命中再查 L2, 并按 L2 剩余过期时间回填 L1
+    - 写: 同时写入 L1 和 L2, 开启 pub/sub 时通知其他进程淘汰各自的 L1
+    """
+
+    def __init__(self, l2_cache: Optional[AsyncRedisCache] = None, l1_max_size: Optional[int] = None,
+                 l1_max_ttl: Optional[int] = None, enable_pubsub: Optional[bool] = None,
+                 channel: str = "media_crawler:cache_invalidate") -> None:
+        """
+        :param l2_cache: L2 异步 redis 缓存, 为空时按配置创建
+        :param l1_max_size: L1 最大缓存键数量
+        :param l1_max_ttl: L1 中键的最长存活时间(秒), 用来限制跨进程数据不一致的窗口
+        :param enable_pubsub: 是否开启 pub/sub 失效通知
+        :param channel: 失效通知频道
+        """
+        self._l1 = BoundedLocalCache(max_size=l1_max_size or db_config.TIERED_CACHE_L1_MAX_SIZE)
+        self._l2 = l2_cache or AsyncRedisCache()
+        self._l1_max_ttl = l1_max_ttl or db_config.TIERED_CACHE_L1_MAX_TTL
+        self._enable_pubsub = db_config.TIERED_CACHE_ENABLE_PUBSUB if enable_pubsub is None else enable_pubsub
+        self._channel = channel
+        self._instance_id = uuid.uuid4().hex
+        self._pubsub = None
+        self._listener_task: Optional[asyncio.Task] = None
+        self._listener_running = False
+
+    @property
+    def l1(self) -> BoundedLocalCache:
+        return self._l1
+
+    @property
+    def l2(self) -> AsyncRedisCache:
+        return self._l2
+
+    def _l1_ttl(self, l2_pttl: int) -> float:
+        """
+        根据 L2 剩余过期时间(毫秒)计算回填 L1 的过期时间(秒)
+        """
+        if l2_pttl is None or l2_pttl < 0:
+            return self._l1_max_ttl
+        return min(l2_pttl / 1000, self._l1_max_ttl)
+
+    async def get(self, key: str) -> Any:
+        """
+        从缓存中获取键的值
+        :param key:
+        :return:
+        """
+        return (await self.mget([key]))[0]
+
+    async def mget(self, keys: List[str]) -> List[Any]:
+        """
+        批量获取, L1 未命中的键通过一次 pipeline 从 L2 读取
+        :param keys:
+        :return:
+        """
+        values: List[Any] = [self._l1.get(key) for key in keys]
+        missed = [i for i, value in enumerate(values) if value is None]
+        if not missed:
+            return values
+
+        l2_results = await self._l2.mget_with_ttl([keys[i] for i in missed])
+        for i, (value, pttl) in zip(missed, l2_results):
+            if value is None:
+                continue
+            values[i] = value
+            self._l1.set(keys[i], value, self._l1_ttl(pttl))
+        return values
+
+    async def set(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        将键的值设置到L1和L2中
+        :param key:
+        :param value:
+        :param expire_time: 过期时间(秒)
+        :return:
+        """
+        await self.mset({key: value}, expire_time)
+
+    async def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        """
+        批量设置
+        :param mapping:
+        :param expire_time: 过期时间(秒)
+        :return:
+        """
+        if not mapping:
+            return
+        await self._l2.mset(mapping, expire_time)
+        l1_ttl = min(expire_time, self._l1_max_ttl) if expire_time > 0 else self._l1_max_ttl
+        for key, value in mapping.items():
+            self._l1.set(key, value, l1_ttl)
+        await self._publish_invalidate(list(mapping.keys()))
+
+    async def delete(self, *keys: str) -> None:
+        """
+        删除键
+        :param keys:
+        :return:
+        """
+        if not keys:
+            return
+        for key in keys:
+            self._l1.delete(key)
+        await self._l2.delete(*keys)
+        await self._publish_invalidate(list(keys))
+
+    async def keys(self, pattern: str) -> List[str]:
+        """
+        获取所有符合pattern的key, 以 L2 为准
+        :param pattern: 匹配模式
+        :return:
+        """
+        return await self._l2.keys(pattern)
+
+    async def _publish_invalidate(self, keys: List[str]) -> None:
+        if not self._enable_pubsub:
+            return
+        message = json.dumps({"source": self._instance_id, "keys": keys})
+        await self._l2.client.publish(self._channel, message)
+
+    async def start_invalidation_listener(self) -> None:
+        """
+        订阅失效通知频道, 收到其他进程的写入/删除通知时淘汰本地 L1
+        :return:
+        """
+        if not self._enable_pubsub or self._listener_task is not None:
+            return
+        self._pubsub = self._l2.client.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self._channel)
+        self._listener_running = True
+        self._listener_task = asyncio.create_task(self._listen_invalidation())
+
+    async def _listen_invalidation(self) -> None:
+        # get_message 带超时轮询, 以便 close 时能及时退出循环
+        while self._listener_running:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+                if not message:
+                    continue
+                payload = json.loads(message["data"])
+                if payload.get("source") == self._instance_id:
+                    continue
+                for key in payload.get("keys", []):
+                    self._l1.delete(key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                utils.logger.error(f"[TieredCache._listen_invalidation] handle invalidate message error: {e}")
+
+    async def close(self) -> None:
+        """
+        停止订阅并关闭 L2 连接
+        :return:
+        """
+        if self._listener_task is not None:
+            self._listener_running = False
+            await asyncio.wait({self._listener_task}, timeout=3)
+            self._listener_task.cancel()
+            self._listener_task = None
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(self._channel)
+            await self._pubsub.close()
+            self._pubsub = None
+        self._l1.clear()
+        await self._l2.close()
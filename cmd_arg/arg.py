@@ -36,6 +36,12 @@ async def parse_cmd():
                         help='where to save the data (csv or db or json)', choices=['csv', 'db', 'json'], default=config.SAVE_DATA_OPTION)
     parser.add_argument('--cookies', type=str,
                         help='cookies used for cookie login type', default=config.COOKIES)
+    parser.add_argument('--response_cache', type=str,
+                        help='api response cache mode (off | read_write | cache_only)',
+                        choices=['off', 'read_write', 'cache_only'], default=config.RESPONSE_CACHE_MODE)
+    parser.add_argument('--profile', type=str,
+                        help='profile mode (off | sample | cprofile)',
+                        choices=['off', 'sample', 'cprofile'], default=config.PROFILE_MODE)
 
     args = parser.parse_args()
 
@@ -49,3 +55,5 @@ async def parse_cmd():
     config.ENABLE_GET_SUB_COMMENTS = args.get_sub_comment
     config.SAVE_DATA_OPTION = args.save_data_option
     config.COOKIES = args.cookies
+    config.RESPONSE_CACHE_MODE = args.response_cache
+    config.PROFILE_MODE = args.profile
@@ -38,6 +38,27 @@ IP_PROXY_POOL_COUNT = 2
 # 代理IP提供商名称
 IP_PROXY_PROVIDER_NAME = "kuaidaili"
 
+# 代理IP缓存类型 memory | redis | tiered，redis 模式下多个爬虫进程可以共享提取到的IP
+# tiered 模式在 redis 之上加一层进程内 L1，读取IP不访问 redis，参数见 db_config 中的 TIERED_CACHE_*
+IP_CACHE_TYPE = "memory"
+
+# 验证代理IP是否可用的地址及超时时间(秒)
+IP_PROXY_VALIDATE_URL = "https://httpbin.org/ip"
+IP_PROXY_VALIDATE_TIMEOUT = 5
+
+# 是否开启后台预取代理IP，池中可用IP少于 IP_PROXY_LOW_WATER_MARK 时在后台补充并发验证
+ENABLE_IP_PROXY_PREFETCH = True
+IP_PROXY_LOW_WATER_MARK = 1
+
+# 代理IP轮换模式
+# fixed: 整个爬取过程固定使用一个IP | request: 每个请求按健康分从代理池中挑选IP | session: 同一账号固定一个IP，被封禁后自动切换
+IP_PROXY_ROTATE_MODE = "fixed"
+
+# session 轮换模式下的会话标识，同一个标识的请求固定使用一个IP
+# 为空时按平台区分（一个进程只登录一个账号时即为按账号）；多个进程共用代理池或一个进程内切换账号时设置为账号标识，
+# client 也可以在 http_transport.send_request 中通过 proxy_session_key 按请求指定
+IP_PROXY_SESSION_KEY = ""
+
 # 设置为True不会打开浏览器（无头浏览器）
 # 设置False会打开一个浏览器
 # 小红书如果一直扫码登录不通过，打开浏览器手动过一下滑动验证码
@@ -70,6 +91,33 @@ CDP_HEADLESS = False
 # 浏览器启动超时时间（秒）
 BROWSER_LAUNCH_TIMEOUT = 30
 
+# 签名页面池大小，大于1时会在同一个浏览器上下文中额外打开页面，并发签名时轮询使用
+BROWSER_PAGE_POOL_SIZE = 1
+
+# 仅签名浏览器模式，浏览器只用于登录、获取cookie和执行签名函数
+# 开启后启动参数会关闭GPU和媒体自动播放，登录完成后拦截图片、视频、字体、样式和埋点请求
+# 开启前后的启动耗时和内存对比: python -m tools.lightweight_browser --platform xhs
+ENABLE_SIGN_ONLY_BROWSER = False
+
+# 免浏览器模式（目前支持 bili、dy、zhihu，签名可以在 Python/JS 中完成）
+# 开启后浏览器登录一次会把 cookies、localStorage 和 UA 保存为会话快照，之后的运行直接使用快照，不再启动浏览器
+# 快照不存在、超过有效期或登录态失效时自动回退到浏览器模式
+ENABLE_BROWSERLESS_MODE = False
+
+# 会话快照保存目录及有效期（秒），有效期 <=0 表示不过期
+SESSION_SNAPSHOT_DIR = "browser_data/session_snapshot"
+SESSION_SNAPSHOT_MAX_AGE = 24 * 3600
+
+# 常驻浏览器模式，先执行 python -m tools.browser_launcher --daemon start 启动一次浏览器
+# 之后每次运行都通过CDP连接这个浏览器并租用平台上下文，省去浏览器启动和登录的时间，需要同时开启 ENABLE_CDP_MODE
+ENABLE_CDP_DAEMON = False
+
+# 常驻浏览器的状态文件，记录浏览器进程、调试端口和各平台的上下文租用情况
+CDP_DAEMON_STATE_FILE = "browser_data/cdp_daemon.json"
+
+# 平台上下文使用多少次之后重启常驻浏览器，释放长时间运行积累的内存，<=0 表示不重启
+CDP_DAEMON_CONTEXT_MAX_USES = 20
+
 # 是否在程序结束时自动关闭浏览器
 # 设置为False可以保持浏览器运行，便于调试
 AUTO_CLOSE_BROWSER = True
@@ -235,3 +283,91 @@ CRAWLER_MAX_CONTACTS_COUNT_SINGLENOTES = 100
 
 # 爬取作者动态数量控制(单作者)
 CRAWLER_MAX_DYNAMICS_COUNT_SINGLENOTES = 50
+
+# ==================== 接口响应缓存配置 ====================
+# 对幂等的详情类接口缓存原始响应, 重复跑 detail 任务时直接复用几分钟前抓过的数据
+# off: 关闭 | read_write: 读写缓存 | cache_only: 只读缓存, 未命中直接报错, 用于离线重新处理
+# cache_only 只作用于 RESPONSE_CACHE_ENDPOINT_TTLS 中的接口, 其余接口照常请求
+RESPONSE_CACHE_MODE = "off"
+
+# 缓存存储方式 disk | redis | tiered，tiered 为进程内 L1 + redis L2
+RESPONSE_CACHE_STORAGE = "disk"
+
+# 磁盘缓存目录
+RESPONSE_CACHE_DIR = "data/response_cache"
+
+# 需要缓存的接口及其缓存时间(秒), 匹配 "平台:请求路径[#graphql操作名]", 支持 * 通配
+RESPONSE_CACHE_ENDPOINT_TTLS = {
+    "dy:/aweme/v1/web/aweme/detail/": 3600,  # 抖音视频详情
+    "bili:/x/web-interface/view/detail": 3600,  # B站视频详情
+    "zhihu:/question/*/answer/*": 3600,  # 知乎回答详情
+    "wb:/detail/*": 3600,  # 微博帖子详情
+    "ks:/graphql#visionProfile": 3600,  # 快手创作者主页信息
+}
+
+# 不参与缓存key计算的易变参数, 主要是各平台的签名参数
+RESPONSE_CACHE_VOLATILE_PARAMS = [
+    "a_bogus", "X-Bogus", "msToken", "webid", "verifyFp", "fp",  # 抖音
+    "w_rid", "wts",  # B站
+    "X-s", "X-t", "x-s-common",  # 小红书
+    "_signature",
+]
+
+# ==================== 并发请求合并配置 ====================
+# 多个关键词/创作者同时命中同一个帖子时，详情和创作者信息接口只发一次请求，其余调用等待同一个结果
+ENABLE_SINGLE_FLIGHT = True
+
+# ==================== JSON 编解码配置 ====================
+# 接口响应解析和 JSON 存储使用的编解码实现 auto | orjson | stdlib，auto 表示安装了 orjson 时使用 orjson
+# orjson 只支持紧凑格式和 2 个空格缩进，JSON 存储因此使用这两种格式(xhs、zhihu 和词频文件为 2 个空格缩进，其余平台为紧凑格式)，
+# 与旧版本写出的文件只有空白字符不同，读取时完全兼容
+JSON_CODEC = "auto"
+
+# ==================== 请求录制重放配置 ====================
+# off: 关闭 | record: 正常爬取并录制各平台接口的请求响应 | replay: 请求转发到本地 mock 服务重放录制的响应
+# mock 服务启动方式: python -m tools.replay serve，吞吐基准: python -m tools.replay bench --platform dy
+REPLAY_MODE = "off"
+
+# 录制文件目录，每个平台一个 jsonl 文件
+REPLAY_ARCHIVE_DIR = "data/replay"
+
+# replay 模式下 mock 服务地址
+REPLAY_SERVER_URL = "http://127.0.0.1:8765"
+
+# ==================== 运行指标配置 ====================
+# 本地 /metrics 接口端口(Prometheus 文本格式)，0 表示不开启
+METRICS_PORT = 0
+
+# 汇总日志的输出间隔(秒)，输出各平台请求速率、平均延迟、评论速率、并发占用和存储积压，0 表示不输出
+METRICS_SUMMARY_INTERVAL = 60
+
+# ==================== 请求链路追踪配置 ====================
+# 是否记录请求级别的 span(签名、发送、解析、存储)，输出 Chrome trace-event 格式，可用 chrome://tracing 或 Perfetto 打开
+ENABLE_TRACING = False
+
+# trace 文件路径
+TRACE_FILE = "data/trace/trace.json"
+
+# 耗时超过该阈值(毫秒)的请求全部保留
+TRACE_SLOW_THRESHOLD_MS = 1000
+
+# 未超过阈值的请求按该比例随机保留，0 表示只保留慢请求
+TRACE_SAMPLE_RATE = 0.01
+
+# ==================== 性能分析配置 ====================
+# off: 关闭 | sample: 采样调用栈，输出火焰图用的 collapsed 文件 | cprofile: 确定性 profile，输出 pstats 文件
+# 也可以通过命令行 --profile 指定，文本分析入口同样支持
+PROFILE_MODE = "off"
+
+# profile 输出根目录，每次运行一个子目录，包含热点函数、事件循环延迟和内存分配的汇总 summary.txt
+PROFILE_OUTPUT_DIR = "data/profile"
+
+# sample 模式的采样间隔(毫秒)
+PROFILE_SAMPLE_INTERVAL_MS = 5
+
+# ==================== 事件循环阻塞检测配置 ====================
+# 是否开启事件循环看门狗，循环被同步调用阻塞时打印阻塞位置的调用栈和协程，退出时输出汇总
+ENABLE_LOOP_WATCHDOG = False
+
+# 事件循环阻塞超过该时长(毫秒)时记录
+LOOP_WATCHDOG_THRESHOLD_MS = 200
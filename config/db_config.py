@@ -25,10 +25,18 @@ REDIS_DB_HOST = "127.0.0.1"  # your redis host
 REDIS_DB_PWD = os.getenv("REDIS_DB_PWD", "123456")  # your redis password
 REDIS_DB_PORT = os.getenv("REDIS_DB_PORT", 6379)  # your redis port
 REDIS_DB_NUM = os.getenv("REDIS_DB_NUM", 0)  # your redis db num
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 20))  # async redis connection pool size
 
 # cache type
 CACHE_TYPE_REDIS = "redis"
 CACHE_TYPE_MEMORY = "memory"
+CACHE_TYPE_ASYNC_REDIS = "async_redis"
+CACHE_TYPE_TIERED = "tiered"
+
+# tiered cache config (L1 进程内缓存 + L2 redis)
+TIERED_CACHE_L1_MAX_SIZE = 4096  # L1 最多缓存的键数量
+TIERED_CACHE_L1_MAX_TTL = 60  # L1 中键的最长存活时间(秒)
+TIERED_CACHE_ENABLE_PUBSUB = False  # 是否通过 redis pub/sub 通知其他进程淘汰 L1
 
 def get_db_conn():
     """
@@ -10,54 +10,74 @@
 
 
 import asyncio
+import importlib
 import sys
-from typing import Optional
+from typing import Optional, Type
 
 import cmd_arg
 import config
 import db
+from tools import loop_watchdog, metrics, profiler, replay, tracing
 from base.base_crawler import AbstractCrawler
-from media_platform.bilibili import BilibiliCrawler
-from media_platform.douyin import DouYinCrawler
-from media_platform.kuaishou import KuaishouCrawler
-from media_platform.tieba import TieBaCrawler
-from media_platform.weibo import WeiboCrawler
-from media_platform.xhs import XiaoHongShuCrawler
-from media_platform.zhihu import ZhihuCrawler
 
 
 class CrawlerFactory:
+    # 平台爬虫按需导入，只跑一个平台时不会加载其他平台的 playwright、签名 js、store 等依赖
     CRAWLERS = {
-        "xhs": XiaoHongShuCrawler,
-        "dy": DouYinCrawler,
-        "ks": KuaishouCrawler,
-        "bili": BilibiliCrawler,
-        "wb": WeiboCrawler,
-        "tieba": TieBaCrawler,
-        "zhihu": ZhihuCrawler
+        "xhs": ("media_platform.xhs", "XiaoHongShuCrawler"),
+        "dy": ("media_platform.douyin", "DouYinCrawler"),
+        "ks": ("media_platform.kuaishou", "KuaishouCrawler"),
+        "bili": ("media_platform.bilibili", "BilibiliCrawler"),
+        "wb": ("media_platform.weibo", "WeiboCrawler"),
+        "tieba": ("media_platform.tieba", "TieBaCrawler"),
+        "zhihu": ("media_platform.zhihu", "ZhihuCrawler")
     }
 
     @staticmethod
-    def create_crawler(platform: str) -> AbstractCrawler:
-        crawler_class = CrawlerFactory.CRAWLERS.get(platform)
-        if not crawler_class:
+    def get_crawler_class(platform: str) -> Type[AbstractCrawler]:
+        crawler_path = CrawlerFactory.CRAWLERS.get(platform)
+        if not crawler_path:
             raise ValueError("Invalid Media Platform Currently only supported xhs or dy or ks or bili ...")
-        return crawler_class()
+        module_name, class_name = crawler_path
+        return getattr(importlib.import_module(module_name), class_name)
+
+    @staticmethod
+    def create_crawler(platform: str) -> AbstractCrawler:
+        return CrawlerFactory.get_crawler_class(platform)()
 
 async def main():
 
     # parse cmd
     await cmd_arg.parse_cmd()
 
-    # init db
-    if config.SAVE_DATA_OPTION == "db":
-        await db.init_db()
+    # metrics endpoint and periodic summary log
+    metrics.start_exporters()
+
+    # event loop blocking detection, summarized at shutdown
+    watchdog = loop_watchdog.start_watchdog()
+
+    crawler = None
+    try:
+        with profiler.profile(config.PROFILE_MODE, f"crawler_{config.PLATFORM}"):
+            # init db
+            if config.SAVE_DATA_OPTION == "db":
+                await db.init_db()
 
-    crawler = CrawlerFactory.create_crawler(platform=config.PLATFORM)
-    await crawler.start()
+            crawler = CrawlerFactory.create_crawler(platform=config.PLATFORM)
+            await crawler.start()
 
-    if config.SAVE_DATA_OPTION == "db":
-        await db.close()
+            if config.SAVE_DATA_OPTION == "db":
+                await db.close()
+    finally:
+        # proxy pool prefetch task must not outlive the event loop
+        if crawler is not None:
+            await crawler.close_proxy_pool()
+        replay_session = replay.get_replay_session()
+        if replay_session is not None:
+            await replay_session.close()
+        tracing.flush()
+        if watchdog is not None:
+            watchdog.stop()
 
     
 
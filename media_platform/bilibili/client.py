@@ -14,7 +14,6 @@
 # @Time    : 2023/12/2 18:44
 # @Desc    : bilibili 请求客户端
 import asyncio
-import json
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlencode
 
@@ -23,7 +22,9 @@ from playwright.async_api import BrowserContext, Page
 
 import config
 from base.base_crawler import AbstractApiClient
-from tools import utils
+from tools import http_transport, json_codec, metrics, tracing, utils
+from tools.page_pool import PagePool
+from tools.single_flight import single_flight
 
 from .exception import DataFetchError
 from .field import CommentOrderType, SearchOrderType
@@ -37,7 +38,7 @@ class BilibiliClient(AbstractApiClient):
             proxies=None,
             *,
             headers: Dict[str, str],
-            playwright_page: Page,
+            playwright_page: Union[Page, PagePool],
             cookie_dict: Dict[str, str],
     ):
         self.proxies = proxies
@@ -48,17 +49,16 @@ class BilibiliClient(AbstractApiClient):
         self.cookie_dict = cookie_dict
 
     async def request(self, method, url, **kwargs) -> Any:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request(
-                method, url, timeout=self.timeout,
-                **kwargs
-            )
-        data: Dict = response.json()
+        response = await http_transport.send_request(
+            "bili", method, url, proxies=self.proxies, timeout=self.timeout, **kwargs
+        )
+        data: Dict = json_codec.response_json(response)
         if data.get("code") != 0:
             raise DataFetchError(data.get("message", "unkonw error"))
         else:
             return data.get("data", {})
 
+    @metrics.timed_sign("bili")
     async def pre_request_data(self, req_data: Dict) -> Dict:
         """
         发送请求进行请求参数签名
@@ -90,6 +90,7 @@ class BilibiliClient(AbstractApiClient):
         sub_key = sub_url.rsplit('/', 1)[1].split('.')[0]
         return img_key, sub_key
 
+    @tracing.traced("bili.get", cat="request")
     async def get(self, uri: str, params=None, enable_params_sign: bool = True) -> Dict:
         final_uri = uri
         if enable_params_sign:
@@ -99,9 +100,10 @@ class BilibiliClient(AbstractApiClient):
                          f"{urlencode(params)}")
         return await self.request(method="GET", url=f"{self._host}{final_uri}", headers=self.headers)
 
+    @tracing.traced("bili.post", cat="request")
     async def post(self, uri: str, data: dict) -> Dict:
         data = await self.pre_request_data(data)
-        json_str = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+        json_str = json_codec.dumps(data, compact=True)
         return await self.request(method="POST", url=f"{self._host}{uri}",
                                   data=json_str, headers=self.headers)
 
@@ -153,6 +155,7 @@ class BilibiliClient(AbstractApiClient):
         }
         return await self.get(uri, post_data)
 
+    @single_flight("bili", "video_detail")
     async def get_video_info(self, aid: Union[int, None] = None, bvid: Union[str, None] = None) -> Dict:
         """
         Bilibli web video detail api, aid 和 bvid任选一个参数
@@ -339,6 +342,7 @@ class BilibiliClient(AbstractApiClient):
         }
         return await self.get(uri, post_data)
 
+    @single_flight("bili", "creator_info")
     async def get_creator_info(self, creator_id: int) -> Dict:
         """
         get creator info
@@ -17,10 +17,10 @@
 import asyncio
 import os
 import random
+import time
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
-import pandas as pd
 
 from playwright.async_api import (BrowserContext, BrowserType, Page, Playwright, async_playwright)
 
@@ -28,8 +28,10 @@ import config
 from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import bilibili as bilibili_store
-from tools import utils
+from tools import http_transport, lightweight_browser, metrics, session_snapshot, utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.page_pool import PagePool
+from tools.session_snapshot import SessionSnapshot, SnapshotPage
 from var import crawler_type_var, source_keyword_var
 
 from .client import BilibiliClient
@@ -43,6 +45,7 @@ class BilibiliCrawler(AbstractCrawler):
     bili_client: BilibiliClient
     browser_context: BrowserContext
     cdp_manager: Optional[CDPBrowserManager]
+    page_pool: PagePool
 
     def __init__(self):
         self.index_url = "https://www.bilibili.com"
@@ -53,11 +56,17 @@ class BilibiliCrawler(AbstractCrawler):
         playwright_proxy_format, httpx_proxy_format = None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
+            self.ip_proxy_pool = ip_proxy_pool
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
+            http_transport.register_proxy_pool("bili", ip_proxy_pool, config.IP_PROXY_ROTATE_MODE)
             playwright_proxy_format, httpx_proxy_format = self.format_proxy_info(
                 ip_proxy_info)
 
+        if config.ENABLE_BROWSERLESS_MODE and await self.start_browserless(httpx_proxy_format):
+            return
+
         async with async_playwright() as playwright:
+            browser_start_ts = time.perf_counter()
             # 根据配置选择启动模式
             if config.ENABLE_CDP_MODE:
                 utils.logger.info("[BilibiliCrawler] 使用CDP模式启动浏览器")
@@ -79,6 +88,10 @@ class BilibiliCrawler(AbstractCrawler):
             await self.browser_context.add_init_script(path="libs/stealth.min.js")
             self.context_page = await self.browser_context.new_page()
             await self.context_page.goto(self.index_url)
+            self.page_pool = PagePool(
+                self.browser_context, self.index_url,
+                size=config.BROWSER_PAGE_POOL_SIZE, primary_page=self.context_page
+            )
 
             # Create a client to interact with the xiaohongshu website.
             self.bili_client = await self.create_bilibili_client(httpx_proxy_format)
@@ -92,24 +105,49 @@ class BilibiliCrawler(AbstractCrawler):
                 )
                 await login_obj.begin()
                 await self.bili_client.update_cookies(browser_context=self.browser_context)
-
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for video and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_videos(config.BILI_SPECIFIED_ID_LIST)
-            elif config.CRAWLER_TYPE == "creator":
-                if config.CREATOR_MODE:
-                    for creator_id in config.BILI_CREATOR_ID_LIST:
-                        await self.get_creator_videos(int(creator_id))
-                else:
-                    await self.get_all_creator_details(config.BILI_CREATOR_ID_LIST)
+            await lightweight_browser.enable_resource_blocking(self.browser_context)
+            await self.page_pool.start()
+            lightweight_browser.report_browser_startup("BilibiliCrawler", browser_start_ts)
+            await session_snapshot.save_browser_session(config.PLATFORM, self.browser_context, self.context_page)
+            await self.crawl()
+
+    async def start_browserless(self, httpx_proxy: Optional[Dict]) -> bool:
+        """
+        使用浏览器登录后保存的会话快照启动，不启动浏览器
+        wbi 签名的 img_key/sub_key 从快照的 localStorage 中读取，BilibiliSign 在本地计算签名
+        快照不存在、已过期或登录态失效时返回 False，回退到浏览器模式
+        """
+        snapshot = session_snapshot.load_session_snapshot(config.PLATFORM)
+        if not snapshot:
+            utils.logger.info("[BilibiliCrawler.start_browserless] No session snapshot, fallback to browser mode")
+            return False
+        self.bili_client = await self.create_bilibili_client(httpx_proxy, snapshot=snapshot)
+        if not await self.bili_client.pong():
+            utils.logger.warning("[BilibiliCrawler.start_browserless] Session snapshot login state expired, fallback to browser mode")
+            return False
+        utils.logger.info("[BilibiliCrawler.start_browserless] Start crawling with session snapshot, no browser launched")
+        await self.crawl()
+        return True
+
+    async def crawl(self) -> None:
+        """按照 CRAWLER_TYPE 执行爬取"""
+        crawler_type_var.set(config.CRAWLER_TYPE)
+        if config.CRAWLER_TYPE == "search":
+            # Search for video and retrieve their comment information.
+            await self.search()
+        elif config.CRAWLER_TYPE == "detail":
+            # Get the information and comments of the specified post
+            await self.get_specified_videos(config.BILI_SPECIFIED_ID_LIST)
+        elif config.CRAWLER_TYPE == "creator":
+            if config.CREATOR_MODE:
+                for creator_id in config.BILI_CREATOR_ID_LIST:
+                    await self.get_creator_videos(int(creator_id))
             else:
-                pass
-            utils.logger.info(
-                "[BilibiliCrawler.start] Bilibili Crawler finished ...")
+                await self.get_all_creator_details(config.BILI_CREATOR_ID_LIST)
+        else:
+            pass
+        utils.logger.info(
+            "[BilibiliCrawler.start] Bilibili Crawler finished ...")
 
     @staticmethod
     async def get_pubtime_datetime(start: str = config.START_DAY, end: str = config.END_DAY) -> Tuple[str, str]:
@@ -175,7 +213,7 @@ class BilibiliCrawler(AbstractCrawler):
                     )
                     video_list: List[Dict] = videos_res.get("result")
 
-                    semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+                    semaphore = metrics.semaphore("bili", config.MAX_CONCURRENCY_NUM)
                     task_list = []
                     try:
                         task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
@@ -192,6 +230,8 @@ class BilibiliCrawler(AbstractCrawler):
                     await self.batch_get_video_comments(video_id_list)
             # 按照 START_DAY 至 END_DAY 按照每一天进行筛选，这样能够突破 1000 条视频的限制，最大程度爬取该关键词下每一天的所有视频
             else:
+                # pandas 导入较慢，只在按天爬取时使用
+                import pandas as pd
                 for day in pd.date_range(start=config.START_DAY, end=config.END_DAY, freq='D'):
                     # 按照每一天进行爬取的时间戳参数
                     pubtime_begin_s, pubtime_end_s = await self.get_pubtime_datetime(start=day.strftime('%Y-%m-%d'), end=day.strftime('%Y-%m-%d'))
@@ -220,7 +260,7 @@ class BilibiliCrawler(AbstractCrawler):
                             )
                             video_list: List[Dict] = videos_res.get("result")
 
-                            semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+                            semaphore = metrics.semaphore("bili", config.MAX_CONCURRENCY_NUM)
                             task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
                             video_items = await asyncio.gather(*task_list)
                             for video_item in video_items:
@@ -249,7 +289,7 @@ class BilibiliCrawler(AbstractCrawler):
 
         utils.logger.info(
             f"[BilibiliCrawler.batch_get_video_comments] video ids:{video_id_list}")
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = metrics.semaphore("bili", config.MAX_CONCURRENCY_NUM)
         task_list: List[Task] = []
         for video_id in video_id_list:
             task = asyncio.create_task(self.get_comments(
@@ -304,7 +344,7 @@ class BilibiliCrawler(AbstractCrawler):
         get specified videos info
         :return:
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = metrics.semaphore("bili", config.MAX_CONCURRENCY_NUM)
         task_list = [
             self.get_video_info_task(aid=0, bvid=video_id, semaphore=semaphore) for video_id in
             bvids_list
@@ -364,7 +404,8 @@ class BilibiliCrawler(AbstractCrawler):
                     f"[BilibiliCrawler.get_video_play_url_task] have not fund play url from :{aid}|{cid}, err: {ex}")
                 return None
 
-    async def create_bilibili_client(self, httpx_proxy: Optional[str]) -> BilibiliClient:
+    async def create_bilibili_client(self, httpx_proxy: Optional[str],
+                                     snapshot: Optional[SessionSnapshot] = None) -> BilibiliClient:
         """
         create bilibili client
         :param httpx_proxy: httpx proxy
@@ -372,17 +413,24 @@ class BilibiliCrawler(AbstractCrawler):
         """
         utils.logger.info(
             "[BilibiliCrawler.create_bilibili_client] Begin create bilibili API client ...")
-        cookie_str, cookie_dict = utils.convert_cookies(await self.browser_context.cookies())
+        if snapshot:
+            cookie_str, cookie_dict = snapshot.convert_cookies()
+            user_agent = snapshot.user_agent or self.user_agent
+            playwright_page = SnapshotPage(snapshot)
+        else:
+            cookie_str, cookie_dict = utils.convert_cookies(await self.browser_context.cookies())
+            user_agent = self.user_agent
+            playwright_page = self.page_pool
         bilibili_client_obj = BilibiliClient(
             proxies=httpx_proxy,
             headers={
-                "User-Agent": self.user_agent,
+                "User-Agent": user_agent,
                 "Cookie": cookie_str,
                 "Origin": "https://www.bilibili.com",
                 "Referer": "https://www.bilibili.com",
                 "Content-Type": "application/json;charset=UTF-8"
             },
-            playwright_page=self.context_page,
+            playwright_page=playwright_page,
             cookie_dict=cookie_dict,
         )
         return bilibili_client_obj
@@ -429,6 +477,7 @@ class BilibiliCrawler(AbstractCrawler):
             browser_context = await chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
                 accept_downloads=True,
+                args=lightweight_browser.launch_args(),
                 headless=headless,
                 proxy=playwright_proxy,  # type: ignore
                 viewport={"width": 1920, "height": 1080},
@@ -437,7 +486,8 @@ class BilibiliCrawler(AbstractCrawler):
             return browser_context
         else:
             # type: ignore
-            browser = await chromium.launch(headless=headless, proxy=playwright_proxy)
+            browser = await chromium.launch(headless=headless, proxy=playwright_proxy,
+                                           args=lightweight_browser.launch_args())
             browser_context = await browser.new_context(
                 viewport={"width": 1920, "height": 1080},
                 user_agent=user_agent
@@ -472,11 +522,12 @@ class BilibiliCrawler(AbstractCrawler):
 
     async def close(self):
         """Close browser context"""
+        await self.close_proxy_pool()
         # 如果使用CDP模式，需要特殊处理
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
             self.cdp_manager = None
-        else:
+        elif getattr(self, "browser_context", None):
             await self.browser_context.close()
         utils.logger.info("[BilibiliCrawler.close] Browser context closed ...")
 
@@ -524,7 +575,7 @@ class BilibiliCrawler(AbstractCrawler):
         utils.logger.info(
             f"[BilibiliCrawler.get_creator_details] creator ids:{creator_id_list}")
 
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = metrics.semaphore("bili", config.MAX_CONCURRENCY_NUM)
         task_list: List[Task] = []
         try:
             for creator_id in creator_id_list:
@@ -13,13 +13,14 @@ import asyncio
 import copy
 import json
 import urllib.parse
-from typing import Any, Callable, Dict, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
 
-import requests
 from playwright.async_api import BrowserContext
 
 from base.base_crawler import AbstractApiClient
-from tools import utils
+from tools import http_transport, json_codec, metrics, tracing, utils
+from tools.page_pool import PagePool
+from tools.single_flight import single_flight
 from var import request_keyword_var
 
 from .exception import *
@@ -34,7 +35,7 @@ class DOUYINClient(AbstractApiClient):
             proxies=None,
             *,
             headers: Dict,
-            playwright_page: Optional[Page],
+            playwright_page: Optional[Union[Page, PagePool]],
             cookie_dict: Dict
     ):
         self.proxies = proxies
@@ -44,6 +45,7 @@ class DOUYINClient(AbstractApiClient):
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
 
+    @metrics.timed_sign("dy")
     async def __process_req_params(
             self, uri: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
             request_method="GET"
@@ -92,22 +94,21 @@ class DOUYINClient(AbstractApiClient):
         params["a_bogus"] = a_bogus
 
     async def request(self, method, url, **kwargs):
-        response = None
         # 只在 self.proxies 为 dict 且有内容时才传递
-        if isinstance(self.proxies, dict) and self.proxies:
-            kwargs['proxies'] = self.proxies
-        if method == "GET":
-            response = requests.request(method, url, **kwargs)
-        elif method == "POST":
-            response = requests.request(method, url, **kwargs)
+        proxies = self.proxies if isinstance(self.proxies, dict) and self.proxies else None
+        response = await http_transport.send_request(
+            "dy", method, url, proxies=proxies, timeout=self.timeout,
+            backend=http_transport.BACKEND_REQUESTS, **kwargs
+        )
         try:
             if response.text == "" or response.text == "blocked":
                 utils.logger.error(f"request params incrr, response.text: {response.text}")
                 raise Exception("account blocked")
-            return response.json()
+            return json_codec.response_json(response)
         except Exception as e:
             raise DataFetchError(f"{e}, {response.text}")
 
+    @tracing.traced("dy.get", cat="request")
     async def get(self, uri: str, params: Optional[Dict] = None, headers: Optional[Dict] = None):
         """
         GET请求
@@ -116,17 +117,22 @@ class DOUYINClient(AbstractApiClient):
         headers = headers or self.headers
         return await self.request(method="GET", url=f"{self._host}{uri}", params=params, headers=headers)
 
+    @tracing.traced("dy.post", cat="request")
     async def post(self, uri: str, data: dict, headers: Optional[Dict] = None):
         await self.__process_req_params(uri, data, headers)
         headers = headers or self.headers
         return await self.request(method="POST", url=f"{self._host}{uri}", data=data, headers=headers)
 
-    async def pong(self, browser_context: BrowserContext) -> bool:
+    async def pong(self, browser_context: Optional[BrowserContext] = None) -> bool:
         local_storage = await self.playwright_page.evaluate("() => window.localStorage")
         if local_storage.get("HasUserLogin", "") == "1":
             return True
 
-        _, cookie_dict = utils.convert_cookies(await browser_context.cookies())
+        if browser_context is None:
+            # 免浏览器模式下使用会话快照中的 cookies
+            cookie_dict = self.cookie_dict
+        else:
+            _, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         return cookie_dict.get("LOGIN_STATUS") == "1"
 
     async def update_cookies(self, browser_context: BrowserContext):
@@ -179,6 +185,7 @@ class DOUYINClient(AbstractApiClient):
         headers["Referer"] = urllib.parse.quote(referer_url, safe=':/')
         return await self.get("/aweme/v1/web/general/search/single/", query_params, headers=headers)
 
+    @single_flight("dy", "aweme_detail")
     async def get_video_by_id(self, aweme_id: str) -> Any:
         """
         DouYin Video Detail API
@@ -248,17 +255,19 @@ class DOUYINClient(AbstractApiClient):
         comments_has_more = 1
         comments_cursor = 0
         while comments_has_more and len(result) < max_count:
-            comments_res = await self.get_aweme_comments(aweme_id, comments_cursor)
-            comments_has_more = comments_res.get("has_more", 0)
-            comments_cursor = comments_res.get("cursor", 0)
-            comments = comments_res.get("comments", [])
-            if not comments:
-                continue
-            if len(result) + len(comments) > max_count:
-                comments = comments[:max_count - len(result)]
-            result.extend(comments)
-            if callback:  # 如果有回调函数，就执行回调函数
-                await callback(aweme_id, comments)
+            # 一页评论的请求、解析和存储记在同一个 trace 里
+            with tracing.span("dy.comment_page", cat="page", aweme_id=aweme_id, cursor=comments_cursor):
+                comments_res = await self.get_aweme_comments(aweme_id, comments_cursor)
+                comments_has_more = comments_res.get("has_more", 0)
+                comments_cursor = comments_res.get("cursor", 0)
+                comments = comments_res.get("comments", [])
+                if not comments:
+                    continue
+                if len(result) + len(comments) > max_count:
+                    comments = comments[:max_count - len(result)]
+                result.extend(comments)
+                if callback:  # 如果有回调函数，就执行回调函数
+                    await callback(aweme_id, comments)
 
             await asyncio.sleep(crawl_interval)
             if not is_fetch_sub_comments:
@@ -286,6 +295,7 @@ class DOUYINClient(AbstractApiClient):
                         await asyncio.sleep(crawl_interval)
         return result
 
+    @single_flight("dy", "user_info")
     async def get_user_info(self, sec_user_id: str):
         uri = "/aweme/v1/web/user/profile/other/"
         params = {
@@ -308,17 +318,26 @@ class DOUYINClient(AbstractApiClient):
         }
         return await self.get(uri, params)
 
-    async def get_all_user_aweme_posts(self, sec_user_id: str, callback: Optional[Callable] = None):
+    async def iter_user_aweme_posts(self, sec_user_id: str) -> AsyncIterator[List[Dict]]:
+        """
+        按页产出用户的作品列表，调用方处理完一页即可丢弃，内存占用只和单页大小有关
+        :param sec_user_id:
+        :return:
+        """
         posts_has_more = 1
         max_cursor = ""
-        result = []
         while posts_has_more == 1:
             aweme_post_res = await self.get_user_aweme_posts(sec_user_id, max_cursor)
             posts_has_more = aweme_post_res.get("has_more", 0)
             max_cursor = aweme_post_res.get("max_cursor")
             aweme_list = aweme_post_res.get("aweme_list") if aweme_post_res.get("aweme_list") else []
             utils.logger.info(
-                f"[DOUYINClient.get_all_user_aweme_posts] got sec_user_id:{sec_user_id} video len : {len(aweme_list)}")
+                f"[DOUYINClient.iter_user_aweme_posts] got sec_user_id:{sec_user_id} video len : {len(aweme_list)}")
+            yield aweme_list
+
+    async def get_all_user_aweme_posts(self, sec_user_id: str, callback: Optional[Callable] = None):
+        result = []
+        async for aweme_list in self.iter_user_aweme_posts(sec_user_id):
             if callback:
                 await callback(aweme_list)
             result.extend(aweme_list)
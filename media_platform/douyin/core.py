@@ -12,18 +12,22 @@
 import asyncio
 import os
 import random
+import time
 from asyncio import Task
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from playwright.async_api import (BrowserContext, BrowserType, Page, Playwright,
                                   async_playwright)
 
 import config
 from base.base_crawler import AbstractCrawler
+from model.m_douyin import DouyinAwemeRow
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import douyin as douyin_store
-from tools import utils
+from tools import http_transport, lightweight_browser, metrics, session_snapshot, utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.page_pool import PagePool
+from tools.session_snapshot import SessionSnapshot, SnapshotPage
 from var import crawler_type_var, source_keyword_var
 
 from .client import DOUYINClient
@@ -37,6 +41,7 @@ class DouYinCrawler(AbstractCrawler):
     dy_client: DOUYINClient
     browser_context: BrowserContext
     cdp_manager: Optional[CDPBrowserManager]
+    page_pool: PagePool
 
     def __init__(self) -> None:
         self.index_url = "https://www.douyin.com"
@@ -46,10 +51,16 @@ class DouYinCrawler(AbstractCrawler):
         playwright_proxy_format, httpx_proxy_format = None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
+            self.ip_proxy_pool = ip_proxy_pool
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
+            http_transport.register_proxy_pool("dy", ip_proxy_pool, config.IP_PROXY_ROTATE_MODE)
             playwright_proxy_format, httpx_proxy_format = self.format_proxy_info(ip_proxy_info)
 
+        if config.ENABLE_BROWSERLESS_MODE and await self.start_browserless(httpx_proxy_format):
+            return
+
         async with async_playwright() as playwright:
+            browser_start_ts = time.perf_counter()
             # 根据配置选择启动模式
             if config.ENABLE_CDP_MODE:
                 utils.logger.info("[DouYinCrawler] 使用CDP模式启动浏览器")
@@ -71,6 +82,10 @@ class DouYinCrawler(AbstractCrawler):
             await self.browser_context.add_init_script(path="libs/stealth.min.js")
             self.context_page = await self.browser_context.new_page()
             await self.context_page.goto(self.index_url)
+            self.page_pool = PagePool(
+                self.browser_context, self.index_url,
+                size=config.BROWSER_PAGE_POOL_SIZE, primary_page=self.context_page
+            )
 
             self.dy_client = await self.create_douyin_client(httpx_proxy_format)
             if not await self.dy_client.pong(browser_context=self.browser_context):
@@ -83,18 +98,44 @@ class DouYinCrawler(AbstractCrawler):
                 )
                 await login_obj.begin()
                 await self.dy_client.update_cookies(browser_context=self.browser_context)
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for notes and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_awemes()
-            elif config.CRAWLER_TYPE == "creator":
-                # Get the information and comments of the specified creator
-                await self.get_creators_and_videos()
-
-            utils.logger.info("[DouYinCrawler.start] Douyin Crawler finished ...")
+            await lightweight_browser.enable_resource_blocking(self.browser_context)
+            await self.page_pool.start()
+            lightweight_browser.report_browser_startup("DouYinCrawler", browser_start_ts)
+            await session_snapshot.save_browser_session(config.PLATFORM, self.browser_context, self.context_page)
+            await self.crawl()
+
+    async def start_browserless(self, httpx_proxy: Optional[Dict]) -> bool:
+        """
+        使用浏览器登录后保存的会话快照启动，不启动浏览器
+        a_bogus 由 libs/douyin.js 计算，msToken 从快照的 localStorage 中读取
+        快照不存在、已过期或登录态失效时返回 False，回退到浏览器模式
+        """
+        snapshot = session_snapshot.load_session_snapshot(config.PLATFORM)
+        if not snapshot:
+            utils.logger.info("[DouYinCrawler.start_browserless] No session snapshot, fallback to browser mode")
+            return False
+        self.dy_client = await self.create_douyin_client(httpx_proxy, snapshot=snapshot)
+        if not await self.dy_client.pong():
+            utils.logger.warning("[DouYinCrawler.start_browserless] Session snapshot login state expired, fallback to browser mode")
+            return False
+        utils.logger.info("[DouYinCrawler.start_browserless] Start crawling with session snapshot, no browser launched")
+        await self.crawl()
+        return True
+
+    async def crawl(self) -> None:
+        """按照 CRAWLER_TYPE 执行爬取"""
+        crawler_type_var.set(config.CRAWLER_TYPE)
+        if config.CRAWLER_TYPE == "search":
+            # Search for notes and retrieve their comment information.
+            await self.search()
+        elif config.CRAWLER_TYPE == "detail":
+            # Get the information and comments of the specified post
+            await self.get_specified_awemes()
+        elif config.CRAWLER_TYPE == "creator":
+            # Get the information and comments of the specified creator
+            await self.get_creators_and_videos()
+
+        utils.logger.info("[DouYinCrawler.start] Douyin Crawler finished ...")
 
     async def search(self) -> None:
         utils.logger.info("[DouYinCrawler.search] Begin search douyin keywords")
@@ -139,14 +180,15 @@ class DouYinCrawler(AbstractCrawler):
                                            post_item.get("aweme_mix_info", {}).get("mix_items")[0]
                     except TypeError:
                         continue
-                    aweme_list.append(aweme_info.get("aweme_id", ""))
-                    await douyin_store.update_douyin_aweme(aweme_item=aweme_info)
+                    aweme_row = douyin_store.project_douyin_aweme(aweme_info)
+                    aweme_list.append(aweme_row.aweme_id or "")
+                    await douyin_store.update_douyin_aweme(aweme_item=aweme_row)
             utils.logger.info(f"[DouYinCrawler.search] keyword:{keyword}, aweme_list:{aweme_list}")
             await self.batch_get_note_comments(aweme_list)
 
     async def get_specified_awemes(self):
         """Get the information and comments of the specified post"""
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = metrics.semaphore("dy", config.MAX_CONCURRENCY_NUM)
         task_list = [
             self.get_aweme_detail(aweme_id=aweme_id, semaphore=semaphore) for aweme_id in config.DY_SPECIFIED_ID_LIST
         ]
@@ -156,11 +198,12 @@ class DouYinCrawler(AbstractCrawler):
                 await douyin_store.update_douyin_aweme(aweme_detail)
         await self.batch_get_note_comments(config.DY_SPECIFIED_ID_LIST)
 
-    async def get_aweme_detail(self, aweme_id: str, semaphore: asyncio.Semaphore) -> Any:
-        """Get note detail"""
+    async def get_aweme_detail(self, aweme_id: str, semaphore: asyncio.Semaphore) -> Optional[DouyinAwemeRow]:
+        """Get note detail, only the fields to be stored are kept"""
         async with semaphore:
             try:
-                return await self.dy_client.get_video_by_id(aweme_id)
+                aweme_detail = await self.dy_client.get_video_by_id(aweme_id)
+                return douyin_store.project_douyin_aweme(aweme_detail) if aweme_detail else None
             except DataFetchError as ex:
                 utils.logger.error(f"[DouYinCrawler.get_aweme_detail] Get aweme detail error: {ex}")
                 return None
@@ -178,7 +221,7 @@ class DouYinCrawler(AbstractCrawler):
             return
 
         task_list: List[Task] = []
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = metrics.semaphore("dy", config.MAX_CONCURRENCY_NUM)
         for aweme_id in aweme_list:
             task = asyncio.create_task(
                 self.get_comments(aweme_id, semaphore), name=aweme_id)
@@ -213,27 +256,25 @@ class DouYinCrawler(AbstractCrawler):
                 await douyin_store.save_creator(user_id, creator=creator_info)
 
             # Get all video information of the creator
-            all_video_list = await self.dy_client.get_all_user_aweme_posts(
-                sec_user_id=user_id,
-                callback=self.fetch_creator_video_detail
-            )
-
-            video_ids = [video_item.get("aweme_id") for video_item in all_video_list]
-            await self.batch_get_note_comments(video_ids)
+            # Process page by page so that memory does not grow with the creator's history
+            async for video_list in self.dy_client.iter_user_aweme_posts(sec_user_id=user_id):
+                await self.fetch_creator_video_detail(video_list)
+                video_ids = [video_item.get("aweme_id") for video_item in video_list]
+                await self.batch_get_note_comments(video_ids)
 
     async def fetch_creator_video_detail(self, video_list: List[Dict]):
         """
         Concurrently obtain the specified post list and save the data
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = metrics.semaphore("dy", config.MAX_CONCURRENCY_NUM)
         task_list = [
             self.get_aweme_detail(post_item.get("aweme_id"), semaphore) for post_item in video_list
         ]
 
-        note_details = await asyncio.gather(*task_list)
-        for aweme_item in note_details:
-            if aweme_item is not None:
-                await douyin_store.update_douyin_aweme(aweme_item)
+        aweme_rows = await asyncio.gather(*task_list)
+        for aweme_row in aweme_rows:
+            if aweme_row is not None:
+                await douyin_store.update_douyin_aweme(aweme_row)
 
     @staticmethod
     def format_proxy_info(ip_proxy_info: IpInfoModel) -> Tuple[Optional[Dict], Optional[Dict]]:
@@ -248,20 +289,28 @@ class DouYinCrawler(AbstractCrawler):
         }
         return playwright_proxy, httpx_proxy
 
-    async def create_douyin_client(self, httpx_proxy: Optional[str]) -> DOUYINClient:
+    async def create_douyin_client(self, httpx_proxy: Optional[str],
+                                   snapshot: Optional[SessionSnapshot] = None) -> DOUYINClient:
         """Create douyin client"""
-        cookie_str, cookie_dict = utils.convert_cookies(await self.browser_context.cookies())  # type: ignore
+        if snapshot:
+            cookie_str, cookie_dict = snapshot.convert_cookies()
+            user_agent = snapshot.user_agent
+            playwright_page = SnapshotPage(snapshot)
+        else:
+            cookie_str, cookie_dict = utils.convert_cookies(await self.browser_context.cookies())  # type: ignore
+            user_agent = await self.context_page.evaluate("() => navigator.userAgent")
+            playwright_page = self.page_pool
         douyin_client = DOUYINClient(
             proxies=httpx_proxy,
             headers={
-                "User-Agent": await self.context_page.evaluate("() => navigator.userAgent"),
+                "User-Agent": user_agent,
                 "Cookie": cookie_str,
                 "Host": "www.douyin.com",
                 "Origin": "https://www.douyin.com/",
                 "Referer": "https://www.douyin.com/",
                 "Content-Type": "application/json;charset=UTF-8"
             },
-            playwright_page=self.context_page,
+            playwright_page=playwright_page,
             cookie_dict=cookie_dict,
         )
         return douyin_client
@@ -280,6 +329,7 @@ class DouYinCrawler(AbstractCrawler):
             browser_context = await chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
                 accept_downloads=True,
+                args=lightweight_browser.launch_args(),
                 headless=headless,
                 proxy=playwright_proxy,  # type: ignore
                 viewport={"width": 1920, "height": 1080},
@@ -287,7 +337,8 @@ class DouYinCrawler(AbstractCrawler):
             )  # type: ignore
             return browser_context
         else:
-            browser = await chromium.launch(headless=headless, proxy=playwright_proxy)  # type: ignore
+            browser = await chromium.launch(headless=headless, proxy=playwright_proxy,
+                                           args=lightweight_browser.launch_args())  # type: ignore
             browser_context = await browser.new_context(
                 viewport={"width": 1920, "height": 1080},
                 user_agent=user_agent
@@ -325,10 +376,11 @@ class DouYinCrawler(AbstractCrawler):
 
     async def close(self) -> None:
         """Close browser context"""
+        await self.close_proxy_pool()
         # 如果使用CDP模式，需要特殊处理
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
             self.cdp_manager = None
-        else:
+        elif getattr(self, "browser_context", None):
             await self.browser_context.close()
         utils.logger.info("[DouYinCrawler.close] Browser context closed ...")
@@ -11,16 +11,15 @@
 
 # -*- coding: utf-8 -*-
 import asyncio
-import json
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext, Page
 
 import config
 from base.base_crawler import AbstractApiClient
-from tools import utils
+from tools import http_transport, json_codec, tracing, utils
+from tools.single_flight import single_flight
 
 from .exception import DataFetchError
 from .graphql import KuaiShouGraphQL
@@ -45,14 +44,16 @@ class KuaiShouClient(AbstractApiClient):
         self.graphql = KuaiShouGraphQL()
 
     async def request(self, method, url, **kwargs) -> Any:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
-        data: Dict = response.json()
+        response = await http_transport.send_request(
+            "ks", method, url, proxies=self.proxies, timeout=self.timeout, **kwargs
+        )
+        data: Dict = json_codec.response_json(response)
         if data.get("errors"):
             raise DataFetchError(data.get("errors", "unkonw error"))
         else:
             return data.get("data", {})
 
+    @tracing.traced("ks.get", cat="request")
     async def get(self, uri: str, params=None) -> Dict:
         final_uri = uri
         if isinstance(params, dict):
@@ -61,8 +62,9 @@ class KuaiShouClient(AbstractApiClient):
             method="GET", url=f"{self._host}{final_uri}", headers=self.headers
         )
 
+    @tracing.traced("ks.post", cat="request")
     async def post(self, uri: str, data: dict) -> Dict:
-        json_str = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        json_str = json_codec.dumps(data, compact=True)
         return await self.request(
             method="POST", url=f"{self._host}{uri}", data=json_str, headers=self.headers
         )
@@ -116,6 +118,7 @@ class KuaiShouClient(AbstractApiClient):
         }
         return await self.post("", post_data)
 
+    @single_flight("ks", "video_detail")
     async def get_video_info(self, photo_id: str) -> Dict:
         """
         Kuaishou web video detail api
@@ -263,6 +266,7 @@ class KuaiShouClient(AbstractApiClient):
                 result.extend(comments)
         return result
 
+    @single_flight("ks", "creator_info")
     async def get_creator_info(self, user_id: str) -> Dict:
         """
         eg: https://www.kuaishou.com/profile/3x4jtnbfter525a
@@ -272,29 +276,26 @@ class KuaiShouClient(AbstractApiClient):
         visionProfile = await self.get_creator_profile(user_id)
         return visionProfile.get("userProfile")
 
-    async def get_all_videos_by_creator(
+    async def iter_videos_by_creator(
         self,
         user_id: str,
         crawl_interval: float = 1.0,
-        callback: Optional[Callable] = None,
-    ) -> List[Dict]:
+    ) -> AsyncIterator[List[Dict]]:
         """
-        获取指定用户下的所有发过的帖子，该方法会一直查找一个用户下的所有帖子信息
+        按页产出指定用户发过的视频，调用方处理完一页即可丢弃，内存占用只和单页大小有关
         Args:
             user_id: 用户ID
             crawl_interval: 爬取一次的延迟单位（秒）
-            callback: 一次分页爬取结束后的更新回调函数
         Returns:
 
         """
-        result = []
         pcursor = ""
 
         while pcursor != "no_more":
             videos_res = await self.get_video_by_creater(user_id, pcursor)
             if not videos_res:
                 utils.logger.error(
-                    f"[KuaiShouClient.get_all_videos_by_creator] The current creator may have been banned by ks, so they cannot access the data."
+                    f"[KuaiShouClient.iter_videos_by_creator] The current creator may have been banned by ks, so they cannot access the data."
                 )
                 break
 
@@ -303,11 +304,31 @@ class KuaiShouClient(AbstractApiClient):
 
             videos = vision_profile_photo_list.get("feeds", [])
             utils.logger.info(
-                f"[KuaiShouClient.get_all_videos_by_creator] got user_id:{user_id} videos len : {len(videos)}"
+                f"[KuaiShouClient.iter_videos_by_creator] got user_id:{user_id} videos len : {len(videos)}"
             )
 
+            yield videos
+            await asyncio.sleep(crawl_interval)
+
+    async def get_all_videos_by_creator(
+        self,
+        user_id: str,
+        crawl_interval: float = 1.0,
+        callback: Optional[Callable] = None,
+    ) -> List[Dict]:
+        """
+        获取指定用户下的所有发过的帖子，该方法会一直查找一个用户下的所有帖子信息
+        视频较多时建议直接使用 iter_videos_by_creator 按页处理
+        Args:
+            user_id: 用户ID
+            crawl_interval: 爬取一次的延迟单位（秒）
+            callback: 一次分页爬取结束后的更新回调函数
+        Returns:
+
+        """
+        result = []
+        async for videos in self.iter_videos_by_creator(user_id, crawl_interval):
             if callback:
                 await callback(videos)
-            await asyncio.sleep(crawl_interval)
             result.extend(videos)
         return result
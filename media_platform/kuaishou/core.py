@@ -22,7 +22,7 @@ import config
 from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import kuaishou as kuaishou_store
-from tools import utils
+from tools import http_transport, metrics, utils
 from tools.cdp_browser import CDPBrowserManager
 from var import comment_tasks_var, crawler_type_var, source_keyword_var
 
@@ -48,7 +48,9 @@ class KuaishouCrawler(AbstractCrawler):
             ip_proxy_pool = await create_ip_pool(
                 config.IP_PROXY_POOL_COUNT, enable_validate_ip=True
             )
+            self.ip_proxy_pool = ip_proxy_pool
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
+            http_transport.register_proxy_pool("ks", ip_proxy_pool, config.IP_PROXY_ROTATE_MODE)
             playwright_proxy_format, httpx_proxy_format = self.format_proxy_info(
                 ip_proxy_info
             )
@@ -155,7 +157,7 @@ class KuaishouCrawler(AbstractCrawler):
 
     async def get_specified_videos(self):
         """Get the information and comments of the specified post"""
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = metrics.semaphore("ks", config.MAX_CONCURRENCY_NUM)
         task_list = [
             self.get_video_info_task(video_id=video_id, semaphore=semaphore)
             for video_id in config.KS_SPECIFIED_ID_LIST
@@ -203,7 +205,7 @@ class KuaishouCrawler(AbstractCrawler):
         utils.logger.info(
             f"[KuaishouCrawler.batch_get_video_comments] video ids:{video_id_list}"
         )
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = metrics.semaphore("ks", config.MAX_CONCURRENCY_NUM)
         task_list: List[Task] = []
         for video_id in video_id_list:
             task = asyncio.create_task(
@@ -357,22 +359,23 @@ class KuaishouCrawler(AbstractCrawler):
                 await kuaishou_store.save_creator(user_id, creator=createor_info)
 
             # Get all video information of the creator
-            all_video_list = await self.ks_client.get_all_videos_by_creator(
+            # Process page by page so that memory does not grow with the creator's history
+            async for video_list in self.ks_client.iter_videos_by_creator(
                 user_id=user_id,
                 crawl_interval=random.random(),
-                callback=self.fetch_creator_video_detail,
-            )
+            ):
+                await self.fetch_creator_video_detail(video_list)
 
-            video_ids = [
-                video_item.get("photo", {}).get("id") for video_item in all_video_list
-            ]
-            await self.batch_get_video_comments(video_ids)
+                video_ids = [
+                    video_item.get("photo", {}).get("id") for video_item in video_list
+                ]
+                await self.batch_get_video_comments(video_ids)
 
     async def fetch_creator_video_detail(self, video_list: List[Dict]):
         """
         Concurrently obtain the specified post list and save the data
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = metrics.semaphore("ks", config.MAX_CONCURRENCY_NUM)
         task_list = [
             self.get_video_info_task(post_item.get("photo", {}).get("id"), semaphore)
             for post_item in video_list
@@ -385,6 +388,7 @@ class KuaishouCrawler(AbstractCrawler):
 
     async def close(self):
         """Close browser context"""
+        await self.close_proxy_pool()
         # 如果使用CDP模式，需要特殊处理
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
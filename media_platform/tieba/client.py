@@ -10,11 +10,9 @@
 
 
 import asyncio
-import json
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext
 from tenacity import RetryError, retry, stop_after_attempt, wait_fixed
 
@@ -22,7 +20,8 @@ import config
 from base.base_crawler import AbstractApiClient
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
 from proxy.proxy_ip_pool import ProxyIpPool
-from tools import utils
+from tools import http_transport, json_codec, tracing, utils
+from tools.single_flight import single_flight
 
 from .field import SearchNoteType, SearchSortType
 from .help import TieBaExtractor
@@ -60,11 +59,10 @@ class BaiduTieBaClient(AbstractApiClient):
 
         """
         actual_proxies = proxies if proxies else self.default_ip_proxy
-        async with httpx.AsyncClient(proxies=actual_proxies) as client:
-            response = await client.request(
-                method, url, timeout=self.timeout,
-                headers=self.headers, **kwargs
-            )
+        response = await http_transport.send_request(
+            "tieba", method, url, proxies=actual_proxies, timeout=self.timeout,
+            headers=self.headers, **kwargs
+        )
 
         if response.status_code != 200:
             utils.logger.error(f"Request failed, method: {method}, url: {url}, status code: {response.status_code}")
@@ -78,8 +76,9 @@ class BaiduTieBaClient(AbstractApiClient):
         if return_ori_content:
             return response.text
 
-        return response.json()
+        return json_codec.response_json(response)
 
+    @tracing.traced("tieba.get", cat="request")
     async def get(self, uri: str, params=None, return_ori_content=False, **kwargs) -> Any:
         """
         GET请求，对请求头签名
@@ -114,6 +113,7 @@ class BaiduTieBaClient(AbstractApiClient):
             utils.logger.error(f"[BaiduTieBaClient.get] 达到了最大重试次数，IP已经被Block，请尝试更换新的IP代理: {e}")
             raise Exception(f"[BaiduTieBaClient.get] 达到了最大重试次数，IP已经被Block，请尝试更换新的IP代理: {e}")
 
+    @tracing.traced("tieba.post", cat="request")
     async def post(self, uri: str, data: dict, **kwargs) -> Dict:
         """
         POST请求，对请求头签名
@@ -124,7 +124,7 @@ class BaiduTieBaClient(AbstractApiClient):
         Returns:
 
         """
-        json_str = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+        json_str = json_codec.dumps(data, compact=True)
         return await self.request(method="POST", url=f"{self._host}{uri}",
                                   data=json_str, **kwargs)
 
@@ -190,6 +190,7 @@ class BaiduTieBaClient(AbstractApiClient):
         page_content = await self.get(uri, params=params, return_ori_content=True)
         return self._page_extractor.extract_search_note_list(page_content)
 
+    @single_flight("tieba", "note_detail")
     async def get_note_by_id(self, note_id: str) -> TiebaNote:
         """
         根据帖子ID获取帖子详情
@@ -301,6 +302,7 @@ class BaiduTieBaClient(AbstractApiClient):
         page_content = await self.get(uri, return_ori_content=True)
         return self._page_extractor.extract_tieba_note_list(page_content)
 
+    @single_flight("tieba", "creator_info")
     async def get_creator_info_by_url(self, creator_url: str) -> str:
         """
         根据创作者ID获取创作者信息
@@ -332,19 +334,16 @@ class BaiduTieBaClient(AbstractApiClient):
         }
         return await self.get(uri, params=params)
 
-    async def get_all_notes_by_creator_user_name(self,
-                                                 user_name: str, crawl_interval: float = 1.0,
-                                                 callback: Optional[Callable] = None,
-                                                 max_note_count: int = 0,
-                                                 creator_page_html_content: str = None,
-                                                 ) -> List[TiebaNote]:
-
+    async def iter_notes_by_creator_user_name(self,
+                                              user_name: str, crawl_interval: float = 1.0,
+                                              max_note_count: int = 0,
+                                              creator_page_html_content: str = None,
+                                              ) -> AsyncIterator[List[TiebaNote]]:
         """
-        根据创作者用户名获取创作者所有帖子
+        按页产出创作者的帖子，调用方处理完一页即可丢弃，内存占用只和单页大小有关
         Args:
             user_name: 创作者用户名
             crawl_interval: 爬取一次笔记的延迟单位（秒）
-            callback: 一次笔记爬取结束后的回调函数，是一个awaitable类型的函数
             max_note_count: 帖子最大获取数量，如果为0则获取所有
             creator_page_html_content: 创作者主页HTML内容
 
@@ -352,7 +351,6 @@ class BaiduTieBaClient(AbstractApiClient):
 
         """
         # 百度贴吧比较特殊一些，前10个帖子是直接展示在主页上的，要单独处理，通过API获取不到
-        result: List[TiebaNote] = []
         if creator_page_html_content:
             thread_id_list = (
                 self._page_extractor.extract_tieba_thread_id_list_from_creator_page(
@@ -360,15 +358,12 @@ class BaiduTieBaClient(AbstractApiClient):
                 )
             )
             utils.logger.info(
-                f"[BaiduTieBaClient.get_all_notes_by_creator] got user_name:{user_name} thread_id_list len : {len(thread_id_list)}"
+                f"[BaiduTieBaClient.iter_notes_by_creator_user_name] got user_name:{user_name} thread_id_list len : {len(thread_id_list)}"
             )
             note_detail_task = [
                 self.get_note_by_id(thread_id) for thread_id in thread_id_list
             ]
-            notes = await asyncio.gather(*note_detail_task)
-            if callback:
-                await callback(notes)
-            result.extend(notes)
+            yield await asyncio.gather(*note_detail_task)
 
         notes_has_more = 1
         page_number = 1
@@ -378,20 +373,43 @@ class BaiduTieBaClient(AbstractApiClient):
             notes_res = await self.get_notes_by_creator(user_name, page_number)
             if not notes_res or notes_res.get("no") != 0:
                 utils.logger.error(
-                    f"[WeiboClient.get_notes_by_creator] got user_name:{user_name} notes failed, notes_res: {notes_res}")
+                    f"[BaiduTieBaClient.iter_notes_by_creator_user_name] got user_name:{user_name} notes failed, notes_res: {notes_res}")
                 break
             notes_data = notes_res.get("data")
             notes_has_more = notes_data.get("has_more")
             notes = notes_data["thread_list"]
             utils.logger.info(
-                f"[WeiboClient.get_all_notes_by_creator] got user_name:{user_name} notes len : {len(notes)}")
+                f"[BaiduTieBaClient.iter_notes_by_creator_user_name] got user_name:{user_name} notes len : {len(notes)}")
 
             note_detail_task = [self.get_note_by_id(note['thread_id']) for note in notes]
-            notes = await asyncio.gather(*note_detail_task)
-            if callback:
-                await callback(notes)
+            yield await asyncio.gather(*note_detail_task)
             await asyncio.sleep(crawl_interval)
-            result.extend(notes)
             page_number += 1
             total_get_count += page_per_count
+
+    async def get_all_notes_by_creator_user_name(self,
+                                                 user_name: str, crawl_interval: float = 1.0,
+                                                 callback: Optional[Callable] = None,
+                                                 max_note_count: int = 0,
+                                                 creator_page_html_content: str = None,
+                                                 ) -> List[TiebaNote]:
+
+        """
+        根据创作者用户名获取创作者所有帖子
+        Args:
+            user_name: 创作者用户名
+            crawl_interval: 爬取一次笔记的延迟单位（秒）
+            callback: 一次笔记爬取结束后的回调函数，是一个awaitable类型的函数
+            max_note_count: 帖子最大获取数量，如果为0则获取所有
+            creator_page_html_content: 创作者主页HTML内容
+
+        Returns:
+
+        """
+        result: List[TiebaNote] = []
+        async for notes in self.iter_notes_by_creator_user_name(user_name, crawl_interval, max_note_count,
+                                                                creator_page_html_content):
+            if callback:
+                await callback(notes)
+            result.extend(notes)
         return result
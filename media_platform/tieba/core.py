@@ -23,7 +23,7 @@ from base.base_crawler import AbstractCrawler
 from model.m_baidu_tieba import TiebaCreator, TiebaNote
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import tieba as tieba_store
-from tools import utils
+from tools import http_transport, metrics, utils
 from tools.cdp_browser import CDPBrowserManager
 from tools.crawler_util import format_proxy_info
 from var import crawler_type_var, source_keyword_var
@@ -56,7 +56,9 @@ class TieBaCrawler(AbstractCrawler):
         if config.ENABLE_IP_PROXY:
             utils.logger.info("[BaiduTieBaCrawler.start] Begin create ip proxy pool ...")
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
+            self.ip_proxy_pool = ip_proxy_pool
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
+            http_transport.register_proxy_pool("tieba", ip_proxy_pool, config.IP_PROXY_ROTATE_MODE)
             _, httpx_proxy_format = format_proxy_info(ip_proxy_info)
             utils.logger.info(f"[BaiduTieBaCrawler.start] Init default ip proxy, value: {httpx_proxy_format}")
 
@@ -158,7 +160,7 @@ class TieBaCrawler(AbstractCrawler):
         Returns:
 
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = metrics.semaphore("tieba", config.MAX_CONCURRENCY_NUM)
         task_list = [
             self.get_note_detail_async_task(note_id=note_id, semaphore=semaphore) for note_id in note_id_list
         ]
@@ -209,7 +211,7 @@ class TieBaCrawler(AbstractCrawler):
         if not config.ENABLE_GET_COMMENTS:
             return
 
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = metrics.semaphore("tieba", config.MAX_CONCURRENCY_NUM)
         task_list: List[Task] = []
         for note_detail in note_detail_list:
             task = asyncio.create_task(self.get_comments_async_task(note_detail, semaphore), name=note_detail.note_id)
@@ -253,15 +255,15 @@ class TieBaCrawler(AbstractCrawler):
                 await tieba_store.save_creator(user_info=creator_info)
 
                 # Get all note information of the creator
-                all_notes_list = await self.tieba_client.get_all_notes_by_creator_user_name(
+                # Process page by page so that memory does not grow with the creator's history
+                async for notes_list in self.tieba_client.iter_notes_by_creator_user_name(
                     user_name=creator_info.user_name,
                     crawl_interval=0,
-                    callback=tieba_store.batch_update_tieba_notes,
                     max_note_count=config.CRAWLER_MAX_NOTES_COUNT,
                     creator_page_html_content=creator_page_html_content,
-                )
-
-                await self.batch_get_note_comments(all_notes_list)
+                ):
+                    await tieba_store.batch_update_tieba_notes(notes_list)
+                    await self.batch_get_note_comments(notes_list)
 
             else:
                 utils.logger.error(
@@ -340,6 +342,7 @@ class TieBaCrawler(AbstractCrawler):
         Returns:
 
         """
+        await self.close_proxy_pool()
         # 如果使用CDP模式，需要特殊处理
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
@@ -16,9 +16,8 @@
 
 import asyncio
 import copy
-import json
 import re
-from typing import Callable, Dict, List, Optional, Union
+from typing import AsyncIterator, Callable, Dict, List, Optional, Union
 from urllib.parse import parse_qs, unquote, urlencode
 
 import httpx
@@ -26,7 +25,8 @@ from httpx import Response
 from playwright.async_api import BrowserContext, Page
 
 import config
-from tools import utils
+from tools import http_transport, json_codec, tracing, utils
+from tools.single_flight import single_flight
 
 from .exception import DataFetchError
 from .field import SearchType
@@ -52,16 +52,14 @@ class WeiboClient:
 
     async def request(self, method, url, **kwargs) -> Union[Response, Dict]:
         enable_return_response = kwargs.pop("return_response", False)
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request(
-                method, url, timeout=self.timeout,
-                **kwargs
-            )
+        response = await http_transport.send_request(
+            "wb", method, url, proxies=self.proxies, timeout=self.timeout, **kwargs
+        )
 
         if enable_return_response:
             return response
 
-        data: Dict = response.json()
+        data: Dict = json_codec.response_json(response)
         ok_code = data.get("ok")
         if ok_code == 0:  # response error
             utils.logger.error(f"[WeiboClient.request] request {method}:{url} err, res:{data}")
@@ -72,6 +70,7 @@ class WeiboClient:
         else:  # response right
             return data.get("data", {})
 
+    @tracing.traced("wb.get", cat="request")
     async def get(self, uri: str, params=None, headers=None, **kwargs) -> Union[Response, Dict]:
         final_uri = uri
         if isinstance(params, dict):
@@ -82,8 +81,9 @@ class WeiboClient:
             headers = self.headers
         return await self.request(method="GET", url=f"{self._host}{final_uri}", headers=headers, **kwargs)
 
+    @tracing.traced("wb.post", cat="request")
     async def post(self, uri: str, data: dict) -> Dict:
-        json_str = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+        json_str = json_codec.dumps(data, compact=True)
         return await self.request(method="POST", url=f"{self._host}{uri}",
                                   data=json_str, headers=self.headers)
 
@@ -212,6 +212,7 @@ class WeiboClient:
                 res_sub_comments.extend(sub_comments)
         return res_sub_comments
 
+    @single_flight("wb", "note_detail")
     async def get_note_info_by_id(self, note_id: str) -> Dict:
         """
         根据帖子ID获取详情
@@ -219,24 +220,23 @@ class WeiboClient:
         :return:
         """
         url = f"{self._host}/detail/{note_id}"
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request(
-                "GET", url, timeout=self.timeout, headers=self.headers
-            )
-            if response.status_code != 200:
-                raise DataFetchError(f"get weibo detail err: {response.text}")
-            match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
-            if match:
-                render_data_json = match.group(1)
-                render_data_dict = json.loads(render_data_json)
-                note_detail = render_data_dict[0].get("status")
-                note_item = {
-                    "mblog": note_detail
-                }
-                return note_item
-            else:
-                utils.logger.info(f"[WeiboClient.get_note_info_by_id] 未找到$render_data的值")
-                return dict()
+        response = await http_transport.send_request(
+            "wb", "GET", url, proxies=self.proxies, timeout=self.timeout, headers=self.headers
+        )
+        if response.status_code != 200:
+            raise DataFetchError(f"get weibo detail err: {response.text}")
+        match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
+        if match:
+            render_data_json = match.group(1)
+            render_data_dict = json_codec.loads(render_data_json)
+            note_detail = render_data_dict[0].get("status")
+            note_item = {
+                "mblog": note_detail
+            }
+            return note_item
+        else:
+            utils.logger.info(f"[WeiboClient.get_note_info_by_id] 未找到$render_data的值")
+            return dict()
 
     async def get_note_image(self, image_url: str) -> bytes:
         image_url = image_url[8:]  # 去掉 https://
@@ -283,6 +283,7 @@ class WeiboClient:
             "lfid_container_id": m_weibocn_params_dict.get("lfid", [""])[0]
         }
 
+    @single_flight("wb", "creator_info")
     async def get_creator_info_by_id(self, creator_id: str) -> Dict:
         """
         根据用户ID获取用户详情
@@ -337,20 +338,18 @@ class WeiboClient:
         }
         return await self.get(uri, params)
 
-    async def get_all_notes_by_creator_id(self, creator_id: str, container_id: str, crawl_interval: float = 1.0,
-                                          callback: Optional[Callable] = None) -> List[Dict]:
+    async def iter_notes_by_creator_id(self, creator_id: str, container_id: str,
+                                       crawl_interval: float = 1.0) -> AsyncIterator[List[Dict]]:
         """
-        获取指定用户下的所有发过的帖子，该方法会一直查找一个用户下的所有帖子信息
+        按页产出指定用户发过的帖子，调用方处理完一页即可丢弃，内存占用只和单页大小有关
         Args:
             creator_id:
             container_id:
             crawl_interval:
-            callback:
 
         Returns:
 
         """
-        result = []
         notes_has_more = True
         since_id = ""
         crawler_total_count = 0
@@ -363,18 +362,36 @@ class WeiboClient:
             since_id = notes_res.get("cardlistInfo", {}).get("since_id", "0")
             if "cards" not in notes_res:
                 utils.logger.info(
-                    f"[WeiboClient.get_all_notes_by_creator] No 'notes' key found in response: {notes_res}")
+                    f"[WeiboClient.iter_notes_by_creator_id] No 'notes' key found in response: {notes_res}")
                 break
 
             notes = notes_res["cards"]
             utils.logger.info(
-                f"[WeiboClient.get_all_notes_by_creator] got user_id:{creator_id} notes len : {len(notes)}")
+                f"[WeiboClient.iter_notes_by_creator_id] got user_id:{creator_id} notes len : {len(notes)}")
             notes = [note for note  in notes if note.get("card_type") == 9]
-            if callback:
-                await callback(notes)
+            yield notes
             await asyncio.sleep(crawl_interval)
-            result.extend(notes)
             crawler_total_count += 10
             notes_has_more = notes_res.get("cardlistInfo", {}).get("total", 0) > crawler_total_count
+
+    async def get_all_notes_by_creator_id(self, creator_id: str, container_id: str, crawl_interval: float = 1.0,
+                                          callback: Optional[Callable] = None) -> List[Dict]:
+        """
+        获取指定用户下的所有发过的帖子，该方法会一直查找一个用户下的所有帖子信息
+        帖子较多时建议直接使用 iter_notes_by_creator_id 按页处理
+        Args:
+            creator_id:
+            container_id:
+            crawl_interval:
+            callback:
+
+        Returns:
+
+        """
+        result = []
+        async for notes in self.iter_notes_by_creator_id(creator_id, container_id, crawl_interval):
+            if callback:
+                await callback(notes)
+            result.extend(notes)
         return result
 
@@ -28,7 +28,7 @@ import config
 from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import weibo as weibo_store
-from tools import utils
+from tools import http_transport, metrics, utils
 from tools.cdp_browser import CDPBrowserManager
 from var import crawler_type_var, source_keyword_var
 
@@ -56,7 +56,9 @@ class WeiboCrawler(AbstractCrawler):
         playwright_proxy_format, httpx_proxy_format = None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
+            self.ip_proxy_pool = ip_proxy_pool
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
+            http_transport.register_proxy_pool("wb", ip_proxy_pool, config.IP_PROXY_ROTATE_MODE)
             playwright_proxy_format, httpx_proxy_format = self.format_proxy_info(ip_proxy_info)
 
         async with async_playwright() as playwright:
@@ -171,7 +173,7 @@ class WeiboCrawler(AbstractCrawler):
         get specified notes info
         :return:
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = metrics.semaphore("wb", config.MAX_CONCURRENCY_NUM)
         task_list = [
             self.get_note_info_task(note_id=note_id, semaphore=semaphore) for note_id in
             config.WEIBO_SPECIFIED_ID_LIST
@@ -212,7 +214,7 @@ class WeiboCrawler(AbstractCrawler):
             return
 
         utils.logger.info(f"[WeiboCrawler.batch_get_notes_comments] note ids:{note_id_list}")
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = metrics.semaphore("wb", config.MAX_CONCURRENCY_NUM)
         task_list: List[Task] = []
         for note_id in note_id_list:
             task = asyncio.create_task(self.get_note_comments(note_id, semaphore), name=note_id)
@@ -280,16 +282,17 @@ class WeiboCrawler(AbstractCrawler):
                 await weibo_store.save_creator(user_id, user_info=createor_info)
 
                 # Get all note information of the creator
-                all_notes_list = await self.wb_client.get_all_notes_by_creator_id(
+                # Process page by page so that memory does not grow with the creator's history
+                async for notes_list in self.wb_client.iter_notes_by_creator_id(
                     creator_id=user_id,
                     container_id=createor_info_res.get("lfid_container_id"),
                     crawl_interval=0,
-                    callback=weibo_store.batch_update_weibo_notes
-                )
+                ):
+                    await weibo_store.batch_update_weibo_notes(notes_list)
 
-                note_ids = [note_item.get("mblog", {}).get("id") for note_item in all_notes_list if
-                            note_item.get("mblog", {}).get("id")]
-                await self.batch_get_notes_comments(note_ids)
+                    note_ids = [note_item.get("mblog", {}).get("id") for note_item in notes_list if
+                                note_item.get("mblog", {}).get("id")]
+                    await self.batch_get_notes_comments(note_ids)
 
             else:
                 utils.logger.error(
@@ -385,6 +388,7 @@ class WeiboCrawler(AbstractCrawler):
 
     async def close(self):
         """Close browser context"""
+        await self.close_proxy_pool()
         # 如果使用CDP模式，需要特殊处理
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
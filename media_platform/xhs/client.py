@@ -12,7 +12,7 @@
 import asyncio
 import json
 import re
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
 import httpx
@@ -21,7 +21,9 @@ from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_result
 
 import config
 from base.base_crawler import AbstractApiClient
-from tools import utils
+from tools import http_transport, json_codec, metrics, tracing, utils
+from tools.page_pool import PagePool
+from tools.single_flight import single_flight
 from html import unescape
 
 from .exception import DataFetchError, IPBlockError
@@ -36,7 +38,7 @@ class XiaoHongShuClient(AbstractApiClient):
         proxies=None,
         *,
         headers: Dict[str, str],
-        playwright_page: Page,
+        playwright_page: Union[Page, PagePool],
         cookie_dict: Dict[str, str],
     ):
         self.proxies = proxies
@@ -51,6 +53,7 @@ class XiaoHongShuClient(AbstractApiClient):
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
 
+    @metrics.timed_sign("xhs")
     async def _pre_headers(self, url: str, data=None) -> Dict:
         """
         请求头参数签名
@@ -96,8 +99,9 @@ class XiaoHongShuClient(AbstractApiClient):
         # return response.text
         return_response = kwargs.pop("return_response", False)
 
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        response = await http_transport.send_request(
+            "xhs", method, url, proxies=self.proxies, timeout=self.timeout, **kwargs
+        )
 
         if response.status_code == 471 or response.status_code == 461:
             # someday someone maybe will bypass captcha
@@ -109,14 +113,16 @@ class XiaoHongShuClient(AbstractApiClient):
 
         if return_response:
             return response.text
-        data: Dict = response.json()
+        data: Dict = json_codec.response_json(response)
         if data["success"]:
             return data.get("data", data.get("success", {}))
         elif data["code"] == self.IP_ERROR_CODE:
+            http_transport.report_proxy_blocked()
             raise IPBlockError(self.IP_ERROR_STR)
         else:
             raise DataFetchError(data.get("msg", None))
 
+    @tracing.traced("xhs.get", cat="request")
     async def get(self, uri: str, params=None) -> Dict:
         """
         GET请求，对请求头签名
@@ -135,6 +141,7 @@ class XiaoHongShuClient(AbstractApiClient):
             method="GET", url=f"{self._host}{final_uri}", headers=headers
         )
 
+    @tracing.traced("xhs.post", cat="request")
     async def post(self, uri: str, data: dict, **kwargs) -> Dict:
         """
         POST请求，对请求头签名
@@ -146,7 +153,7 @@ class XiaoHongShuClient(AbstractApiClient):
 
         """
         headers = await self._pre_headers(uri, data)
-        json_str = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        json_str = json_codec.dumps(data, compact=True)
         return await self.request(
             method="POST",
             url=f"{self._host}{uri}",
@@ -231,6 +238,7 @@ class XiaoHongShuClient(AbstractApiClient):
         }
         return await self.post(uri, data)
 
+    @single_flight("xhs", "note_detail")
     async def get_note_by_id(
         self, note_id: str, xsec_source: str, xsec_token: str
     ) -> Dict:
@@ -435,6 +443,7 @@ class XiaoHongShuClient(AbstractApiClient):
                 result.extend(comments)
         return result
 
+    @single_flight("xhs", "creator_info")
     async def get_creator_info(self, user_id: str) -> Dict:
         """
         通过解析网页版的用户主页HTML，获取用户个人简要信息
@@ -479,26 +488,27 @@ class XiaoHongShuClient(AbstractApiClient):
         }
         return await self.get(uri, data)
 
-    async def get_all_notes_by_creator(
+    async def iter_notes_by_creator(
         self,
         user_id: str,
         crawl_interval: float = 1.0,
-        callback: Optional[Callable] = None,
-    ) -> List[Dict]:
+        max_count: Optional[int] = None,
+    ) -> AsyncIterator[List[Dict]]:
         """
-        获取指定用户下的所有发过的帖子，该方法会一直查找一个用户下的所有帖子信息
+        按页产出指定用户发过的帖子，调用方处理完一页即可丢弃，内存占用只和单页大小有关
         Args:
             user_id: 用户ID
             crawl_interval: 爬取一次的延迟单位（秒）
-            callback: 一次分页爬取结束后的更新回调函数
+            max_count: 最多产出的帖子数量，默认读取配置 CRAWLER_MAX_NOTES_COUNT
 
         Returns:
 
         """
-        result = []
+        max_count = config.CRAWLER_MAX_NOTES_COUNT if max_count is None else max_count
+        total = 0
         notes_has_more = True
         notes_cursor = ""
-        while notes_has_more and len(result) < config.CRAWLER_MAX_NOTES_COUNT:
+        while notes_has_more and total < max_count:
             notes_res = await self.get_notes_by_creator(user_id, notes_cursor)
             if not notes_res:
                 utils.logger.error(
@@ -510,29 +520,46 @@ class XiaoHongShuClient(AbstractApiClient):
             notes_cursor = notes_res.get("cursor", "")
             if "notes" not in notes_res:
                 utils.logger.info(
-                    f"[XiaoHongShuClient.get_all_notes_by_creator] No 'notes' key found in response: {notes_res}"
+                    f"[XiaoHongShuClient.iter_notes_by_creator] No 'notes' key found in response: {notes_res}"
                 )
                 break
 
             notes = notes_res["notes"]
             utils.logger.info(
-                f"[XiaoHongShuClient.get_all_notes_by_creator] got user_id:{user_id} notes len : {len(notes)}"
+                f"[XiaoHongShuClient.iter_notes_by_creator] got user_id:{user_id} notes len : {len(notes)}"
             )
 
-            remaining = config.CRAWLER_MAX_NOTES_COUNT - len(result)
-            if remaining <= 0:
-                break
-
-            notes_to_add = notes[:remaining]
-            if callback:
-                await callback(notes_to_add)
-
-            result.extend(notes_to_add)
+            notes_to_yield = notes[:max_count - total]
+            total += len(notes_to_yield)
+            yield notes_to_yield
             await asyncio.sleep(crawl_interval)
 
         utils.logger.info(
-            f"[XiaoHongShuClient.get_all_notes_by_creator] Finished getting notes for user {user_id}, total: {len(result)}"
+            f"[XiaoHongShuClient.iter_notes_by_creator] Finished getting notes for user {user_id}, total: {total}"
         )
+
+    async def get_all_notes_by_creator(
+        self,
+        user_id: str,
+        crawl_interval: float = 1.0,
+        callback: Optional[Callable] = None,
+    ) -> List[Dict]:
+        """
+        获取指定用户下的所有发过的帖子，该方法会一直查找一个用户下的所有帖子信息
+        帖子较多时建议直接使用 iter_notes_by_creator 按页处理
+        Args:
+            user_id: 用户ID
+            crawl_interval: 爬取一次的延迟单位（秒）
+            callback: 一次分页爬取结束后的更新回调函数
+
+        Returns:
+
+        """
+        result = []
+        async for notes in self.iter_notes_by_creator(user_id, crawl_interval):
+            if callback:
+                await callback(notes)
+            result.extend(notes)
         return result
 
     async def get_note_short_url(self, note_id: str) -> Dict:
@@ -548,6 +575,7 @@ class XiaoHongShuClient(AbstractApiClient):
         data = {"original_url": f"{self._domain}/discovery/item/{note_id}"}
         return await self.post(uri, data=data, return_response=True)
 
+    @single_flight("xhs", "note_detail_html")
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def get_note_by_id_from_html(
         self,
@@ -574,7 +602,7 @@ class XiaoHongShuClient(AbstractApiClient):
             return re.sub(r"(?<!^)(?=[A-Z])", "_", key).lower()
 
         def transform_json_keys(json_data):
-            data_dict = json.loads(json_data)
+            data_dict = json_codec.loads(json_data)
             dict_new = {}
             for key, value in data_dict.items():
                 new_key = camel_to_underscore(key)
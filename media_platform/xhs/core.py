@@ -22,11 +22,12 @@ from tenacity import RetryError
 import config
 from base.base_crawler import AbstractCrawler
 from config import CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES
-from model.m_xiaohongshu import NoteUrlInfo
+from model.m_xiaohongshu import NoteUrlInfo, XhsNoteRow
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import xhs as xhs_store
-from tools import utils
+from tools import http_transport, lightweight_browser, metrics, utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.page_pool import PagePool
 from var import crawler_type_var, source_keyword_var
 
 from .client import XiaoHongShuClient
@@ -41,6 +42,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
     xhs_client: XiaoHongShuClient
     browser_context: BrowserContext
     cdp_manager: Optional[CDPBrowserManager]
+    page_pool: PagePool
 
     def __init__(self) -> None:
         self.index_url = "https://www.xiaohongshu.com"
@@ -54,12 +56,15 @@ class XiaoHongShuCrawler(AbstractCrawler):
             ip_proxy_pool = await create_ip_pool(
                 config.IP_PROXY_POOL_COUNT, enable_validate_ip=True
             )
+            self.ip_proxy_pool = ip_proxy_pool
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
+            http_transport.register_proxy_pool("xhs", ip_proxy_pool, config.IP_PROXY_ROTATE_MODE)
             playwright_proxy_format, httpx_proxy_format = self.format_proxy_info(
                 ip_proxy_info
             )
 
         async with async_playwright() as playwright:
+            browser_start_ts = time.perf_counter()
             # 根据配置选择启动模式
             if config.ENABLE_CDP_MODE:
                 utils.logger.info("[XiaoHongShuCrawler] 使用CDP模式启动浏览器")
@@ -89,6 +94,10 @@ class XiaoHongShuCrawler(AbstractCrawler):
             )
             self.context_page = await self.browser_context.new_page()
             await self.context_page.goto(self.index_url)
+            self.page_pool = PagePool(
+                self.browser_context, self.index_url,
+                size=config.BROWSER_PAGE_POOL_SIZE, primary_page=self.context_page
+            )
 
             # Create a client to interact with the xiaohongshu website.
             self.xhs_client = await self.create_xhs_client(httpx_proxy_format)
@@ -104,6 +113,9 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 await self.xhs_client.update_cookies(
                     browser_context=self.browser_context
                 )
+            await lightweight_browser.enable_resource_blocking(self.browser_context)
+            await self.page_pool.start()
+            lightweight_browser.report_browser_startup("XiaoHongShuCrawler", browser_start_ts)
 
             crawler_type_var.set(config.CRAWLER_TYPE)
             if config.CRAWLER_TYPE == "search":
@@ -166,7 +178,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
                     if not notes_res or not notes_res.get("has_more", False):
                         utils.logger.info("No more content!")
                         break
-                    semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+                    semaphore = metrics.semaphore("xhs", config.MAX_CONCURRENCY_NUM)
                     task_list = [
                         self.get_note_detail_async_task(
                             note_id=post_item.get("id"),
@@ -177,16 +189,16 @@ class XiaoHongShuCrawler(AbstractCrawler):
                         for post_item in notes_res.get("items", {})
                         if post_item.get("model_type") not in ("rec_query", "hot_query")
                     ]
-                    note_details = await asyncio.gather(*task_list)
-                    for note_detail in note_details:
-                        if note_detail:
-                            await xhs_store.update_xhs_note(note_detail)
-                            await self.get_notice_media(note_detail)
-                            note_ids.append(note_detail.get("note_id"))
-                            xsec_tokens.append(note_detail.get("xsec_token"))
+                    note_rows = await asyncio.gather(*task_list)
+                    for note_row in note_rows:
+                        if note_row:
+                            await xhs_store.update_xhs_note(note_row)
+                            await self.get_notice_media(note_row)
+                            note_ids.append(note_row.note_id)
+                            xsec_tokens.append(note_row.xsec_token)
                     page += 1
                     utils.logger.info(
-                        f"[XiaoHongShuCrawler.search] Note details: {note_details}"
+                        f"[XiaoHongShuCrawler.search] Note ids: {note_ids}"
                     )
                     await self.batch_get_note_comments(note_ids, xsec_tokens)
                 except DataFetchError:
@@ -214,24 +226,25 @@ class XiaoHongShuCrawler(AbstractCrawler):
             else:
                 crawl_interval = random.uniform(1, config.CRAWLER_MAX_SLEEP_SEC)
             # Get all note information of the creator
-            all_notes_list = await self.xhs_client.get_all_notes_by_creator(
+            # Process page by page so that memory does not grow with the creator's history
+            async for notes_list in self.xhs_client.iter_notes_by_creator(
                 user_id=user_id,
                 crawl_interval=crawl_interval,
-                callback=self.fetch_creator_notes_detail,
-            )
+            ):
+                await self.fetch_creator_notes_detail(notes_list)
 
-            note_ids = []
-            xsec_tokens = []
-            for note_item in all_notes_list:
-                note_ids.append(note_item.get("note_id"))
-                xsec_tokens.append(note_item.get("xsec_token"))
-            await self.batch_get_note_comments(note_ids, xsec_tokens)
+                note_ids = []
+                xsec_tokens = []
+                for note_item in notes_list:
+                    note_ids.append(note_item.get("note_id"))
+                    xsec_tokens.append(note_item.get("xsec_token"))
+                await self.batch_get_note_comments(note_ids, xsec_tokens)
 
     async def fetch_creator_notes_detail(self, note_list: List[Dict]):
         """
         Concurrently obtain the specified post list and save the data
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = metrics.semaphore("xhs", config.MAX_CONCURRENCY_NUM)
         task_list = [
             self.get_note_detail_async_task(
                 note_id=post_item.get("note_id"),
@@ -242,10 +255,10 @@ class XiaoHongShuCrawler(AbstractCrawler):
             for post_item in note_list
         ]
 
-        note_details = await asyncio.gather(*task_list)
-        for note_detail in note_details:
-            if note_detail:
-                await xhs_store.update_xhs_note(note_detail)
+        note_rows = await asyncio.gather(*task_list)
+        for note_row in note_rows:
+            if note_row:
+                await xhs_store.update_xhs_note(note_row)
 
     async def get_specified_notes(self):
         """
@@ -264,18 +277,18 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 note_id=note_url_info.note_id,
                 xsec_source=note_url_info.xsec_source,
                 xsec_token=note_url_info.xsec_token,
-                semaphore=asyncio.Semaphore(config.MAX_CONCURRENCY_NUM),
+                semaphore=metrics.semaphore("xhs", config.MAX_CONCURRENCY_NUM),
             )
             get_note_detail_task_list.append(crawler_task)
 
         need_get_comment_note_ids = []
         xsec_tokens = []
-        note_details = await asyncio.gather(*get_note_detail_task_list)
-        for note_detail in note_details:
-            if note_detail:
-                need_get_comment_note_ids.append(note_detail.get("note_id", ""))
-                xsec_tokens.append(note_detail.get("xsec_token", ""))
-                await xhs_store.update_xhs_note(note_detail)
+        note_rows = await asyncio.gather(*get_note_detail_task_list)
+        for note_row in note_rows:
+            if note_row:
+                need_get_comment_note_ids.append(note_row.note_id or "")
+                xsec_tokens.append(note_row.xsec_token or "")
+                await xhs_store.update_xhs_note(note_row)
         await self.batch_get_note_comments(need_get_comment_note_ids, xsec_tokens)
 
     async def get_note_detail_async_task(
@@ -284,8 +297,8 @@ class XiaoHongShuCrawler(AbstractCrawler):
         xsec_source: str,
         xsec_token: str,
         semaphore: asyncio.Semaphore,
-    ) -> Optional[Dict]:
-        """Get note detail
+    ) -> Optional[XhsNoteRow]:
+        """Get note detail, only the fields to be stored and the media urls are kept
 
         Args:
             note_id:
@@ -294,7 +307,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
             semaphore:
 
         Returns:
-            Dict: note detail
+            XhsNoteRow: note detail projection
         """
         note_detail_from_html, note_detail_from_api = None, None
         async with semaphore:
@@ -334,7 +347,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
                     note_detail.update(
                         {"xsec_token": xsec_token, "xsec_source": xsec_source}
                     )
-                    return note_detail
+                    return xhs_store.project_xhs_note(note_detail)
             except DataFetchError as ex:
                 utils.logger.error(
                     f"[XiaoHongShuCrawler.get_note_detail_async_task] Get note detail error: {ex}"
@@ -359,7 +372,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
         utils.logger.info(
             f"[XiaoHongShuCrawler.batch_get_note_comments] Begin batch get note comments, note list: {note_list}"
         )
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = metrics.semaphore("xhs", config.MAX_CONCURRENCY_NUM)
         task_list: List[Task] = []
         for index, note_id in enumerate(note_list):
             task = asyncio.create_task(
@@ -424,7 +437,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 "Referer": "https://www.xiaohongshu.com",
                 "Content-Type": "application/json;charset=UTF-8",
             },
-            playwright_page=self.context_page,
+            playwright_page=self.page_pool,
             cookie_dict=cookie_dict,
         )
         return xhs_client_obj
@@ -449,6 +462,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
             browser_context = await chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
                 accept_downloads=True,
+                args=lightweight_browser.launch_args(),
                 headless=headless,
                 proxy=playwright_proxy,  # type: ignore
                 viewport={"width": 1920, "height": 1080},
@@ -456,7 +470,8 @@ class XiaoHongShuCrawler(AbstractCrawler):
             )
             return browser_context
         else:
-            browser = await chromium.launch(headless=headless, proxy=playwright_proxy)  # type: ignore
+            browser = await chromium.launch(headless=headless, proxy=playwright_proxy,
+                                           args=lightweight_browser.launch_args())  # type: ignore
             browser_context = await browser.new_context(
                 viewport={"width": 1920, "height": 1080}, user_agent=user_agent
             )
@@ -490,6 +505,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
     async def close(self):
         """Close browser context"""
+        await self.close_proxy_pool()
         # 如果使用CDP模式，需要特殊处理
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
@@ -498,35 +514,25 @@ class XiaoHongShuCrawler(AbstractCrawler):
             await self.browser_context.close()
         utils.logger.info("[XiaoHongShuCrawler.close] Browser context closed ...")
 
-    async def get_notice_media(self, note_detail: Dict):
+    async def get_notice_media(self, note_row: XhsNoteRow):
         if not config.ENABLE_GET_IMAGES:
             utils.logger.info(
                 f"[XiaoHongShuCrawler.get_notice_media] Crawling image mode is not enabled"
             )
             return
-        await self.get_note_images(note_detail)
-        await self.get_notice_video(note_detail)
+        await self.get_note_images(note_row)
+        await self.get_notice_video(note_row)
 
-    async def get_note_images(self, note_item: Dict):
+    async def get_note_images(self, note_row: XhsNoteRow):
         """
         get note images. please use get_notice_media
-        :param note_item:
+        :param note_row:
         :return:
         """
         if not config.ENABLE_GET_IMAGES:
             return
-        note_id = note_item.get("note_id")
-        image_list: List[Dict] = note_item.get("image_list", [])
-
-        for img in image_list:
-            if img.get("url_default") != "":
-                img.update({"url": img.get("url_default")})
-
-        if not image_list:
-            return
         picNum = 0
-        for pic in image_list:
-            url = pic.get("url")
+        for url in note_row.image_urls:
             if not url:
                 continue
             content = await self.xhs_client.get_note_media(url)
@@ -534,27 +540,21 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 continue
             extension_file_name = f"{picNum}.jpg"
             picNum += 1
-            await xhs_store.update_xhs_note_image(note_id, content, extension_file_name)
+            await xhs_store.update_xhs_note_image(note_row.note_id, content, extension_file_name)
 
-    async def get_notice_video(self, note_item: Dict):
+    async def get_notice_video(self, note_row: XhsNoteRow):
         """
         get note images. please use get_notice_media
-        :param note_item:
+        :param note_row:
         :return:
         """
         if not config.ENABLE_GET_IMAGES:
             return
-        note_id = note_item.get("note_id")
-
-        videos = xhs_store.get_video_url_arr(note_item)
-
-        if not videos:
-            return
         videoNum = 0
-        for url in videos:
+        for url in note_row.video_urls:
             content = await self.xhs_client.get_note_media(url)
             if content is None:
                 continue
             extension_file_name = f"{videoNum}.mp4"
             videoNum += 1
-            await xhs_store.update_xhs_note_image(note_id, content, extension_file_name)
+            await xhs_store.update_xhs_note_image(note_row.note_id, content, extension_file_name)
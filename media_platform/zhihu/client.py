@@ -12,10 +12,9 @@
 # -*- coding: utf-8 -*-
 import asyncio
 import json
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
-import httpx
 from httpx import Response
 from playwright.async_api import BrowserContext, Page
 from tenacity import retry, stop_after_attempt, wait_fixed
@@ -24,7 +23,8 @@ import config
 from base.base_crawler import AbstractApiClient
 from constant import zhihu as zhihu_constant
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
-from tools import utils
+from tools import http_transport, json_codec, metrics, tracing, utils
+from tools.single_flight import single_flight
 
 from .exception import DataFetchError, ForbiddenError
 from .field import SearchSort, SearchTime, SearchType
@@ -47,6 +47,7 @@ class ZhiHuClient(AbstractApiClient):
         self.cookie_dict = cookie_dict
         self._extractor = ZhihuExtractor()
 
+    @metrics.timed_sign("zhihu")
     async def _pre_headers(self, url: str) -> Dict:
         """
         请求头参数签名
@@ -79,11 +80,9 @@ class ZhiHuClient(AbstractApiClient):
         # return response.text
         return_response = kwargs.pop('return_response', False)
 
-        async with httpx.AsyncClient(proxies=self.proxies, ) as client:
-            response = await client.request(
-                method, url, timeout=self.timeout,
-                **kwargs
-            )
+        response = await http_transport.send_request(
+            "zhihu", method, url, proxies=self.proxies, timeout=self.timeout, **kwargs
+        )
 
         if response.status_code != 200:
             utils.logger.error(f"[ZhiHuClient.request] Requset Url: {url}, Request error: {response.text}")
@@ -97,7 +96,7 @@ class ZhiHuClient(AbstractApiClient):
         if return_response:
             return response.text
         try:
-            data: Dict = response.json()
+            data: Dict = json_codec.response_json(response)
             if data.get("error"):
                 utils.logger.error(f"[ZhiHuClient.request] Request error: {data}")
                 raise DataFetchError(data.get("error", {}).get("message"))
@@ -107,6 +106,7 @@ class ZhiHuClient(AbstractApiClient):
             raise DataFetchError(response.text)
 
 
+    @tracing.traced("zhihu.get", cat="request")
     async def get(self, uri: str, params=None, **kwargs) -> Union[Response, Dict, str]:
         """
         GET请求，对请求头签名
@@ -338,6 +338,7 @@ class ZhiHuClient(AbstractApiClient):
                 await asyncio.sleep(crawl_interval)
         return all_sub_comments
 
+    @single_flight("zhihu", "creator_info")
     async def get_creator_info(self, url_token: str) -> Optional[ZhihuCreator]:
         """
         获取创作者信息
@@ -412,19 +413,17 @@ class ZhiHuClient(AbstractApiClient):
         }
         return await self.get(uri, params)
 
-    async def get_all_anwser_by_creator(self, creator: ZhihuCreator, crawl_interval: float = 1.0,
-                                        callback: Optional[Callable] = None) -> List[ZhihuContent]:
+    async def iter_anwser_by_creator(self, creator: ZhihuCreator,
+                                     crawl_interval: float = 1.0) -> AsyncIterator[List[ZhihuContent]]:
         """
-        获取创作者的所有回答
+        按页产出创作者的回答，调用方处理完一页即可丢弃，内存占用只和单页大小有关
         Args:
             creator: 创作者信息
             crawl_interval: 爬取一次笔记的延迟单位（秒）
-            callback: 一次笔记爬取结束后
 
         Returns:
 
         """
-        all_contents: List[ZhihuContent] = []
         is_end: bool = False
         offset: int = 0
         limit: int = 20
@@ -432,15 +431,30 @@ class ZhiHuClient(AbstractApiClient):
             res = await self.get_creator_answers(creator.url_token, offset, limit)
             if not res:
                 break
-            utils.logger.info(f"[ZhiHuClient.get_all_anwser_by_creator] Get creator {creator.url_token} answers: {res}")
+            utils.logger.info(f"[ZhiHuClient.iter_anwser_by_creator] Get creator {creator.url_token} answers: {res}")
             paging_info = res.get("paging", {})
             is_end = paging_info.get("is_end")
-            contents = self._extractor.extract_content_list_from_creator(res.get("data"))
+            yield self._extractor.extract_content_list_from_creator(res.get("data"))
+            offset += limit
+            await asyncio.sleep(crawl_interval)
+
+    async def get_all_anwser_by_creator(self, creator: ZhihuCreator, crawl_interval: float = 1.0,
+                                        callback: Optional[Callable] = None) -> List[ZhihuContent]:
+        """
+        获取创作者的所有回答
+        Args:
+            creator: 创作者信息
+            crawl_interval: 爬取一次笔记的延迟单位（秒）
+            callback: 一次笔记爬取结束后
+
+        Returns:
+
+        """
+        all_contents: List[ZhihuContent] = []
+        async for contents in self.iter_anwser_by_creator(creator, crawl_interval):
             if callback:
                 await callback(contents)
             all_contents.extend(contents)
-            offset += limit
-            await asyncio.sleep(crawl_interval)
         return all_contents
 
 
@@ -506,6 +520,7 @@ class ZhiHuClient(AbstractApiClient):
         return all_contents
 
 
+    @single_flight("zhihu", "answer_detail")
     async def get_answer_info(
         self, question_id: str, answer_id: str
     ) -> Optional[ZhihuContent]:
@@ -522,6 +537,7 @@ class ZhiHuClient(AbstractApiClient):
         response_html = await self.get(uri, return_response=True)
         return self._extractor.extract_answer_content_from_html(response_html)
 
+    @single_flight("zhihu", "article_detail")
     async def get_article_info(self, article_id: str) -> Optional[ZhihuContent]:
         """
         获取文章信息
@@ -535,6 +551,7 @@ class ZhiHuClient(AbstractApiClient):
         response_html = await self.get(uri, return_response=True)
         return self._extractor.extract_article_content_from_html(response_html)
 
+    @single_flight("zhihu", "video_detail")
     async def get_video_info(self, video_id: str) -> Optional[ZhihuContent]:
         """
         获取视频信息
@@ -25,8 +25,9 @@ from base.base_crawler import AbstractCrawler
 from model.m_zhihu import ZhihuContent, ZhihuCreator
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import zhihu as zhihu_store
-from tools import utils
+from tools import http_transport, metrics, session_snapshot, utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.session_snapshot import SessionSnapshot, SnapshotPage
 from var import crawler_type_var, source_keyword_var
 
 from .client import ZhiHuClient
@@ -57,9 +58,14 @@ class ZhihuCrawler(AbstractCrawler):
         playwright_proxy_format, httpx_proxy_format = None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
+            self.ip_proxy_pool = ip_proxy_pool
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
+            http_transport.register_proxy_pool("zhihu", ip_proxy_pool, config.IP_PROXY_ROTATE_MODE)
             playwright_proxy_format, httpx_proxy_format = self.format_proxy_info(ip_proxy_info)
 
+        if config.ENABLE_BROWSERLESS_MODE and await self.start_browserless(httpx_proxy_format):
+            return
+
         async with async_playwright() as playwright:
             # 根据配置选择启动模式
             if config.ENABLE_CDP_MODE:
@@ -102,21 +108,43 @@ class ZhihuCrawler(AbstractCrawler):
             await self.context_page.goto(f"{self.index_url}/search?q=python&search_source=Guess&utm_content=search_hot&type=content")
             await asyncio.sleep(5)
             await self.zhihu_client.update_cookies(browser_context=self.browser_context)
+            await session_snapshot.save_browser_session(config.PLATFORM, self.browser_context, self.context_page)
+            await self.crawl()
 
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for notes and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_notes()
-            elif config.CRAWLER_TYPE == "creator":
-                # Get creator's information and their notes and comments
-                await self.get_creators_and_notes()
-            else:
-                pass
+    async def start_browserless(self, httpx_proxy: Optional[Dict]) -> bool:
+        """
+        使用浏览器登录后保存的会话快照启动，不启动浏览器
+        x-zse-96 签名由 libs/zhihu.js 根据快照中的 d_c0 cookie 计算，快照里已经包含了搜索页下发的 cookies
+        快照不存在、已过期或登录态失效时返回 False，回退到浏览器模式
+        """
+        snapshot = session_snapshot.load_session_snapshot(config.PLATFORM)
+        if not snapshot:
+            utils.logger.info("[ZhihuCrawler.start_browserless] No session snapshot, fallback to browser mode")
+            return False
+        self.zhihu_client = await self.create_zhihu_client(httpx_proxy, snapshot=snapshot)
+        if not await self.zhihu_client.pong():
+            utils.logger.warning("[ZhihuCrawler.start_browserless] Session snapshot login state expired, fallback to browser mode")
+            return False
+        utils.logger.info("[ZhihuCrawler.start_browserless] Start crawling with session snapshot, no browser launched")
+        await self.crawl()
+        return True
+
+    async def crawl(self) -> None:
+        """按照 CRAWLER_TYPE 执行爬取"""
+        crawler_type_var.set(config.CRAWLER_TYPE)
+        if config.CRAWLER_TYPE == "search":
+            # Search for notes and retrieve their comment information.
+            await self.search()
+        elif config.CRAWLER_TYPE == "detail":
+            # Get the information and comments of the specified post
+            await self.get_specified_notes()
+        elif config.CRAWLER_TYPE == "creator":
+            # Get creator's information and their notes and comments
+            await self.get_creators_and_notes()
+        else:
+            pass
 
-            utils.logger.info("[ZhihuCrawler.start] Zhihu Crawler finished ...")
+        utils.logger.info("[ZhihuCrawler.start] Zhihu Crawler finished ...")
 
     async def search(self) -> None:
         """Search for notes and retrieve their comment information."""
@@ -168,7 +196,7 @@ class ZhihuCrawler(AbstractCrawler):
             utils.logger.info(f"[ZhihuCrawler.batch_get_content_comments] Crawling comment mode is not enabled")
             return
 
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = metrics.semaphore("zhihu", config.MAX_CONCURRENCY_NUM)
         task_list: List[Task] = []
         for content_item in content_list:
             task = asyncio.create_task(self.get_comments(content_item, semaphore), name=content_item.content_id)
@@ -215,11 +243,13 @@ class ZhihuCrawler(AbstractCrawler):
             # 默认只提取回答信息，如果需要文章和视频，把下面的注释打开即可
 
             # Get all anwser information of the creator
-            all_content_list = await self.zhihu_client.get_all_anwser_by_creator(
+            # Process page by page so that memory does not grow with the creator's history
+            async for content_list in self.zhihu_client.iter_anwser_by_creator(
                 creator=createor_info,
                 crawl_interval=random.random(),
-                callback=zhihu_store.batch_update_zhihu_contents
-            )
+            ):
+                await zhihu_store.batch_update_zhihu_contents(content_list)
+                await self.batch_get_content_comments(content_list)
 
 
             # Get all articles of the creator's contents
@@ -236,8 +266,8 @@ class ZhihuCrawler(AbstractCrawler):
             #     callback=zhihu_store.batch_update_zhihu_contents
             # )
 
-            # Get all comments of the creator's contents
-            await self.batch_get_content_comments(all_content_list)
+            # Get all comments of the creator's articles or videos, answer comments are fetched page by page above
+            # await self.batch_get_content_comments(all_content_list)
 
     async def get_note_detail(
         self, full_note_url: str, semaphore: asyncio.Semaphore
@@ -291,7 +321,7 @@ class ZhihuCrawler(AbstractCrawler):
             full_note_url = full_note_url.split("?")[0]
             crawler_task = self.get_note_detail(
                 full_note_url=full_note_url,
-                semaphore=asyncio.Semaphore(config.MAX_CONCURRENCY_NUM),
+                semaphore=metrics.semaphore("zhihu", config.MAX_CONCURRENCY_NUM),
             )
             get_note_detail_task_list.append(crawler_task)
 
@@ -323,10 +353,16 @@ class ZhihuCrawler(AbstractCrawler):
         }
         return playwright_proxy, httpx_proxy
 
-    async def create_zhihu_client(self, httpx_proxy: Optional[str]) -> ZhiHuClient:
+    async def create_zhihu_client(self, httpx_proxy: Optional[str],
+                                  snapshot: Optional[SessionSnapshot] = None) -> ZhiHuClient:
         """Create zhihu client"""
         utils.logger.info("[ZhihuCrawler.create_zhihu_client] Begin create zhihu API client ...")
-        cookie_str, cookie_dict = utils.convert_cookies(await self.browser_context.cookies())
+        if snapshot:
+            cookie_str, cookie_dict = snapshot.convert_cookies()
+            playwright_page = SnapshotPage(snapshot)
+        else:
+            cookie_str, cookie_dict = utils.convert_cookies(await self.browser_context.cookies())
+            playwright_page = self.context_page
         zhihu_client_obj = ZhiHuClient(
             proxies=httpx_proxy,
             headers={
@@ -341,7 +377,7 @@ class ZhihuCrawler(AbstractCrawler):
                 'x-requested-with': 'fetch',
                 'x-zse-93': '101_3_3.0',
             },
-            playwright_page=self.context_page,
+            playwright_page=playwright_page,
             cookie_dict=cookie_dict,
         )
         return zhihu_client_obj
@@ -405,10 +441,11 @@ class ZhihuCrawler(AbstractCrawler):
 
     async def close(self):
         """Close browser context"""
+        await self.close_proxy_pool()
         # 如果使用CDP模式，需要特殊处理
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
             self.cdp_manager = None
-        else:
+        elif getattr(self, "browser_context", None):
             await self.browser_context.close()
         utils.logger.info("[ZhihuCrawler.close] Browser context closed ...")
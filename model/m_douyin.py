@@ -10,3 +10,31 @@
 
 
 # -*- coding: utf-8 -*-
+from typing import NamedTuple
+
+
+class DouyinAwemeRow(NamedTuple):
+    """
+    从视频详情中投影出来的入库字段，解析完成后立即替换掉原始的大 dict
+    last_modify_ts 和 source_keyword 在入库时生成
+    """
+    aweme_id: str
+    aweme_type: str
+    title: str
+    desc: str
+    create_time: int
+    user_id: str
+    sec_uid: str
+    short_user_id: str
+    user_unique_id: str
+    user_signature: str
+    nickname: str
+    avatar: str
+    liked_count: str
+    collected_count: str
+    comment_count: str
+    share_count: str
+    ip_location: str
+    aweme_url: str
+    cover_url: str
+    video_download_url: str
@@ -12,10 +12,37 @@
 # -*- coding: utf-8 -*-
 
 
+from typing import NamedTuple, Tuple
+
 from pydantic import BaseModel, Field
 
 
 class NoteUrlInfo(BaseModel):
     note_id: str = Field(title="note id")
     xsec_token: str = Field(title="xsec token")
-    xsec_source: str = Field(title="xsec source")
\ No newline at end of file
+    xsec_source: str = Field(title="xsec source")
+
+
+class XhsNoteRow(NamedTuple):
+    """
+    从笔记详情中投影出来的入库字段以及下载媒体需要的地址，解析完成后立即替换掉原始的大 dict
+    last_modify_ts 和 source_keyword 在入库时生成
+    """
+    note_id: str
+    type: str
+    title: str
+    desc: str
+    video_urls: Tuple[str, ...]
+    time: int
+    last_update_time: int
+    user_id: str
+    nickname: str
+    avatar: str
+    liked_count: str
+    collected_count: str
+    comment_count: str
+    share_count: str
+    ip_location: str
+    image_urls: Tuple[str, ...]
+    tag_list: str
+    xsec_token: str
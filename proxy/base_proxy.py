@@ -15,11 +15,11 @@
 # @Desc    : 爬虫 IP 获取实现
 # @Url     : 快代理HTTP实现，官方文档：https://www.kuaidaili.com/?ref=ldwkjqipvz6c
 import json
+import time
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 import config
-from cache.abs_cache import AbstractCache
 from cache.cache_factory import CacheFactory
 from tools.utils import utils
 
@@ -43,33 +43,159 @@ class ProxyProvider(ABC):
 
 
 class IpCache:
-    def __init__(self):
-        self.cache_client: AbstractCache = CacheFactory.create_cache(cache_type=config.CACHE_TYPE_MEMORY)
+    """
+    代理IP缓存, 按代理商维护一个按过期时间排序的索引和IP信息表
+    - memory: 只存在进程内
+    - redis: 过期时间索引存放在 sorted set, IP 信息存放在 hash, 同时在内存中做镜像,
+      列出有效IP只需要一次范围查询, 过期的IP在读取时自动清理
+    - tiered: redis 中的存储结构同上, 内存镜像是否有效由 TieredCache 的 L1 决定,
+      热路径上读IP不访问 redis, 其他进程写入新IP时通过 pub/sub 淘汰本进程的镜像
+    """
 
-    def set_ip(self, ip_key: str, ip_value_info: str, ex: int):
+    def __init__(self, cache_type: Optional[str] = None, redis_client=None, sync_interval: float = 5,
+                 tiered_cache=None):
         """
-        设置IP并带有过期时间，到期之后由 redis 负责删除
+        :param cache_type: memory | redis | tiered, 默认读取配置 IP_CACHE_TYPE
+        :param redis_client: 异步 redis 客户端, 为空时按配置创建
+        :param sync_interval: redis 模式下内存镜像的有效期(秒), 超过后重新从 redis 同步
+        :param tiered_cache: tiered 模式使用的 TieredCache, 为空时按配置创建
+        """
+        self._cache_type = cache_type or config.IP_CACHE_TYPE
+        self._expire_index: Dict[str, Dict[str, float]] = {}
+        self._payloads: Dict[str, Dict[str, str]] = {}
+        self._last_sync_ts: Dict[str, float] = {}
+        self._sync_interval = sync_interval
+        self._redis = None
+        self._tiered = None
+        if self._cache_type == config.CACHE_TYPE_TIERED:
+            self._tiered = tiered_cache or CacheFactory.create_cache(cache_type=config.CACHE_TYPE_TIERED)
+            self._redis = self._tiered.l2.client
+        elif self._cache_type == config.CACHE_TYPE_REDIS:
+            if redis_client is None:
+                redis_client = CacheFactory.create_cache(cache_type=config.CACHE_TYPE_ASYNC_REDIS).client
+            self._redis = redis_client
+
+    @staticmethod
+    def _index_key(proxy_brand_name: str) -> str:
+        return f"proxy_ip:{proxy_brand_name}:expire"
+
+    @staticmethod
+    def _payload_key(proxy_brand_name: str) -> str:
+        return f"proxy_ip:{proxy_brand_name}:payload"
+
+    @staticmethod
+    def _mirror_key(proxy_brand_name: str) -> str:
+        return f"proxy_ip:{proxy_brand_name}:mirror"
+
+    async def set_ip(self, proxy_brand_name: str, ip_key: str, ip_value_info: str, ex: int):
+        """
+        设置IP并带有过期时间，过期之后在读取时自动清理
+        :param proxy_brand_name: 代理商名称
         :param ip_key:
         :param ip_value_info:
-        :param ex:
+        :param ex: 有效时长(秒)
+        :return:
+        """
+        await self.set_ips(proxy_brand_name, [(ip_key, ip_value_info, ex)])
+
+    async def set_ips(self, proxy_brand_name: str, ip_items: List[Tuple[str, str, int]]):
+        """
+        批量设置IP, redis 模式下通过一次 pipeline 写入
+        :param proxy_brand_name: 代理商名称
+        :param ip_items: [(ip_key, ip_value_info, ex)]
         :return:
         """
-        self.cache_client.set(key=ip_key, value=ip_value_info, expire_time=ex)
+        if not ip_items:
+            return
+        now = time.time()
+        expire_index = self._expire_index.setdefault(proxy_brand_name, {})
+        payloads = self._payloads.setdefault(proxy_brand_name, {})
+        for ip_key, ip_value_info, ex in ip_items:
+            expire_index[ip_key] = now + ex
+            payloads[ip_key] = ip_value_info
+
+        if self._redis is None:
+            return
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(self._index_key(proxy_brand_name), {ip_key: now + ex for ip_key, _, ex in ip_items})
+            pipe.hset(self._payload_key(proxy_brand_name), mapping={ip_key: value for ip_key, value, _ in ip_items})
+            await pipe.execute()
+        if self._tiered is not None:
+            # 淘汰所有进程(包括本进程)的镜像标记, 下次读取时重新同步
+            await self._tiered.delete(self._mirror_key(proxy_brand_name))
+
+    async def _mirror_expired(self, proxy_brand_name: str) -> bool:
+        """
+        内存镜像是否需要重新从 redis 同步
+        :param proxy_brand_name:
+        :return:
+        """
+        if self._redis is None:
+            return False
+        if self._tiered is None:
+            return time.time() - self._last_sync_ts.get(proxy_brand_name, 0) >= self._sync_interval
+        await self._tiered.start_invalidation_listener()
+        return self._tiered.l1.get(self._mirror_key(proxy_brand_name)) is None
+
+    async def _sync_from_redis(self, proxy_brand_name: str) -> None:
+        """
+        清理 redis 中已过期的IP, 并通过一次范围查询把有效IP同步到内存镜像
+        :param proxy_brand_name:
+        :return:
+        """
+        now = time.time()
+        index_key, payload_key = self._index_key(proxy_brand_name), self._payload_key(proxy_brand_name)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.zrangebyscore(index_key, "-inf", now)
+            pipe.zremrangebyscore(index_key, "-inf", now)
+            pipe.zrangebyscore(index_key, now, "+inf", withscores=True)
+            expired_keys, _, valid_items = await pipe.execute()
+
+        valid_keys = [key.decode() if isinstance(key, bytes) else key for key, _ in valid_items]
+        async with self._redis.pipeline(transaction=False) as pipe:
+            if expired_keys:
+                pipe.hdel(payload_key, *expired_keys)
+            if valid_keys:
+                pipe.hmget(payload_key, valid_keys)
+            results = await pipe.execute() if (expired_keys or valid_keys) else []
+        payload_values = results[-1] if valid_keys else []
+
+        expire_index: Dict[str, float] = {}
+        payloads: Dict[str, str] = {}
+        for (_, expire_at), ip_key, payload in zip(valid_items, valid_keys, payload_values):
+            if payload is None:
+                continue
+            expire_index[ip_key] = expire_at
+            payloads[ip_key] = payload.decode() if isinstance(payload, bytes) else payload
+        self._expire_index[proxy_brand_name] = expire_index
+        self._payloads[proxy_brand_name] = payloads
+        self._last_sync_ts[proxy_brand_name] = now
+        if self._tiered is not None:
+            self._tiered.l1.set(self._mirror_key(proxy_brand_name), now, config.TIERED_CACHE_L1_MAX_TTL)
+
+    def _prune_expired(self, proxy_brand_name: str) -> None:
+        now = time.time()
+        expire_index = self._expire_index.get(proxy_brand_name, {})
+        payloads = self._payloads.get(proxy_brand_name, {})
+        for ip_key in [ip_key for ip_key, expire_at in expire_index.items() if expire_at <= now]:
+            del expire_index[ip_key]
+            payloads.pop(ip_key, None)
 
-    def load_all_ip(self, proxy_brand_name: str) -> List[IpInfoModel]:
+    async def load_all_ip(self, proxy_brand_name: str) -> List[IpInfoModel]:
         """
-        从 redis 中加载所有还未过期的 IP 信息
+        加载所有还未过期的 IP 信息, 按过期时间从晚到早排序
         :param proxy_brand_name: 代理商名称
         :return:
         """
         all_ip_list: List[IpInfoModel] = []
-        all_ip_keys: List[str] = self.cache_client.keys(pattern=f"{proxy_brand_name}_*")
         try:
-            for ip_key in all_ip_keys:
-                ip_value = self.cache_client.get(ip_key)
-                if not ip_value:
-                    continue
-                all_ip_list.append(IpInfoModel(**json.loads(ip_value)))
+            if await self._mirror_expired(proxy_brand_name):
+                await self._sync_from_redis(proxy_brand_name)
+            self._prune_expired(proxy_brand_name)
+            expire_index = self._expire_index.get(proxy_brand_name, {})
+            payloads = self._payloads.get(proxy_brand_name, {})
+            for ip_key in sorted(expire_index, key=expire_index.get, reverse=True):
+                all_ip_list.append(IpInfoModel(**json.loads(payloads[ip_key])))
         except Exception as e:
-            utils.logger.error("[IpCache.load_all_ip] get ip err from redis db", e)
+            utils.logger.error(f"[IpCache.load_all_ip] get ip err from cache: {e}")
         return all_ip_list
@@ -13,34 +13,139 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2023/12/2 13:45
 # @Desc    : ip代理池实现
+import asyncio
 import random
-from typing import Dict, List
+import time
+from typing import Dict, List, Optional, Tuple
 
 import httpx
 from tenacity import retry, stop_after_attempt, wait_fixed
 
 import config
 from proxy.providers import new_jisu_http_proxy, new_kuai_daili_proxy
-from tools import utils
+from tools import metrics, utils
 
 from .base_proxy import ProxyProvider
 from .types import IpInfoModel, ProviderNameEnum
 
 
+def proxy_key(proxy: IpInfoModel) -> str:
+    return f"{proxy.ip}:{proxy.port}"
+
+
+class ProxyHealth:
+    """
+    单个代理IP的健康度统计
+    """
+    __slots__ = ("latency_ewma", "success_count", "failure_count", "consecutive_failures", "block_count",
+                 "cooldown_until")
+
+    # 延迟的指数加权平均系数
+    LATENCY_ALPHA = 0.3
+
+    def __init__(self):
+        self.latency_ewma: float = 0.0
+        self.success_count: int = 0
+        self.failure_count: int = 0
+        self.consecutive_failures: int = 0
+        self.block_count: int = 0
+        self.cooldown_until: float = 0.0
+
+    @property
+    def success_rate(self) -> float:
+        # 拉普拉斯平滑, 新代理默认给一个中等成功率
+        return (self.success_count + 1) / (self.success_count + self.failure_count + 2)
+
+    @property
+    def score(self) -> float:
+        """
+        健康分, 成功率越高、延迟越低分数越高
+        """
+        return self.success_rate / (1 + self.latency_ewma)
+
+    def in_cooldown(self, now: float) -> bool:
+        return self.cooldown_until > now
+
+    def record_success(self, latency: float) -> Tuple[float, int]:
+        """
+        :return: 记录前的 (latency_ewma, consecutive_failures)，用于撤销这次记录
+        """
+        snapshot = (self.latency_ewma, self.consecutive_failures)
+        self.success_count += 1
+        self.consecutive_failures = 0
+        if self.latency_ewma == 0:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma = self.LATENCY_ALPHA * latency + (1 - self.LATENCY_ALPHA) * self.latency_ewma
+        return snapshot
+
+    def undo_success(self, snapshot: Tuple[float, int]) -> None:
+        self.success_count = max(self.success_count - 1, 0)
+        self.latency_ewma, self.consecutive_failures = snapshot
+
+    def record_failure(self, blocked: bool) -> None:
+        self.failure_count += 1
+        self.consecutive_failures += 1
+        if blocked:
+            self.block_count += 1
+
+
 class ProxyIpPool:
-    def __init__(self, ip_pool_count: int, enable_validate_ip: bool, ip_provider: ProxyProvider) -> None:
+    def __init__(self, ip_pool_count: int, enable_validate_ip: bool, ip_provider: ProxyProvider,
+                 cooldown_seconds: int = 60, max_consecutive_failures: int = 3, max_block_count: int = 2,
+                 valid_ip_url: str = "https://httpbin.org/ip", validate_timeout: float = 5,
+                 low_water_mark: int = 1, prefetch_interval: float = 10, expire_margin: int = 10) -> None:
         """
 
         Args:
             ip_pool_count:
             enable_validate_ip:
             ip_provider:
+            cooldown_seconds: 代理出现封禁信号后的冷却时间, 多次封禁按指数递增
+            max_consecutive_failures: 连续失败多少次后剔除该代理
+            max_block_count: 被封禁多少次后剔除该代理
+            valid_ip_url: 验证 IP 是否有效的地址
+            validate_timeout: 验证 IP 的超时时间(秒)
+            low_water_mark: 后台预取的低水位, 池中可用 IP 少于该值时立即补充
+            prefetch_interval: 后台预取任务的检查间隔(秒)
+            expire_margin: 距离过期不足该秒数的 IP 视为已过期
         """
-        self.valid_ip_url = "https://httpbin.org/ip"  # 验证 IP 是否有效的地址
+        self.valid_ip_url = valid_ip_url
+        self.validate_timeout = validate_timeout
+        self.low_water_mark = low_water_mark
+        self.prefetch_interval = prefetch_interval
+        self.expire_margin = expire_margin
         self.ip_pool_count = ip_pool_count
         self.enable_validate_ip = enable_validate_ip
         self.proxy_list: List[IpInfoModel] = []
         self.ip_provider: ProxyProvider = ip_provider
+        self.cooldown_seconds = cooldown_seconds
+        self.max_consecutive_failures = max_consecutive_failures
+        self.max_block_count = max_block_count
+        self._health: Dict[str, ProxyHealth] = {}
+        self._sticky_sessions: Dict[str, str] = {}
+        # 已剔除的代理及其过期时间, 过期后代理商的缓存里也不会再有, 不需要继续记录
+        self._evicted_keys: Dict[str, float] = {}
+        self._prefetch_task: Optional[asyncio.Task] = None
+        self._refill_task: Optional[asyncio.Task] = None
+        # 延迟到事件循环中创建, 避免绑定到错误的事件循环
+        self._refill_lock: Optional[asyncio.Lock] = None
+        self._refill_event: Optional[asyncio.Event] = None
+
+    def _notify_refill(self) -> None:
+        """
+        通知后台补充代理, 不等待补充完成; 没有开启后台预取时起一个一次性的补充任务
+        """
+        if self._refill_event is not None:
+            self._refill_event.set()
+        elif self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._safe_refill())
+
+    async def _safe_refill(self) -> None:
+        try:
+            await self._refill_proxies()
+        except Exception as e:
+            utils.logger.error(f"[ProxyIpPool._safe_refill] refill proxies error: {e}")
 
     async def load_proxies(self) -> None:
         """
@@ -48,7 +153,8 @@ class ProxyIpPool:
         Returns:
 
         """
-        self.proxy_list = await self.ip_provider.get_proxies(self.ip_pool_count)
+        self.proxy_list = []
+        await self._refill_proxies()
 
     async def _is_valid_proxy(self, proxy: IpInfoModel) -> bool:
         """
@@ -61,32 +167,196 @@ class ProxyIpPool:
             httpx_proxy = {
                 f"{proxy.protocol}": f"http://{proxy.user}:{proxy.password}@{proxy.ip}:{proxy.port}"
             }
-            async with httpx.AsyncClient(proxies=httpx_proxy) as client:
+            async with httpx.AsyncClient(proxies=httpx_proxy, timeout=self.validate_timeout) as client:
                 response = await client.get(self.valid_ip_url)
-            if response.status_code == 200:
-                return True
-            else:
-                return False
+            return response.status_code == 200
         except Exception as e:
             utils.logger.info(f"[ProxyIpPool._is_valid_proxy] testing {proxy.ip} err: {e}")
-            raise e
+            return False
+
+    def _is_expired(self, proxy: IpInfoModel, now: float) -> bool:
+        return bool(proxy.expired_time_ts) and proxy.expired_time_ts - self.expire_margin < now
+
+    def _prune_expired(self) -> None:
+        now = time.time()
+        if any(self._is_expired(proxy, now) for proxy in self.proxy_list):
+            self.proxy_list = [proxy for proxy in self.proxy_list if not self._is_expired(proxy, now)]
 
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def get_proxy(self) -> IpInfoModel:
         """
-        从代理池中随机提取一个代理IP
+        从代理池中随机提取一个代理IP, 池中的IP在入池时已经验证过,
+        开启后台预取后这里只是一次 O(1) 的出池操作, 不会等待网络
         :return:
         """
+        self._prune_expired()
         if len(self.proxy_list) == 0:
-            await self._reload_proxies()
+            await self._refill_proxies()
+            if len(self.proxy_list) == 0:
+                raise Exception("[ProxyIpPool.get_proxy] no valid proxy ip and again get it")
 
-        proxy = random.choice(self.proxy_list)
-        self.proxy_list.remove(proxy) # 取出来一个IP就应该移出掉
-        if self.enable_validate_ip:
-            if not await self._is_valid_proxy(proxy):
-                raise Exception("[ProxyIpPool.get_proxy] current ip invalid and again get it")
+        # 与队尾交换后出池, 取出来一个IP就应该移出掉
+        index = random.randrange(len(self.proxy_list))
+        self.proxy_list[index], self.proxy_list[-1] = self.proxy_list[-1], self.proxy_list[index]
+        proxy = self.proxy_list.pop()
+        if len(self.proxy_list) < self.low_water_mark:
+            self._notify_refill()
         return proxy
 
+    def health_of(self, proxy: IpInfoModel) -> ProxyHealth:
+        key = proxy_key(proxy)
+        if key not in self._health:
+            self._health[key] = ProxyHealth()
+        return self._health[key]
+
+    async def acquire(self, session_key: Optional[str] = None) -> IpInfoModel:
+        """
+        按健康分为单次请求挑选代理IP, 代理不会从池子中移出, 多个请求分摊到池中的所有IP上
+        :param session_key: 会话标识(如账号), 传入后同一个会话会一直使用同一个IP, 直到该IP被冷却或剔除
+        :return:
+        """
+        now = time.time()
+        if session_key:
+            sticky_key = self._sticky_sessions.get(session_key)
+            for proxy in self.proxy_list:
+                if proxy_key(proxy) == sticky_key and not self.health_of(proxy).in_cooldown(now):
+                    return proxy
+
+        self._prune_expired()
+        # 只有池子空了才在请求路径上等待补充, 其余情况交给后台补充
+        if not self.proxy_list:
+            await self._refill_proxies()
+        elif len(self.proxy_list) < self.ip_pool_count:
+            self._notify_refill()
+
+        candidates = [proxy for proxy in self.proxy_list if not self.health_of(proxy).in_cooldown(now)]
+        metrics.PROXY_POOL_SIZE.set(len(candidates))
+        if not candidates:
+            # 全部在冷却中时选最快结束冷却的那个
+            if not self.proxy_list:
+                raise Exception("[ProxyIpPool.acquire] proxy pool is empty")
+            candidates = [min(self.proxy_list, key=lambda p: self.health_of(p).cooldown_until)]
+
+        proxy = random.choices(candidates, weights=[self.health_of(p).score for p in candidates])[0]
+        if session_key:
+            self._sticky_sessions[session_key] = proxy_key(proxy)
+        return proxy
+
+    def report_success(self, proxy: IpInfoModel, latency: float) -> Tuple[float, int]:
+        """
+        上报一次成功的请求
+        :param proxy:
+        :param latency: 请求耗时(秒)
+        :return: 撤销用的快照，见 revoke_success
+        """
+        health = self.health_of(proxy)
+        snapshot = health.record_success(latency)
+        metrics.PROXY_HEALTH.set(health.score, proxy=proxy_key(proxy))
+        return snapshot
+
+    def revoke_success(self, proxy: IpInfoModel, snapshot: Tuple[float, int]) -> None:
+        """
+        撤销一次成功上报，HTTP 层看起来正常、但 client 解析响应体后发现是封禁时使用
+        :param proxy:
+        :param snapshot: report_success 的返回值
+        :return:
+        """
+        key = proxy_key(proxy)
+        if key in self._health:
+            self._health[key].undo_success(snapshot)
+
+    def report_failure(self, proxy: IpInfoModel, blocked: bool = False) -> None:
+        """
+        上报一次失败的请求, 出现封禁信号时进入冷却, 失败/封禁次数过多时剔除
+        :param proxy:
+        :param blocked: 是否为封禁信号(IPBlockError、461/471、blocked 响应等)
+        :return:
+        """
+        health = self.health_of(proxy)
+        health.record_failure(blocked)
+        metrics.PROXY_HEALTH.set(health.score, proxy=proxy_key(proxy))
+        if health.consecutive_failures >= self.max_consecutive_failures or health.block_count >= self.max_block_count:
+            utils.logger.info(f"[ProxyIpPool.report_failure] evict proxy {proxy.ip}, "
+                              f"failures: {health.consecutive_failures}, blocks: {health.block_count}")
+            self.evict(proxy)
+        elif blocked:
+            health.cooldown_until = time.time() + self.cooldown_seconds * (2 ** (health.block_count - 1))
+
+    def evict(self, proxy: IpInfoModel) -> None:
+        """
+        将代理从池中剔除
+        :param proxy:
+        :return:
+        """
+        key = proxy_key(proxy)
+        self.proxy_list = [p for p in self.proxy_list if proxy_key(p) != key]
+        self._health.pop(key, None)
+        self._evicted_keys[key] = proxy.expired_time_ts or float("inf")
+        metrics.PROXY_HEALTH.remove(proxy=key)
+        metrics.PROXY_POOL_SIZE.set(len(self.proxy_list))
+
+    async def _refill_proxies(self) -> None:
+        """
+        池中代理不足 ip_pool_count 时从代理商补充, 候选IP并发验证, 只有验证通过且未过期的IP才会入池
+        :return:
+        """
+        if self._refill_lock is None:
+            self._refill_lock = asyncio.Lock()
+        async with self._refill_lock:
+            self._prune_expired()
+            need_count = self.ip_pool_count - len(self.proxy_list)
+            if need_count <= 0:
+                return
+            now = time.time()
+            self._evicted_keys = {key: ts for key, ts in self._evicted_keys.items() if ts > now}
+            # 代理商会优先返回缓存中的IP, 其中包括池中已有和已剔除的IP, 多要这么多个才能拿到新IP
+            exists = {proxy_key(p) for p in self.proxy_list} | set(self._evicted_keys)
+            candidates: List[IpInfoModel] = []
+            for proxy in await self.ip_provider.get_proxies(need_count + len(exists)):
+                if proxy_key(proxy) not in exists and not self._is_expired(proxy, now):
+                    candidates.append(proxy)
+                    exists.add(proxy_key(proxy))
+
+            if self.enable_validate_ip and candidates:
+                valid_flags = await asyncio.gather(*[self._is_valid_proxy(proxy) for proxy in candidates])
+                candidates = [proxy for proxy, is_valid in zip(candidates, valid_flags) if is_valid]
+            self.proxy_list.extend(candidates[:need_count])
+
+    def start_prefetch(self) -> None:
+        """
+        开启后台预取任务, 让池中的IP保持在低水位之上
+        :return:
+        """
+        if self._prefetch_task is None:
+            self._prefetch_task = asyncio.create_task(self._prefetch_loop())
+
+    async def stop_prefetch(self) -> None:
+        """
+        停止后台预取任务和未完成的补充任务, 爬虫关闭时调用
+        :return:
+        """
+        for task in (self._prefetch_task, self._refill_task):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._prefetch_task = None
+        self._refill_task = None
+        self._refill_event = None
+
+    async def _prefetch_loop(self) -> None:
+        self._refill_event = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._refill_event.wait(), timeout=self.prefetch_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._refill_event.clear()
+            await self._safe_refill()
+
     async def _reload_proxies(self):
         """
         # 重新加载代理池
@@ -111,9 +381,14 @@ async def create_ip_pool(ip_pool_count: int, enable_validate_ip: bool) -> ProxyI
     """
     pool = ProxyIpPool(ip_pool_count=ip_pool_count,
                        enable_validate_ip=enable_validate_ip,
-                       ip_provider=IpProxyProvider.get(config.IP_PROXY_PROVIDER_NAME)
+                       ip_provider=IpProxyProvider.get(config.IP_PROXY_PROVIDER_NAME),
+                       valid_ip_url=config.IP_PROXY_VALIDATE_URL,
+                       validate_timeout=config.IP_PROXY_VALIDATE_TIMEOUT,
+                       low_water_mark=config.IP_PROXY_LOW_WATER_MARK,
                        )
     await pool.load_proxies()
+    if config.ENABLE_IP_PROXY_PREFETCH:
+        pool.start_prefetch()
     return pool
 
 
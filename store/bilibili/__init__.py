@@ -17,6 +17,7 @@
 from typing import List
 
 import config
+from tools import metrics
 from var import source_keyword_var
 
 from .bilibili_store_impl import *
@@ -37,7 +38,7 @@ class BiliStoreFactory:
             raise ValueError(
                 "[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json ..."
             )
-        return store_class()
+        return metrics.instrument_store(store_class(), "bili")
 
 
 async def update_bilibili_video(video_item: Dict):
@@ -13,9 +13,11 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/1/14 18:46
 # @Desc    :
-from typing import List
+from typing import List, Union
 
 import config
+from tools import metrics
+from model.m_douyin import DouyinAwemeRow
 from var import source_keyword_var
 
 from .douyin_store_impl import *
@@ -35,7 +37,7 @@ class DouyinStoreFactory:
             raise ValueError(
                 "[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json ..."
             )
-        return store_class()
+        return metrics.instrument_store(store_class(), "dy")
 
 
 def _extract_comment_image_list(comment_item: Dict) -> List[str]:
@@ -104,36 +106,71 @@ def _extract_video_download_url(aweme_detail: Dict) -> str:
     return actual_url_list[-1]
 
 
-async def update_douyin_aweme(aweme_item: Dict):
+def project_douyin_aweme(aweme_item: Dict) -> DouyinAwemeRow:
+    """
+    从视频详情中提取入库字段，调用方拿到结果后即可丢弃原始数据
+
+    Args:
+        aweme_item (Dict): 抖音视频详情
+
+    Returns:
+        DouyinAwemeRow: 入库字段
+    """
     aweme_id = aweme_item.get("aweme_id")
     user_info = aweme_item.get("author", {})
     interact_info = aweme_item.get("statistics", {})
+    return DouyinAwemeRow(
+        aweme_id=aweme_id,
+        aweme_type=str(aweme_item.get("aweme_type")),
+        title=aweme_item.get("desc", ""),
+        desc=aweme_item.get("desc", ""),
+        create_time=aweme_item.get("create_time"),
+        user_id=user_info.get("uid"),
+        sec_uid=user_info.get("sec_uid"),
+        short_user_id=user_info.get("short_id"),
+        user_unique_id=user_info.get("unique_id"),
+        user_signature=user_info.get("signature"),
+        nickname=user_info.get("nickname"),
+        avatar=user_info.get("avatar_thumb", {}).get("url_list", [""])[0],
+        liked_count=str(interact_info.get("digg_count")),
+        collected_count=str(interact_info.get("collect_count")),
+        comment_count=str(interact_info.get("comment_count")),
+        share_count=str(interact_info.get("share_count")),
+        ip_location=aweme_item.get("ip_label", ""),
+        aweme_url=f"https://www.douyin.com/video/{aweme_id}",
+        cover_url=_extract_content_cover_url(aweme_item),
+        video_download_url=_extract_video_download_url(aweme_item),
+    )
+
+
+async def update_douyin_aweme(aweme_item: Union[Dict, DouyinAwemeRow]):
+    row = aweme_item if isinstance(aweme_item, DouyinAwemeRow) else project_douyin_aweme(aweme_item)
     save_content_item = {
-        "aweme_id": aweme_id,
-        "aweme_type": str(aweme_item.get("aweme_type")),
-        "title": aweme_item.get("desc", ""),
-        "desc": aweme_item.get("desc", ""),
-        "create_time": aweme_item.get("create_time"),
-        "user_id": user_info.get("uid"),
-        "sec_uid": user_info.get("sec_uid"),
-        "short_user_id": user_info.get("short_id"),
-        "user_unique_id": user_info.get("unique_id"),
-        "user_signature": user_info.get("signature"),
-        "nickname": user_info.get("nickname"),
-        "avatar": user_info.get("avatar_thumb", {}).get("url_list", [""])[0],
-        "liked_count": str(interact_info.get("digg_count")),
-        "collected_count": str(interact_info.get("collect_count")),
-        "comment_count": str(interact_info.get("comment_count")),
-        "share_count": str(interact_info.get("share_count")),
-        "ip_location": aweme_item.get("ip_label", ""),
+        "aweme_id": row.aweme_id,
+        "aweme_type": row.aweme_type,
+        "title": row.title,
+        "desc": row.desc,
+        "create_time": row.create_time,
+        "user_id": row.user_id,
+        "sec_uid": row.sec_uid,
+        "short_user_id": row.short_user_id,
+        "user_unique_id": row.user_unique_id,
+        "user_signature": row.user_signature,
+        "nickname": row.nickname,
+        "avatar": row.avatar,
+        "liked_count": row.liked_count,
+        "collected_count": row.collected_count,
+        "comment_count": row.comment_count,
+        "share_count": row.share_count,
+        "ip_location": row.ip_location,
         "last_modify_ts": utils.get_current_timestamp(),
-        "aweme_url": f"https://www.douyin.com/video/{aweme_id}",
-        "cover_url": _extract_content_cover_url(aweme_item),
-        "video_download_url": _extract_video_download_url(aweme_item),
+        "aweme_url": row.aweme_url,
+        "cover_url": row.cover_url,
+        "video_download_url": row.video_download_url,
         "source_keyword": source_keyword_var.get(),
     }
     utils.logger.info(
-        f"[store.douyin.update_douyin_aweme] douyin aweme id:{aweme_id}, title:{save_content_item.get('title')}"
+        f"[store.douyin.update_douyin_aweme] douyin aweme id:{row.aweme_id}, title:{row.title}"
     )
     await DouyinStoreFactory.create_store().store_content(
         content_item=save_content_item
@@ -16,6 +16,7 @@
 from typing import List
 
 import config
+from tools import metrics
 from var import source_keyword_var
 
 from .kuaishou_store_impl import *
@@ -34,7 +35,7 @@ class KuaishouStoreFactory:
         if not store_class:
             raise ValueError(
                 "[KuaishouStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+        return metrics.instrument_store(store_class(), "ks")
 
 
 async def update_kuaishou_video(video_item: Dict):
@@ -13,6 +13,7 @@
 from typing import List
 
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
+from tools import metrics
 from var import source_keyword_var
 
 from . import tieba_store_impl
@@ -32,7 +33,7 @@ class TieBaStoreFactory:
         if not store_class:
             raise ValueError(
                 "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+        return metrics.instrument_store(store_class(), "tieba")
 
 
 async def batch_update_tieba_notes(note_list: List[TiebaNote]):
@@ -17,6 +17,7 @@
 import re
 from typing import List
 
+from tools import metrics
 from var import source_keyword_var
 
 from .weibo_store_image import *
@@ -36,7 +37,7 @@ class WeibostoreFactory:
         if not store_class:
             raise ValueError(
                 "[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+        return metrics.instrument_store(store_class(), "wb")
 
 
 async def batch_update_weibo_notes(note_list: List[Dict]):
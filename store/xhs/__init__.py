@@ -13,9 +13,11 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/1/14 17:34
 # @Desc    :
-from typing import List
+from typing import List, Union
 
 import config
+from tools import metrics
+from model.m_xiaohongshu import XhsNoteRow
 from var import source_keyword_var
 
 from . import xhs_store_impl
@@ -35,7 +37,7 @@ class XhsStoreFactory:
         store_class = XhsStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+        return metrics.instrument_store(store_class(), "xhs")
 
 
 def get_video_url_arr(note_item: Dict) -> List:
@@ -65,49 +67,77 @@ def get_video_url_arr(note_item: Dict) -> List:
     return videoArr
 
 
-async def update_xhs_note(note_item: Dict):
+def project_xhs_note(note_item: Dict) -> XhsNoteRow:
     """
-    更新小红书笔记
+    从笔记详情中提取入库字段和媒体地址，调用方拿到结果后即可丢弃原始数据
     Args:
         note_item:
 
     Returns:
 
     """
-    note_id = note_item.get("note_id")
     user_info = note_item.get("user", {})
     interact_info = note_item.get("interact_info", {})
     image_list: List[Dict] = note_item.get("image_list", [])
     tag_list: List[Dict] = note_item.get("tag_list", [])
+    image_urls = tuple(
+        img.get('url_default') if img.get('url_default') != '' else img.get('url', '')
+        for img in image_list
+    )
+    return XhsNoteRow(
+        note_id=note_item.get("note_id"),
+        type=note_item.get("type"),
+        title=note_item.get("title") or note_item.get("desc", "")[:255],
+        desc=note_item.get("desc", ""),
+        video_urls=tuple(get_video_url_arr(note_item)),
+        time=note_item.get("time"),
+        last_update_time=note_item.get("last_update_time", 0),
+        user_id=user_info.get("user_id"),
+        nickname=user_info.get("nickname"),
+        avatar=user_info.get("avatar"),
+        liked_count=interact_info.get("liked_count"),
+        collected_count=interact_info.get("collected_count"),
+        comment_count=interact_info.get("comment_count"),
+        share_count=interact_info.get("share_count"),
+        ip_location=note_item.get("ip_location", ""),
+        image_urls=image_urls,
+        tag_list=','.join([tag.get('name', '') for tag in tag_list if tag.get('type') == 'topic']),
+        xsec_token=note_item.get("xsec_token"),
+    )
+
+
+async def update_xhs_note(note_item: Union[Dict, XhsNoteRow]):
+    """
+    更新小红书笔记
+    Args:
+        note_item: 笔记详情或者 project_xhs_note 投影后的结果
 
-    for img in image_list:
-        if img.get('url_default') != '':
-            img.update({'url': img.get('url_default')})
-
-    video_url = ','.join(get_video_url_arr(note_item))
+    Returns:
 
+    """
+    row = note_item if isinstance(note_item, XhsNoteRow) else project_xhs_note(note_item)
     local_db_item = {
-        "note_id": note_item.get("note_id"), # 帖子id
-        "type": note_item.get("type"), # 帖子类型
-        "title": note_item.get("title") or note_item.get("desc", "")[:255], # 帖子标题
-        "desc": note_item.get("desc", ""), # 帖子描述
-        "video_url": video_url, # 帖子视频url
-        "time": note_item.get("time"), # 帖子发布时间
-        "last_update_time": note_item.get("last_update_time", 0), # 帖子最后更新时间
-        "user_id": user_info.get("user_id"), # 用户id
-        "nickname": user_info.get("nickname"), # 用户昵称
-        "avatar": user_info.get("avatar"), # 用户头像
-        "liked_count": interact_info.get("liked_count"), # 点赞数
-        "collected_count": interact_info.get("collected_count"), # 收藏数
-        "comment_count": interact_info.get("comment_count"), # 评论数
-        "share_count": interact_info.get("share_count"), # 分享数
-        "ip_location": note_item.get("ip_location", ""), # ip地址
-        "image_list": ','.join([img.get('url', '') for img in image_list]), # 图片url
-        "tag_list": ','.join([tag.get('name', '') for tag in tag_list if tag.get('type') == 'topic']), # 标签
+        "note_id": row.note_id, # 帖子id
+        "type": row.type, # 帖子类型
+        "title": row.title, # 帖子标题
+        "desc": row.desc, # 帖子描述
+        "video_url": ','.join(row.video_urls), # 帖子视频url
+        "time": row.time, # 帖子发布时间
+        "last_update_time": row.last_update_time, # 帖子最后更新时间
+        "user_id": row.user_id, # 用户id
+        "nickname": row.nickname, # 用户昵称
+        "avatar": row.avatar, # 用户头像
+        "liked_count": row.liked_count, # 点赞数
+        "collected_count": row.collected_count, # 收藏数
+        "comment_count": row.comment_count, # 评论数
+        "share_count": row.share_count, # 分享数
+        "ip_location": row.ip_location, # ip地址
+        "image_list": ','.join(row.image_urls), # 图片url
+        "tag_list": row.tag_list, # 标签
         "last_modify_ts": utils.get_current_timestamp(), # 最后更新时间戳（MediaCrawler程序生成的，主要用途在db存储的时候记录一条记录最新更新时间）
-        "note_url": f"https://www.xiaohongshu.com/explore/{note_id}?xsec_token={note_item.get('xsec_token')}&xsec_source=pc_search", # 帖子url
+        "note_url": f"https://www.xiaohongshu.com/explore/{row.note_id}?xsec_token={row.xsec_token}&xsec_source=pc_search", # 帖子url
         "source_keyword": source_keyword_var.get(), # 搜索关键词
-        "xsec_token": note_item.get("xsec_token"), # xsec_token
+        "xsec_token": row.xsec_token, # xsec_token
     }
     utils.logger.info(f"[store.xhs.update_xhs_note] xhs note: {local_db_item}")
     await XhsStoreFactory.create_store().store_content(local_db_item)
@@ -18,7 +18,7 @@ from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from store.zhihu.zhihu_store_impl import (ZhihuCsvStoreImplement,
                                           ZhihuDbStoreImplement,
                                           ZhihuJsonStoreImplement)
-from tools import utils
+from tools import metrics, utils
 from var import source_keyword_var
 
 
@@ -34,7 +34,7 @@ class ZhihuStoreFactory:
         store_class = ZhihuStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+        return metrics.instrument_store(store_class(), "zhihu")
 
 async def batch_update_zhihu_contents(contents: List[ZhihuContent]):
     """
@@ -0,0 +1,96 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : AsyncRedisCache 单测, 使用 fakeredis 模拟本地 redis
+
+import math
+import pickle
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from cache.async_redis_cache import AsyncRedisCache
+from cache.serializer import CODEC_PICKLE, CacheSerializer
+
+try:
+    from fakeredis.aioredis import FakeRedis
+except ImportError:  # pragma: no cover
+    FakeRedis = None
+
+
+class TestCacheSerializer(unittest.TestCase):
+
+    def test_round_trip(self):
+        serializer = CacheSerializer()
+        value = {"ip": "127.0.0.1", "port": 8080, "tags": ["a", "b"]}
+        self.assertEqual(serializer.loads(serializer.dumps(value)), value)
+
+    def test_fallback_to_pickle(self):
+        serializer = CacheSerializer()
+        data = serializer.dumps({1, 2, 3})
+        self.assertEqual(data[1], CODEC_PICKLE)
+        self.assertEqual(serializer.loads(data), {1, 2, 3})
+
+    def test_types_preserved(self):
+        from cache.serializer import CODEC_MSGPACK, CODEC_ORJSON
+        value = {"ids": (1, 2), "ratio": float("nan"), "nested": [{"k": (3,)}]}
+        for codec in (CODEC_MSGPACK, CODEC_ORJSON, CODEC_PICKLE):
+            try:
+                serializer = CacheSerializer(prefer_codec=codec)
+            except ValueError:  # 可选依赖未安装
+                continue
+            loaded = serializer.loads(serializer.dumps(value))
+            self.assertEqual(loaded["ids"], (1, 2))
+            self.assertEqual(loaded["nested"], [{"k": (3,)}])
+            self.assertTrue(math.isnan(loaded["ratio"]))
+            plain = {"a": [1, "b", None, 1.5], "c": {"d": True}}
+            self.assertEqual(serializer.dumps(plain)[1], codec)
+            self.assertEqual(serializer.loads(serializer.dumps(plain)), plain)
+
+    def test_load_legacy_pickle(self):
+        serializer = CacheSerializer()
+        self.assertEqual(serializer.loads(pickle.dumps([1, 2, 3])), [1, 2, 3])
+
+
+@unittest.skipIf(FakeRedis is None, "fakeredis is not installed")
+class TestAsyncRedisCache(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.redis_cache = AsyncRedisCache(redis_client=FakeRedis())
+
+    async def test_set_and_get(self):
+        await self.redis_cache.set('key', 'value', 10)
+        self.assertEqual(await self.redis_cache.get('key'), 'value')
+        self.assertIsNone(await self.redis_cache.get('not_exist'))
+
+    async def test_expire_time(self):
+        await self.redis_cache.set('key', 'value', 10)
+        ttl = await self.redis_cache.client.ttl('key')
+        self.assertTrue(0 < ttl <= 10)
+
+    async def test_mget_and_mset(self):
+        await self.redis_cache.mset({'key1': 'value1', 'key2': [1, 2]}, 10)
+        self.assertEqual(await self.redis_cache.mget(['key1', 'key2', 'key3']), ['value1', [1, 2], None])
+
+    async def test_keys(self):
+        await self.redis_cache.mset({f'kuaidaili_{i}': i for i in range(20)}, 10)
+        await self.redis_cache.set('other', 1, 10)
+        keys = await self.redis_cache.keys('kuaidaili_*')
+        self.assertEqual(sorted(keys), sorted(f'kuaidaili_{i}' for i in range(20)))
+
+    async def asyncTearDown(self):
+        await self.redis_cache.client.flushdb()
+        await self.redis_cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
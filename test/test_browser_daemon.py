@@ -0,0 +1,154 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 常驻浏览器登记表单测, 用本地 HTTP 服务模拟浏览器的 CDP 端口
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import IsolatedAsyncioTestCase, mock
+
+from tools.browser_daemon import DAEMON_USER_DATA_DIR_NAME, BrowserDaemon, BrowserDaemonError, is_process_alive
+
+
+class FakeCDPHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = b'{"Browser": "Chrome/126.0.0.0"}'
+        self.send_response(200 if self.path == "/json/version" else 404)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestBrowserDaemon(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeCDPHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.daemon = BrowserDaemon(state_file=os.path.join(self.tmp_dir.name, "daemon.json"), max_uses=2)
+        # 用当前进程模拟浏览器进程
+        self.fake_state = {"pid": os.getpid(), "port": self.server.server_address[1], "contexts": {}}
+        self.start_mock = mock.patch.object(BrowserDaemon, "start", side_effect=self._fake_start).start()
+        self.stop_mock = mock.patch.object(BrowserDaemon, "stop").start()
+
+    def _fake_start(self, headless=False):
+        state = dict(self.fake_state, contexts={})
+        self.daemon.save_state(state)
+        return state
+
+    async def test_start_when_missing_and_reuse(self):
+        state = await self.daemon.lease("xhs")
+        self.assertEqual(state["port"], self.server.server_address[1])
+        self.assertEqual(self.start_mock.call_count, 1)
+        self.daemon.release("xhs")
+
+        state = await self.daemon.lease("xhs")
+        self.assertEqual(self.start_mock.call_count, 1)
+        self.assertEqual(state["contexts"]["xhs"]["uses"], 2)
+        self.assertEqual(state["contexts"]["xhs"]["leased_by"], os.getpid())
+
+    async def test_lease_conflict(self):
+        other = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"])
+        try:
+            self.daemon.save_state(dict(self.fake_state, contexts={"dy": {"uses": 1, "leased_by": other.pid}}))
+            with self.assertRaises(BrowserDaemonError):
+                await self.daemon.lease("dy")
+            # 其他平台不受影响
+            await self.daemon.lease("bili")
+        finally:
+            other.kill()
+            other.wait()
+        # 持有者退出之后租约自动失效
+        state = await self.daemon.lease("dy")
+        self.assertEqual(state["contexts"]["dy"]["leased_by"], os.getpid())
+
+    async def test_recycle_after_max_uses(self):
+        for _ in range(2):
+            await self.daemon.lease("xhs")
+            self.daemon.release("xhs")
+        self.assertEqual(self.start_mock.call_count, 1)
+        state = await self.daemon.lease("xhs")
+        self.assertEqual(self.stop_mock.call_count, 1)
+        self.assertEqual(self.start_mock.call_count, 2)
+        self.assertEqual(state["contexts"]["xhs"]["uses"], 1)
+
+    async def test_unhealthy_daemon_restart(self):
+        self.daemon.save_state(dict(self.fake_state, port=1))
+        await self.daemon.lease("zhihu")
+        self.assertEqual(self.stop_mock.call_count, 1)
+        self.assertEqual(self.start_mock.call_count, 1)
+
+    async def test_concurrent_leases(self):
+        self.daemon.save_state(dict(self.fake_state, contexts={}))
+        other = BrowserDaemon(state_file=self.daemon.state_file, max_uses=2)
+        await asyncio.gather(self.daemon.lease("xhs"), other.lease("dy"), self.daemon.lease("bili"))
+        # 读取 -> 修改 -> 写回 串行执行，后写入的租约不会覆盖先写入的
+        contexts = self.daemon.load_state()["contexts"]
+        self.assertEqual(sorted(contexts), ["bili", "dy", "xhs"])
+        self.assertTrue(all(info["uses"] == 1 for info in contexts.values()))
+        self.assertEqual(self.start_mock.call_count, 0)
+
+    async def test_async_release(self):
+        await self.daemon.lease("xhs")
+        async with self.daemon.async_locked():
+            # 锁被持有时归还操作在事件循环中等待，不阻塞其他协程
+            release_task = asyncio.create_task(self.daemon.async_release("xhs"))
+            await asyncio.sleep(0.1)
+            self.assertFalse(release_task.done())
+        await release_task
+        self.assertIsNone(self.daemon.load_state()["contexts"]["xhs"]["leased_by"])
+
+    async def asyncTearDown(self):
+        mock.patch.stopall()
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp_dir.cleanup()
+
+
+@unittest.skipIf(sys.platform == "win32", "按进程组结束浏览器只在类 Unix 系统上测试")
+class TestBrowserDaemonStop(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.daemon = BrowserDaemon(state_file=os.path.join(self.tmp_dir.name, "daemon.json"))
+
+    def _spawn(self, *args: str) -> subprocess.Popen:
+        # 额外的参数只是为了出现在命令行中，用独立的进程组避免结束进程组时影响测试进程
+        return subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)", *args],
+                                start_new_session=True)
+
+    def test_stop_daemon_browser(self):
+        process = self._spawn("--remote-debugging-port=9333", f"--user-data-dir=/tmp/{DAEMON_USER_DATA_DIR_NAME}")
+        self.daemon.save_state({"pid": process.pid, "port": 9333, "contexts": {}})
+        self.daemon.stop()
+        process.wait(timeout=5)
+        self.assertFalse(os.path.exists(self.daemon.state_file))
+
+    def test_stop_skips_reused_pid(self):
+        process = self._spawn()
+        try:
+            self.daemon.save_state({"pid": process.pid, "port": 9333, "contexts": {}})
+            self.daemon.stop()
+            self.assertTrue(is_process_alive(process.pid), msg="pid 被其他进程复用时不应该结束该进程")
+            self.assertFalse(os.path.exists(self.daemon.state_file))
+        finally:
+            process.kill()
+            process.wait()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
@@ -0,0 +1,41 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 文本分析跟随速度向量化计算单测
+import unittest
+
+import pandas as pd
+
+from text_analysis.benchmark_follow_speed import run_benchmark
+from text_analysis.utils import child_comment_mask, follow_speed_minutes
+
+
+class TestFollowSpeed(unittest.TestCase):
+    def test_matches_row_wise_apply(self):
+        # run_benchmark 内部会断言两种实现结果一致
+        result = run_benchmark(2000)
+        self.assertGreater(result["apply_seconds"], 0)
+
+    def test_edge_cases(self):
+        df = pd.DataFrame({
+            "comment_id": ["1", "2", "3", "4", "5"],
+            "parent_comment_id": ["0", "1", "1", "404", "2"],
+            "create_time": pd.to_datetime([1000, 1600, 400, 2000, 1600], unit="s"),
+        })
+        is_child = child_comment_mask(df["parent_comment_id"])
+        self.assertEqual(is_child.tolist(), [False, True, True, True, True])
+        speeds = follow_speed_minutes(df[is_child], df)
+        # 正常、早于父评论、父评论不存在、同一时间
+        self.assertEqual(speeds.tolist()[0], 10.0)
+        self.assertTrue(speeds.iloc[1:3].isna().all())
+        self.assertEqual(speeds.tolist()[3], 0.0)
+        self.assertEqual(speeds.index.tolist(), [1, 2, 3, 4])
@@ -0,0 +1,65 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 启动导入耗时基准，基于 python -X importtime，防止重新引入重量级的全局导入
+import os
+import subprocess
+import sys
+import unittest
+from typing import Dict
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# import main 的累计耗时上限(毫秒)，留足余量只用来发现明显的回退
+MAIN_IMPORT_BUDGET_MS = 1500
+
+# 爬虫启动阶段不应该加载的重量级依赖
+HEAVY_MODULES = ("pandas", "matplotlib", "jieba", "wordcloud", "cv2", "PIL")
+
+
+def import_times(code: str) -> Dict[str, int]:
+    """
+    在子进程中执行代码并解析 -X importtime 的输出
+    :param code:
+    :return: {模块名: 累计导入耗时(微秒)}
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=PROJECT_ROOT,
+                            capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        raise AssertionError(result.stderr[-2000:])
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line.split("|")
+        if cumulative.strip().isdigit():
+            times[module.strip()] = int(cumulative)
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+    def test_main_import_is_lazy(self):
+        times = import_times("import main")
+        self.assertFalse([m for m in times if m.startswith("media_platform")], "平台爬虫应该按需导入")
+        self.assertFalse([m for m in times if m.split(".")[0] in HEAVY_MODULES + ("execjs",)])
+        self.assertLess(times["main"] / 1000, MAIN_IMPORT_BUDGET_MS)
+
+    def test_single_platform_import(self):
+        times = import_times(
+            "import main\n"
+            "main.CrawlerFactory.get_crawler_class('dy')\n"
+            "from media_platform.douyin import help\n"
+            "assert help._douyin_sign_obj is None, 'douyin.js should be compiled lazily'\n"
+        )
+        self.assertIn("media_platform.douyin.core", times)
+        self.assertFalse([m for m in times if m.startswith("media_platform.xhs")])
+        self.assertFalse([m for m in times if m.split(".")[0] in HEAVY_MODULES])
@@ -0,0 +1,70 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : JSON 编解码层单测，各实现的解析结果和签名用的紧凑格式需要与标准库一致
+import json
+import unittest
+
+import httpx
+
+from tools import json_codec
+
+PAYLOAD = {"aweme_id": "7300000000000000000", "desc": "测试视频 #话题", "digg_count": 12, "ratio": 0.5,
+           "list": [1, None, True], "nested": {"url": "https://example.com/a?b=1&c=2"}}
+
+
+class TestJsonCodec(unittest.TestCase):
+    def tearDown(self):
+        json_codec.set_codec(json_codec.JSON_CODEC_AUTO)
+
+    def test_codecs_roundtrip(self):
+        for name in json_codec.available_codecs():
+            json_codec.set_codec(name)
+            text = json_codec.dumps(PAYLOAD)
+            self.assertIn("测试视频", text)
+            self.assertEqual(json_codec.loads(text), PAYLOAD)
+            self.assertEqual(json_codec.loads(text.encode("utf-8")), PAYLOAD)
+
+    def test_compact_matches_stdlib(self):
+        expected = json.dumps(PAYLOAD, separators=(",", ":"), ensure_ascii=False)
+        for name in json_codec.available_codecs():
+            json_codec.set_codec(name)
+            self.assertEqual(json_codec.dumps(PAYLOAD, compact=True), expected)
+
+    def test_store_formats_match_stdlib(self):
+        for indent in (None, 2, 4):
+            expected = json.dumps(PAYLOAD, ensure_ascii=False, indent=indent)
+            for name in json_codec.available_codecs():
+                json_codec.set_codec(name)
+                self.assertEqual(json_codec.dumps(PAYLOAD, indent=indent), expected, msg=f"{name} indent={indent}")
+
+    def test_fallback_to_stdlib(self):
+        big_int = 2 ** 70
+        for name in json_codec.available_codecs():
+            json_codec.set_codec(name)
+            self.assertEqual(json_codec.loads(f'{{"id": {big_int}}}'), {"id": big_int})
+            self.assertEqual(json_codec.dumps({"id": big_int}, compact=True), f'{{"id":{big_int}}}')
+            with self.assertRaises(json.JSONDecodeError):
+                json_codec.loads("{invalid")
+
+    def test_response_json(self):
+        response = httpx.Response(200, content=json.dumps(PAYLOAD).encode("utf-8"))
+        self.assertEqual(json_codec.response_json(response), PAYLOAD)
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            json_codec.set_codec("unknown")
+
+    def test_benchmark(self):
+        result = json_codec.benchmark([json.dumps(PAYLOAD).encode("utf-8")], rounds=2)
+        self.assertEqual(set(result), set(json_codec.available_codecs()))
+        self.assertTrue(all("store_dumps_ms" in cost for cost in result.values()))
@@ -0,0 +1,57 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+import config
+from tools import lightweight_browser
+
+
+class TestLightweightBrowser(unittest.TestCase):
+    def test_should_block(self):
+        self.assertTrue(lightweight_browser.should_block("image", "https://sns-img.xhscdn.com/a.jpg"))
+        self.assertTrue(lightweight_browser.should_block("media", "https://v.douyinvod.com/a.mp4"))
+        self.assertTrue(lightweight_browser.should_block("xhr", "https://hm.baidu.com/hm.gif"))
+        self.assertFalse(lightweight_browser.should_block("script", "https://fe-static.xhscdn.com/sign.js"))
+        self.assertFalse(lightweight_browser.should_block("document", "https://www.bilibili.com"))
+
+    def test_launch_args(self):
+        with mock.patch.object(config, "ENABLE_SIGN_ONLY_BROWSER", False):
+            self.assertEqual(lightweight_browser.launch_args(), [])
+        with mock.patch.object(config, "ENABLE_SIGN_ONLY_BROWSER", True):
+            self.assertIn("--disable-gpu", lightweight_browser.launch_args())
+
+    def test_compare_alternates_modes(self):
+        calls = []
+
+        async def measure_startup(url, sign_only):
+            calls.append(sign_only)
+            return {"startup_s": 1.0, "rss_mb": 100.0}
+
+        with mock.patch.object(lightweight_browser, "measure_startup", measure_startup):
+            result = asyncio.run(lightweight_browser.compare("https://www.xiaohongshu.com", rounds=2))
+        self.assertEqual(calls, [False, True, False, True])
+        self.assertEqual((len(result["off"]), len(result["on"])), (2, 2))
+
+    @unittest.skipUnless(os.path.isdir("/proc"), "procfs not available")
+    def test_browser_rss_counts_children(self):
+        child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"])
+        try:
+            self.assertGreater(lightweight_browser.browser_rss_mb(), 0)
+        finally:
+            child.kill()
+            child.wait()
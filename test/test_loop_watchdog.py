@@ -0,0 +1,55 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 事件循环阻塞看门狗单测
+import asyncio
+import time
+from unittest import IsolatedAsyncioTestCase
+
+from tools.loop_watchdog import LoopWatchdog
+
+
+def sync_sign():
+    time.sleep(0.3)
+
+
+async def fetch_page():
+    await asyncio.sleep(0.01)
+    sync_sign()
+
+
+class TestLoopWatchdog(IsolatedAsyncioTestCase):
+    async def test_reports_blocking_coroutine(self):
+        watchdog = LoopWatchdog(threshold=0.1, interval=0.02)
+        watchdog.start()
+        await asyncio.sleep(0.05)
+        await asyncio.create_task(fetch_page(), name="fetch-task")
+        await asyncio.sleep(0.1)
+        watchdog.stop()
+
+        self.assertEqual(len(watchdog.events), 1)
+        event = watchdog.events[0]
+        self.assertTrue(event.location.startswith("sync_sign (test"), event.location)
+        self.assertEqual(event.task_name, "fetch-task")
+        self.assertEqual(event.coroutine, "fetch_page")
+        self.assertIn("time.sleep(0.3)", event.stack)
+        self.assertGreater(event.duration, 0.2)
+        self.assertIn("sync_sign", watchdog.summary()[1])
+
+    async def test_no_blocking(self):
+        watchdog = LoopWatchdog(threshold=0.1, interval=0.02)
+        watchdog.start()
+        for _ in range(5):
+            await asyncio.sleep(0.02)
+        watchdog.stop()
+        self.assertEqual(watchdog.events, [])
+        self.assertIn("no event loop blocking", watchdog.summary()[0])
@@ -0,0 +1,99 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 运行指标单测
+import asyncio
+import unittest
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, patch
+
+import httpx
+
+from cache.response_cache import RESPONSE_CACHE_MODE_OFF, ResponseCache, set_response_cache
+from tools import http_transport, metrics
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_render_prometheus_text(self):
+        registry = metrics.MetricsRegistry()
+        counter = registry.counter("test_total", "test counter", ("platform",))
+        histogram = registry.histogram("test_seconds", "test histogram", ("platform",), buckets=(0.1, 1.0))
+        counter.inc(platform="dy")
+        counter.inc(2, platform="dy")
+        histogram.observe(0.05, platform="dy")
+        histogram.observe(0.5, platform="dy")
+        histogram.observe(5, platform="dy")
+        text = registry.render()
+        self.assertIn('test_total{platform="dy"} 3', text)
+        self.assertIn('test_seconds_bucket{platform="dy",le="0.1"} 1', text)
+        self.assertIn('test_seconds_bucket{platform="dy",le="1.0"} 2', text)
+        self.assertIn('test_seconds_bucket{platform="dy",le="+Inf"} 3', text)
+        self.assertIn('test_seconds_count{platform="dy"} 3', text)
+        with self.assertRaises(ValueError):
+            registry.counter("test_total", "duplicated")
+
+    def test_endpoint_of(self):
+        self.assertEqual(metrics.endpoint_of("https://m.weibo.cn/detail/4987654321?x=1"), "/detail/:id")
+        self.assertEqual(metrics.endpoint_of("https://www.douyin.com/aweme/v1/web/aweme/detail/?aweme_id=1"),
+                         "/aweme/v1/web/aweme/detail/")
+
+
+class TestInstrumentation(IsolatedAsyncioTestCase):
+    async def test_semaphore_gauges(self):
+        semaphore = metrics.semaphore("test_sem", 1)
+        async with semaphore:
+            waiter = asyncio.ensure_future(semaphore.acquire())
+            await asyncio.sleep(0)
+            self.assertEqual(metrics.CONCURRENCY_IN_USE.value(platform="test_sem"), 1)
+            self.assertEqual(metrics.CONCURRENCY_WAITING.value(platform="test_sem"), 1)
+        await waiter
+        semaphore.release()
+        self.assertEqual(metrics.CONCURRENCY_IN_USE.value(platform="test_sem"), 0)
+        self.assertEqual(metrics.CONCURRENCY_WAITING.value(platform="test_sem"), 0)
+
+    async def test_instrument_store(self):
+        class FakeStore:
+            name = "fake"
+
+            async def store_comment(self, comment_item):
+                return comment_item
+
+        store = metrics.instrument_store(FakeStore(), "test_store")
+        self.assertEqual(store.name, "fake")
+        self.assertEqual(await store.store_comment({"id": 1}), {"id": 1})
+        self.assertEqual(metrics.ITEMS_STORED.value(platform="test_store", kind="comment"), 1)
+        self.assertEqual(metrics.STORE_DURATION.stats(platform="test_store", kind="comment")[0], 1)
+        self.assertEqual(metrics.STORE_PENDING.value(platform="test_store"), 0)
+        self.assertTrue(any("test_store" in line for line in metrics.SummaryReporter().summary()))
+
+    async def test_send_request_observed(self):
+        set_response_cache(ResponseCache(RESPONSE_CACHE_MODE_OFF, None, {}, []))
+        self.addCleanup(set_response_cache, None)
+        url = "https://example.com/api/test_metrics/"
+        with patch.object(http_transport, "_send", AsyncMock(return_value=httpx.Response(200, text="{}"))):
+            await http_transport.send_request("test_req", "GET", url)
+        with patch.object(http_transport, "_send", AsyncMock(side_effect=httpx.ConnectError("down"))):
+            with self.assertRaises(httpx.ConnectError):
+                await http_transport.send_request("test_req", "GET", url)
+        endpoint = "/api/test_metrics/"
+        self.assertEqual(metrics.REQUESTS_TOTAL.value(platform="test_req", endpoint=endpoint, status="200"), 1)
+        self.assertEqual(metrics.REQUESTS_TOTAL.value(platform="test_req", endpoint=endpoint, status="error"), 1)
+        self.assertEqual(metrics.REQUEST_DURATION.stats(platform="test_req", endpoint=endpoint)[0], 2)
+
+    async def test_http_endpoint(self):
+        server = metrics.start_http_server(0)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        async with httpx.AsyncClient() as client:
+            response = await client.get(f"http://127.0.0.1:{server.server_address[1]}/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("# TYPE mediacrawler_requests_total counter", response.text)
@@ -0,0 +1,61 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : MinHash LSH 近重复评论候选对单测
+import itertools
+import unittest
+
+import numpy as np
+
+from text_analysis.core.near_duplicate import MinHashLSH, char_shingles, optimal_bands
+
+CHARS = list("的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产")
+
+
+def jaccard(a: str, b: str) -> float:
+    x, y = set(char_shingles(a)), set(char_shingles(b))
+    return len(x & y) / len(x | y)
+
+
+class TestMinHashLSH(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        originals = ["".join(rng.choice(CHARS, size=20)) for _ in range(40)]
+        # 每条原评论带一条改了结尾的模仿评论，其余是随机评论
+        self.texts = originals + [t[:-2] + "哈哈" for t in originals] + \
+            ["".join(rng.choice(CHARS, size=20)) for _ in range(200)]
+
+    def test_recall_against_brute_force(self):
+        pairs = {tuple(p) for p in MinHashLSH(threshold=0.5).candidate_pairs(self.texts)}
+        expected = {(i, j) for i, j in itertools.combinations(range(len(self.texts)), 2)
+                    if jaccard(self.texts[i], self.texts[j]) >= 0.7}
+        self.assertEqual(len(expected), 40)
+        self.assertLessEqual(expected, pairs)
+        # 候选对远少于全量两两比较
+        self.assertLess(len(pairs), len(self.texts) * 2)
+
+    def test_time_window(self):
+        texts = ["这个视频拍得太好了支持一下"] * 4 + [""]
+        times = [0, 100, 5000, 5050, 0]
+        pairs = MinHashLSH().candidate_pairs(texts, times, max_time_diff=3600)
+        self.assertEqual(pairs.tolist(), [[0, 1], [2, 3]])
+        self.assertEqual(len(MinHashLSH().candidate_pairs(texts)), 6)
+
+    def test_max_neighbors_bounds_huge_buckets(self):
+        texts = ["刷屏刷屏刷屏刷屏"] * 100
+        pairs = MinHashLSH(max_neighbors=5).candidate_pairs(texts, np.arange(100))
+        self.assertEqual(len(pairs), sum(100 - k for k in range(1, 6)))
+
+    def test_optimal_bands(self):
+        bands, rows = optimal_bands(0.5, 128)
+        self.assertLessEqual(bands * rows, 128)
+        self.assertAlmostEqual((1 / bands) ** (1 / rows), 0.5, delta=0.05)
@@ -0,0 +1,87 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : PagePool 单测, 使用假的 BrowserContext / Page 代替真实浏览器
+from unittest import IsolatedAsyncioTestCase
+
+from tools.page_pool import PagePool
+
+
+class FakePage:
+    def __init__(self, name: str):
+        self.name = name
+        self.closed = False
+        self.url = ""
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def crash(self):
+        self.handlers["crash"](self)
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    async def goto(self, url, timeout=None):
+        self.url = url
+
+    async def evaluate(self, expression, arg=None):
+        if self.closed:
+            raise RuntimeError("Target page, context or browser has been closed")
+        return self.name
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self):
+        self.created = 0
+
+    async def new_page(self) -> FakePage:
+        self.created += 1
+        return FakePage(f"page-{self.created}")
+
+
+class TestPagePool(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.context = FakeContext()
+        self.primary = FakePage("primary")
+        self.pool = PagePool(self.context, "https://example.com", size=3, primary_page=self.primary)
+
+    async def test_round_robin(self):
+        await self.pool.start()
+        self.assertEqual(len(self.pool.pages), 3)
+        self.assertTrue(all(page.url == "https://example.com" for page in self.pool.pages[1:]))
+        names = [await self.pool.evaluate("() => 1") for _ in range(6)]
+        self.assertEqual(names, ["primary", "page-1", "page-2"] * 2)
+
+    async def test_recycle_crashed_page(self):
+        await self.pool.start()
+        self.pool.pages[1].crash()
+        names = [await self.pool.evaluate("() => 1") for _ in range(3)]
+        self.assertEqual(names, ["primary", "page-3", "page-2"])
+        self.assertEqual(self.context.created, 3)
+
+    async def test_retry_on_closed_page(self):
+        self.primary.closed = True
+        self.assertEqual(await self.pool.evaluate("() => 1"), "page-1")
+        self.assertEqual(self.pool.pages[0].name, "page-1")
+
+    async def test_close_keep_primary(self):
+        await self.pool.start()
+        created = self.pool.pages[1:]
+        await self.pool.close()
+        self.assertEqual(self.pool.pages, [self.primary])
+        self.assertTrue(all(page.closed for page in created))
+        self.assertFalse(self.primary.closed)
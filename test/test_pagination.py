@@ -0,0 +1,106 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 创作者分页迭代器单测, 用假的分页接口代替网络请求
+from typing import Dict, List
+from unittest import IsolatedAsyncioTestCase
+
+from media_platform.douyin.client import DOUYINClient
+from media_platform.kuaishou.client import KuaiShouClient
+from media_platform.weibo.client import WeiboClient
+from media_platform.xhs.client import XiaoHongShuClient
+
+
+class TestCreatorPagination(IsolatedAsyncioTestCase):
+    async def test_douyin_iter_user_aweme_posts(self):
+        client = DOUYINClient(headers={}, playwright_page=None, cookie_dict={})
+        pages = [
+            {"has_more": 1, "max_cursor": "1", "aweme_list": [{"aweme_id": "1"}, {"aweme_id": "2"}]},
+            {"has_more": 0, "max_cursor": "2", "aweme_list": [{"aweme_id": "3"}]},
+        ]
+        cursors = []
+
+        async def get_user_aweme_posts(sec_user_id: str, max_cursor: str = "") -> Dict:
+            cursors.append(max_cursor)
+            return pages[len(cursors) - 1]
+
+        client.get_user_aweme_posts = get_user_aweme_posts
+        got = [page async for page in client.iter_user_aweme_posts("sec_uid")]
+        self.assertEqual([[item["aweme_id"] for item in page] for page in got], [["1", "2"], ["3"]])
+        self.assertEqual(cursors, ["", "1"])
+
+        # 旧的聚合接口仍然返回全部结果并对每页调用回调
+        cursors.clear()
+        callback_pages: List[List[Dict]] = []
+
+        async def callback(aweme_list: List[Dict]):
+            callback_pages.append(aweme_list)
+
+        result = await client.get_all_user_aweme_posts("sec_uid", callback=callback)
+        self.assertEqual(len(result), 3)
+        self.assertEqual(len(callback_pages), 2)
+
+    async def test_xhs_iter_notes_by_creator_max_count(self):
+        client = XiaoHongShuClient(headers={}, playwright_page=None, cookie_dict={})
+        requested = []
+
+        async def get_notes_by_creator(user_id: str, cursor: str) -> Dict:
+            requested.append(cursor)
+            page = len(requested)
+            return {"has_more": True, "cursor": str(page),
+                    "notes": [{"note_id": f"{page}-{i}"} for i in range(3)]}
+
+        client.get_notes_by_creator = get_notes_by_creator
+        got = [page async for page in client.iter_notes_by_creator("uid", crawl_interval=0, max_count=5)]
+        self.assertEqual([len(page) for page in got], [3, 2])
+        self.assertEqual(requested, ["", "1"])
+
+        # 提前结束迭代时不会继续请求下一页
+        requested.clear()
+        async for _ in client.iter_notes_by_creator("uid", crawl_interval=0, max_count=100):
+            break
+        self.assertEqual(requested, [""])
+
+    async def test_kuaishou_iter_videos_by_creator(self):
+        client = KuaiShouClient(headers={}, playwright_page=None, cookie_dict={})
+        pages = [
+            {"visionProfilePhotoList": {"pcursor": "1", "feeds": [{"photo": {"id": "1"}}, {"photo": {"id": "2"}}]}},
+            {"visionProfilePhotoList": {"pcursor": "no_more", "feeds": [{"photo": {"id": "3"}}]}},
+        ]
+        cursors = []
+
+        async def get_video_by_creater(userId: str, pcursor: str = "") -> Dict:
+            cursors.append(pcursor)
+            return pages[len(cursors) - 1]
+
+        client.get_video_by_creater = get_video_by_creater
+        got = [page async for page in client.iter_videos_by_creator("uid", crawl_interval=0)]
+        self.assertEqual([[item["photo"]["id"] for item in page] for page in got], [["1", "2"], ["3"]])
+        self.assertEqual(cursors, ["", "1"])
+
+    async def test_weibo_iter_notes_by_creator_id(self):
+        client = WeiboClient(headers={}, playwright_page=None, cookie_dict={})
+        requested = []
+
+        async def get_notes_by_creator(creator: str, container_id: str, since_id: str = "0") -> Dict:
+            requested.append(since_id)
+            page = len(requested)
+            cards = [{"card_type": 9, "mblog": {"id": f"{page}-{i}"}} for i in range(10)] + [{"card_type": 11}]
+            return {"cardlistInfo": {"since_id": str(page), "total": 20}, "cards": cards}
+
+        client.get_notes_by_creator = get_notes_by_creator
+        got = [page async for page in client.iter_notes_by_creator_id("uid", "cid", crawl_interval=0)]
+        self.assertEqual([len(page) for page in got], [10, 10], msg="只保留微博类型的卡片")
+        self.assertEqual(requested, ["", "1"])
+
+        result = await client.get_all_notes_by_creator_id("uid", "cid", crawl_interval=0)
+        self.assertEqual(len(result), 20)
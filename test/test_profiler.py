@@ -0,0 +1,75 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : --profile 模式单测
+import asyncio
+import os
+import pstats
+import tempfile
+import time
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from tools import profiler
+
+
+def busy_loop(seconds: float) -> int:
+    total, deadline = 0, time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        total += 1
+    return total
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_sample_mode(self):
+        with profiler.profile("sample", "unit", base_dir=self.tmp_dir.name) as run_profiler:
+            busy_loop(0.2)
+        with open(os.path.join(run_profiler.output_dir, "stacks.collapsed"), encoding="utf-8") as f:
+            collapsed = f.read()
+        self.assertIn("busy_loop (test_profiler.py", collapsed)
+        stack, count = collapsed.splitlines()[0].rsplit(" ", 1)
+        self.assertTrue(count.isdigit())
+        with open(os.path.join(run_profiler.output_dir, "summary.txt"), encoding="utf-8") as f:
+            summary = f.read()
+        self.assertIn("busy_loop", summary)
+        self.assertIn("no event loop", summary)
+        self.assertTrue(os.path.exists(os.path.join(run_profiler.output_dir, "memory.snapshot")))
+
+    def test_cprofile_mode(self):
+        with profiler.profile("cprofile", "unit", base_dir=self.tmp_dir.name) as run_profiler:
+            busy_loop(0.05)
+        stats = pstats.Stats(os.path.join(run_profiler.output_dir, "profile.prof"))
+        self.assertTrue([func for func in stats.stats if func[2] == "busy_loop"])
+
+    def test_off(self):
+        with profiler.profile("off", "unit", base_dir=self.tmp_dir.name) as run_profiler:
+            pass
+        self.assertIsNone(run_profiler)
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+
+class TestLoopLag(IsolatedAsyncioTestCase):
+    async def test_blocking_call_shows_up_as_lag(self):
+        monitor = profiler.LoopLagMonitor(interval=0.01)
+        monitor.start()
+        await asyncio.sleep(0.02)
+        time.sleep(0.15)
+        await asyncio.sleep(0.02)
+        monitor.stop()
+        self.assertGreater(max(monitor.lags), 0.1)
+        self.assertIn("lag > 100ms: 1 times", monitor.summary()[1])
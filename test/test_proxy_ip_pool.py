@@ -13,10 +13,51 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2023/12/2 14:42
 # @Desc    :
+import asyncio
+import base64
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
 from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, patch
 
-from proxy.proxy_ip_pool import create_ip_pool
+import httpx
+
+from cache.async_redis_cache import AsyncRedisCache
+from cache.response_cache import RESPONSE_CACHE_MODE_OFF, ResponseCache, set_response_cache
+from cache.tiered_cache import TieredCache
+from proxy.base_proxy import IpCache, ProxyProvider
+from proxy.proxy_ip_pool import ProxyIpPool, create_ip_pool
 from proxy.types import IpInfoModel
+from tools import http_transport
+from var import current_proxy_var
+
+try:
+    from fakeredis.aioredis import FakeRedis
+except ImportError:  # pragma: no cover
+    FakeRedis = None
+
+
+class FakeProxyProvider(ProxyProvider):
+    """和真实代理商一样优先返回缓存中的IP, 缓存不够时才提取新IP"""
+
+    def __init__(self):
+        self.next_ip = 1
+        self.ip_cache: List[IpInfoModel] = []
+
+    async def get_proxies(self, num: int) -> List[IpInfoModel]:
+        if len(self.ip_cache) >= num:
+            return self.ip_cache[:num]
+        proxies = []
+        for _ in range(num - len(self.ip_cache)):
+            proxies.append(IpInfoModel(ip=f"10.0.0.{self.next_ip}", port=8000, user="u", password="p",
+                                       expired_time_ts=int(time.time()) + 3600))
+            self.next_ip += 1
+        cached = list(self.ip_cache)
+        self.ip_cache.extend(proxies)
+        return cached + proxies
 
 
 class TestIpPool(IsolatedAsyncioTestCase):
@@ -28,3 +69,236 @@ class TestIpPool(IsolatedAsyncioTestCase):
             print(ip_proxy_info)
             self.assertIsNotNone(ip_proxy_info.ip, msg="验证 ip 是否获取成功")
 
+
+class TestProxyRotation(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.pool = ProxyIpPool(ip_pool_count=3, enable_validate_ip=False, ip_provider=FakeProxyProvider(),
+                                cooldown_seconds=60, max_consecutive_failures=3, max_block_count=2)
+        await self.pool.load_proxies()
+
+    async def test_spread_across_pool(self):
+        used_ips = {(await self.pool.acquire()).ip for _ in range(200)}
+        self.assertEqual(len(used_ips), 3)
+        self.assertEqual(len(self.pool.proxy_list), 3, msg="按请求挑选代理不应该把代理移出池子")
+
+    async def test_block_cooldown_and_evict(self):
+        blocked = self.pool.proxy_list[0]
+        self.pool.report_failure(blocked, blocked=True)
+        used_ips = {(await self.pool.acquire()).ip for _ in range(100)}
+        self.assertNotIn(blocked.ip, used_ips, msg="被封禁的代理应该进入冷却")
+
+        self.pool.report_failure(blocked, blocked=True)
+        self.assertNotIn(blocked.ip, [p.ip for p in self.pool.proxy_list])
+        await self.pool.acquire()
+        await self.pool._refill_task
+        self.assertEqual(len(self.pool.proxy_list), 3, msg="剔除后应该从代理商补充")
+        self.assertNotIn(blocked.ip, [p.ip for p in self.pool.proxy_list], msg="缓存中已剔除的IP不应该回到池中")
+
+    async def test_refill_skips_cached_ips(self):
+        for proxy in list(self.pool.proxy_list):
+            self.pool.evict(proxy)
+        await self.pool.acquire()
+        self.assertEqual(sorted(p.ip for p in self.pool.proxy_list), ["10.0.0.4", "10.0.0.5", "10.0.0.6"])
+
+    async def test_sticky_session(self):
+        first = await self.pool.acquire(session_key="account_1")
+        for _ in range(20):
+            self.assertEqual((await self.pool.acquire(session_key="account_1")).ip, first.ip)
+        self.pool.report_failure(first, blocked=True)
+        self.assertNotEqual((await self.pool.acquire(session_key="account_1")).ip, first.ip)
+
+    async def test_acquire_refills_in_background(self):
+        self.pool.evict(self.pool.proxy_list[0])
+        await self.pool.acquire()
+        self.assertEqual(len(self.pool.proxy_list), 2, msg="池子没空时不应该在请求路径上等待补充")
+        await self.pool._refill_task
+        self.assertEqual(len(self.pool.proxy_list), 3)
+
+    async def test_body_block_revokes_transport_success(self):
+        proxy = self.pool.proxy_list[0]
+        self.pool.report_failure(proxy)
+        response = httpx.Response(200, json={"success": False, "code": 300012})
+        http_transport.register_proxy_pool("xhs", self.pool, http_transport.PROXY_ROTATE_MODE_SESSION)
+        set_response_cache(ResponseCache(RESPONSE_CACHE_MODE_OFF, None, {}, []))
+        try:
+            with patch.object(self.pool, "acquire", AsyncMock(return_value=proxy)), \
+                    patch.object(http_transport, "_send", AsyncMock(return_value=response)):
+                await http_transport.send_request("xhs", "GET", "https://edith.xiaohongshu.com/api/sns/web/v1/feed")
+            self.assertEqual(self.pool.health_of(proxy).success_count, 1)
+            # client 解析响应体后发现是 IP 封禁
+            http_transport.report_proxy_blocked()
+        finally:
+            http_transport.register_proxy_pool("xhs", self.pool, http_transport.PROXY_ROTATE_MODE_FIXED)
+            set_response_cache(None)
+        health = self.pool.health_of(proxy)
+        self.assertEqual((health.success_count, health.failure_count, health.block_count), (0, 2, 1))
+        self.assertEqual(health.consecutive_failures, 2)
+
+    async def test_session_key_per_account(self):
+        response = httpx.Response(200, json={"success": True})
+        http_transport.register_proxy_pool("xhs", self.pool, http_transport.PROXY_ROTATE_MODE_SESSION,
+                                           session_key="account_a")
+        set_response_cache(ResponseCache(RESPONSE_CACHE_MODE_OFF, None, {}, []))
+        url = "https://edith.xiaohongshu.com/api/sns/web/v1/feed"
+        try:
+            with patch.object(http_transport, "_send", AsyncMock(return_value=response)):
+                await http_transport.send_request("xhs", "GET", url)
+                proxy_a = current_proxy_var.get()[1]
+                await http_transport.send_request("xhs", "GET", url, proxy_session_key="account_b")
+                proxy_b = current_proxy_var.get()[1]
+                http_transport.set_proxy_session_key("xhs", "account_b")
+                await http_transport.send_request("xhs", "GET", url)
+                self.assertIs(current_proxy_var.get()[1], proxy_b)
+        finally:
+            http_transport.register_proxy_pool("xhs", self.pool, http_transport.PROXY_ROTATE_MODE_FIXED)
+            set_response_cache(None)
+        self.assertNotIn("xhs", self.pool._sticky_sessions, msg="设置了账号标识后不应该再按平台共用一个IP")
+        self.assertIs(await self.pool.acquire(session_key="account_a"), proxy_a)
+        self.assertIs(await self.pool.acquire(session_key="account_b"), proxy_b)
+
+    async def test_prefer_healthy_proxy(self):
+        fast, slow = self.pool.proxy_list[0], self.pool.proxy_list[1]
+        for _ in range(10):
+            self.pool.report_success(fast, 0.1)
+            self.pool.report_success(slow, 3)
+        self.assertGreater(self.pool.health_of(fast).score, self.pool.health_of(slow).score)
+
+    async def asyncTearDown(self):
+        await self.pool.stop_prefetch()
+
+
+class LocalProxyHandler(BaseHTTPRequestHandler):
+    """本地模拟的代理服务器, 用户名为 slow 时模拟超时的代理"""
+
+    def do_GET(self):
+        auth = self.headers.get("Proxy-Authorization", "").replace("Basic ", "")
+        if base64.b64decode(auth).decode().startswith("slow:"):
+            time.sleep(2)
+        try:
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(b'{"origin": "127.0.0.1"}')
+        except BrokenPipeError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalProxyProvider(ProxyProvider):
+    def __init__(self, port: int, closed_port: int):
+        self.port = port
+        self.closed_port = closed_port
+        self.next_ip = 1
+
+    async def get_proxies(self, num: int) -> List[IpInfoModel]:
+        proxies = []
+        for _ in range(num):
+            user = "slow" if self.next_ip % 4 == 0 else "u"
+            port = self.closed_port if self.next_ip % 4 == 3 else self.port
+            proxies.append(IpInfoModel(ip=f"127.0.0.{self.next_ip}", port=port, user=user, password="p",
+                                       protocol="http://", expired_time_ts=int(time.time()) + 3600))
+            self.next_ip += 1
+        return proxies
+
+
+class TestProxyPrefetch(IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("", 0), LocalProxyHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        closed_server = ThreadingHTTPServer(("", 0), LocalProxyHandler)
+        cls.closed_port = closed_server.server_address[1]
+        closed_server.server_close()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    async def asyncSetUp(self):
+        port = self.server.server_address[1]
+        self.pool = ProxyIpPool(ip_pool_count=4, enable_validate_ip=True,
+                                ip_provider=LocalProxyProvider(port, self.closed_port),
+                                valid_ip_url=f"http://127.0.0.1:{port}/ip", validate_timeout=0.5,
+                                low_water_mark=2, prefetch_interval=0.1)
+
+    async def test_concurrent_validate(self):
+        start = time.time()
+        await self.pool.load_proxies()
+        self.assertLess(time.time() - start, 1.5, msg="候选IP应该并发验证")
+        self.assertEqual(sorted(p.ip for p in self.pool.proxy_list), ["127.0.0.1", "127.0.0.2"])
+
+    async def test_prefetch_refill(self):
+        await self.pool.load_proxies()
+        self.pool.start_prefetch()
+        await self.pool.get_proxy()
+        await self.pool.get_proxy()
+        for _ in range(30):
+            if len(self.pool.proxy_list) >= 2:
+                break
+            await asyncio.sleep(0.1)
+        self.assertGreaterEqual(len(self.pool.proxy_list), 2)
+
+    async def test_prune_expired(self):
+        await self.pool.load_proxies()
+        expired, alive = self.pool.proxy_list
+        expired.expired_time_ts = int(time.time())
+        self.assertEqual((await self.pool.get_proxy()).ip, alive.ip)
+        self.assertEqual(self.pool.proxy_list, [])
+
+    async def asyncTearDown(self):
+        await self.pool.stop_prefetch()
+
+
+def _ip_payload(ip: str) -> str:
+    return IpInfoModel(ip=ip, port=8000, user="u", password="p",
+                       expired_time_ts=int(time.time()) + 3600).model_dump_json()
+
+
+class TestIpCache(IsolatedAsyncioTestCase):
+    async def test_memory_load_and_prune(self):
+        ip_cache = IpCache(cache_type="memory")
+        await ip_cache.set_ips("KDL", [("KDL_10.0.0.1_8000", _ip_payload("10.0.0.1"), 60),
+                                       ("KDL_10.0.0.2_8000", _ip_payload("10.0.0.2"), 1)])
+        self.assertEqual([ip.ip for ip in await ip_cache.load_all_ip("KDL")], ["10.0.0.1", "10.0.0.2"])
+        self.assertEqual(await ip_cache.load_all_ip("JISUHTTP"), [])
+        ip_cache._expire_index["KDL"]["KDL_10.0.0.2_8000"] = time.time() - 1
+        self.assertEqual([ip.ip for ip in await ip_cache.load_all_ip("KDL")], ["10.0.0.1"])
+        self.assertNotIn("KDL_10.0.0.2_8000", ip_cache._payloads["KDL"])
+
+    @unittest.skipIf(FakeRedis is None, "fakeredis not installed")
+    async def test_redis_index_shared_and_pruned(self):
+        redis_client = FakeRedis()
+        writer = IpCache(cache_type="redis", redis_client=redis_client)
+        reader = IpCache(cache_type="redis", redis_client=redis_client, sync_interval=0)
+        await writer.set_ip("KDL", "KDL_10.0.0.1_8000", _ip_payload("10.0.0.1"), ex=60)
+        await writer.set_ip("KDL", "KDL_10.0.0.2_8000", _ip_payload("10.0.0.2"), ex=60)
+        self.assertEqual(sorted(ip.ip for ip in await reader.load_all_ip("KDL")), ["10.0.0.1", "10.0.0.2"])
+
+        await redis_client.zadd("proxy_ip:KDL:expire", {"KDL_10.0.0.2_8000": time.time() - 1})
+        self.assertEqual([ip.ip for ip in await reader.load_all_ip("KDL")], ["10.0.0.1"])
+        self.assertEqual(await redis_client.zcard("proxy_ip:KDL:expire"), 1)
+        self.assertEqual(await redis_client.hkeys("proxy_ip:KDL:payload"), [b"KDL_10.0.0.1_8000"])
+        await redis_client.close()
+
+    @unittest.skipIf(FakeRedis is None, "fakeredis not installed")
+    async def test_tiered_mirror_served_from_l1(self):
+        redis_client = FakeRedis()
+        writer = IpCache(cache_type="redis", redis_client=redis_client)
+        tiered = TieredCache(l2_cache=AsyncRedisCache(redis_client=redis_client), enable_pubsub=False)
+        reader = IpCache(cache_type="tiered", tiered_cache=tiered)
+        await writer.set_ip("KDL", "KDL_10.0.0.1_8000", _ip_payload("10.0.0.1"), ex=60)
+        self.assertEqual([ip.ip for ip in await reader.load_all_ip("KDL")], ["10.0.0.1"])
+
+        # L1 中的镜像标记有效期内不访问 redis
+        await writer.set_ip("KDL", "KDL_10.0.0.2_8000", _ip_payload("10.0.0.2"), ex=60)
+        self.assertEqual([ip.ip for ip in await reader.load_all_ip("KDL")], ["10.0.0.1"])
+        tiered.l1.delete("proxy_ip:KDL:mirror")
+        self.assertEqual(sorted(ip.ip for ip in await reader.load_all_ip("KDL")), ["10.0.0.1", "10.0.0.2"])
+
+        # 本进程写入时淘汰镜像标记
+        await reader.set_ip("KDL", "KDL_10.0.0.3_8000", _ip_payload("10.0.0.3"), ex=60)
+        self.assertIsNone(tiered.l1.get("proxy_ip:KDL:mirror"))
+        self.assertEqual(len(await reader.load_all_ip("KDL")), 3)
+        await redis_client.close()
@@ -0,0 +1,100 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 请求录制重放单测，录制时用假的发送层代替真实平台
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, patch
+
+import httpx
+
+from cache.response_cache import RESPONSE_CACHE_MODE_OFF, ResponseCache, set_response_cache
+from tools import http_transport, replay
+
+DETAIL_URL = "https://www.douyin.com/aweme/v1/web/aweme/detail/"
+DETAIL_TEXT = '{"aweme_detail": {"aweme_id": "1"}}'
+
+
+class TestReplay(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        set_response_cache(ResponseCache(RESPONSE_CACHE_MODE_OFF, None, {}, []))
+        self.server = None
+
+    async def asyncTearDown(self):
+        session = replay.get_replay_session()
+        if session is not None:
+            await session.close()
+
+    def tearDown(self):
+        if self.server is not None:
+            self.server.stop()
+        replay.set_replay_session(None)
+        set_response_cache(None)
+        self.tmp_dir.cleanup()
+
+    async def _record(self):
+        replay.set_replay_session(replay.ReplaySession(replay.REPLAY_MODE_RECORD, self.tmp_dir.name))
+        response = httpx.Response(200, text=DETAIL_TEXT, headers={"content-type": "application/json"})
+        with patch.object(http_transport, "_send", AsyncMock(return_value=response)):
+            await http_transport.send_request("dy", "GET", DETAIL_URL, params={"aweme_id": "1", "a_bogus": "x"})
+
+    def _replay(self, **kwargs) -> replay.ReplaySession:
+        self.server = replay.MockPlatformServer(self.tmp_dir.name, platform="dy", seed=1, **kwargs)
+        session = replay.ReplaySession(replay.REPLAY_MODE_REPLAY, self.tmp_dir.name, self.server.start())
+        replay.set_replay_session(session)
+        return session
+
+    async def test_record_then_replay(self):
+        await self._record()
+        records = replay.FixtureArchive(self.tmp_dir.name).load("dy")
+        self.assertEqual(len(records), 1)
+
+        session = self._replay()
+        with patch.object(http_transport, "_send", AsyncMock(side_effect=AssertionError("should not hit network"))):
+            # 签名参数不同也能匹配到录制的响应
+            response = await http_transport.send_request("dy", "GET", DETAIL_URL,
+                                                         params={"aweme_id": "1", "a_bogus": "y"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"aweme_detail": {"aweme_id": "1"}})
+        self.assertEqual(session.stats.summary()["requests"], 1)
+
+        with self.assertRaises(replay.ReplayFixtureMissError):
+            await http_transport.send_request("dy", "GET", DETAIL_URL, params={"aweme_id": "2"})
+
+    async def test_inject_error_and_captcha(self):
+        await self._record()
+        self._replay(error_rate=1.0)
+        response = await http_transport.send_request("dy", "GET", DETAIL_URL, params={"aweme_id": "1"})
+        self.assertEqual(response.status_code, replay.ERROR_STATUS_CODE)
+
+        self.server.stop()
+        session = self._replay(captcha_rate=1.0)
+        response = await http_transport.send_request("dy", "GET", DETAIL_URL, params={"aweme_id": "1"})
+        self.assertIn(response.status_code, http_transport.BLOCK_STATUS_CODES)
+        self.assertEqual(session.stats.summary()["errors"], 1)
+
+    async def test_replay_archive(self):
+        await self._record()
+        session = self._replay(latency_ms=5)
+        await replay.replay_archive(session, "dy", concurrency=2)
+        self.assertEqual(self.server.served, 1)
+        self.assertGreaterEqual(session.stats.summary()["p50_ms"], 5)
+
+
+class TestRequestStats(unittest.TestCase):
+    def test_percentile(self):
+        values = [float(i) for i in range(1, 101)]
+        self.assertEqual(replay.RequestStats.percentile(values, 50), 50)
+        self.assertEqual(replay.RequestStats.percentile(values, 99), 99)
+        self.assertEqual(replay.RequestStats.percentile([], 99), 0.0)
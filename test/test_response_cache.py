@@ -0,0 +1,115 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 接口响应缓存单测
+
+import os
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, patch
+
+import httpx
+
+from cache.response_cache import (RESPONSE_CACHE_MODE_CACHE_ONLY,
+                                  RESPONSE_CACHE_MODE_READ_WRITE,
+                                  DiskResponseStorage, ResponseCache,
+                                  ResponseCacheMissError, set_response_cache)
+from tools import http_transport
+
+DETAIL_URL = "https://www.douyin.com/aweme/v1/web/aweme/detail/"
+
+
+class TestResponseCache(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.response_cache = self._new_cache(RESPONSE_CACHE_MODE_READ_WRITE)
+        set_response_cache(self.response_cache)
+
+    def _new_cache(self, mode: str) -> ResponseCache:
+        return ResponseCache(
+            mode=mode,
+            storage=DiskResponseStorage(self.tmp_dir.name),
+            endpoint_ttls={"dy:/aweme/v1/web/aweme/detail/": 60, "ks:/graphql#visionProfile": 60},
+            volatile_params=["a_bogus", "webid"],
+        )
+
+    def test_build_key_ignore_volatile_params(self):
+        key1 = self.response_cache.build_key("dy", "GET", DETAIL_URL, {"aweme_id": "1", "a_bogus": "x", "webid": "1"})
+        key2 = self.response_cache.build_key("dy", "GET", DETAIL_URL, {"webid": "2", "aweme_id": "1", "a_bogus": "y"})
+        key3 = self.response_cache.build_key("dy", "GET", DETAIL_URL, {"aweme_id": "2", "a_bogus": "x"})
+        self.assertEqual(key1, key2)
+        self.assertNotEqual(key1, key3)
+
+    def test_match_graphql_endpoint(self):
+        endpoint = self.response_cache.endpoint_of("ks", "https://www.kuaishou.com/graphql",
+                                                   '{"operationName":"visionProfile","variables":{}}')
+        self.assertEqual(self.response_cache.match_ttl(endpoint), 60)
+        endpoint = self.response_cache.endpoint_of("ks", "https://www.kuaishou.com/graphql",
+                                                   '{"operationName":"commentListQuery","variables":{}}')
+        self.assertIsNone(self.response_cache.match_ttl(endpoint))
+
+    async def test_send_request_hit_cache(self):
+        response = httpx.Response(200, json={"aweme_detail": {"aweme_id": "1"}},
+                                  request=httpx.Request("GET", DETAIL_URL))
+        with patch.object(http_transport, "_send", AsyncMock(return_value=response)) as mock_send:
+            for a_bogus in ("a", "b"):
+                res = await http_transport.send_request("dy", "GET", DETAIL_URL,
+                                                        params={"aweme_id": "1", "a_bogus": a_bogus})
+                self.assertEqual(res.json(), {"aweme_detail": {"aweme_id": "1"}})
+            self.assertEqual(mock_send.await_count, 1)
+
+    async def test_cache_only_mode(self):
+        response = httpx.Response(200, json={"ok": 1}, request=httpx.Request("GET", DETAIL_URL))
+        with patch.object(http_transport, "_send", AsyncMock(return_value=response)):
+            await http_transport.send_request("dy", "GET", DETAIL_URL, params={"aweme_id": "1"})
+
+        set_response_cache(self._new_cache(RESPONSE_CACHE_MODE_CACHE_ONLY))
+        with patch.object(http_transport, "_send", AsyncMock()) as mock_send:
+            res = await http_transport.send_request("dy", "GET", DETAIL_URL, params={"aweme_id": "1"})
+            self.assertEqual(res.json(), {"ok": 1})
+            with self.assertRaises(ResponseCacheMissError):
+                await http_transport.send_request("dy", "GET", DETAIL_URL, params={"aweme_id": "2"})
+            mock_send.assert_not_awaited()
+
+    async def test_corrupt_entry_is_a_miss(self):
+        response = httpx.Response(200, json={"ok": 1}, request=httpx.Request("GET", DETAIL_URL))
+        with patch.object(http_transport, "_send", AsyncMock(return_value=response)):
+            await http_transport.send_request("dy", "GET", DETAIL_URL, params={"aweme_id": "1"})
+        key = self.response_cache.build_key("dy", "GET", DETAIL_URL, {"aweme_id": "1"})
+        path = os.path.join(self.tmp_dir.name, key[:2], f"{key}.bin")
+        self.assertEqual([name for name in os.listdir(os.path.dirname(path))], [f"{key}.bin"])
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - 5)
+
+        set_response_cache(self._new_cache(RESPONSE_CACHE_MODE_CACHE_ONLY))
+        with self.assertRaises(ResponseCacheMissError):
+            await http_transport.send_request("dy", "GET", DETAIL_URL, params={"aweme_id": "1"})
+
+    async def test_cache_only_passes_uncached_endpoint(self):
+        set_response_cache(self._new_cache(RESPONSE_CACHE_MODE_CACHE_ONLY))
+        pong_url = "https://www.douyin.com/aweme/v1/web/query/user/"
+        response = httpx.Response(200, json={"ok": 1}, request=httpx.Request("GET", pong_url))
+        with patch.object(http_transport, "_send", AsyncMock(return_value=response)) as mock_send:
+            res = await http_transport.send_request("dy", "GET", pong_url)
+            self.assertEqual(res.json(), {"ok": 1})
+            mock_send.assert_awaited_once()
+
+    def tearDown(self):
+        set_response_cache(None)
+        self.tmp_dir.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 情感词典多模式匹配单测
+import importlib.util
+import os
+import tempfile
+import unittest
+
+from text_analysis.core.sentiment_matcher import AhoCorasickMatcher, load_weighted_dict
+
+
+class TestAhoCorasickMatcher(unittest.TestCase):
+    def test_find_all_overlapping(self):
+        matcher = AhoCorasickMatcher(["he", "she", "his", "hers"])
+        text = "ushers"
+        self.assertEqual(sorted(text[s:e] for s, e in matcher.find_all(text)), ["he", "hers", "she"])
+
+    def test_longest_match_first(self):
+        matcher = AhoCorasickMatcher(["太", "太棒", "太棒了", "棒", "不", "不错"])
+        self.assertEqual(matcher.find_longest("真的太棒了不错"),
+                         [(2, 5, "太棒了"), (5, 7, "不错")])
+        self.assertEqual(matcher.find_longest(""), [])
+
+    def test_load_weighted_dict(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "dict.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("# 注释\n绝绝子 1.5\n拉胯\t-1.2\nYYDS\n")
+            self.assertEqual(load_weighted_dict(path), {"绝绝子": 1.5, "拉胯": -1.2, "yyds": 1.0})
+
+
+@unittest.skipUnless(importlib.util.find_spec("seaborn"), "text_analysis.modules 依赖 seaborn")
+class TestDictionaryAnalyzer(unittest.TestCase):
+    def setUp(self):
+        from text_analysis.modules.sentiment_analyzer_optimized import DictionaryAnalyzer
+        self.analyzer = DictionaryAnalyzer()
+
+    def test_negation_and_intensifier_window(self):
+        self.assertEqual(self.analyzer.analyze_text("这个视频太棒了")["score"], 1.5)
+        self.assertEqual(self.analyzer.analyze_text("不是很好")["score"], -1.5)
+        self.assertEqual(self.analyzer.analyze_text("我不喜欢")["sentiment"], "negative")
+        # 标点隔开时否定词不修饰后面的情感词
+        self.assertEqual(self.analyzer.analyze_text("不，喜欢")["sentiment"], "positive")
+
+
+@unittest.skipUnless(importlib.util.find_spec("seaborn"), "text_analysis.modules 依赖 seaborn")
+class TestSentimentExecutionModes(unittest.TestCase):
+    def test_process_pool_matches_inline(self):
+        from text_analysis.modules.sentiment_analyzer_optimized import SentimentAnalyzer
+        texts = [f"第{i}条评论{'太棒了' if i % 3 else '不是很好'}" for i in range(3000)] * 2
+        inline = SentimentAnalyzer("dictionary", sa_mode="inline")
+        process = SentimentAnalyzer("dictionary", sa_mode="process", sa_workers=2)
+        self.assertEqual(process.analyze_texts(texts), inline.analyze_texts(texts))
+        self.assertEqual(process.get_stats()["total_analyzed"], 3000)
+
+    def test_auto_mode(self):
+        from text_analysis.modules.sentiment_analyzer_optimized import SentimentAnalyzer
+        analyzer = SentimentAnalyzer("dictionary", sa_workers=4)
+        self.assertEqual(analyzer._resolve_mode(10), "inline")
+        self.assertEqual(analyzer._resolve_mode(SentimentAnalyzer.PROCESS_POOL_MIN_TEXTS), "process")
+        self.assertEqual(SentimentAnalyzer("dictionary", sa_workers=1)._resolve_mode(10 ** 6), "inline")
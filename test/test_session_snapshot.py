@@ -0,0 +1,66 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import time
+from unittest import IsolatedAsyncioTestCase
+
+from media_platform.bilibili.client import BilibiliClient
+from tools.session_snapshot import (BrowserlessEvaluateError, SessionSnapshot, SnapshotPage,
+                                    capture_session_snapshot, load_session_snapshot, save_session_snapshot)
+
+
+class FakeContext:
+    async def cookies(self):
+        return [{"name": "SESSDATA", "value": "abc", "domain": ".bilibili.com", "path": "/"}]
+
+
+class FakePage:
+    async def evaluate(self, expression, arg=None):
+        if "localStorage" in expression:
+            return {"wbi_img_urls": "https://i0.hdslb.com/bfs/wbi/7cd084941338484aae1ad9425b84077c.png-https://i0.hdslb.com/bfs/wbi/4932caff0ff746eab6f01bf08b70ac45.png"}
+        return "Mozilla/5.0 Test"
+
+
+class TestSessionSnapshot(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "bili.json")
+
+    async def test_capture_save_and_load(self):
+        snapshot = await capture_session_snapshot("bili", FakeContext(), FakePage())
+        save_session_snapshot(snapshot, self.file_path)
+        loaded = load_session_snapshot("bili", self.file_path, max_age=60)
+        self.assertEqual(loaded, snapshot)
+        self.assertEqual(loaded.convert_cookies(), ("SESSDATA=abc", {"SESSDATA": "abc"}))
+        self.assertIsNone(load_session_snapshot("dy", self.file_path))
+
+    async def test_expired_snapshot(self):
+        snapshot = SessionSnapshot(platform="bili", created_at=int(time.time()) - 120)
+        save_session_snapshot(snapshot, self.file_path)
+        self.assertIsNone(load_session_snapshot("bili", self.file_path, max_age=60))
+        self.assertIsNotNone(load_session_snapshot("bili", self.file_path, max_age=0))
+
+    async def test_snapshot_page_signs_bilibili(self):
+        snapshot = await capture_session_snapshot("bili", FakeContext(), FakePage())
+        page = SnapshotPage(snapshot)
+        self.assertEqual(await page.evaluate("() => navigator.userAgent"), "Mozilla/5.0 Test")
+        with self.assertRaises(BrowserlessEvaluateError):
+            await page.evaluate("() => window._webmsxyw()")
+
+        client = BilibiliClient(headers={}, playwright_page=page, cookie_dict=snapshot.convert_cookies()[1])
+        self.assertEqual(await client.get_wbi_keys(), ("7cd084941338484aae1ad9425b84077c", "4932caff0ff746eab6f01bf08b70ac45"))
+        self.assertIn("w_rid", await client.pre_request_data({"mid": 1}))
+
+    async def asyncTearDown(self):
+        self.tmp_dir.cleanup()
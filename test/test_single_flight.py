@@ -0,0 +1,80 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 并发请求合并单测
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from tools.single_flight import SingleFlight, single_flight
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = 0
+
+    @single_flight("test", "detail")
+    async def get_detail(self, note_id: str, fields: str = "all"):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        if note_id == "bad":
+            raise ValueError(note_id)
+        return {"note_id": note_id}
+
+
+class TestSingleFlight(IsolatedAsyncioTestCase):
+    async def test_concurrent_calls_are_coalesced(self):
+        client = FakeClient()
+        results = await asyncio.gather(*[client.get_detail("1") for _ in range(5)], client.get_detail("2"))
+        self.assertEqual(client.calls, 2)
+        self.assertEqual([r["note_id"] for r in results], ["1"] * 5 + ["2"])
+        # 等待者拿到的是拷贝，修改不会互相影响
+        results[0]["xsec_token"] = "token"
+        self.assertNotIn("xsec_token", results[1])
+
+    async def test_equivalent_arguments_are_coalesced(self):
+        client = FakeClient()
+        await asyncio.gather(client.get_detail("1"), client.get_detail(note_id="1"), client.get_detail("1", "all"),
+                             client.get_detail("1", fields="all"))
+        self.assertEqual(client.calls, 1)
+
+    async def test_clients_are_not_coalesced(self):
+        # 不同客户端可能登录的是不同账号，返回结果不能共享
+        client_a, client_b = FakeClient(), FakeClient()
+        await asyncio.gather(client_a.get_detail("1"), client_b.get_detail("1"))
+        self.assertEqual((client_a.calls, client_b.calls), (1, 1))
+
+    async def test_no_caching_after_completion(self):
+        client = FakeClient()
+        await client.get_detail("1")
+        await client.get_detail("1")
+        self.assertEqual(client.calls, 2)
+
+    async def test_error_is_shared(self):
+        client = FakeClient()
+        results = await asyncio.gather(client.get_detail("bad"), client.get_detail("bad"), return_exceptions=True)
+        self.assertEqual(client.calls, 1)
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+
+    async def test_cancelled_caller_does_not_cancel_shared_call(self):
+        group = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return 1
+
+        first = asyncio.ensure_future(group.do("key", fetch))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(group.do("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        self.assertEqual(await second, 1)
+        self.assertFalse(group.in_flight("key"))
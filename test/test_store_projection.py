@@ -0,0 +1,106 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 入库字段投影单测，投影后入库的数据需要和直接传原始详情时一致
+import gc
+import weakref
+from typing import Dict, List
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import store.douyin as douyin_store
+import store.xhs as xhs_store
+from model.m_douyin import DouyinAwemeRow
+from model.m_xiaohongshu import XhsNoteRow
+
+AWEME_DETAIL = {
+    "aweme_id": "7300000000000000001",
+    "aweme_type": 0,
+    "desc": "测试视频",
+    "create_time": 1700000000,
+    "ip_label": "上海",
+    "author": {"uid": "1", "sec_uid": "sec", "short_id": "2", "unique_id": "u", "signature": "s",
+               "nickname": "昵称", "avatar_thumb": {"url_list": ["https://a/1.jpeg"]}},
+    "statistics": {"digg_count": 10, "collect_count": 2, "comment_count": 3, "share_count": 4},
+    "video": {"raw_cover": {"url_list": ["https://c/0", "https://c/1"]},
+              "play_addr": {"url_list": ["https://v/0", "https://v/1"]}},
+    "risk_infos": {"content": "x" * 1024},
+}
+
+NOTE_DETAIL = {
+    "note_id": "64f0000000000000000000001",
+    "type": "normal",
+    "title": "",
+    "desc": "测试笔记的描述",
+    "time": 1700000000000,
+    "last_update_time": 1700000000001,
+    "user": {"user_id": "u1", "nickname": "昵称", "avatar": "https://a/1.jpg"},
+    "interact_info": {"liked_count": "10", "collected_count": "2", "comment_count": "3", "share_count": "4"},
+    "ip_location": "上海",
+    "image_list": [{"url_default": "https://i/1.jpg", "url": "https://i/old1.jpg"},
+                   {"url_default": "", "url": "https://i/2.jpg"}],
+    "tag_list": [{"type": "topic", "name": "旅行"}, {"type": "location", "name": "上海"}],
+    "xsec_token": "token",
+}
+
+
+class FakeStore:
+    def __init__(self):
+        self.contents: List[Dict] = []
+
+    async def store_content(self, content_item: Dict):
+        self.contents.append(content_item)
+
+
+class TestStoreProjection(IsolatedAsyncioTestCase):
+    async def _stored(self, factory, update_func, item) -> Dict:
+        fake_store = FakeStore()
+        with patch.object(factory, "create_store", return_value=fake_store), \
+                patch("tools.utils.get_current_timestamp", return_value=1):
+            await update_func(item)
+        return fake_store.contents[0]
+
+    async def test_douyin_row_matches_raw(self):
+        row = douyin_store.project_douyin_aweme(AWEME_DETAIL)
+        self.assertIsInstance(row, DouyinAwemeRow)
+        from_raw = await self._stored(douyin_store.DouyinStoreFactory, douyin_store.update_douyin_aweme, AWEME_DETAIL)
+        from_row = await self._stored(douyin_store.DouyinStoreFactory, douyin_store.update_douyin_aweme, row)
+        self.assertEqual(list(from_row.items()), list(from_raw.items()))
+        self.assertEqual(from_row["cover_url"], "https://c/1")
+        self.assertEqual(from_row["liked_count"], "10")
+
+    async def test_xhs_row_matches_raw(self):
+        row = xhs_store.project_xhs_note(NOTE_DETAIL)
+        self.assertIsInstance(row, XhsNoteRow)
+        self.assertEqual(row.image_urls, ("https://i/1.jpg", "https://i/2.jpg"))
+        stored = await self._stored(xhs_store.XhsStoreFactory, xhs_store.update_xhs_note, row)
+        self.assertEqual(stored["image_list"], "https://i/1.jpg,https://i/2.jpg")
+        self.assertEqual(stored["tag_list"], "旅行")
+        self.assertEqual(stored["title"], "测试笔记的描述")
+        self.assertEqual(stored["video_url"], "")
+        self.assertEqual(list(stored), [
+            "note_id", "type", "title", "desc", "video_url", "time", "last_update_time", "user_id", "nickname",
+            "avatar", "liked_count", "collected_count", "comment_count", "share_count", "ip_location",
+            "image_list", "tag_list", "last_modify_ts", "note_url", "source_keyword", "xsec_token",
+        ])
+
+    def test_row_does_not_retain_raw_payload(self):
+        class Payload(dict):
+            pass
+
+        raw = Payload(AWEME_DETAIL)
+        ref = weakref.ref(raw)
+        row = douyin_store.project_douyin_aweme(raw)
+        del raw
+        gc.collect()
+        self.assertIsNone(ref())
+        self.assertEqual(row.aweme_id, AWEME_DETAIL["aweme_id"])
@@ -0,0 +1,49 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 本地语料级文本向量化单测
+import unittest
+
+import numpy as np
+
+from text_analysis.core.text_vectorizer import LocalTextVectorizer
+
+TEXTS = [
+    "这个视频拍得太好了，支持一下",
+    "这个视频拍得太好了，必须支持",
+    "今天天气不错适合出去玩",
+    "这个视频拍得太好了，支持一下",
+]
+
+
+class TestLocalTextVectorizer(unittest.TestCase):
+    def assert_similarities(self, mode: str):
+        matrix = LocalTextVectorizer(mode=mode).fit_transform(TEXTS)
+        self.assertEqual(matrix.shape[0], len(TEXTS))
+        similarity = (matrix @ matrix.T).toarray()
+        np.testing.assert_allclose(np.diag(similarity), 1.0)
+        # 同一语料空间内相似文本得分高、无关文本得分低，重复文本向量完全一致
+        self.assertGreater(similarity[0, 1], 0.5)
+        self.assertLess(similarity[0, 2], 0.1)
+        self.assertAlmostEqual(similarity[0, 3], 1.0)
+
+    def test_tfidf(self):
+        self.assert_similarities("tfidf")
+
+    def test_hashing(self):
+        self.assert_similarities("hashing")
+
+    def test_empty(self):
+        self.assertEqual(LocalTextVectorizer().fit_transform([]).shape[0], 0)
+        self.assertEqual(LocalTextVectorizer().fit_transform(["，。", ""]).shape[0], 2)
+        with self.assertRaises(ValueError):
+            LocalTextVectorizer(mode="word2vec")
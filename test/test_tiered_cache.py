@@ -0,0 +1,92 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : TieredCache 单测, 使用 fakeredis 模拟本地 redis
+
+import asyncio
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from cache.async_redis_cache import AsyncRedisCache
+from cache.local_cache import BoundedLocalCache
+from cache.tiered_cache import TieredCache
+
+try:
+    from fakeredis import FakeServer
+    from fakeredis.aioredis import FakeRedis
+except ImportError:  # pragma: no cover
+    FakeRedis = None
+
+
+class TestBoundedLocalCache(unittest.TestCase):
+
+    def test_lru_evict(self):
+        cache = BoundedLocalCache(max_size=2)
+        cache.set('key1', 1, 10)
+        cache.set('key2', 2, 10)
+        cache.get('key1')
+        cache.set('key3', 3, 10)
+        self.assertIsNone(cache.get('key2'))
+        self.assertEqual(cache.get('key1'), 1)
+        self.assertEqual(len(cache), 2)
+
+
+@unittest.skipIf(FakeRedis is None, "fakeredis is not installed")
+class TestTieredCache(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = FakeServer()
+        self.cache = self._new_cache()
+
+    def _new_cache(self, **kwargs) -> TieredCache:
+        return TieredCache(l2_cache=AsyncRedisCache(redis_client=FakeRedis(server=self.server)),
+                           l1_max_size=16, l1_max_ttl=30, **kwargs)
+
+    async def test_set_and_get(self):
+        await self.cache.set('key', 'value', 10)
+        self.assertEqual(self.cache.l1.get('key'), 'value')
+        self.assertEqual(await self.cache.get('key'), 'value')
+
+    async def test_backfill_l1_with_l2_ttl(self):
+        await self.cache.l2.set('key', 'value', 5)
+        self.assertIsNone(self.cache.l1.get('key'))
+        self.assertEqual(await self.cache.get('key'), 'value')
+        self.assertTrue(0 < self.cache.l1.ttl('key') <= 5)
+
+    async def test_batch_across_tiers(self):
+        await self.cache.set('key1', 'value1', 10)
+        await self.cache.l2.set('key2', 'value2', 10)
+        self.assertEqual(await self.cache.mget(['key1', 'key2', 'key3']), ['value1', 'value2', None])
+
+    async def test_pubsub_invalidate(self):
+        other = self._new_cache(enable_pubsub=True)
+        cache = self._new_cache(enable_pubsub=True)
+        await other.start_invalidation_listener()
+        await cache.set('key', 'old', 10)
+        self.assertEqual(await other.get('key'), 'old')
+
+        await cache.set('key', 'new', 10)
+        for _ in range(50):
+            if other.l1.get('key') is None:
+                break
+            await asyncio.sleep(0.02)
+        self.assertEqual(await other.get('key'), 'new')
+        await other.close()
+        await cache.close()
+
+    async def asyncTearDown(self):
+        await self.cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
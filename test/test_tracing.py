@@ -0,0 +1,101 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 请求链路追踪单测
+import asyncio
+import os
+import tempfile
+import threading
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import httpx
+
+import config
+from tools import json_codec, metrics, tracing
+
+
+class TestTracing(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.trace_file = os.path.join(self.tmp_dir.name, "trace.json")
+        self.patcher = patch.object(config, "ENABLE_TRACING", True)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        tracing.set_tracer(None)
+        self.tmp_dir.cleanup()
+
+    async def test_nested_spans_share_one_trace(self):
+        tracing.set_tracer(tracing.Tracer(self.trace_file, slow_threshold_ms=0, sample_rate=0))
+
+        @metrics.timed_sign("test_trace")
+        async def sign():
+            await asyncio.sleep(0)
+
+        with tracing.span("dy.comment_page", cat="page", cursor=0):
+            await sign()
+            json_codec.response_json(httpx.Response(200, content=b'{"comments": []}'))
+            await asyncio.gather(sign(), sign())
+
+        tracing.flush()
+        events = tracing.load_trace(self.trace_file)
+        self.assertEqual([e["name"] for e in events][-1], "dy.comment_page")
+        self.assertEqual(sum(e["name"] == "test_trace.sign" for e in events), 3)
+        self.assertIn("json.decode", [e["name"] for e in events])
+        self.assertEqual(len({e["tid"] for e in events}), 1)
+        root = events[-1]
+        self.assertEqual(root["args"]["sampling"], "slow")
+        for event in events:
+            self.assertEqual(event["ph"], "X")
+            self.assertGreaterEqual(event["ts"], root["ts"])
+            self.assertLessEqual(event["ts"] + event["dur"], root["ts"] + root["dur"] + 1)
+
+    async def test_tail_sampling_drops_fast_requests(self):
+        tracer = tracing.Tracer(self.trace_file, slow_threshold_ms=50, sample_rate=0)
+        tracing.set_tracer(tracer)
+        with tracing.span("fast"):
+            pass
+        with tracing.span("slow"):
+            await asyncio.sleep(0.06)
+        self.assertEqual((tracer.kept, tracer.dropped), (1, 1))
+        tracer.flush()
+        self.assertEqual([e["name"] for e in tracing.load_trace(self.trace_file)], ["slow"])
+
+    async def test_buffered_write_off_loop_thread(self):
+        tracer = tracing.Tracer(self.trace_file, slow_threshold_ms=0, sample_rate=0, flush_events=3)
+        tracing.set_tracer(tracer)
+        write_threads = []
+        write = tracer.write
+
+        def record_thread(events):
+            write_threads.append(threading.current_thread().name)
+            write(events)
+
+        with patch.object(tracer, "write", side_effect=record_thread):
+            for i in range(4):
+                with tracing.span(f"request_{i}"):
+                    pass
+            # 第 3 个 event 时后台写一批，剩下 1 个在 flush 时写入
+            tracer.flush()
+        self.assertEqual(len(write_threads), 2)
+        self.assertTrue(all(name.startswith("trace-writer") for name in write_threads))
+        self.assertEqual([e["name"] for e in tracing.load_trace(self.trace_file)],
+                         [f"request_{i}" for i in range(4)])
+
+    async def test_disabled(self):
+        tracing.set_tracer(tracing.Tracer(self.trace_file, slow_threshold_ms=0, sample_rate=1))
+        with patch.object(config, "ENABLE_TRACING", False):
+            with tracing.span("noop"):
+                pass
+        self.assertFalse(os.path.exists(self.trace_file))
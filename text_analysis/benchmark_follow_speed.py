@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跟随速度计算基准测试
+在合成评论数据上对比逐行 apply 查字典与关联后整列运算的耗时
+
+用法:
+  python text_analysis/benchmark_follow_speed.py --rows 1000000
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import pandas as pd
+
+from text_analysis.utils import child_comment_mask, follow_speed_minutes, make_synthetic_comments
+
+
+def follow_speed_apply(child_comments: pd.DataFrame, parent_comments: pd.DataFrame) -> pd.Series:
+    """原实现：逐行 apply 查父评论时间字典，作为对照"""
+    parent_times = parent_comments.set_index('comment_id')['create_time'].to_dict()
+
+    def get_follow_speed(row):
+        parent_id = str(row['parent_comment_id'])
+        if parent_id not in parent_times:
+            return None
+        parent_time = parent_times[parent_id]
+        child_time = row['create_time']
+        if pd.isna(parent_time) or pd.isna(child_time):
+            return None
+        time_diff = (child_time - parent_time).total_seconds() / 60
+        return time_diff if time_diff >= 0 else None
+
+    return child_comments.apply(get_follow_speed, axis=1)
+
+
+def run_benchmark(rows: int) -> dict:
+    """返回两种实现的耗时（秒）与结果是否一致"""
+    df = make_synthetic_comments(rows)
+    df['create_time'] = pd.to_datetime(df['create_time'], unit='s')
+    is_child = child_comment_mask(df['parent_comment_id'])
+    parent_comments, child_comments = df[~is_child], df[is_child]
+
+    start = time.perf_counter()
+    expected = follow_speed_apply(child_comments, parent_comments)
+    apply_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = follow_speed_minutes(child_comments, parent_comments)
+    vectorized_seconds = time.perf_counter() - start
+
+    pd.testing.assert_series_equal(actual, expected.astype(float), check_names=False)
+    return {
+        'rows': rows,
+        'apply_seconds': apply_seconds,
+        'vectorized_seconds': vectorized_seconds,
+        'speedup': apply_seconds / max(vectorized_seconds, 1e-9),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="跟随速度计算基准测试")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000], help='合成评论条数')
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'apply(s)':>10} {'vectorized(s)':>14} {'speedup':>8}")
+    for rows in args.rows:
+        result = run_benchmark(rows)
+        print(f"{result['rows']:>10} {result['apply_seconds']:>10.3f} "
+              f"{result['vectorized_seconds']:>14.3f} {result['speedup']:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+近重复评论候选对生成
+对字符 shingle 做 MinHash，再按 band 分桶(LSH)，只有落进同一个桶、且发布时间差在阈值内的评论才成为候选对，
+代替 n×n 的稠密相似度矩阵：计算量和内存随评论数近似线性增长，由桶大小决定
+"""
+
+import zlib
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 2^31 - 1，shingle 哈希是 32 位，a * x + b 不会超出 uint64
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def char_shingles(text: str, size: int = 3) -> np.ndarray:
+    """字符 shingle 的 32 位哈希集合，不足 size 个字符时整段文本作为一个 shingle"""
+    text = "".join((text or "").split()).lower()
+    if not text:
+        return np.empty(0, dtype=np.uint64)
+    if len(text) <= size:
+        grams = {text}
+    else:
+        grams = {text[i:i + size] for i in range(len(text) - size + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    选择 band 数 b 和每个 band 的行数 r，使 S 曲线的拐点 (1/b)^(1/r) 最接近 threshold
+    :return: (b, r)
+    """
+    best, best_error = (num_perm, 1), float("inf")
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class MinHashLSH:
+    """MinHash + LSH 分桶"""
+
+    def __init__(self, threshold: float = 0.5, num_perm: int = 128, shingle_size: int = 3,
+                 max_neighbors: int = 200, seed: int = 1):
+        """
+        Args:
+            threshold: 候选对的近似 Jaccard 阈值，只决定分桶参数，最终是否相似由调用方复核
+            num_perm: MinHash 排列数
+            shingle_size: 字符 shingle 长度
+            max_neighbors: 同一个桶内按时间排序后，每条评论最多与之后多少条评论配对，限制超大桶(刷屏)的配对数
+        """
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.max_neighbors = max_neighbors
+        self.bands, self.rows = optimal_bands(threshold, num_perm)
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, (1 << 31) - 1, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, (1 << 31) - 1, size=num_perm).astype(np.uint64)
+        self._band_mix = (rng.randint(1, 1 << 31, size=self.rows).astype(np.uint64) << np.uint64(32)) \
+            | rng.randint(1, 1 << 31, size=self.rows).astype(np.uint64) | np.uint64(1)
+
+    def signatures(self, texts: Sequence[str], chunk_size: int = 2000) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :param texts:
+        :param chunk_size: 每批拼接多少条文本的 shingle 一起计算，控制中间矩阵大小
+        :return: (签名矩阵 n×num_perm, 是否有有效 shingle 的掩码)
+        """
+        signatures = np.full((len(texts), self.num_perm), _MAX_HASH, dtype=np.uint64)
+        shingles = [char_shingles(text, self.shingle_size) for text in texts]
+        valid = np.fromiter((len(x) > 0 for x in shingles), dtype=bool, count=len(texts))
+        valid_index = np.flatnonzero(valid)
+        for start in range(0, len(valid_index), chunk_size):
+            chunk = valid_index[start:start + chunk_size]
+            lengths = np.fromiter((len(shingles[i]) for i in chunk), dtype=np.int64, count=len(chunk))
+            hashed = (self._a[:, None] * np.concatenate([shingles[i] for i in chunk])[None, :]
+                      + self._b[:, None]) % _MERSENNE_PRIME
+            # 按每条文本的 shingle 区间分段取最小值
+            offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+            signatures[chunk] = np.minimum.reduceat(hashed, offsets, axis=1).T
+        return signatures, valid
+
+    def candidate_pairs(self, texts: Sequence[str], times: Optional[Sequence[float]] = None,
+                        max_time_diff: Optional[float] = None) -> np.ndarray:
+        """
+        生成候选对
+        :param texts: 文本
+        :param times: 发布时间(秒)，与 max_time_diff 一起使用
+        :param max_time_diff: 候选对的最大时间差(秒)，None 表示不限制
+        :return: m×2 的下标数组，每行 i < j，已去重
+        """
+        n = len(texts)
+        times = np.zeros(n) if times is None else np.asarray(times, dtype=float)
+        signatures, valid = self.signatures(texts)
+        valid_index = np.flatnonzero(valid)
+        pair_keys: List[np.ndarray] = []
+        for band in range(self.bands):
+            # band 内的 r 个 MinHash 值混合成一个 64 位桶键(uint64 溢出回绕)
+            band_values = signatures[valid_index, band * self.rows:(band + 1) * self.rows]
+            _, bucket_of = np.unique((band_values * self._band_mix).sum(axis=1), return_inverse=True)
+            bucket_of = bucket_of.ravel()
+            # 桶号为主键、时间为次键排序，同一个桶的评论连续且按时间有序
+            order = np.lexsort((times[valid_index], bucket_of))
+            members, buckets = valid_index[order], bucket_of[order]
+            for offset in range(1, min(self.max_neighbors, len(members) - 1) + 1):
+                same_bucket = buckets[offset:] == buckets[:-offset]
+                if max_time_diff is not None:
+                    same_bucket &= (times[members[offset:]] - times[members[:-offset]]) <= max_time_diff
+                if not same_bucket.any():
+                    # 按时间有序，间隔更大的配对只会更远，可以提前结束
+                    break
+                left, right = members[:-offset][same_bucket], members[offset:][same_bucket]
+                pair_keys.append(np.minimum(left, right).astype(np.int64) * n + np.maximum(left, right))
+        if not pair_keys:
+            return np.empty((0, 2), dtype=np.int64)
+        keys = np.unique(np.concatenate(pair_keys))
+        return np.stack([keys // n, keys % n], axis=1)
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+情感词典多模式匹配
+基于 Aho-Corasick 自动机，一次扫描找出文本中所有词典词，按最左最长原则切分，
+中文无空格文本也能正确命中情感词、否定词和程度副词
+"""
+
+import os
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+class AhoCorasickMatcher:
+    """多模式匹配自动机，构建后只读，可在多线程/多进程间复用"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # 每个状态上以当前位置结尾的所有词的长度（含失败链上的）
+        self._outputs: List[Tuple[int, ...]] = [()]
+        self.patterns: Set[str] = set()
+        for pattern in patterns:
+            if pattern:
+                self._add(pattern)
+        self._build()
+
+    def _add(self, pattern: str):
+        state = 0
+        for ch in pattern:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append(())
+            state = next_state
+        if pattern not in self.patterns:
+            self._outputs[state] = self._outputs[state] + (len(pattern),)
+            self.patterns.add(pattern)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(ch, 0)
+                self._fail[next_state] = fail if fail != next_state else 0
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int]]:
+        """返回所有命中 (start, end)，可能重叠"""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        matches = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length in outputs[state]:
+                matches.append((i + 1 - length, i + 1))
+        return matches
+
+    def find_longest(self, text: str) -> List[Tuple[int, int, str]]:
+        """最左最长匹配，返回不重叠的 (start, end, word)，按位置排序"""
+        longest_at: Dict[int, int] = {}
+        for start, end in self.find_all(text):
+            if end - start > longest_at.get(start, 0):
+                longest_at[start] = end - start
+        result = []
+        cursor = 0
+        for start in sorted(longest_at):
+            if start < cursor:
+                continue
+            end = start + longest_at[start]
+            result.append((start, end, text[start:end]))
+            cursor = end
+        return result
+
+
+def load_weighted_dict(path: str, default_weight: float = 1.0) -> Dict[str, float]:
+    """加载外部词典文件。
+
+    每行一个词，可跟空格/制表符/逗号分隔的权重，没有权重时使用 default_weight，# 开头为注释
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"词典文件不存在: {path}")
+    words: Dict[str, float] = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.replace(',', ' ').replace('\t', ' ').split()
+            weight = float(parts[1]) if len(parts) > 1 else default_weight
+            words[parts[0].lower()] = weight
+    return words
+
+
+def load_word_set(path: str) -> Set[str]:
+    """加载外部词表文件，每行一个词"""
+    return set(load_weighted_dict(path))
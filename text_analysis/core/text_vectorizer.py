@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+本地文本向量化
+整个语料只分词一次、拟合一个 TF-IDF(或哈希)模型，所有文本落在同一个稀疏向量空间里，
+向量经过 L2 归一化，行向量点积即余弦相似度
+"""
+
+from typing import List, Optional
+
+import numpy as np
+from scipy import sparse
+
+try:
+    import jieba
+except ImportError:  # 可选依赖，没有 jieba 时按字符 n-gram 切分
+    jieba = None
+
+
+class LocalTextVectorizer:
+    """语料级 TF-IDF / 哈希向量化"""
+
+    MODES = ("tfidf", "hashing")
+
+    def __init__(self, mode: str = "tfidf", ngram_range=(1, 2), min_df: int = 1,
+                 max_features: Optional[int] = 200000, n_features: int = 2 ** 20):
+        """
+        Args:
+            mode: tfidf 为完整词表，hashing 不保存词表，内存只和特征维度有关，适合超大语料
+            ngram_range: 词级 n-gram 范围
+            min_df: 词最少出现在多少条文本里
+            max_features: tfidf 模式下词表上限
+            n_features: hashing 模式下的特征维度
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"不支持的向量化方式: {mode}")
+        self.mode = mode
+        self.ngram_range = ngram_range
+        self.min_df = min_df
+        self.max_features = max_features
+        self.n_features = n_features
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """分词，去掉空白和单个标点"""
+        text = (text or "").strip().lower()
+        if jieba is not None:
+            tokens = jieba.lcut(text)
+        else:
+            tokens = list(text)
+        return [t for t in tokens if t.strip() and (len(t) > 1 or t.isalnum())]
+
+    def _build(self):
+        from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+        # 输入已经是分好词的列表，关闭 sklearn 自带的预处理和分词
+        common = dict(analyzer="word", tokenizer=_identity, preprocessor=_identity, token_pattern=None,
+                      lowercase=False, ngram_range=self.ngram_range)
+        if self.mode == "tfidf":
+            return [TfidfVectorizer(min_df=self.min_df, max_features=self.max_features, sublinear_tf=True, **common)]
+        return [HashingVectorizer(n_features=self.n_features, alternate_sign=False, norm=None, **common),
+                TfidfTransformer(sublinear_tf=True)]
+
+    def fit_transform(self, texts: List[str]) -> sparse.csr_matrix:
+        """
+        对整个语料拟合并返回 L2 归一化的稀疏矩阵，行与 texts 一一对应，重复文本只分词一次
+        """
+        unique_texts = list(dict.fromkeys(texts))
+        if not unique_texts:
+            return sparse.csr_matrix((0, 0))
+        tokenized = [self.tokenize(t) for t in unique_texts]
+        if not any(tokenized):
+            return sparse.csr_matrix((len(texts), 1))
+
+        matrix = tokenized
+        for step in self._build():
+            matrix = step.fit_transform(matrix)
+        row_of = {t: i for i, t in enumerate(unique_texts)}
+        return sparse.csr_matrix(matrix)[np.fromiter((row_of[t] for t in texts), dtype=np.int64, count=len(texts))]
+
+
+def _identity(x):
+    return x
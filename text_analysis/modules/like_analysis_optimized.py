@@ -30,6 +30,7 @@ project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(_
 sys.path.insert(0, project_root)
 
 from text_analysis.core.base_analyzer import BaseAnalyzer, create_parser, parse_common_args
+from text_analysis.utils import follow_speed_minutes
 
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei']
@@ -231,66 +232,45 @@ class LikeAnalysisAnalyzer(BaseAnalyzer):
         parent_comments['create_time'] = pd.to_datetime(parent_comments['create_time'], unit='s')
         child_comments['create_time'] = pd.to_datetime(child_comments['create_time'], unit='s')
         
-        # 创建父评论时间映射
-        parent_times = parent_comments.set_index('comment_id')['create_time'].to_dict()
-        
         # 计算跟随速度
-        def get_follow_speed(row):
-            parent_id = str(row['parent_comment_id'])
-            if parent_id not in parent_times:
-                return None
-            
-            parent_time = parent_times[parent_id]
-            child_time = row['create_time']
-            
-            if pd.isna(parent_time) or pd.isna(child_time):
-                return None
-            
-            time_diff = (child_time - parent_time).total_seconds() / 60
-            return time_diff if time_diff >= 0 else None
-        
-        child_comments['follow_speed'] = child_comments.apply(get_follow_speed, axis=1)
-        
-        # 识别意见领袖
-        opinion_leaders = []
-        for _, parent in parent_comments.iterrows():
-            parent_id = parent['comment_id']
-            parent_likes = parent['like_count']
-            parent_time = parent['create_time']
-            
-            # 找到该父评论的所有子评论
-            children = child_comments[child_comments['parent_comment_id'] == parent_id]
-            
-            if len(children) == 0:
-                continue
-            
-            # 计算跟随速度统计
-            valid_follow_speeds = children[children['follow_speed'].notna()]['follow_speed']
-            if len(valid_follow_speeds) == 0:
-                continue
-            
-            avg_follow_speed = valid_follow_speeds.mean()
-            quick_followers = len(valid_follow_speeds[valid_follow_speeds <= follow_speed_threshold])
-            
-            # 确保parent_likes是数值类型
-            parent_likes_numeric = pd.to_numeric(parent_likes, errors='coerce')
-            if pd.isna(parent_likes_numeric):
-                continue
-                
-            # 判断是否为意见领袖
-            if (parent_likes_numeric >= like_threshold and 
-                len(children) >= 3 and 
-                quick_followers >= len(children) * 0.3):
-                
-                opinion_leaders.append({
-                    'comment_id': parent_id,
-                    'content': parent['content'][:50] + '...' if len(parent['content']) > 50 else parent['content'],
-                    'like_count': int(parent_likes),
-                    'child_count': len(children),
-                    'avg_follow_speed': float(avg_follow_speed),
-                    'quick_followers': int(quick_followers),
-                    'quick_follower_ratio': float(quick_followers / len(children))
-                })
+        child_comments['follow_speed'] = follow_speed_minutes(child_comments, parent_comments)
+        
+        # 按父评论聚合子评论数、平均跟随速度和快速跟随数
+        child_comments['parent_key'] = child_comments['parent_comment_id'].astype(str)
+        child_comments['is_quick'] = child_comments['follow_speed'] <= follow_speed_threshold
+        children_stats = child_comments.groupby('parent_key').agg(
+            child_count=('follow_speed', 'size'),
+            valid_follow_count=('follow_speed', 'count'),
+            avg_follow_speed=('follow_speed', 'mean'),
+            quick_followers=('is_quick', 'sum'),
+        )
+        
+        parents = parent_comments.join(children_stats, on=parent_comments['comment_id'].astype(str), how='inner')
+        parents['like_count_numeric'] = pd.to_numeric(parents['like_count'], errors='coerce')
+        
+        # 判断是否为意见领袖
+        leader_mask = (
+            (parents['valid_follow_count'] > 0) &
+            (parents['like_count_numeric'] >= like_threshold) &
+            (parents['child_count'] >= 3) &
+            (parents['quick_followers'] >= parents['child_count'] * 0.3)
+        )
+        leaders = parents[leader_mask]
+        
+        opinion_leaders = [
+            {
+                'comment_id': comment_id,
+                'content': content[:50] + '...' if len(content) > 50 else content,
+                'like_count': int(like_count),
+                'child_count': int(child_count),
+                'avg_follow_speed': float(avg_follow_speed),
+                'quick_followers': int(quick_followers),
+                'quick_follower_ratio': float(quick_followers / child_count)
+            }
+            for comment_id, content, like_count, child_count, avg_follow_speed, quick_followers in zip(
+                leaders['comment_id'], leaders['content'], leaders['like_count_numeric'],
+                leaders['child_count'], leaders['avg_follow_speed'], leaders['quick_followers'])
+        ]
         
         # 按点赞数排序
         opinion_leaders.sort(key=lambda x: x['like_count'], reverse=True)
@@ -358,25 +338,8 @@ class LikeAnalysisAnalyzer(BaseAnalyzer):
         parent_comments['create_time'] = pd.to_datetime(parent_comments['create_time'], unit='s')
         child_comments['create_time'] = pd.to_datetime(child_comments['create_time'], unit='s')
         
-        # 创建父评论时间映射
-        parent_times = parent_comments.set_index('comment_id')['create_time'].to_dict()
-        
         # 计算跟随速度
-        def get_follow_speed(row):
-            parent_id = str(row['parent_comment_id'])
-            if parent_id not in parent_times:
-                return None
-            
-            parent_time = parent_times[parent_id]
-            child_time = row['create_time']
-            
-            if pd.isna(parent_time) or pd.isna(child_time):
-                return None
-            
-            time_diff = (child_time - parent_time).total_seconds() / 60
-            return time_diff if time_diff >= 0 else None
-        
-        child_comments['follow_speed'] = child_comments.apply(get_follow_speed, axis=1)
+        child_comments['follow_speed'] = follow_speed_minutes(child_comments, parent_comments)
         valid_child_comments = child_comments[child_comments['follow_speed'].notna()]
         
         if len(valid_child_comments) == 0:
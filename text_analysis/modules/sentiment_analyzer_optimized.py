@@ -44,11 +44,25 @@ logger = logging.getLogger(__name__)
 
 # 导入统一的API管理器
 from text_analysis.core.aliyun_api_manager import get_aliyun_api_manager, is_aliyun_api_available
+from text_analysis.core.sentiment_matcher import AhoCorasickMatcher, load_weighted_dict, load_word_set
+
+# 分句标点：否定词、程度副词不跨越标点修饰情感词
+_CLAUSE_BREAK = re.compile(r'[^\u4e00-\u9fa5a-zA-Z0-9]')
 
 class DictionaryAnalyzer:
     """本地词典情感分析器"""
     
-    def __init__(self):
+    # 否定词/程度副词与被修饰的情感词之间最多间隔的字符数，如 "不是很好" 中 "不" 与 "很" 间隔 1 个字符
+    MODIFIER_WINDOW = 2
+    
+    def __init__(self, sentiment_dict_path: Optional[str] = None, negation_dict_path: Optional[str] = None,
+                 intensifier_dict_path: Optional[str] = None):
+        """
+        Args:
+            sentiment_dict_path: 外部情感词典文件，每行 "词 分数"，与内置词典合并
+            negation_dict_path: 外部否定词表文件，每行一个词
+            intensifier_dict_path: 外部程度副词文件，每行 "词 倍数"
+        """
         self.sentiment_dict = self._load_sentiment_dict()
         self.negation_words = {'不', '没', '无', '非', '未', '别', '莫', '勿', '毋', '弗', '否', '反'}
         self.intensifier_words = {
@@ -56,6 +70,17 @@ class DictionaryAnalyzer:
             '比较': 1.2, '有点': 0.8, '稍微': 0.7, '略微': 0.7, '太': 1.8, '真': 1.5,
             '确实': 1.3, '真的': 1.5, '绝对': 2.0, '完全': 2.0,
         }
+        if sentiment_dict_path:
+            self.sentiment_dict.update(load_weighted_dict(sentiment_dict_path))
+        if negation_dict_path:
+            self.negation_words |= load_word_set(negation_dict_path)
+        if intensifier_dict_path:
+            self.intensifier_words.update(load_weighted_dict(intensifier_dict_path))
+        
+        # 三个词典编译成一个自动机，一次扫描完成分词与查词
+        self.matcher = AhoCorasickMatcher(
+            set(self.sentiment_dict) | self.negation_words | set(self.intensifier_words)
+        )
     
     def _load_sentiment_dict(self) -> Dict[str, float]:
         """加载情感词典"""
@@ -95,35 +120,34 @@ class DictionaryAnalyzer:
         if not text or not text.strip():
             return {'sentiment': 'neutral', 'score': 0.0, 'confidence': 0.0}
         
-        # 文本预处理
-        text = re.sub(r'[^\u4e00-\u9fa5a-zA-Z0-9]', ' ', text)
-        words = text.split()
-        
-        if not words:
-            return {'sentiment': 'neutral', 'score': 0.0, 'confidence': 0.0}
+        text = text.lower()
+        tokens = self.matcher.find_longest(text)
         
         total_score = 0.0
         word_count = 0
         
-        for i, word in enumerate(words):
-            word_score = 0.0
-            
-            # 检查情感词典
-            if word in self.sentiment_dict:
-                word_score = self.sentiment_dict[word]
-            
-            # 检查程度副词
-            if i > 0 and words[i-1] in self.intensifier_words:
-                word_score *= self.intensifier_words[words[i-1]]
+        for i, (start, _, word) in enumerate(tokens):
+            if word not in self.sentiment_dict:
+                continue
+            word_score = self.sentiment_dict[word]
             
-            # 检查否定词
-            if i > 0 and words[i-1] in self.negation_words:
-                word_score *= -1
+            # 向前查找修饰词窗口：紧邻(间隔不超过 MODIFIER_WINDOW 且中间没有标点)的否定词和程度副词
+            boundary = start
+            for prev_start, prev_end, prev_word in reversed(tokens[:i]):
+                if prev_word in self.sentiment_dict or boundary - prev_end > self.MODIFIER_WINDOW:
+                    break
+                if _CLAUSE_BREAK.search(text, prev_end, boundary):
+                    break
+                if prev_word in self.intensifier_words:
+                    word_score *= self.intensifier_words[prev_word]
+                elif prev_word in self.negation_words:
+                    word_score *= -1
+                boundary = prev_start
             
             total_score += word_score
             word_count += 1
         
-        # 计算平均分数
+        # 计算命中情感词的平均分数
         if word_count > 0:
             score = total_score / word_count
         else:
@@ -146,6 +170,29 @@ class DictionaryAnalyzer:
             'confidence': confidence,
             'method': 'dictionary'
         }
+    
+    def analyze_texts(self, texts: List[str]) -> List[Dict[str, Union[str, float]]]:
+        """批量分析，相同文本只计算一次"""
+        cache: Dict[str, Dict[str, Union[str, float]]] = {}
+        results = []
+        for text in texts:
+            result = cache.get(text)
+            if result is None:
+                result = cache[text] = self.analyze_text(text)
+            results.append(result)
+        return results
+
+# 进程池 worker 内的词典分析器，每个进程初始化时加载一次
+_worker_analyzer: Optional[DictionaryAnalyzer] = None
+
+def _init_dictionary_worker(dict_paths: Optional[Dict[str, str]]):
+    """进程池 initializer：在 worker 进程内构建词典自动机"""
+    global _worker_analyzer
+    _worker_analyzer = DictionaryAnalyzer(**(dict_paths or {}))
+
+def _score_chunk(texts: List[str]) -> List[Dict[str, Union[str, float]]]:
+    """进程池任务：对一段去重后的文本打分"""
+    return _worker_analyzer.analyze_texts(texts)
 
 class AliyunAnalyzer:
     """阿里云NLP情感分析器"""
@@ -181,15 +228,30 @@ class AliyunAnalyzer:
 class SentimentAnalyzer:
     """统一情感分析器"""
     
+    EXECUTION_MODES = ("auto", "thread", "process", "inline")
+    # 去重后文本少于该数量时进程池的启动开销大于收益，auto 模式下直接在当前进程计算
+    PROCESS_POOL_MIN_TEXTS = 5000
+    
     def __init__(self, analyzer_type: str = "dictionary", video_id: Optional[str] = None,
-                 sa_concurrency: int = 8, sa_batch_size: int = 200, sa_throttle_ms: int = 0):
+                 sa_concurrency: int = 8, sa_batch_size: int = 200, sa_throttle_ms: int = 0,
+                 dict_paths: Optional[Dict[str, str]] = None, sa_mode: str = "auto",
+                 sa_workers: Optional[int] = None):
         """
         初始化情感分析器
         
         Args:
             analyzer_type: 分析器类型 ("dictionary" 或 "aliyun")
+            dict_paths: 本地词典的外部词典文件，键为 DictionaryAnalyzer 的 *_dict_path 参数名
+            sa_mode: 批量执行方式 auto | thread | process | inline，
+                     auto 时阿里云(I/O 密集)用线程池，本地词典(CPU 密集)文本量大时用进程池
+            sa_workers: 进程池进程数，默认 CPU 核数
         """
+        if sa_mode not in self.EXECUTION_MODES:
+            raise ValueError(f"不支持的执行方式: {sa_mode}")
         self.analyzer_type = analyzer_type
+        self.dict_paths = dict_paths
+        self.sa_mode = sa_mode
+        self.sa_workers = max(1, sa_workers or os.cpu_count() or 1)
         self.video_id = video_id
         self.sa_concurrency = max(1, sa_concurrency)
         self.sa_batch_size = max(1, sa_batch_size)
@@ -197,7 +259,7 @@ class SentimentAnalyzer:
         self._stats_lock = threading.Lock()
         
         if analyzer_type == "dictionary":
-            self.analyzer = DictionaryAnalyzer()
+            self.analyzer = DictionaryAnalyzer(**(dict_paths or {}))
         elif analyzer_type == "aliyun":
             self.analyzer = AliyunAnalyzer()
         else:
@@ -347,12 +409,54 @@ class SentimentAnalyzer:
         }
         return [result_map[order_to_text[i]] for i in range(n)]
 
+    def _resolve_mode(self, unique_count: int) -> str:
+        """确定批量执行方式"""
+        if self.sa_mode != "auto":
+            return self.sa_mode
+        if self.analyzer_type != "dictionary":
+            return "thread"
+        if self.sa_workers > 1 and unique_count >= self.PROCESS_POOL_MIN_TEXTS:
+            return "process"
+        return "inline"
+
+    def _analyze_texts_process(self, unique_texts: List[str]) -> List[Dict[str, Union[str, float]]]:
+        """把去重后的文本分块交给进程池，worker 只在启动时加载一次词典，结果按原顺序合并"""
+        from concurrent.futures import ProcessPoolExecutor
+        chunk_size = max(500, -(-len(unique_texts) // (self.sa_workers * 4)))
+        chunks = [unique_texts[i:i + chunk_size] for i in range(0, len(unique_texts), chunk_size)]
+        print(f"[RUN] 本地情感分析 {len(unique_texts)} 条文本，{self.sa_workers} 进程，{len(chunks)} 块")
+        results: List[Dict[str, Union[str, float]]] = []
+        with ProcessPoolExecutor(max_workers=self.sa_workers, initializer=_init_dictionary_worker,
+                                 initargs=(self.dict_paths,)) as ex:
+            for chunk_results in ex.map(_score_chunk, chunks):
+                results.extend(chunk_results)
+        return results
+
+    def analyze_texts(self, texts: List[str]) -> List[Dict[str, Union[str, float]]]:
+        """批量情感分析，按 sa_mode 选择线程池/进程池/当前进程，返回与 texts 顺序一致的结果"""
+        unique_texts = list(dict.fromkeys(texts))
+        mode = self._resolve_mode(len(unique_texts))
+        if mode == "thread":
+            return self._analyze_texts_concurrent(texts)
+        if self.analyzer_type != "dictionary":
+            raise ValueError(f"{self.analyzer_type} 分析器只支持线程池执行")
+
+        if mode == "process":
+            unique_results = self._analyze_texts_process(unique_texts)
+        else:
+            unique_results = self.analyzer.analyze_texts(unique_texts)
+        # 与线程池路径一致，统计按去重后的文本计
+        for result in unique_results:
+            self._update_stats(result)
+        result_map = dict(zip(unique_texts, unique_results))
+        return [result_map[t] for t in texts]
+
     def analyze_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
-        """对DataFrame的content列并发执行情感分析并填充结果列"""
+        """对DataFrame的content列批量执行情感分析并填充结果列"""
         if 'content' not in df.columns:
             return df
         texts = df['content'].astype(str).tolist()
-        results = self._analyze_texts_concurrent(texts)
+        results = self.analyze_texts(texts)
         df = df.copy()
         df['sentiment'] = [r.get('sentiment', 'neutral') for r in results]
         df['sentiment_score'] = [r.get('score', 0.0) for r in results]
@@ -558,6 +662,13 @@ def main():
     parser.add_argument('--sa-concurrency', type=int, default=8, help='情感API并发数，默认8')
     parser.add_argument('--sa-batch-size', type=int, default=200, help='情感API批大小，默认200')
     parser.add_argument('--sa-throttle-ms', type=int, default=0, help='情感API节流毫秒，默认0=不限制')
+    parser.add_argument('--sa-mode', choices=['auto', 'thread', 'process', 'inline'], default='auto',
+                        help='批量执行方式，默认auto：阿里云用线程池，本地词典文本量大时用进程池')
+    parser.add_argument('--sa-workers', type=int, help='本地词典进程池进程数，默认CPU核数')
+    # 本地词典外部文件
+    parser.add_argument('--sentiment-dict', type=str, help='外部情感词典文件，每行 "词 分数"')
+    parser.add_argument('--negation-dict', type=str, help='外部否定词表文件，每行一个词')
+    parser.add_argument('--intensifier-dict', type=str, help='外部程度副词文件，每行 "词 倍数"')
     
     args = parser.parse_args()
     
@@ -601,6 +712,13 @@ def main():
             sa_concurrency=max(1, args.sa_concurrency),
             sa_batch_size=max(1, args.sa_batch_size),
             sa_throttle_ms=max(0, args.sa_throttle_ms),
+            dict_paths={
+                'sentiment_dict_path': args.sentiment_dict,
+                'negation_dict_path': args.negation_dict,
+                'intensifier_dict_path': args.intensifier_dict,
+            },
+            sa_mode=args.sa_mode,
+            sa_workers=args.sa_workers,
         )
         print("[OK] 情感分析器初始化成功")
     except Exception as e:
@@ -659,15 +777,8 @@ def main():
     try:
         # 对数据进行情感分析
         print("=== 开始情感分析 ===")
-        results = []
-        for idx, row in df.iterrows():
-            result = analyzer.analyze_text(row['content'])
-            results.append(result)
-        
-        # 将结果添加到DataFrame
-        df['sentiment'] = [r['sentiment'] for r in results]
-        df['sentiment_score'] = [r['score'] for r in results]
-        df['confidence'] = [r['confidence'] for r in results]
+        df = analyzer.analyze_dataframe(df)
+        df['confidence'] = df['sentiment_confidence']
         
         print("[OK] 情感分析完成")
         
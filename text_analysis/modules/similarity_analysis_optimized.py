@@ -13,11 +13,12 @@ import time
 import warnings
 import argparse
 from datetime import datetime
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Optional
 import numpy as np
 import pandas as pd
 import requests
-from sklearn.metrics.pairwise import cosine_similarity
+from scipy import sparse
+from sklearn.preprocessing import normalize
 import matplotlib.pyplot as plt
 import seaborn as sns
 
@@ -37,6 +38,8 @@ warnings.filterwarnings('ignore')
 
 
 from text_analysis.core.aliyun_api_manager import get_aliyun_api_manager, is_aliyun_api_available
+from text_analysis.core.near_duplicate import MinHashLSH
+from text_analysis.core.text_vectorizer import LocalTextVectorizer
 
 class AliyunTextVectorClient:
     """阿里云词向量API客户端"""
@@ -47,66 +50,12 @@ class AliyunTextVectorClient:
             raise ValueError("阿里云API配置缺失，请设置 ALIYUN_ACCESS_KEY_ID 和 ALIYUN_ACCESS_KEY_SECRET")
         
     def get_text_vector(self, text: str) -> List[float]:
-        """获取文本向量 - 使用阿里云词向量API"""
+        """获取文本向量 - 使用阿里云词向量API，失败时返回空列表"""
         try:
             return self.api_manager.get_text_vector(text)
         except Exception as e:
             print(f"获取文本向量失败: {e}")
             return []
-            error_msg = str(e)
-            if "400" in error_msg:
-                if "BasicServiceNotActivated" in error_msg:
-                    print("⚠️ 阿里云NLP基础版服务未开通，请访问：https://common-buy.aliyun.com/?commodityCode=nlp%5FalinlpBasePost%5Fpublic%5Fcn#/buy")
-                elif "UserStatusInvalid" in error_msg:
-                    print("⚠️ 用户状态无效，请检查账户是否欠费")
-                elif "InvalidParameter" in error_msg:
-                    print("⚠️ 参数无效，请检查API调用参数")
-                else:
-                    print(f"⚠️ 阿里云API调用失败(400错误): {error_msg}")
-            else:
-                print(f"⚠️ 阿里云API调用失败: {error_msg}")
-            
-            print("🔄 自动切换到本地TF-IDF方法...")
-            # 使用本地TF-IDF作为备选方案
-            return self._get_tfidf_vector(text)
-    
-    def _get_tfidf_vector(self, text: str) -> List[float]:
-        """使用本地TF-IDF计算文本向量"""
-        try:
-            from sklearn.feature_extraction.text import TfidfVectorizer
-            import jieba
-            
-            # 简单的文本预处理
-            text = text.strip()
-            if not text:
-                return [0.0] * 100
-            
-            # 使用jieba分词
-            words = list(jieba.cut(text))
-            processed_text = ' '.join(words)
-            
-            # 创建TF-IDF向量化器
-            vectorizer = TfidfVectorizer(
-                max_features=100,
-                stop_words=None,
-                ngram_range=(1, 2)
-            )
-            
-            # 计算TF-IDF向量
-            tfidf_matrix = vectorizer.fit_transform([processed_text])
-            vector = tfidf_matrix.toarray()[0].tolist()
-            
-            # 确保向量长度为100
-            if len(vector) < 100:
-                vector.extend([0.0] * (100 - len(vector)))
-            elif len(vector) > 100:
-                vector = vector[:100]
-            
-            return vector
-            
-        except Exception as e:
-            print(f"❌ TF-IDF计算失败: {e}")
-            return [0.0] * 100
     
     def batch_get_vectors(self, texts: List[str], batch_size: int = 50, concurrency: int = 4, throttle_ms: int = 0) -> List[List[float]]:
         """批量获取文本向量（支持并发与节流）"""
@@ -127,7 +76,7 @@ class AliyunTextVectorClient:
                     try:
                         vectors[idx] = fut.result()
                     except Exception:
-                        vectors[idx] = [0.0] * 100
+                        vectors[idx] = []
 
         for i in range(0, total, batch_size):
             _submit_range(i, min(i + batch_size, total))
@@ -144,20 +93,44 @@ class SimilarityAnalyzer:
                  min_text_length: int = 5,
                  vector_batch_size: int = 50,
                  vector_concurrency: int = 4,
-                 vector_throttle_ms: int = 0):
+                 vector_throttle_ms: int = 0,
+                 vector_mode: str = "aliyun",
+                 local_vectorizer: str = "tfidf",
+                 pair_mode: str = "lsh",
+                 lsh_threshold: float = 0.5):
+        """
+        Args:
+            vector_mode: aliyun 使用阿里云文本向量API | local 使用本地语料级TF-IDF，无需API密钥
+            local_vectorizer: 本地向量化方式 tfidf | hashing，也用于阿里云向量获取失败时的回退
+            pair_mode: lsh 用 MinHash LSH 找出时间阈值内所有近似评论对 | adjacent 只比较相邻评论
+            lsh_threshold: LSH 分桶的近似 Jaccard 阈值，越低召回越高、候选对越多
+        """
+        if vector_mode not in ("aliyun", "local"):
+            raise ValueError(f"不支持的向量模式: {vector_mode}")
+        if pair_mode not in ("lsh", "adjacent"):
+            raise ValueError(f"不支持的评论对模式: {pair_mode}")
+        self.pair_mode = pair_mode
+        self.lsh = MinHashLSH(threshold=lsh_threshold)
         self.similarity_threshold = similarity_threshold
         self.time_diff_threshold = time_diff_threshold
         self.min_text_length = min_text_length
         self.vector_batch_size = vector_batch_size
         self.vector_concurrency = vector_concurrency
         self.vector_throttle_ms = vector_throttle_ms
+        self.vector_mode = vector_mode
+        self.local_vectorizer = LocalTextVectorizer(mode=local_vectorizer)
+        self.vector_client = None
+        
+        if vector_mode == "local":
+            print(f"✅ 使用本地语料级向量化: {local_vectorizer}")
+            return
         
         # 初始化阿里云客户端
         access_key_id = os.getenv('NLP_AK_ENV')
         access_key_secret = os.getenv('NLP_SK_ENV')
         
         if not access_key_id or not access_key_secret:
-            raise ValueError("❌ 请设置阿里云API密钥环境变量: NLP_AK_ENV, NLP_SK_ENV")
+            raise ValueError("❌ 请设置阿里云API密钥环境变量: NLP_AK_ENV, NLP_SK_ENV，或使用 --vector-mode local")
         
         self.vector_client = AliyunTextVectorClient(access_key_id, access_key_secret)
         print("✅ 阿里云文本向量客户端初始化成功")
@@ -219,24 +192,20 @@ class SimilarityAnalyzer:
         print("2. 计算文本向量...")
         vectors = self._calculate_text_vectors(df_processed['content'].tolist())
         
-        # 3. 计算相似度矩阵
-        print("3. 计算相似度矩阵...")
-        similarity_matrix = self._calculate_similarity_matrix(vectors)
-        
-        # 4. 识别评论对
-        print("4. 识别评论对...")
+        # 3. 生成候选评论对
+        print("3. 生成候选评论对...")
         comment_pairs = self._identify_comment_pairs(df_processed)
         
-        # 5. 分析相似度
-        print("5. 分析相似度...")
-        similarity_results = self._analyze_similarity(df_processed, similarity_matrix, comment_pairs)
+        # 4. 计算评论对相似度
+        print("4. 计算评论对相似度...")
+        similarity_results = self._analyze_similarity(df_processed, vectors, comment_pairs)
         
-        # 6. 识别模仿性评论
-        print("6. 识别模仿性评论...")
+        # 5. 识别模仿性评论
+        print("5. 识别模仿性评论...")
         imitative_comments = self._identify_imitative_comments(df_processed, similarity_results)
         
-        # 7. 生成统计结果
-        print("7. 生成统计结果...")
+        # 6. 生成统计结果
+        print("6. 生成统计结果...")
         stats = self._generate_statistics(df_processed, similarity_results, imitative_comments)
         
         # 保存处理后的数据
@@ -264,8 +233,11 @@ class SimilarityAnalyzer:
         
         return df_processed
     
-    def _calculate_text_vectors(self, texts: List[str]) -> List[List[float]]:
-        """计算文本向量（去重+并发）"""
+    def _calculate_text_vectors(self, texts: List[str]):
+        """计算文本向量（去重+并发），返回稠密向量列表或本地模式下的稀疏矩阵"""
+        if self.vector_mode == "local":
+            return self.local_vectorizer.fit_transform(texts)
+        
         # 去重映射
         unique_index: Dict[str, int] = {}
         order_to_text: Dict[int, str] = {}
@@ -284,54 +256,70 @@ class SimilarityAnalyzer:
             concurrency=self.vector_concurrency,
             throttle_ms=self.vector_throttle_ms,
         )
+        # 部分文本获取失败时整体回退到本地向量化，不同向量空间的结果之间无法比较
+        if any(not v for v in vectors_unique):
+            print("🔄 部分文本向量获取失败，整体切换到本地语料级TF-IDF...")
+            return self.local_vectorizer.fit_transform(texts)
         vec_map: Dict[str, List[float]] = {t: vectors_unique[u] for t, u in unique_index.items()}
         return [vec_map[order_to_text[i]] for i in range(len(texts))]
     
-    def _calculate_similarity_matrix(self, vectors: List[List[float]]) -> np.ndarray:
-        """计算相似度矩阵"""
-        vectors_array = np.array(vectors)
-        similarity_matrix = cosine_similarity(vectors_array)
-        return similarity_matrix
+    @staticmethod
+    def _time_seconds(create_time: pd.Series) -> np.ndarray:
+        """发布时间统一转换为秒：数值按秒级时间戳处理，其余按日期字符串解析"""
+        numeric = pd.to_numeric(create_time, errors='coerce')
+        if numeric.notna().all():
+            return numeric.to_numpy(dtype=float)
+        return pd.to_datetime(create_time).astype('int64').to_numpy() / 1e9
     
-    def _identify_comment_pairs(self, df: pd.DataFrame) -> List[Tuple[int, int]]:
-        """识别评论对（用于相似度分析）"""
-        pairs = []
+    def _identify_comment_pairs(self, df: pd.DataFrame) -> np.ndarray:
+        """生成候选评论对（m×2 的行下标数组）"""
         n = len(df)
-        
-        # 为了避免计算量过大，只分析相邻的评论对
-        for i in range(n - 1):
-            pairs.append((i, i + 1))
-        
-        print(f"   - 找到 {len(pairs)} 对相邻评论")
+        if self.pair_mode == "adjacent":
+            # 只分析相邻的评论对
+            pairs = np.stack([np.arange(n - 1), np.arange(1, n)], axis=1) if n > 1 else np.empty((0, 2), dtype=np.int64)
+            print(f"   - 找到 {len(pairs)} 对相邻评论")
+            return pairs
+        
+        # MinHash LSH：只有字符 shingle 相近、且时间差在阈值内的评论才配对，避免 n×n 全量比较
+        pairs = self.lsh.candidate_pairs(df['content'].tolist(), self._time_seconds(df['create_time']),
+                                         max_time_diff=self.time_diff_threshold)
+        print(f"   - LSH({self.lsh.bands}×{self.lsh.rows}) 找到 {len(pairs)} 对候选评论")
         return pairs
     
-    def _analyze_similarity(self, df: pd.DataFrame, similarity_matrix: np.ndarray, 
-                          comment_pairs: List[Tuple[int, int]]) -> pd.DataFrame:
+    @staticmethod
+    def _pair_similarities(vectors, pairs: np.ndarray) -> np.ndarray:
+        """只计算候选对的余弦相似度，向量按行 L2 归一化后逐对点积"""
+        if len(pairs) == 0:
+            return np.empty(0)
+        matrix = normalize(vectors if sparse.issparse(vectors) else np.asarray(vectors, dtype=float))
+        left, right = matrix[pairs[:, 0]], matrix[pairs[:, 1]]
+        if sparse.issparse(matrix):
+            return np.asarray(left.multiply(right).sum(axis=1)).ravel()
+        return (left * right).sum(axis=1)
+    
+    def _analyze_similarity(self, df: pd.DataFrame, vectors, comment_pairs: np.ndarray) -> pd.DataFrame:
         """分析相似度"""
-        results = []
+        similarity = self._pair_similarities(vectors, comment_pairs)
+        idx1, idx2 = comment_pairs[:, 0], comment_pairs[:, 1]
         
-        for idx1, idx2 in comment_pairs:
-            similarity = similarity_matrix[idx1][idx2]
-            
-            # 计算时间差
-            time1 = pd.to_datetime(df.iloc[idx1]['create_time'])
-            time2 = pd.to_datetime(df.iloc[idx2]['create_time'])
-            time_diff = abs((time2 - time1).total_seconds())
-            
-            # 处理不同的字段名
-            id_field = 'id' if 'id' in df.columns else 'comment_id'
-            
-            results.append({
-                'comment1_id': df.iloc[idx1][id_field],
-                'comment2_id': df.iloc[idx2][id_field],
-                'comment1_content': df.iloc[idx1]['content'],
-                'comment2_content': df.iloc[idx2]['content'],
-                'similarity': similarity,
-                'time_diff': time_diff,
-                'is_imitative': (similarity > self.similarity_threshold) and (time_diff < self.time_diff_threshold)
-            })
-        
-        return pd.DataFrame(results)
+        # 计算时间差
+        times = self._time_seconds(df['create_time'])
+        time_diff = np.abs(times[idx2] - times[idx1])
+        
+        # 处理不同的字段名
+        id_field = 'id' if 'id' in df.columns else 'comment_id'
+        ids = df[id_field].to_numpy()
+        contents = df['content'].to_numpy()
+        
+        return pd.DataFrame({
+            'comment1_id': ids[idx1],
+            'comment2_id': ids[idx2],
+            'comment1_content': contents[idx1],
+            'comment2_content': contents[idx2],
+            'similarity': similarity,
+            'time_diff': time_diff,
+            'is_imitative': (similarity > self.similarity_threshold) & (time_diff < self.time_diff_threshold)
+        })
     
     def _identify_imitative_comments(self, df: pd.DataFrame, similarity_results: pd.DataFrame) -> pd.DataFrame:
         """识别模仿性评论"""
@@ -562,6 +550,13 @@ def main():
     parser.add_argument('--vector-batch-size', type=int, default=100, help='向量API批大小，默认100')
     parser.add_argument('--vector-concurrency', type=int, default=8, help='向量API并发数，默认8')
     parser.add_argument('--vector-throttle-ms', type=int, default=0, help='向量API节流毫秒，默认0=不限制')
+    parser.add_argument('--vector-mode', choices=['aliyun', 'local'], default='aliyun',
+                        help='向量来源：aliyun(阿里云API) 或 local(本地语料级TF-IDF，离线)，默认aliyun')
+    parser.add_argument('--local-vectorizer', choices=['tfidf', 'hashing'], default='tfidf',
+                        help='本地向量化方式，hashing 适合超大语料，默认tfidf')
+    parser.add_argument('--pair-mode', choices=['lsh', 'adjacent'], default='lsh',
+                        help='评论对生成方式：lsh(找出时间阈值内所有近似评论) 或 adjacent(只比较相邻评论)，默认lsh')
+    parser.add_argument('--lsh-threshold', type=float, default=0.5, help='LSH分桶的近似Jaccard阈值，默认0.5')
     
     args = parser.parse_args()
     
@@ -590,6 +585,10 @@ def main():
             vector_batch_size=max(1, args.vector_batch_size),
             vector_concurrency=max(1, args.vector_concurrency),
             vector_throttle_ms=max(0, args.vector_throttle_ms),
+            vector_mode=args.vector_mode,
+            local_vectorizer=args.local_vectorizer,
+            pair_mode=args.pair_mode,
+            lsh_threshold=args.lsh_threshold,
         )
         
         # 加载数据
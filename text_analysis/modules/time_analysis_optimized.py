@@ -22,7 +22,6 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from collections import defaultdict
 import sys
 import os
 # 添加项目根目录到Python路径
@@ -30,6 +29,7 @@ project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(_
 sys.path.insert(0, project_root)
 
 from text_analysis.core.base_analyzer import BaseAnalyzer, create_parser, parse_common_args
+from text_analysis.utils import child_comment_mask, follow_speed_minutes
 
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei']
@@ -132,29 +132,10 @@ class TimeAnalysisAnalyzer(BaseAnalyzer):
         # 转换时间格式
         df_with_diff['create_time'] = pd.to_datetime(df_with_diff['create_time'], unit='s')
         
-        # 创建父评论时间映射
-        parent_times = df_with_diff.set_index('comment_id')['create_time'].to_dict()
-        
-        def get_time_diff(row):
-            """计算时间差（分钟）"""
-            if pd.isna(row['parent_comment_id']) or row['parent_comment_id'] == '0' or row['parent_comment_id'] == 0:
-                return None
-            
-            parent_id = str(row['parent_comment_id'])
-            if parent_id not in parent_times:
-                return None
-            
-            parent_time = parent_times[parent_id]
-            child_time = row['create_time']
-            
-            if pd.isna(parent_time) or pd.isna(child_time):
-                return None
-            
-            time_diff = (child_time - parent_time).total_seconds() / 60  # 转换为分钟
-            return time_diff if time_diff >= 0 else None
-        
-        # 计算时间差
-        df_with_diff['time_diff'] = df_with_diff.apply(get_time_diff, axis=1)
+        # 按 parent_comment_id -> comment_id 关联父评论时间，整列计算时间差（分钟）
+        is_child = child_comment_mask(df_with_diff['parent_comment_id'])
+        time_diff = follow_speed_minutes(df_with_diff[is_child], df_with_diff)
+        df_with_diff['time_diff'] = time_diff.reindex(df_with_diff.index)
         
         # 过滤有效的子评论
         valid_child_comments = df_with_diff[df_with_diff['time_diff'].notna()]
@@ -203,28 +184,17 @@ class TimeAnalysisAnalyzer(BaseAnalyzer):
         if len(valid_comments) == 0:
             return {}
         
-        window_counts = defaultdict(int)
-        
-        for _, row in valid_comments.iterrows():
-            time_diff = row['time_diff']
-            
-            if time_diff <= 5:
-                window_counts['immediate'] += 1
-            elif time_diff <= 30:
-                window_counts['quick'] += 1
-            elif time_diff <= 120:
-                window_counts['normal'] += 1
-            elif time_diff <= 1440:
-                window_counts['slow'] += 1
-            elif time_diff <= 10080:
-                window_counts['delayed'] += 1
+        # 左开右闭分箱，超过7天的不计入任何窗口
+        windows = pd.cut(valid_comments['time_diff'], bins=[-np.inf, 5, 30, 120, 1440, 10080],
+                         labels=['immediate', 'quick', 'normal', 'slow', 'delayed'])
+        window_counts = {name: int(count) for name, count in windows.value_counts(sort=False).items() if count > 0}
         
         # 计算百分比
         total = len(valid_comments)
         window_percentages = {k: (v / total * 100) for k, v in window_counts.items()}
         
         return {
-            'counts': dict(window_counts),
+            'counts': window_counts,
             'percentages': window_percentages
         }
     
@@ -236,17 +206,14 @@ class TimeAnalysisAnalyzer(BaseAnalyzer):
             return {}
         
         # 按分钟统计评论数量
-        minute_counts = defaultdict(int)
-        for _, row in valid_comments.iterrows():
-            minute = int(row['time_diff'])
-            minute_counts[minute] += 1
+        minute_counts = valid_comments['time_diff'].astype(int).value_counts()
         
         # 计算阈值
         total_comments = len(valid_comments)
         threshold = total_comments * threshold_percentage / 100
         
         # 找到密集时段
-        dense_minutes = [minute for minute, count in minute_counts.items() if count >= threshold]
+        dense_minutes = [int(minute) for minute in minute_counts.index[minute_counts >= threshold]]
         
         # 合并连续的密集分钟
         conformity_windows = []
@@ -280,18 +247,17 @@ class TimeAnalysisAnalyzer(BaseAnalyzer):
             return {}
         
         # 按小时统计
-        hour_counts = defaultdict(int)
-        for _, row in valid_comments.iterrows():
-            hour = int(row['time_diff'] / 60)
-            hour_counts[hour] += 1
+        hour_counts = (valid_comments['time_diff'] / 60).astype(int).value_counts()
         
         # 找到最密集的时段
-        if hour_counts:
-            max_hour = max(hour_counts, key=hour_counts.get)
-            max_count = hour_counts[max_hour]
+        if len(hour_counts) > 0:
+            # 数量相同时小时数小的在前
+            hour_counts = hour_counts.sort_index(kind='mergesort').sort_values(ascending=False, kind='mergesort')
+            max_hour = int(hour_counts.index[0])
+            max_count = int(hour_counts.iloc[0])
             
             # 计算前10个最密集的时段
-            top_hours = sorted(hour_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+            top_hours = [(int(hour), int(count)) for hour, count in hour_counts.iloc[:10].items()]
             
             return {
                 'peak_hour': max_hour,
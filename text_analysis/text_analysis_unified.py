@@ -42,9 +42,15 @@ def main():
   python text_analysis_unified.py like --use-cleaned-data --test
   python text_analysis_unified.py sentiment --use-cleaned-data --type local --test
   python text_analysis_unified.py similarity --use-cleaned-data --test
+
+性能分析示例:
+  python text_analysis_unified.py --profile sample time --use-cleaned-data --test
         """
     )
     
+    parser.add_argument('--profile', choices=['off', 'sample', 'cprofile'], default='off',
+                        help='性能分析模式，结果输出到 data/profile 目录，默认off')
+
     # 子命令
     subparsers = parser.add_subparsers(dest='module', help='选择分析模块')
     
@@ -65,6 +71,12 @@ def main():
     sentiment_parser.add_argument('--sa-concurrency', type=int, default=8, help='情感API并发数，默认8')
     sentiment_parser.add_argument('--sa-batch-size', type=int, default=200, help='情感API批大小，默认200')
     sentiment_parser.add_argument('--sa-throttle-ms', type=int, default=0, help='情感API节流毫秒，默认0=不限制')
+    sentiment_parser.add_argument('--sa-mode', choices=['auto', 'thread', 'process', 'inline'], default='auto',
+                                  help='批量执行方式，默认auto：阿里云用线程池，本地词典文本量大时用进程池')
+    sentiment_parser.add_argument('--sa-workers', type=int, help='本地词典进程池进程数，默认CPU核数')
+    sentiment_parser.add_argument('--sentiment-dict', type=str, help='外部情感词典文件，每行 "词 分数"')
+    sentiment_parser.add_argument('--negation-dict', type=str, help='外部否定词表文件，每行一个词')
+    sentiment_parser.add_argument('--intensifier-dict', type=str, help='外部程度副词文件，每行 "词 倍数"')
     
     # 时间分析子命令
     time_parser = subparsers.add_parser('time', help='从众心理时间分析')
@@ -110,6 +122,13 @@ def main():
                                   help='相似度阈值（默认0.7）')
     similarity_parser.add_argument('--time-diff-threshold', type=int, default=3600, 
                                   help='时间差阈值(秒)（默认3600）')
+    similarity_parser.add_argument('--vector-mode', choices=['aliyun', 'local'], default='aliyun',
+                                   help='向量来源：aliyun(阿里云API) 或 local(本地语料级TF-IDF，离线)，默认aliyun')
+    similarity_parser.add_argument('--local-vectorizer', choices=['tfidf', 'hashing'], default='tfidf',
+                                   help='本地向量化方式，hashing 适合超大语料，默认tfidf')
+    similarity_parser.add_argument('--pair-mode', choices=['lsh', 'adjacent'], default='lsh',
+                                   help='评论对生成方式：lsh(找出时间阈值内所有近似评论) 或 adjacent(只比较相邻评论)，默认lsh')
+    similarity_parser.add_argument('--lsh-threshold', type=float, default=0.5, help='LSH分桶的近似Jaccard阈值，默认0.5')
     similarity_parser.add_argument('--test', action='store_true', help='测试模式，只分析少量数据')
     similarity_parser.add_argument('--no-save', action='store_true', help='不保存结果文件')
     similarity_parser.add_argument('--no-report', action='store_true', help='不生成分析报告')
@@ -139,6 +158,18 @@ def main():
         print("使用清洗数据")
     print("=" * 50)
     
+    if args.profile == 'off':
+        run_modules(args)
+        return
+
+    from tools import profiler
+    with profiler.profile(args.profile, f"analysis_{args.module}",
+                          base_dir=os.path.join(project_root, 'data', 'profile')) as run_profiler:
+        run_modules(args)
+    print(f"📈 性能分析结果: {run_profiler.output_dir}")
+
+def run_modules(args):
+    """执行分析模块，未指定视频ID时按视频ID批处理"""
     # 批量模式：未指定 --video-id 时，按视频ID批处理
     if not getattr(args, 'video_id', None):
         from text_analysis.utils import enumerate_aweme_ids
@@ -153,6 +184,7 @@ def main():
             print("⚠️ 未发现可处理的视频ID，回退到全量执行")
             args.video_id = None
     dispatch_module(args)
+
 def dispatch_module(args):
     """按模块分发执行"""
     if args.module == 'sentiment':
@@ -197,6 +229,17 @@ def run_sentiment_analysis(args):
             sys.argv.extend(['--sa-batch-size', str(args.sa_batch_size)])
         if hasattr(args, 'sa_throttle_ms'):
             sys.argv.extend(['--sa-throttle-ms', str(args.sa_throttle_ms)])
+        if hasattr(args, 'sa_mode'):
+            sys.argv.extend(['--sa-mode', args.sa_mode])
+        if getattr(args, 'sa_workers', None):
+            sys.argv.extend(['--sa-workers', str(args.sa_workers)])
+        # 外部词典透传
+        if args.sentiment_dict:
+            sys.argv.extend(['--sentiment-dict', args.sentiment_dict])
+        if args.negation_dict:
+            sys.argv.extend(['--negation-dict', args.negation_dict])
+        if args.intensifier_dict:
+            sys.argv.extend(['--intensifier-dict', args.intensifier_dict])
         
         sentiment_main()
         
@@ -317,6 +360,10 @@ def run_similarity_analysis(args):
             sys.argv.extend(['--similarity-threshold', str(args.similarity_threshold)])
         if args.time_diff_threshold:
             sys.argv.extend(['--time-diff-threshold', str(args.time_diff_threshold)])
+        sys.argv.extend(['--vector-mode', args.vector_mode])
+        sys.argv.extend(['--local-vectorizer', args.local_vectorizer])
+        sys.argv.extend(['--pair-mode', args.pair_mode])
+        sys.argv.extend(['--lsh-threshold', str(args.lsh_threshold)])
         if args.test:
             sys.argv.append('--test')
         if args.no_save:
@@ -0,0 +1,344 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 常驻 CDP 浏览器守护进程，多次爬取复用同一个已登录的浏览器
+import asyncio
+import json
+import os
+import platform
+import signal
+import subprocess
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional
+
+import httpx
+
+try:
+    import fcntl
+except ImportError:  # Windows 下用 O_EXCL 锁文件代替
+    fcntl = None
+
+import config
+from tools import utils
+from tools.browser_launcher import BrowserLauncher
+
+# 各平台页面所属的域名，租用时用来找到上一次运行遗留的页面
+PLATFORM_DOMAINS = {
+    "xhs": "xiaohongshu.com",
+    "dy": "douyin.com",
+    "ks": "kuaishou.com",
+    "bili": "bilibili.com",
+    "wb": "weibo.",
+    "tieba": "tieba.baidu.com",
+    "zhihu": "zhihu.com",
+}
+
+
+# 等待状态文件锁的最长时间(秒)和重试间隔(秒)
+STATE_LOCK_TIMEOUT = 60
+STATE_LOCK_RETRY_INTERVAL = 0.05
+
+# 守护浏览器的用户数据目录名，停止前用来确认进程确实是守护浏览器
+DAEMON_USER_DATA_DIR_NAME = "cdp_daemon_user_data"
+
+
+class BrowserDaemonError(Exception):
+    """守护浏览器不可用或者平台上下文已被占用"""
+
+
+def is_process_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    if platform.system() == "Windows":
+        result = subprocess.run(["tasklist", "/FI", f"PID eq {pid}"], capture_output=True, text=True)
+        return str(pid) in result.stdout
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def process_cmdline(pid: int) -> Optional[str]:
+    """
+    读取进程的启动命令行，优先使用 psutil，没有安装时读取 /proc 或调用系统命令
+    :param pid:
+    :return: 命令行，读取失败时返回 None
+    """
+    try:
+        import psutil
+        return " ".join(psutil.Process(pid).cmdline())
+    except ImportError:
+        pass
+    except Exception:
+        return None
+
+    if os.path.isdir("/proc"):
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                return f.read().replace(b"\0", b" ").decode(errors="ignore")
+        except OSError:
+            return None
+    if platform.system() == "Windows":
+        command = ["wmic", "process", "where", f"ProcessId={pid}", "get", "CommandLine"]
+    else:
+        command = ["ps", "-o", "command=", "-p", str(pid)]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+class BrowserDaemon:
+    """
+    常驻浏览器由 `python -m tools.browser_launcher --daemon start` 启动一次，之后每次爬取通过 CDP 连接
+    状态文件中记录浏览器进程、调试端口以及按平台划分的上下文租用信息:
+    {
+        "pid": 1234, "port": 9222, "started_at": 1700000000,
+        "contexts": {"xhs": {"uses": 3, "leased_by": 5678, "leased_at": 1700000100}}
+    }
+    CDP 连接下新建的 BrowserContext 会在断开连接时销毁，所以各平台共用浏览器的默认上下文(登录态保存在用户数据目录中)，
+    登记表负责保证同一平台同一时间只有一个爬虫在使用，并在使用 N 次之后重启浏览器释放长时间运行积累的内存
+    """
+
+    def __init__(self, state_file: Optional[str] = None, max_uses: Optional[int] = None):
+        self.state_file = state_file or config.CDP_DAEMON_STATE_FILE
+        self.max_uses = config.CDP_DAEMON_CONTEXT_MAX_USES if max_uses is None else max_uses
+        self.launcher = BrowserLauncher()
+
+    def load_state(self) -> Dict:
+        if not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            utils.logger.warning(f"[BrowserDaemon.load_state] read state file error: {e}")
+            return {}
+
+    def save_state(self, state: Dict) -> None:
+        os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+        # 临时文件按进程区分，写完整之后原子替换，其他进程不会读到写了一半的文件
+        tmp_file = f"{self.state_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.state_file)
+
+    @property
+    def lock_file(self) -> str:
+        return f"{self.state_file}.lock"
+
+    def _try_lock(self) -> Optional[int]:
+        """
+        尝试获取状态文件的排他锁，不阻塞
+        :return: 锁文件描述符，锁被其他进程或协程持有时返回 None
+        """
+        os.makedirs(os.path.dirname(self.lock_file) or ".", exist_ok=True)
+        if fcntl is not None:
+            # flock 锁属于打开的文件，同一进程内的两次 open 也会互斥
+            fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return None
+            return fd
+
+        try:
+            fd = os.open(self.lock_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+        except FileExistsError:
+            # 持有锁的进程异常退出时锁文件不会被删除，清理之后下次重试
+            try:
+                with open(self.lock_file, encoding="utf-8") as f:
+                    holder = int(f.read().strip() or 0)
+                if holder and not is_process_alive(holder):
+                    os.remove(self.lock_file)
+            except (OSError, ValueError):
+                pass
+            return None
+        os.write(fd, str(os.getpid()).encode())
+        return fd
+
+    def _unlock(self, fd: int) -> None:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+            return
+        os.close(fd)
+        os.remove(self.lock_file)
+
+    @contextmanager
+    def locked(self):
+        """持有状态文件锁，保护 读取 -> 修改 -> 写回 的过程"""
+        deadline = time.monotonic() + STATE_LOCK_TIMEOUT
+        fd = self._try_lock()
+        while fd is None:
+            if time.monotonic() > deadline:
+                raise BrowserDaemonError(f"等待守护浏览器状态文件锁超时: {self.lock_file}")
+            time.sleep(STATE_LOCK_RETRY_INTERVAL)
+            fd = self._try_lock()
+        try:
+            yield
+        finally:
+            self._unlock(fd)
+
+    @asynccontextmanager
+    async def async_locked(self):
+        """同 locked，等待锁时让出事件循环"""
+        deadline = time.monotonic() + STATE_LOCK_TIMEOUT
+        fd = self._try_lock()
+        while fd is None:
+            if time.monotonic() > deadline:
+                raise BrowserDaemonError(f"等待守护浏览器状态文件锁超时: {self.lock_file}")
+            await asyncio.sleep(STATE_LOCK_RETRY_INTERVAL)
+            fd = self._try_lock()
+        try:
+            yield
+        finally:
+            self._unlock(fd)
+
+    async def is_healthy(self, state: Optional[Dict] = None) -> bool:
+        """
+        浏览器进程存活并且 CDP 端口可以返回版本信息
+        :param state:
+        :return:
+        """
+        state = self.load_state() if state is None else state
+        if not state.get("port") or not is_process_alive(state.get("pid")):
+            return False
+        try:
+            async with httpx.AsyncClient() as client:
+                response = await client.get(f"http://localhost:{state['port']}/json/version", timeout=3)
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    def start(self, headless: bool = False) -> Dict:
+        """
+        启动常驻浏览器，浏览器进程独立于当前 Python 进程运行
+        :param headless:
+        :return: 新的状态
+        """
+        browser_paths = self.launcher.detect_browser_paths()
+        if config.CUSTOM_BROWSER_PATH and os.path.isfile(config.CUSTOM_BROWSER_PATH):
+            browser_paths.insert(0, config.CUSTOM_BROWSER_PATH)
+        if not browser_paths:
+            raise BrowserDaemonError("未找到可用的浏览器，请在配置文件中设置CUSTOM_BROWSER_PATH")
+
+        port = self.launcher.find_available_port(config.CDP_DEBUG_PORT)
+        user_data_dir = os.path.join(os.getcwd(), "browser_data", DAEMON_USER_DATA_DIR_NAME)
+        os.makedirs(user_data_dir, exist_ok=True)
+        process = self.launcher.launch_browser(browser_paths[0], port, headless=headless,
+                                               user_data_dir=user_data_dir)
+        if not self.launcher.wait_for_browser_ready(port, config.BROWSER_LAUNCH_TIMEOUT):
+            raise BrowserDaemonError(f"浏览器在 {config.BROWSER_LAUNCH_TIMEOUT} 秒内未能启动")
+
+        state = {"pid": process.pid, "port": port, "headless": headless,
+                 "started_at": int(time.time()), "contexts": {}}
+        self.save_state(state)
+        utils.logger.info(f"[BrowserDaemon.start] daemon browser started, pid: {process.pid}, port: {port}")
+        return state
+
+    @staticmethod
+    def is_daemon_browser(state: Dict) -> bool:
+        """
+        状态文件中的 pid 是否仍然是守护浏览器，浏览器退出后 pid 可能已经被其他进程复用
+        :param state:
+        :return:
+        """
+        cmdline = process_cmdline(state["pid"]) if state.get("pid") else None
+        if not cmdline:
+            return False
+        return f"--remote-debugging-port={state.get('port')}" in cmdline and DAEMON_USER_DATA_DIR_NAME in cmdline
+
+    def stop(self) -> None:
+        state = self.load_state()
+        pid = state.get("pid")
+        if is_process_alive(pid) and not self.is_daemon_browser(state):
+            utils.logger.warning(f"[BrowserDaemon.stop] process {pid} is not the daemon browser, "
+                                 f"drop the state file without killing it")
+        elif is_process_alive(pid):
+            try:
+                if platform.system() == "Windows":
+                    subprocess.run(["taskkill", "/F", "/T", "/PID", str(pid)], capture_output=True)
+                else:
+                    os.killpg(os.getpgid(pid), signal.SIGKILL)
+            except OSError as e:
+                utils.logger.warning(f"[BrowserDaemon.stop] kill daemon browser error: {e}")
+        if os.path.exists(self.state_file):
+            os.remove(self.state_file)
+        utils.logger.info("[BrowserDaemon.stop] daemon browser stopped")
+
+    @staticmethod
+    def _active_leases(state: Dict) -> Dict[str, Dict]:
+        return {
+            name: info for name, info in state.get("contexts", {}).items()
+            if is_process_alive(info.get("leased_by"))
+        }
+
+    async def lease(self, platform_name: str, headless: bool = False) -> Dict:
+        """
+        租用平台上下文，必要时启动或重启守护浏览器
+        :param platform_name: 平台名称，与 config.PLATFORM 一致
+        :param headless: 需要启动浏览器时是否使用无头模式
+        :return: 租用之后的状态，包含调试端口
+        """
+        async with self.async_locked():
+            return await self._lease(platform_name, headless)
+
+    async def _lease(self, platform_name: str, headless: bool) -> Dict:
+        state = self.load_state()
+        if not await self.is_healthy(state):
+            if state:
+                utils.logger.warning("[BrowserDaemon.lease] daemon browser unhealthy, restart it")
+                await asyncio.to_thread(self.stop)
+            state = await asyncio.to_thread(self.start, state.get("headless", headless))
+
+        active_leases = self._active_leases(state)
+        leased_by = active_leases.get(platform_name, {}).get("leased_by")
+        if leased_by and leased_by != os.getpid():
+            raise BrowserDaemonError(f"平台 {platform_name} 的浏览器上下文正在被进程 {leased_by} 使用")
+
+        context_info = state.setdefault("contexts", {}).setdefault(platform_name, {"uses": 0})
+        if self.max_uses > 0 and context_info.get("uses", 0) >= self.max_uses and not active_leases:
+            utils.logger.info(f"[BrowserDaemon.lease] {platform_name} context used {context_info['uses']} times, "
+                              f"recycle daemon browser")
+            await asyncio.to_thread(self.stop)
+            state = await asyncio.to_thread(self.start, state.get("headless", headless))
+            context_info = state["contexts"].setdefault(platform_name, {"uses": 0})
+
+        context_info["uses"] = context_info.get("uses", 0) + 1
+        context_info["leased_by"] = os.getpid()
+        context_info["leased_at"] = int(time.time())
+        self.save_state(state)
+        return state
+
+    def release(self, platform_name: str) -> None:
+        with self.locked():
+            self._release(platform_name)
+
+    async def async_release(self, platform_name: str) -> None:
+        """同 release，在事件循环中等待锁时不阻塞其他协程"""
+        async with self.async_locked():
+            self._release(platform_name)
+
+    def _release(self, platform_name: str) -> None:
+        state = self.load_state()
+        context_info = state.get("contexts", {}).get(platform_name)
+        if not context_info or context_info.get("leased_by") != os.getpid():
+            return
+        context_info["leased_by"] = None
+        self.save_state(state)
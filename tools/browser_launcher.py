@@ -18,7 +18,7 @@ from typing import Optional, List, Tuple
 import asyncio
 from pathlib import Path
 
-from tools import utils
+from tools import lightweight_browser, utils
 
 
 class BrowserLauncher:
@@ -145,6 +145,9 @@ class BrowserLauncher:
                 "--disable-infobars",
             ])
         
+        # 仅签名模式下关闭GPU和媒体自动播放
+        args.extend(lightweight_browser.launch_args())
+
         # 用户数据目录
         if user_data_dir:
             args.append(f"--user-data-dir={user_data_dir}")
@@ -247,3 +250,36 @@ class BrowserLauncher:
                 
             except Exception as e:
                 utils.logger.warning(f"[BrowserLauncher] 关闭浏览器进程时出错: {e}")
+
+
+def main():
+    """
+    常驻浏览器命令行: python -m tools.browser_launcher --daemon start|stop|status [--headless]
+    """
+    import argparse
+    import json
+
+    from tools.browser_daemon import BrowserDaemon
+
+    parser = argparse.ArgumentParser(description="MediaCrawler 常驻CDP浏览器")
+    parser.add_argument("--daemon", choices=["start", "stop", "status"], required=True)
+    parser.add_argument("--headless", action="store_true", help="使用无头模式启动浏览器")
+    args = parser.parse_args()
+
+    daemon = BrowserDaemon()
+    if args.daemon == "start":
+        if asyncio.run(daemon.is_healthy()):
+            utils.logger.info("[BrowserLauncher] 常驻浏览器已经在运行")
+        else:
+            daemon.stop()
+            daemon.start(headless=args.headless)
+    elif args.daemon == "stop":
+        daemon.stop()
+    else:
+        state = daemon.load_state()
+        state["healthy"] = asyncio.run(daemon.is_healthy(state))
+        print(json.dumps(state, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
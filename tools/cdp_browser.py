@@ -17,6 +17,7 @@ from typing import Optional, Dict, Any
 from playwright.async_api import Browser, BrowserContext, Playwright
 
 import config
+from tools.browser_daemon import PLATFORM_DOMAINS, BrowserDaemon
 from tools.browser_launcher import BrowserLauncher
 from tools import utils
 
@@ -31,6 +32,9 @@ class CDPBrowserManager:
         self.browser: Optional[Browser] = None
         self.browser_context: Optional[BrowserContext] = None
         self.debug_port: Optional[int] = None
+        # 常驻浏览器模式下只连接、不启动和关闭浏览器进程
+        self.daemon: Optional[BrowserDaemon] = BrowserDaemon() if config.ENABLE_CDP_DAEMON else None
+        self._daemon_pages = []
 
     async def launch_and_connect(
         self,
@@ -42,6 +46,8 @@ class CDPBrowserManager:
         """
         启动浏览器并通过CDP连接
         """
+        if self.daemon:
+            return await self.lease_from_daemon(playwright, playwright_proxy, user_agent, headless)
         try:
             # 1. 检测浏览器路径
             browser_path = await self._get_browser_path()
@@ -68,6 +74,61 @@ class CDPBrowserManager:
             await self.cleanup()
             raise
 
+    async def lease_from_daemon(
+        self,
+        playwright: Playwright,
+        playwright_proxy: Optional[Dict] = None,
+        user_agent: Optional[str] = None,
+        headless: bool = False,
+    ) -> BrowserContext:
+        """
+        连接常驻浏览器并租用当前平台的上下文，守护浏览器不存在或不健康时会自动启动
+        """
+        state = await self.daemon.lease(config.PLATFORM, headless=headless)
+        self.debug_port = state["port"]
+        try:
+            await self._connect_via_cdp(playwright)
+            browser_context = await self._create_browser_context(playwright_proxy, user_agent)
+        except Exception:
+            await self.daemon.async_release(config.PLATFORM)
+            raise
+
+        # 关闭上一次运行遗留的本平台页面，页面数量不会随着运行次数增长
+        domain = PLATFORM_DOMAINS.get(config.PLATFORM)
+        stale_pages = [page for page in browser_context.pages if domain and domain in page.url]
+        if len(stale_pages) == len(browser_context.pages):
+            # 至少保留一个页面，避免关闭最后一个窗口导致浏览器退出
+            stale_pages = stale_pages[1:]
+        for page in stale_pages:
+            await page.close()
+        self._daemon_pages = list(browser_context.pages)
+
+        self.browser_context = browser_context
+        utils.logger.info(
+            f"[CDPBrowserManager] 已租用常驻浏览器上下文, 平台: {config.PLATFORM}, 端口: {self.debug_port}, "
+            f"使用次数: {state['contexts'][config.PLATFORM]['uses']}"
+        )
+        return browser_context
+
+    async def release_to_daemon(self):
+        """
+        归还常驻浏览器上下文: 关闭本次运行打开的页面，只断开CDP连接，不关闭浏览器
+        """
+        try:
+            if self.browser_context:
+                for page in self.browser_context.pages:
+                    if page not in self._daemon_pages:
+                        await page.close()
+                self.browser_context = None
+            if self.browser:
+                await self.browser.close()
+                self.browser = None
+        except Exception as e:
+            utils.logger.warning(f"[CDPBrowserManager] 归还常驻浏览器上下文时出错: {e}")
+        finally:
+            await self.daemon.async_release(config.PLATFORM)
+            utils.logger.info("[CDPBrowserManager] 常驻浏览器上下文已归还")
+
     async def _get_browser_path(self) -> str:
         """
         获取浏览器路径
@@ -289,6 +350,9 @@ class CDPBrowserManager:
         """
         清理资源
         """
+        if self.daemon:
+            await self.release_to_daemon()
+            return
         try:
             # 关闭浏览器上下文
             if self.browser_context:
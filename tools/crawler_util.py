@@ -24,7 +24,6 @@ from io import BytesIO
 from typing import Dict, List, Optional, Tuple
 
 import httpx
-from PIL import Image, ImageDraw
 from playwright.async_api import Cookie, Page
 
 from . import utils
@@ -77,6 +76,8 @@ async def find_qrcode_img_from_canvas(page: Page, canvas_selector: str) -> str:
 
 def show_qrcode(qr_code) -> None:  # type: ignore
     """parse base64 encode qrcode image and show it"""
+    from PIL import Image, ImageDraw
+
     if "," in qr_code:
         qr_code = qr_code.split(",")[1]
     qr_code = base64.b64decode(qr_code)
@@ -0,0 +1,201 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 各平台 client 公共的 HTTP 发送层, 统一接入响应缓存等横切逻辑
+import asyncio
+import functools
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+import httpx
+import requests
+
+import config
+from cache.response_cache import ResponseCacheMissError, get_response_cache
+from tools import metrics, replay, tracing, utils
+from var import current_proxy_var
+
+if TYPE_CHECKING:
+    from proxy.proxy_ip_pool import ProxyIpPool
+
+BACKEND_HTTPX = "httpx"
+BACKEND_REQUESTS = "requests"
+
+PROXY_ROTATE_MODE_FIXED = "fixed"
+PROXY_ROTATE_MODE_REQUEST = "request"
+PROXY_ROTATE_MODE_SESSION = "session"
+
+# 被风控/封禁时平台返回的状态码
+BLOCK_STATUS_CODES = {461, 471}
+
+# 平台 -> (代理池, 轮换模式, 默认会话标识)
+_proxy_pools: Dict[str, tuple] = {}
+
+
+def register_proxy_pool(platform: str, proxy_pool: "ProxyIpPool", rotate_mode: str,
+                        session_key: Optional[str] = None) -> None:
+    """
+    注册平台的代理池, 注册后该平台的每个请求都会从代理池中挑选代理IP
+    :param platform: 平台简称
+    :param proxy_pool: 代理池
+    :param rotate_mode: request: 每个请求按健康分挑选 | session: 同一个会话固定使用一个IP, 被封禁后再切换
+    :param session_key: session 模式下的默认会话标识(账号), 为空时使用 config.IP_PROXY_SESSION_KEY,
+                        都为空时按平台区分, 即同一平台的所有请求视为一个会话
+    :return:
+    """
+    if rotate_mode == PROXY_ROTATE_MODE_FIXED:
+        _proxy_pools.pop(platform, None)
+        return
+    _proxy_pools[platform] = (proxy_pool, rotate_mode, session_key or config.IP_PROXY_SESSION_KEY or platform)
+
+
+def set_proxy_session_key(platform: str, session_key: str) -> None:
+    """
+    更新平台的默认会话标识, 如登录完成后换成账号标识
+    :param platform:
+    :param session_key:
+    :return:
+    """
+    if platform in _proxy_pools:
+        proxy_pool, rotate_mode, _ = _proxy_pools[platform]
+        _proxy_pools[platform] = (proxy_pool, rotate_mode, session_key)
+
+
+def report_proxy_blocked() -> None:
+    """
+    client 解析响应后发现 IP 被封禁(如 IPBlockError)时调用, 给当前请求使用的代理记一次封禁
+    发送层按状态码已经记了一次成功的话, 先撤销这次成功, 避免同一个请求既算成功又算封禁
+    :return:
+    """
+    current = current_proxy_var.get()
+    if current is not None:
+        proxy_pool, proxy, success_snapshot = current
+        current_proxy_var.set((proxy_pool, proxy, None))
+        if success_snapshot is not None:
+            proxy_pool.revoke_success(proxy, success_snapshot)
+        proxy_pool.report_failure(proxy, blocked=True)
+
+
+def _is_blocked(response: Any) -> bool:
+    if response.status_code in BLOCK_STATUS_CODES:
+        return True
+    text = response.text
+    return text == "" or text == "blocked"
+
+
+def _is_cacheable(response: Any) -> bool:
+    if response.status_code != 200:
+        return False
+    text = response.text
+    return text != "" and text != "blocked"
+
+
+async def _send(method: str, url: str, proxies: Optional[Dict], timeout: Optional[float], backend: str,
+                **kwargs) -> Any:
+    if backend == BACKEND_REQUESTS:
+        if proxies:
+            kwargs["proxies"] = proxies
+        # requests 是同步库, 放到线程池中执行, 避免阻塞事件循环
+        return await asyncio.to_thread(functools.partial(requests.request, method, url, timeout=timeout, **kwargs))
+
+    async with httpx.AsyncClient(proxies=proxies) as client:
+        return await client.request(method, url, timeout=timeout, **kwargs)
+
+
+async def send_request(platform: str, method: str, url: str, *, proxies: Optional[Dict] = None,
+                       timeout: Optional[float] = 10, backend: str = BACKEND_HTTPX,
+                       proxy_session_key: Optional[str] = None, **kwargs) -> Any:
+    """
+    发送 HTTP 请求
+    :param platform: 平台简称, 如 xhs、dy
+    :param method: 请求方法
+    :param url: 请求地址
+    :param proxies: 代理
+    :param timeout: 超时时间
+    :param backend: httpx | requests
+    :param proxy_session_key: session 轮换模式下本次请求所属的会话(账号), 为空时使用注册代理池时的默认会话标识
+    :param kwargs: 透传给底层 client 的参数, 如 headers、params、data
+    :return: httpx.Response 或 requests.Response
+    """
+    start = time.perf_counter()
+    status = "error"
+    try:
+        with tracing.span(f"{platform}.send", cat="transport", method=method, endpoint=metrics.endpoint_of(url)):
+            response = await _send_request(platform, method, url, proxies, timeout, backend, proxy_session_key,
+                                           **kwargs)
+        status = str(response.status_code)
+        return response
+    finally:
+        metrics.observe_request(platform, url, status, time.perf_counter() - start)
+
+
+async def _send_request(platform: str, method: str, url: str, proxies: Optional[Dict], timeout: Optional[float],
+                        backend: str, proxy_session_key: Optional[str] = None, **kwargs) -> Any:
+    replay_session = replay.get_replay_session()
+    if replay_session is not None and replay_session.replaying:
+        return await replay_session.forward(platform, method, url, timeout, **kwargs)
+
+    response_cache = get_response_cache()
+    cache_key, cache_ttl = None, None
+    if response_cache.enabled:
+        cache_ttl = response_cache.match_ttl(response_cache.endpoint_of(platform, url, kwargs.get("data")))
+        if cache_ttl is not None:
+            cache_key = response_cache.build_key(platform, method, url, kwargs.get("params"), kwargs.get("data"))
+            cached_response = await response_cache.get(cache_key, method, url)
+            if cached_response is not None:
+                return cached_response
+            # cache_only 只约束配置了缓存的接口, pong、登录检查、搜索列表等接口照常请求
+            if response_cache.cache_only:
+                raise ResponseCacheMissError(f"[send_request] response cache miss, {method}:{url}")
+
+    start = time.perf_counter()
+    proxy_pool_item = _proxy_pools.get(platform)
+    if proxy_pool_item is None:
+        response = await _send(method, url, proxies, timeout, backend, **kwargs)
+    else:
+        response = await _send_with_proxy_pool(platform, proxy_pool_item, method, url, timeout, backend,
+                                               proxy_session_key, **kwargs)
+
+    if replay_session is not None and replay_session.recording:
+        await replay_session.record(platform, method, url, kwargs, response, (time.perf_counter() - start) * 1000)
+
+    if cache_key is not None and _is_cacheable(response):
+        await response_cache.set(cache_key, response, cache_ttl)
+    return response
+
+
+async def _send_with_proxy_pool(platform: str, proxy_pool_item: tuple, method: str, url: str,
+                                timeout: Optional[float], backend: str, proxy_session_key: Optional[str] = None,
+                                **kwargs) -> Any:
+    proxy_pool, rotate_mode, default_session_key = proxy_pool_item
+    session_key = None
+    if rotate_mode == PROXY_ROTATE_MODE_SESSION:
+        session_key = proxy_session_key or default_session_key
+    with tracing.span(f"{platform}.proxy_acquire", cat="transport"):
+        proxy = await proxy_pool.acquire(session_key=session_key)
+    current_proxy_var.set((proxy_pool, proxy, None))
+    _, proxies = utils.format_proxy_info(proxy)
+
+    start = time.perf_counter()
+    try:
+        response = await _send(method, url, proxies, timeout, backend, **kwargs)
+    except Exception:
+        proxy_pool.report_failure(proxy)
+        raise
+
+    if _is_blocked(response):
+        proxy_pool.report_failure(proxy, blocked=True)
+    else:
+        success_snapshot = proxy_pool.report_success(proxy, time.perf_counter() - start)
+        current_proxy_var.set((proxy_pool, proxy, success_snapshot))
+    return response
@@ -0,0 +1,201 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 可替换的 JSON 编解码层，客户端解析响应和存储层写 JSON 都走这里，优先使用 orjson，不可用时回退到标准库
+import argparse
+import json
+import time
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+import config
+from tools import tracing
+
+JSON_CODEC_AUTO = "auto"
+JSON_CODEC_STDLIB = "stdlib"
+JSON_CODEC_ORJSON = "orjson"
+
+
+class StdlibJsonCodec:
+    name = JSON_CODEC_STDLIB
+
+    def loads(self, data: Union[str, bytes, bytearray]) -> Any:
+        return json.loads(data)
+
+    def dumps(self, obj: Any, indent: Optional[int] = None, compact: bool = False) -> str:
+        separators = (",", ":") if compact else None
+        return json.dumps(obj, ensure_ascii=False, indent=indent, separators=separators)
+
+
+class OrjsonJsonCodec:
+    """
+    orjson 只能输出紧凑格式或 2 个空格缩进，其他格式(默认的 ", " 分隔符、indent=4 等)交给标准库，保证输出与标准库一致
+    orjson 不支持的情况(超过 64 位的整数、NaN、自定义对象等)也回退到标准库，保证结果和报错与标准库一致
+    """
+    name = JSON_CODEC_ORJSON
+
+    def __init__(self):
+        self._fallback = StdlibJsonCodec()
+
+    def loads(self, data: Union[str, bytes, bytearray]) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return self._fallback.loads(data)
+
+    def dumps(self, obj: Any, indent: Optional[int] = None, compact: bool = False) -> str:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent == 2:
+            option |= orjson.OPT_INDENT_2
+        elif indent or not compact:
+            return self._fallback.dumps(obj, indent=indent, compact=compact)
+        try:
+            return orjson.dumps(obj, option=option).decode("utf-8")
+        except orjson.JSONEncodeError:
+            return self._fallback.dumps(obj, indent=indent, compact=compact)
+
+
+_CODECS: Dict[str, Any] = {JSON_CODEC_STDLIB: StdlibJsonCodec()}
+if orjson is not None:
+    _CODECS[JSON_CODEC_ORJSON] = OrjsonJsonCodec()
+
+_codec = None
+
+
+def available_codecs() -> List[str]:
+    return list(_CODECS)
+
+
+def set_codec(name: str) -> None:
+    """
+    切换编解码实现
+    :param name: auto | stdlib | orjson，auto 表示有 orjson 时使用 orjson
+    :return:
+    """
+    global _codec
+    if name == JSON_CODEC_AUTO:
+        name = JSON_CODEC_ORJSON if JSON_CODEC_ORJSON in _CODECS else JSON_CODEC_STDLIB
+    if name not in _CODECS:
+        raise ValueError(f"JSON codec {name} is not available, available codecs: {available_codecs()}")
+    _codec = _CODECS[name]
+
+
+def get_codec():
+    if _codec is None:
+        set_codec(config.JSON_CODEC)
+    return _codec
+
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    return get_codec().loads(data)
+
+
+def dumps(obj: Any, indent: Optional[int] = None, compact: bool = False) -> str:
+    """
+    序列化为字符串，不转义非 ASCII 字符
+    :param obj:
+    :param indent: 是否缩进
+    :param compact: 是否使用不带空格的分隔符，签名用的请求体需要紧凑格式
+    :return:
+    """
+    return get_codec().dumps(obj, indent=indent, compact=compact)
+
+
+def response_json(response) -> Any:
+    """
+    代替 httpx.Response.json()
+    :param response:
+    :return:
+    """
+    content = response.content
+    with tracing.span("json.decode", cat="decode", bytes=len(content)):
+        return loads(content)
+
+
+def benchmark(payloads: List[bytes], rounds: int = 20) -> Dict[str, Dict[str, float]]:
+    """
+    对比各编解码实现在给定样本上的耗时
+    :param payloads: JSON 原始字节，一般是录制下来的接口响应
+    :param rounds: 每个样本重复次数
+    :return: {codec: {"loads_ms": ..., "dumps_ms": ..., "store_dumps_ms": ...}}，store_dumps_ms 是 JSON 存储使用的 2 个空格缩进格式
+    """
+    result = {}
+    for name, codec in _CODECS.items():
+        objs = [codec.loads(payload) for payload in payloads]
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for payload in payloads:
+                codec.loads(payload)
+        loads_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for obj in objs:
+                codec.dumps(obj, compact=True)
+        dumps_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for obj in objs:
+                codec.dumps(obj, indent=2)
+        store_dumps_ms = (time.perf_counter() - start) * 1000
+        result[name] = {"loads_ms": round(loads_ms, 2), "dumps_ms": round(dumps_ms, 2),
+                        "store_dumps_ms": round(store_dumps_ms, 2)}
+    return result
+
+
+def _read_payloads(paths: List[str]) -> List[bytes]:
+    payloads = []
+    for path in paths:
+        with open(path, "rb") as f:
+            content = f.read()
+        if path.endswith(".jsonl"):
+            payloads.extend(line for line in content.splitlines() if line.strip())
+        else:
+            payloads.append(content)
+    return payloads
+
+
+def _sample_comment_page(count: int = 50) -> bytes:
+    """没有录制样本时，构造一页结构类似抖音评论接口的数据"""
+    comments = [{
+        "cid": str(7300000000000000000 + i),
+        "text": "这条视频拍得真好，支持一下！" * 3,
+        "create_time": 1700000000 + i,
+        "digg_count": i * 7,
+        "reply_comment_total": i % 5,
+        "user": {"uid": str(100000 + i), "sec_uid": "MS4wLjABAAAA" + "x" * 40, "nickname": f"用户{i}",
+                 "avatar_thumb": {"url_list": [f"https://p3.douyinpic.com/aweme/100x100/{i}.jpeg"] * 3}},
+        "image_list": None,
+        "label_list": [{"type": 1, "text": "作者赞过"}],
+    } for i in range(count)]
+    return json.dumps({"status_code": 0, "comments": comments, "cursor": count, "has_more": 1},
+                      ensure_ascii=False).encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON 编解码性能对比")
+    parser.add_argument("files", nargs="*", help="录制的接口响应文件(.json 或 .jsonl)，不传时使用内置样本")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    payloads = _read_payloads(args.files) if args.files else [_sample_comment_page() for _ in range(20)]
+    total_kb = sum(len(payload) for payload in payloads) / 1024
+    print(f"payloads: {len(payloads)}, total: {total_kb:.1f}KB, rounds: {args.rounds}")
+    for name, cost in benchmark(payloads, args.rounds).items():
+        print(f"{name:>8}: loads {cost['loads_ms']:>9.2f}ms  dumps {cost['dumps_ms']:>9.2f}ms  "
+              f"store dumps(indent=2) {cost['store_dumps_ms']:>9.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
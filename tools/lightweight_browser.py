@@ -0,0 +1,218 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 仅签名浏览器模式，浏览器只用来登录、拿 cookie 和执行签名函数，拦截图片/视频/字体和埋点请求
+import argparse
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional
+
+from playwright.async_api import BrowserContext, Route, async_playwright
+
+import config
+from tools import utils
+
+# 签名用不到的资源类型
+BLOCK_RESOURCE_TYPES = frozenset({"image", "media", "font", "stylesheet"})
+
+# 常见的统计埋点上报地址
+BLOCK_URL_KEYWORDS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "hm.baidu.com",
+    "cnzz.com",
+    "/apm/",
+    "/sentry",
+    "mcs.zijieapi.com",
+    "data.bilibili.com",
+    "t.xiaohongshu.com",
+)
+
+# 关闭媒体自动播放、GPU 以及后台联网，降低浏览器的 CPU 和内存占用
+SIGN_ONLY_BROWSER_ARGS = [
+    "--autoplay-policy=user-gesture-required",
+    "--mute-audio",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+]
+
+
+def launch_args() -> List[str]:
+    """
+    启动浏览器时追加的参数, 未开启仅签名模式时为空
+    :return:
+    """
+    if not config.ENABLE_SIGN_ONLY_BROWSER:
+        return []
+    return list(SIGN_ONLY_BROWSER_ARGS)
+
+
+def should_block(resource_type: str, url: str) -> bool:
+    """
+    判断请求是否需要拦截
+    :param resource_type: playwright 的 request.resource_type
+    :param url:
+    :return:
+    """
+    if resource_type in BLOCK_RESOURCE_TYPES:
+        return True
+    return any(keyword in url for keyword in BLOCK_URL_KEYWORDS)
+
+
+async def _route_handler(route: Route) -> None:
+    request = route.request
+    if should_block(request.resource_type, request.url):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def enable_resource_blocking(browser_context: BrowserContext) -> None:
+    """
+    给浏览器上下文挂上资源拦截，登录完成之后调用，避免拦截掉登录二维码
+    :param browser_context:
+    :return:
+    """
+    if not config.ENABLE_SIGN_ONLY_BROWSER:
+        return
+    await browser_context.route("**/*", _route_handler)
+    utils.logger.info("[lightweight_browser] sign-only browser mode enabled, heavy resources will be blocked")
+
+
+def _proc_children() -> Dict[int, List[int]]:
+    children: Dict[int, List[int]] = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                # 进程名可能包含空格，从最后一个右括号之后开始解析
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(name))
+    return children
+
+
+def _proc_rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def browser_rss_mb() -> Optional[float]:
+    """
+    统计当前进程派生出的所有子进程(playwright driver 和浏览器)的常驻内存
+    优先使用 psutil，没有安装时读取 /proc，两者都不可用时返回 None
+    :return:
+    """
+    try:
+        import psutil
+        children = psutil.Process().children(recursive=True)
+        return sum(child.memory_info().rss for child in children) / 1024 / 1024
+    except ImportError:
+        pass
+    except Exception:
+        return None
+
+    if not os.path.isdir("/proc"):
+        return None
+    children = _proc_children()
+    pending, rss_kb = list(children.get(os.getpid(), [])), 0
+    while pending:
+        pid = pending.pop()
+        rss_kb += _proc_rss_kb(pid)
+        pending.extend(children.get(pid, []))
+    return rss_kb / 1024
+
+
+def report_browser_startup(tag: str, start_ts: float) -> None:
+    """
+    打印浏览器启动耗时和内存占用，便于对比是否开启仅签名模式的效果
+    :param tag: 日志前缀，一般是 crawler 类名
+    :param start_ts: time.perf_counter() 记录的启动开始时间
+    :return:
+    """
+    rss_mb = browser_rss_mb()
+    rss_desc = f"{rss_mb:.1f}MB" if rss_mb is not None else "unknown"
+    utils.logger.info(
+        f"[{tag}] browser ready in {time.perf_counter() - start_ts:.2f}s, "
+        f"browser rss: {rss_desc}, sign_only: {config.ENABLE_SIGN_ONLY_BROWSER}"
+    )
+
+
+# 对比测量时各平台打开的首页，与各平台 crawler 登录前打开的页面一致
+PLATFORM_INDEX_URLS = {
+    "xhs": "https://www.xiaohongshu.com",
+    "dy": "https://www.douyin.com",
+    "bili": "https://www.bilibili.com",
+}
+
+
+async def measure_startup(url: str, sign_only: bool) -> Dict[str, float]:
+    """
+    启动无头浏览器打开平台首页，测量启动到页面加载完成的耗时和浏览器内存
+    没有登录态，资源拦截从一开始就生效，对应登录完成之后的稳定状态
+    :param url: 平台首页
+    :param sign_only: 是否开启仅签名模式
+    :return: {"startup_s": ..., "rss_mb": ...}
+    """
+    origin = config.ENABLE_SIGN_ONLY_BROWSER
+    config.ENABLE_SIGN_ONLY_BROWSER = sign_only
+    try:
+        start_ts = time.perf_counter()
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch(headless=True, args=launch_args())
+            browser_context = await browser.new_context()
+            await enable_resource_blocking(browser_context)
+            page = await browser_context.new_page()
+            await page.goto(url, wait_until="load")
+            startup_s = time.perf_counter() - start_ts
+            rss_mb = browser_rss_mb()
+            await browser.close()
+    finally:
+        config.ENABLE_SIGN_ONLY_BROWSER = origin
+    return {"startup_s": round(startup_s, 2), "rss_mb": round(rss_mb, 1) if rss_mb is not None else -1}
+
+
+async def compare(url: str, rounds: int) -> Dict[str, List[Dict[str, float]]]:
+    result = {"off": [], "on": []}
+    for _ in range(rounds):
+        # 交替测量，减少网络波动对某一组的影响
+        result["off"].append(await measure_startup(url, sign_only=False))
+        result["on"].append(await measure_startup(url, sign_only=True))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比开启和关闭仅签名模式时浏览器的启动耗时和内存占用")
+    parser.add_argument("--platform", choices=sorted(PLATFORM_INDEX_URLS), default="xhs")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    url = PLATFORM_INDEX_URLS[args.platform]
+    print(f"url: {url}, rounds: {args.rounds}")
+    for mode, samples in asyncio.run(compare(url, args.rounds)).items():
+        startup = sorted(sample["startup_s"] for sample in samples)[len(samples) // 2]
+        rss = sorted(sample["rss_mb"] for sample in samples)[len(samples) // 2]
+        print(f"sign_only {mode:>3}: startup {startup:>6.2f}s  rss {rss:>8.1f}MB (median)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 事件循环阻塞看门狗
+#            事件循环里的心跳协程定时更新时间戳，后台线程发现心跳超过阈值没有更新时，
+#            抓取事件循环线程当前的调用栈和正在执行的 task，定位是哪个同步调用卡住了循环
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import config
+from tools import utils
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class BlockEvent:
+    """一次事件循环阻塞"""
+
+    __slots__ = ("location", "task_name", "coroutine", "stack", "duration")
+
+    def __init__(self, location: str, task_name: str, coroutine: str, stack: str):
+        self.location = location
+        self.task_name = task_name
+        self.coroutine = coroutine
+        self.stack = stack
+        # 阻塞结束、心跳恢复后才知道完整时长，之前是发现阻塞时已经过去的时长
+        self.duration = 0.0
+
+
+def blocking_location(frame) -> str:
+    """
+    从最内层往外找第一个项目内的栈帧，定位到业务代码而不是 time.sleep、ssl 之类的底层调用
+    :param frame:
+    :return: 函数名 (文件:行号)
+    """
+    innermost = frame
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(PROJECT_ROOT) and "site-packages" not in filename:
+            break
+        frame = frame.f_back
+    frame = frame or innermost
+    return f"{frame.f_code.co_name} ({os.path.relpath(frame.f_code.co_filename, PROJECT_ROOT)}:{frame.f_lineno})"
+
+
+class LoopWatchdog:
+    def __init__(self, threshold: float = 0.2, interval: float = 0.05):
+        """
+        :param threshold: 心跳超过该时长(秒)没有更新就认为事件循环被阻塞
+        :param interval: 心跳间隔(秒)
+        """
+        self.threshold = threshold
+        self.interval = interval
+        self.events: List[BlockEvent] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id = 0
+        self._last_beat = 0.0
+        self._pending: Optional[BlockEvent] = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """需要在事件循环中调用"""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._heartbeat_task = self._loop.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+        if self._thread is not None:
+            self._thread.join()
+        for line in self.summary():
+            utils.logger.info(f"[LoopWatchdog] {line}")
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            with self._lock:
+                if self._pending is not None:
+                    self._pending.duration = now - self._last_beat - self.interval
+                    self._pending = None
+                self._last_beat = now
+
+    def _watch(self) -> None:
+        while not self._stop_event.wait(self.interval / 2):
+            with self._lock:
+                stalled = time.monotonic() - self._last_beat - self.interval
+                if self._pending is not None or stalled < self.threshold:
+                    continue
+                event = self._capture()
+                if event is None:
+                    continue
+                event.duration = stalled
+                self._pending = event
+                self.events.append(event)
+            utils.logger.warning(
+                f"[LoopWatchdog] event loop blocked for more than {stalled * 1000:.0f}ms at {event.location}, "
+                f"task: {event.task_name}, coroutine: {event.coroutine}\n{event.stack}"
+            )
+
+    def _capture(self) -> Optional[BlockEvent]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        # 这里读的只是 asyncio 内部的 {loop: task} 字典，可以在其他线程调用
+        task = asyncio.current_task(self._loop)
+        task_name, coroutine = "-", "-"
+        if task is not None:
+            task_name = task.get_name()
+            coroutine = getattr(task.get_coro(), "__qualname__", repr(task.get_coro()))
+        return BlockEvent(blocking_location(frame), task_name, coroutine, "".join(traceback.format_stack(frame)))
+
+    def summary(self) -> List[str]:
+        """按阻塞位置汇总，总阻塞时长最多的排在前面"""
+        if not self.events:
+            return [f"no event loop blocking over {self.threshold * 1000:.0f}ms"]
+        grouped: Dict[str, List[BlockEvent]] = defaultdict(list)
+        for event in self.events:
+            grouped[event.location].append(event)
+        lines = [f"event loop blocked {len(self.events)} times, "
+                 f"total {sum(e.duration for e in self.events) * 1000:.0f}ms"]
+        for location, events in sorted(grouped.items(), key=lambda item: -sum(e.duration for e in item[1])):
+            coroutines = ", ".join(sorted({e.coroutine for e in events}))
+            lines.append(f"{location}: {len(events)} times, total {sum(e.duration for e in events) * 1000:.0f}ms, "
+                         f"max {max(e.duration for e in events) * 1000:.0f}ms, coroutine: {coroutines}")
+        return lines
+
+
+def start_watchdog() -> Optional[LoopWatchdog]:
+    """
+    按配置在当前事件循环上启动看门狗
+    :return: 未开启时返回 None
+    """
+    if not config.ENABLE_LOOP_WATCHDOG:
+        return None
+    watchdog = LoopWatchdog(threshold=config.LOOP_WATCHDOG_THRESHOLD_MS / 1000)
+    watchdog.start()
+    return watchdog
@@ -0,0 +1,390 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 爬虫内部指标，Prometheus 文本格式，可选本地 HTTP 导出和定时汇总日志，用于根据数据调整 MAX_CONCURRENCY_NUM
+import asyncio
+import bisect
+import functools
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import config
+from tools import tracing, utils
+
+# 请求耗时的分桶(秒)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._values: Dict[LabelValues, Any] = {}
+        # 导出接口在单独的线程中读取
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def _format_labels(self, key: LabelValues, extra: Optional[Dict[str, str]] = None) -> str:
+        pairs = list(zip(self.label_names, key)) + list((extra or {}).items())
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def remove(self, **labels) -> None:
+        with self._lock:
+            self._values.pop(self._key(labels), None)
+
+    def items(self) -> List[Tuple[LabelValues, Any]]:
+        with self._lock:
+            return list(self._values.items())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for key, value in self.items():
+            lines.append(f"{self.name}{self._format_labels(key)} {value}")
+        return lines
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Counter):
+    metric_type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class _HistogramValue:
+    __slots__ = ("bucket_counts", "sum", "count")
+
+    def __init__(self, bucket_size: int):
+        self.bucket_counts = [0] * bucket_size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            hist_value = self._values.get(key)
+            if hist_value is None:
+                hist_value = self._values[key] = _HistogramValue(len(self.buckets))
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                hist_value.bucket_counts[index] += 1
+            hist_value.sum += value
+            hist_value.count += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def stats(self, **labels) -> Tuple[int, float]:
+        """
+        :return: (次数, 总耗时)
+        """
+        with self._lock:
+            hist_value = self._values.get(self._key(labels))
+            return (hist_value.count, hist_value.sum) if hist_value else (0, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for key, hist_value in self.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, hist_value.bucket_counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{self._format_labels(key, {'le': str(bound)})} {cumulative}")
+            lines.append(f"{self.name}_bucket{self._format_labels(key, {'le': '+Inf'})} {hist_value.count}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {hist_value.sum}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {hist_value.count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+REQUESTS_TOTAL = REGISTRY.counter("mediacrawler_requests_total", "平台接口请求次数",
+                                  ("platform", "endpoint", "status"))
+REQUEST_DURATION = REGISTRY.histogram("mediacrawler_request_duration_seconds", "平台接口请求耗时",
+                                      ("platform", "endpoint"))
+SIGN_DURATION = REGISTRY.histogram("mediacrawler_sign_duration_seconds", "请求签名耗时", ("platform",))
+STORE_DURATION = REGISTRY.histogram("mediacrawler_store_duration_seconds", "单条数据存储耗时", ("platform", "kind"))
+STORE_PENDING = REGISTRY.gauge("mediacrawler_store_pending", "正在写入的存储任务数", ("platform",))
+ITEMS_STORED = REGISTRY.counter("mediacrawler_items_stored_total", "已存储的数据条数", ("platform", "kind"))
+CONCURRENCY_IN_USE = REGISTRY.gauge("mediacrawler_concurrency_in_use", "并发信号量已占用数", ("platform",))
+CONCURRENCY_WAITING = REGISTRY.gauge("mediacrawler_concurrency_waiting", "等待并发信号量的任务数", ("platform",))
+PROXY_HEALTH = REGISTRY.gauge("mediacrawler_proxy_health_score", "代理IP健康分", ("proxy",))
+PROXY_POOL_SIZE = REGISTRY.gauge("mediacrawler_proxy_pool_size", "代理池中不在冷却中的IP数量")
+
+# 路径中的数字ID、长十六进制串替换掉，避免 endpoint 标签无限增长
+_ID_PATTERN = re.compile(r"/(\d{4,}|[0-9a-fA-F]{16,}|BV[0-9A-Za-z]{10})(?=/|$)")
+
+
+def endpoint_of(url: str) -> str:
+    return _ID_PATTERN.sub("/:id", urlsplit(url).path) or "/"
+
+
+def observe_request(platform: str, url: str, status: str, duration: float) -> None:
+    endpoint = endpoint_of(url)
+    REQUESTS_TOTAL.inc(platform=platform, endpoint=endpoint, status=status)
+    REQUEST_DURATION.observe(duration, platform=platform, endpoint=endpoint)
+
+
+def timed_sign(platform: str):
+    """
+    异步签名函数的耗时统计装饰器
+    :param platform:
+    :return:
+    """
+
+    def decorator(func: Callable):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with SIGN_DURATION.time(platform=platform), tracing.span(f"{platform}.sign", cat="sign"):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class InstrumentedSemaphore(asyncio.Semaphore):
+    """记录占用数和等待数的信号量，用来判断 MAX_CONCURRENCY_NUM 是否成为瓶颈"""
+
+    def __init__(self, value: int, platform: str):
+        super().__init__(value)
+        self.platform = platform
+
+    async def acquire(self):
+        CONCURRENCY_WAITING.inc(platform=self.platform)
+        try:
+            result = await super().acquire()
+        finally:
+            CONCURRENCY_WAITING.dec(platform=self.platform)
+        CONCURRENCY_IN_USE.inc(platform=self.platform)
+        return result
+
+    def release(self):
+        CONCURRENCY_IN_USE.dec(platform=self.platform)
+        super().release()
+
+
+def semaphore(platform: str, value: int) -> InstrumentedSemaphore:
+    return InstrumentedSemaphore(value, platform)
+
+
+class InstrumentedStore:
+    """
+    包装存储实现，统计 store_content / store_comment / store_creator 的耗时、写入中的任务数和条数
+    其余属性原样透传
+    """
+
+    def __init__(self, store: Any, platform: str):
+        self._store = store
+        self._platform = platform
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._store, name)
+        if not name.startswith("store_") or not callable(attr):
+            return attr
+        kind = name[len("store_"):]
+
+        @functools.wraps(attr)
+        async def wrapper(*args, **kwargs):
+            STORE_PENDING.inc(platform=self._platform)
+            try:
+                with STORE_DURATION.time(platform=self._platform, kind=kind), \
+                        tracing.span(f"{self._platform}.store_{kind}", cat="store"):
+                    result = await attr(*args, **kwargs)
+            finally:
+                STORE_PENDING.dec(platform=self._platform)
+            ITEMS_STORED.inc(platform=self._platform, kind=kind)
+            return result
+
+        return wrapper
+
+
+def instrument_store(store: Any, platform: str) -> InstrumentedStore:
+    return InstrumentedStore(store, platform)
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+def start_http_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    在后台线程中提供 /metrics 接口
+    :param port:
+    :param host: 默认只监听本机
+    :return:
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    utils.logger.info(f"[metrics] metrics endpoint: http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+class SummaryReporter:
+    """按固定间隔汇总各平台的请求速率、平均延迟、评论速率以及并发和存储的占用情况"""
+
+    def __init__(self):
+        self._last_ts = time.perf_counter()
+        self._last_requests: Dict[str, float] = {}
+        self._last_comments: Dict[str, float] = {}
+
+    @staticmethod
+    def _sum_by_platform(metric: Counter) -> Dict[str, float]:
+        result: Dict[str, float] = {}
+        platform_index = metric.label_names.index("platform")
+        for key, value in metric.items():
+            if metric is ITEMS_STORED and key[1] != "comment":
+                continue
+            result[key[platform_index]] = result.get(key[platform_index], 0) + value
+        return result
+
+    def summary(self) -> List[str]:
+        now = time.perf_counter()
+        elapsed = max(now - self._last_ts, 1e-6)
+        requests = self._sum_by_platform(REQUESTS_TOTAL)
+        comments = self._sum_by_platform(ITEMS_STORED)
+
+        durations: Dict[str, List[float]] = {}
+        for key, hist_value in REQUEST_DURATION.items():
+            count_sum = durations.setdefault(key[0], [0, 0.0])
+            count_sum[0] += hist_value.count
+            count_sum[1] += hist_value.sum
+
+        lines = []
+        for platform in sorted(set(requests) | set(comments)):
+            request_rate = (requests.get(platform, 0) - self._last_requests.get(platform, 0)) / elapsed
+            comment_rate = (comments.get(platform, 0) - self._last_comments.get(platform, 0)) / elapsed
+            count, total = durations.get(platform, [0, 0.0])
+            avg_ms = total / count * 1000 if count else 0.0
+            lines.append(
+                f"[metrics] {platform}: requests {int(requests.get(platform, 0))} ({request_rate:.2f}/s), "
+                f"avg latency {avg_ms:.0f}ms, comments {comment_rate:.2f}/s, "
+                f"concurrency in use {CONCURRENCY_IN_USE.value(platform=platform):.0f}"
+                f"/{config.MAX_CONCURRENCY_NUM}, waiting {CONCURRENCY_WAITING.value(platform=platform):.0f}, "
+                f"store pending {STORE_PENDING.value(platform=platform):.0f}"
+            )
+        self._last_ts, self._last_requests, self._last_comments = now, requests, comments
+        return lines
+
+    async def run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            for line in self.summary():
+                utils.logger.info(line)
+
+
+_summary_task: Optional[asyncio.Task] = None
+_http_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_exporters() -> None:
+    """
+    按配置启动 /metrics 接口和定时汇总日志，需要在事件循环中调用
+    :return:
+    """
+    global _summary_task, _http_server
+    if config.METRICS_PORT and _http_server is None:
+        _http_server = start_http_server(config.METRICS_PORT)
+    if config.METRICS_SUMMARY_INTERVAL > 0 and _summary_task is None:
+        _summary_task = asyncio.create_task(SummaryReporter().run(config.METRICS_SUMMARY_INTERVAL))
@@ -0,0 +1,147 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 浏览器页面池，多个预热好的页面轮询执行签名等 evaluate 调用
+import asyncio
+from typing import Any, List, Optional
+
+from playwright.async_api import BrowserContext, Page
+
+from tools import utils
+
+
+class PagePool:
+    """
+    在同一个 BrowserContext 中维护 N 个已经打开首页的页面
+    stealth 脚本(add_init_script)和登录 cookie 都挂在 context 上，新建的页面天然共享
+    对外提供和 Page 一致的 evaluate 方法，客户端可以直接把 PagePool 当作 playwright_page 使用
+    """
+
+    def __init__(self, browser_context: BrowserContext, url: str, size: int = 1,
+                 primary_page: Optional[Page] = None, goto_timeout: float = 30):
+        """
+        :param browser_context: 浏览器上下文
+        :param url: 新页面预热时打开的地址
+        :param size: 页面数量
+        :param primary_page: 已经打开的页面(通常是 crawler 的 context_page)，作为池中第一个页面
+        :param goto_timeout: 页面打开超时时间(秒)
+        """
+        self.browser_context = browser_context
+        self.url = url
+        self.size = max(1, size)
+        self.goto_timeout = goto_timeout
+        self._pages: List[Page] = []
+        self._crashed_pages = set()
+        self._next_index = 0
+        self._recycle_lock: Optional[asyncio.Lock] = None
+        if primary_page is not None:
+            self._watch(primary_page)
+            self._pages.append(primary_page)
+
+    @property
+    def pages(self) -> List[Page]:
+        return list(self._pages)
+
+    def _watch(self, page: Page) -> None:
+        page.on("crash", lambda _: self._crashed_pages.add(id(page)))
+
+    def is_healthy(self, page: Page) -> bool:
+        return not page.is_closed() and id(page) not in self._crashed_pages
+
+    async def _new_page(self) -> Page:
+        page = await self.browser_context.new_page()
+        self._watch(page)
+        await page.goto(self.url, timeout=self.goto_timeout * 1000)
+        return page
+
+    async def start(self) -> None:
+        """
+        补齐页面数量，一般在登录完成之后调用，保证新页面拿到的是登录后的 cookie
+        :return:
+        """
+        need_count = self.size - len(self._pages)
+        if need_count <= 0:
+            return
+        pages = await asyncio.gather(*[self._new_page() for _ in range(need_count)], return_exceptions=True)
+        for page in pages:
+            if isinstance(page, Exception):
+                utils.logger.warning(f"[PagePool.start] create page error: {page}")
+                continue
+            self._pages.append(page)
+        utils.logger.info(f"[PagePool.start] page pool ready, size: {len(self._pages)}")
+
+    async def _recycle(self, index: int) -> Page:
+        """
+        关闭并重建指定位置的页面
+        :param index:
+        :return:
+        """
+        if self._recycle_lock is None:
+            self._recycle_lock = asyncio.Lock()
+        async with self._recycle_lock:
+            page = self._pages[index]
+            if self.is_healthy(page):
+                # 其他协程已经重建过了
+                return page
+            utils.logger.warning(f"[PagePool._recycle] page {index} crashed or closed, recreate it")
+            self._crashed_pages.discard(id(page))
+            try:
+                await page.close()
+            except Exception:
+                pass
+            new_page = await self._new_page()
+            self._pages[index] = new_page
+            return new_page
+
+    async def acquire(self) -> Page:
+        """
+        轮询取出一个健康的页面，遇到崩溃或已关闭的页面时重建
+        :return:
+        """
+        if not self._pages:
+            self._pages.append(await self._new_page())
+        index = self._next_index % len(self._pages)
+        self._next_index = index + 1
+        page = self._pages[index]
+        if not self.is_healthy(page):
+            page = await self._recycle(index)
+        return page
+
+    async def evaluate(self, expression: str, arg: Any = None) -> Any:
+        """
+        在池中的页面上执行 js，执行失败且页面已不可用时重建页面再执行一次
+        :param expression:
+        :param arg:
+        :return:
+        """
+        page = await self.acquire()
+        try:
+            return await page.evaluate(expression, arg)
+        except Exception:
+            if page in self._pages and not self.is_healthy(page):
+                page = await self._recycle(self._pages.index(page))
+                return await page.evaluate(expression, arg)
+            raise
+
+    async def close(self, keep_primary: bool = True) -> None:
+        """
+        关闭池中创建的页面
+        :param keep_primary: 是否保留第一个页面(crawler 的 context_page 由 crawler 自己管理)
+        :return:
+        """
+        pages = self._pages[1:] if keep_primary else self._pages
+        for page in pages:
+            try:
+                await page.close()
+            except Exception:
+                pass
+        self._pages = self._pages[:1] if keep_primary else []
@@ -0,0 +1,250 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : --profile 模式，爬虫和文本分析共用
+#            sample: 后台线程定时采样主线程调用栈，输出 collapsed 格式(flamegraph.pl、speedscope 可直接打开)
+#            cprofile: 确定性 profile，输出 pstats 文件(snakeviz、flameprof 可直接打开)
+#            两种模式都会记录 tracemalloc 内存快照，有事件循环时额外统计事件循环延迟
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional
+
+import config
+from tools import utils
+
+PROFILE_MODE_OFF = "off"
+PROFILE_MODE_SAMPLE = "sample"
+PROFILE_MODE_CPROFILE = "cprofile"
+PROFILE_MODES = (PROFILE_MODE_OFF, PROFILE_MODE_SAMPLE, PROFILE_MODE_CPROFILE)
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """定时采样指定线程的调用栈"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame))
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[tuple(stack)] += 1
+            self.samples += 1
+
+    def write_collapsed(self, file_path: str) -> None:
+        """每行一个调用栈，从外到内用 ; 分隔，最后是采样次数"""
+        with open(file_path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{';'.join(stack)} {count}\n")
+
+    def hot_functions(self, top_n: int) -> List[str]:
+        own, inclusive = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack):
+                inclusive[label] += count
+        total = self.samples or 1
+        lines = [f"{'self%':>7} {'total%':>7}  function"]
+        for label, count in own.most_common(top_n):
+            lines.append(f"{count * 100 / total:>6.1f}% {inclusive[label] * 100 / total:>6.1f}%  {label}")
+        return lines
+
+
+class LoopLagMonitor:
+    """在事件循环里定时 sleep，实际唤醒时间比预期晚多少就是循环被阻塞的时长"""
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.lags: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - start - self.interval))
+
+    def summary(self) -> List[str]:
+        if not self.lags:
+            return ["no samples"]
+        lags = sorted(self.lags)
+        p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+        return [
+            f"samples: {len(lags)}, mean: {sum(lags) / len(lags) * 1000:.1f}ms, "
+            f"p99: {p99 * 1000:.1f}ms, max: {lags[-1] * 1000:.1f}ms",
+            f"lag > 100ms: {sum(lag > 0.1 for lag in lags)} times",
+        ]
+
+
+class RunProfiler:
+    """一次运行的 profile，start/stop 之间的耗时、调用栈和内存分配写到 output_dir"""
+
+    def __init__(self, mode: str, output_dir: str, sample_interval: float = 0.005, top_n: int = 30):
+        if mode not in (PROFILE_MODE_SAMPLE, PROFILE_MODE_CPROFILE):
+            raise ValueError(f"unknown profile mode: {mode}")
+        self.mode = mode
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.top_n = top_n
+        self.sampler: Optional[StackSampler] = None
+        self.cprofile: Optional[cProfile.Profile] = None
+        self.lag_monitor: Optional[LoopLagMonitor] = None
+        self._start_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._started_tracemalloc = False
+        self._start_time = 0.0
+
+    def start(self) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._start_snapshot = tracemalloc.take_snapshot()
+        try:
+            asyncio.get_running_loop()
+            self.lag_monitor = LoopLagMonitor()
+            self.lag_monitor.start()
+        except RuntimeError:
+            # 文本分析是同步流程，没有事件循环
+            self.lag_monitor = None
+
+        self._start_time = time.perf_counter()
+        if self.mode == PROFILE_MODE_SAMPLE:
+            self.sampler = StackSampler(threading.get_ident(), self.sample_interval)
+            self.sampler.start()
+        else:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+    def stop(self) -> str:
+        """
+        停止 profile 并写出结果
+        :return: 汇总文件路径
+        """
+        elapsed = time.perf_counter() - self._start_time
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        if self.sampler is not None:
+            self.sampler.stop()
+        if self.lag_monitor is not None:
+            self.lag_monitor.stop()
+
+        end_snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        end_snapshot.dump(os.path.join(self.output_dir, "memory.snapshot"))
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+        lines = [f"mode: {self.mode}", f"wall time: {elapsed:.2f}s", ""]
+        lines.append("== hot functions ==")
+        lines.extend(self._hot_functions())
+        lines.append("")
+        lines.append("== event loop lag ==")
+        lines.extend(self.lag_monitor.summary() if self.lag_monitor else ["no event loop"])
+        lines.append("")
+        lines.append(f"== memory (tracemalloc) current: {current / 1024 / 1024:.1f}MB, "
+                     f"peak: {peak / 1024 / 1024:.1f}MB ==")
+        for stat in end_snapshot.compare_to(self._start_snapshot, "lineno")[:self.top_n]:
+            lines.append(str(stat))
+
+        summary_path = os.path.join(self.output_dir, "summary.txt")
+        with open(summary_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return summary_path
+
+    def _hot_functions(self) -> List[str]:
+        if self.sampler is not None:
+            self.sampler.write_collapsed(os.path.join(self.output_dir, "stacks.collapsed"))
+            return [f"samples: {self.sampler.samples}"] + self.sampler.hot_functions(self.top_n)
+
+        self.cprofile.dump_stats(os.path.join(self.output_dir, "profile.prof"))
+        stream = io.StringIO()
+        stats = pstats.Stats(self.cprofile, stream=stream)
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(self.top_n)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+        return stream.getvalue().splitlines()
+
+
+def make_output_dir(name: str, base_dir: Optional[str] = None) -> str:
+    """
+    :param name: 运行名称，如 crawler_dy、analysis_time
+    :param base_dir: 默认 config.PROFILE_OUTPUT_DIR
+    :return: base_dir/name_时间戳
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(base_dir or config.PROFILE_OUTPUT_DIR, f"{name}_{timestamp}")
+
+
+@contextmanager
+def profile(mode: str, name: str, base_dir: Optional[str] = None):
+    """
+    用法: with profile(config.PROFILE_MODE, "crawler_dy"): ...
+    :param mode: off | sample | cprofile
+    :param name: 运行名称
+    :param base_dir: 输出根目录
+    :return:
+    """
+    if mode == PROFILE_MODE_OFF:
+        yield None
+        return
+
+    run_profiler = RunProfiler(mode, make_output_dir(name, base_dir),
+                               sample_interval=config.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+    run_profiler.start()
+    utils.logger.info(f"[profiler] {mode} profiling enabled, output: {run_profiler.output_dir}")
+    try:
+        yield run_profiler
+    finally:
+        summary_path = run_profiler.stop()
+        utils.logger.info(f"[profiler] profile summary written to {summary_path}")
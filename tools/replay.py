@@ -0,0 +1,413 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 请求录制/重放，录制各平台 client 的请求响应，用本地 mock 服务重放，在不访问真实平台的情况下测量爬取吞吐
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import aiofiles
+import httpx
+
+import config
+from cache.response_cache import RESPONSE_CACHE_MODE_OFF, ResponseCache
+from tools import utils
+
+REPLAY_MODE_OFF = "off"
+REPLAY_MODE_RECORD = "record"
+REPLAY_MODE_REPLAY = "replay"
+
+HEADER_PLATFORM = "X-Replay-Platform"
+HEADER_KEY = "X-Replay-Key"
+
+# 注入验证码时返回的状态码，与 http_transport.BLOCK_STATUS_CODES 一致，会被当作风控处理
+CAPTCHA_STATUS_CODE = 461
+ERROR_STATUS_CODE = 503
+
+
+class ReplayFixtureMissError(Exception):
+    """重放时找不到录制的响应"""
+
+
+def _build_key_builder() -> ResponseCache:
+    # 复用响应缓存的 key 计算规则，签名类参数每次不同也能匹配到录制的响应
+    return ResponseCache(mode=RESPONSE_CACHE_MODE_OFF, storage=None, endpoint_ttls={},
+                         volatile_params=config.RESPONSE_CACHE_VOLATILE_PARAMS)
+
+
+class FixtureArchive:
+    """
+    录制文件目录，每个平台一个 jsonl 文件，每行一条请求响应:
+    {"key": ..., "platform": "dy", "method": "GET", "url": ..., "params": ..., "data": ..., "status_code": 200,
+     "content_type": "application/json", "text": ..., "elapsed_ms": 123.4}
+    """
+
+    def __init__(self, archive_dir: str):
+        self.archive_dir = archive_dir
+
+    def path_of(self, platform: str) -> str:
+        return os.path.join(self.archive_dir, f"{platform}.jsonl")
+
+    async def append(self, record: Dict) -> None:
+        os.makedirs(self.archive_dir, exist_ok=True)
+        async with aiofiles.open(self.path_of(record["platform"]), "a", encoding="utf-8") as f:
+            await f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def load(self, platform: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """
+        读取录制的响应
+        :param platform: 为空时读取所有平台
+        :return: {key: [record, ...]}，同一个 key 录制了多次时重放时轮流返回
+        """
+        records: Dict[str, List[Dict]] = {}
+        if not os.path.isdir(self.archive_dir):
+            return records
+        for file_name in sorted(os.listdir(self.archive_dir)):
+            if not file_name.endswith(".jsonl"):
+                continue
+            if platform and file_name != f"{platform}.jsonl":
+                continue
+            with open(os.path.join(self.archive_dir, file_name), encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        records.setdefault(record["key"], []).append(record)
+        return records
+
+
+class RequestStats:
+    """请求耗时统计，用于输出 pages/s、p50/p99 延迟以及峰值内存"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.latencies_ms: List[float] = []
+        self.errors = 0
+
+    def observe(self, latency_ms: float, ok: bool) -> None:
+        self.latencies_ms.append(latency_ms)
+        if not ok:
+            self.errors += 1
+
+    @staticmethod
+    def percentile(values: List[float], percent: float) -> float:
+        if not values:
+            return 0.0
+        values = sorted(values)
+        index = min(len(values) - 1, max(0, math.ceil(percent / 100 * len(values)) - 1))
+        return values[index]
+
+    @staticmethod
+    def peak_rss_mb() -> Optional[float]:
+        try:
+            import resource
+        except ImportError:  # Windows
+            return None
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 单位为 KB，macOS 单位为字节
+        return max_rss / 1024 / 1024 if sys.platform == "darwin" else max_rss / 1024
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started_at
+        pages = len(self.latencies_ms) - self.errors
+        return {
+            "requests": len(self.latencies_ms),
+            "errors": self.errors,
+            "elapsed_sec": round(elapsed, 3),
+            "pages_per_sec": round(pages / elapsed, 2) if elapsed > 0 else 0.0,
+            "p50_ms": round(self.percentile(self.latencies_ms, 50), 2),
+            "p99_ms": round(self.percentile(self.latencies_ms, 99), 2),
+            "peak_rss_mb": self.peak_rss_mb(),
+        }
+
+
+class ReplaySession:
+    """
+    接入 http_transport.send_request
+    - record: 正常请求平台，把响应追加到录制文件
+    - replay: 请求转发到本地 mock 服务，不访问真实平台
+    """
+
+    def __init__(self, mode: str, archive_dir: str, server_url: str = ""):
+        self.mode = mode
+        self.archive = FixtureArchive(archive_dir)
+        self.server_url = server_url.rstrip("/")
+        self.stats = RequestStats()
+        self._key_builder = _build_key_builder()
+        # 重放时所有请求复用同一个 client 的连接池，避免每个请求都建立一次连接拉高延迟
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == REPLAY_MODE_RECORD
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY_MODE_REPLAY
+
+    def build_key(self, platform: str, method: str, url: str, kwargs: Dict) -> str:
+        return self._key_builder.build_key(platform, method, url, kwargs.get("params"), kwargs.get("data"))
+
+    async def record(self, platform: str, method: str, url: str, kwargs: Dict, response: Any,
+                     elapsed_ms: float) -> None:
+        self.stats.observe(elapsed_ms, response.status_code < 400)
+        await self.archive.append({
+            "key": self.build_key(platform, method, url, kwargs),
+            "platform": platform,
+            "method": method.upper(),
+            "url": url,
+            "params": kwargs.get("params"),
+            "data": kwargs.get("data"),
+            "status_code": response.status_code,
+            "content_type": response.headers.get("content-type", ""),
+            "text": response.text,
+            "elapsed_ms": round(elapsed_ms, 2),
+        })
+
+    async def forward(self, platform: str, method: str, url: str, timeout: Optional[float],
+                      **kwargs) -> httpx.Response:
+        """
+        把请求转发到 mock 服务，只携带 key，mock 服务按 key 返回录制的响应
+        :return:
+        """
+        headers = {HEADER_PLATFORM: platform, HEADER_KEY: self.build_key(platform, method, url, kwargs)}
+        if self._client is None:
+            self._client = httpx.AsyncClient()
+        start = time.perf_counter()
+        response = await self._client.get(f"{self.server_url}/replay", headers=headers, timeout=timeout)
+        self.stats.observe((time.perf_counter() - start) * 1000, response.status_code < 400)
+        if response.status_code == 404:
+            raise ReplayFixtureMissError(f"[ReplaySession.forward] fixture not found, {method}:{url}")
+        return response
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class MockPlatformServer:
+    """
+    本地 mock 平台服务，按 key 重放录制的响应，支持注入延迟、错误和验证码
+    """
+
+    def __init__(self, archive_dir: str, platform: Optional[str] = None, host: str = "127.0.0.1", port: int = 0,
+                 latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0.0, captcha_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        """
+        :param archive_dir: 录制文件目录
+        :param platform: 只加载指定平台的录制文件
+        :param port: 0 表示随机端口
+        :param latency_ms: 每个响应固定增加的延迟
+        :param jitter_ms: 在固定延迟之上随机增加 0~jitter_ms 的延迟
+        :param error_rate: 返回 503 的概率
+        :param captcha_rate: 返回验证码(风控状态码)的概率
+        :param seed: 随机种子，便于复现
+        """
+        self.records = FixtureArchive(archive_dir).load(platform)
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.captcha_rate = captcha_rate
+        self.served = 0
+        self.missed = 0
+        self._random = random.Random(seed)
+        self._cursors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def pick(self, key: str) -> Optional[Dict]:
+        """
+        按 key 取一条录制的响应并决定是否注入错误
+        :param key:
+        :return: {"status_code", "content_type", "text"}，未录制返回 None
+        """
+        with self._lock:
+            records = self.records.get(key)
+            if not records:
+                self.missed += 1
+                return None
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            self.served += 1
+            roll = self._random.random()
+            delay_ms = self.latency_ms + self._random.random() * self.jitter_ms
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+        if roll < self.error_rate:
+            return {"status_code": ERROR_STATUS_CODE, "content_type": "text/plain", "text": "injected error"}
+        if roll < self.error_rate + self.captcha_rate:
+            return {"status_code": CAPTCHA_STATUS_CODE, "content_type": "text/plain", "text": ""}
+        return records[cursor % len(records)]
+
+    def _handler_class(self):
+        mock_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                record = mock_server.pick(self.headers.get(HEADER_KEY, ""))
+                if record is None:
+                    record = {"status_code": 404, "content_type": "text/plain", "text": "fixture not found"}
+                body = record["text"].encode("utf-8")
+                self.send_response(record["status_code"])
+                self.send_header("Content-Type", record.get("content_type") or "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> str:
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler_class())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        utils.logger.info(f"[MockPlatformServer.start] serving {sum(map(len, self.records.values()))} "
+                          f"fixtures on {self.url}")
+        return self.url
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+_replay_session: Optional[ReplaySession] = None
+_replay_session_loaded = False
+
+
+def get_replay_session() -> Optional[ReplaySession]:
+    """
+    按配置懒加载全局的录制/重放会话，未开启时返回 None
+    :return:
+    """
+    global _replay_session, _replay_session_loaded
+    if not _replay_session_loaded:
+        _replay_session_loaded = True
+        if config.REPLAY_MODE != REPLAY_MODE_OFF:
+            _replay_session = ReplaySession(config.REPLAY_MODE, config.REPLAY_ARCHIVE_DIR, config.REPLAY_SERVER_URL)
+    return _replay_session
+
+
+def set_replay_session(replay_session: Optional[ReplaySession]) -> None:
+    """
+    替换全局的录制/重放会话，基准测试和单测使用
+    :param replay_session:
+    :return:
+    """
+    global _replay_session, _replay_session_loaded
+    _replay_session = replay_session
+    _replay_session_loaded = True
+
+
+async def replay_archive(session: ReplaySession, platform: str, concurrency: int) -> None:
+    """
+    不启动爬虫，直接把录制的请求全部重放一遍，只测量发送层和 mock 服务的吞吐
+    :param session:
+    :param platform:
+    :param concurrency:
+    :return:
+    """
+    from tools import http_transport
+
+    records = [record for items in session.archive.load(platform).values() for record in items]
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def send(record: Dict):
+        async with semaphore:
+            try:
+                await http_transport.send_request(platform, record["method"], record["url"],
+                                                  params=record.get("params"), data=record.get("data"))
+            except ReplayFixtureMissError as e:
+                utils.logger.warning(e)
+
+    await asyncio.gather(*[send(record) for record in records])
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    server = MockPlatformServer(args.archive, platform=args.platform, latency_ms=args.latency_ms,
+                                jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                                captcha_rate=args.captcha_rate, seed=args.seed)
+    session = ReplaySession(REPLAY_MODE_REPLAY, args.archive, server.start())
+    set_replay_session(session)
+    try:
+        if args.transport_only:
+            await replay_archive(session, args.platform, args.concurrency)
+        else:
+            # 端到端运行爬虫核心流程，登录和签名仍然需要浏览器或者免浏览器模式的会话快照
+            import main
+            config.PLATFORM = args.platform
+            await main.CrawlerFactory.create_crawler(args.platform).start()
+    finally:
+        await session.close()
+        server.stop()
+    result = session.stats.summary()
+    result.update({"platform": args.platform, "served": server.served, "missed": server.missed})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="请求录制重放与爬取吞吐基准")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="启动 mock 平台服务，配合 REPLAY_MODE=replay 运行 main.py")
+    bench_parser = subparsers.add_parser("bench", help="启动 mock 平台服务并运行基准")
+    for sub_parser in (serve_parser, bench_parser):
+        sub_parser.add_argument("--archive", default=config.REPLAY_ARCHIVE_DIR, help="录制文件目录")
+        sub_parser.add_argument("--platform", default=None, help="只重放指定平台")
+        sub_parser.add_argument("--latency-ms", type=float, default=0)
+        sub_parser.add_argument("--jitter-ms", type=float, default=0)
+        sub_parser.add_argument("--error-rate", type=float, default=0.0)
+        sub_parser.add_argument("--captcha-rate", type=float, default=0.0)
+        sub_parser.add_argument("--seed", type=int, default=None)
+    serve_parser.add_argument("--port", type=int, default=8765)
+    bench_parser.add_argument("--transport-only", action="store_true", help="不运行爬虫，只重放录制的请求")
+    bench_parser.add_argument("--concurrency", type=int, default=config.MAX_CONCURRENCY_NUM)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        server = MockPlatformServer(args.archive, platform=args.platform, port=args.port,
+                                    latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                                    error_rate=args.error_rate, captcha_rate=args.captcha_rate, seed=args.seed)
+        print(f"mock platform server listening on {server.start()}, press Ctrl+C to stop")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.stop()
+        return
+
+    if not args.platform:
+        parser.error("bench requires --platform")
+    print(json.dumps(asyncio.run(run_benchmark(args)), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 会话快照，浏览器登录一次之后保存 cookies、localStorage 和 UA，之后的爬取可以不启动浏览器
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from playwright.async_api import BrowserContext, Page
+from pydantic import BaseModel, Field
+
+import config
+from tools import utils
+
+LOCAL_STORAGE_EXPRESSION = "() => window.localStorage"
+USER_AGENT_EXPRESSION = "() => navigator.userAgent"
+
+
+class BrowserlessEvaluateError(Exception):
+    """免浏览器模式下无法执行任意 js"""
+
+
+class SessionSnapshot(BaseModel):
+    """一次浏览器登录之后的会话快照"""
+    platform: str = Field(title="平台")
+    user_agent: str = Field(default="", title="浏览器UA")
+    cookies: List[Dict[str, Any]] = Field(default_factory=list, title="playwright 格式的 cookies")
+    local_storage: Dict[str, str] = Field(default_factory=dict, title="首页的 localStorage")
+    created_at: int = Field(default_factory=lambda: int(time.time()), title="快照创建时间")
+
+    def convert_cookies(self) -> Tuple[str, Dict]:
+        return utils.convert_cookies(self.cookies)  # type: ignore
+
+    def is_expired(self, max_age: int) -> bool:
+        if max_age <= 0:
+            return False
+        return time.time() - self.created_at > max_age
+
+
+class SnapshotPage:
+    """
+    用快照代替 playwright Page，客户端只会通过 evaluate 读取 localStorage 和 UA
+    """
+
+    def __init__(self, snapshot: SessionSnapshot):
+        self.snapshot = snapshot
+
+    async def evaluate(self, expression: str, arg: Any = None) -> Any:
+        if expression == LOCAL_STORAGE_EXPRESSION:
+            return dict(self.snapshot.local_storage)
+        if expression == USER_AGENT_EXPRESSION:
+            return self.snapshot.user_agent
+        raise BrowserlessEvaluateError(f"expression not supported in browserless mode: {expression}")
+
+
+def snapshot_path(platform: str) -> str:
+    return os.path.join(config.SESSION_SNAPSHOT_DIR, f"{platform}.json")
+
+
+async def capture_session_snapshot(platform: str, browser_context: BrowserContext, page: Page) -> SessionSnapshot:
+    """
+    从已经登录的浏览器中读取会话信息
+    :param platform:
+    :param browser_context:
+    :param page: 已经打开平台首页的页面
+    :return:
+    """
+    return SessionSnapshot(
+        platform=platform,
+        user_agent=await page.evaluate(USER_AGENT_EXPRESSION),
+        cookies=[dict(cookie) for cookie in await browser_context.cookies()],
+        local_storage=await page.evaluate(LOCAL_STORAGE_EXPRESSION),
+    )
+
+
+def save_session_snapshot(snapshot: SessionSnapshot, file_path: Optional[str] = None) -> str:
+    file_path = file_path or snapshot_path(snapshot.platform)
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(snapshot.model_dump_json())
+    os.replace(tmp_path, file_path)
+    utils.logger.info(f"[session_snapshot] saved {snapshot.platform} session snapshot to {file_path}")
+    return file_path
+
+
+def load_session_snapshot(platform: str, file_path: Optional[str] = None,
+                          max_age: Optional[int] = None) -> Optional[SessionSnapshot]:
+    """
+    读取会话快照，文件不存在、格式错误或已过期时返回 None
+    :param platform:
+    :param file_path:
+    :param max_age: 快照最长有效期(秒)，默认读取配置 SESSION_SNAPSHOT_MAX_AGE，<=0 表示不过期
+    :return:
+    """
+    file_path = file_path or snapshot_path(platform)
+    if not os.path.exists(file_path):
+        return None
+    try:
+        with open(file_path, encoding="utf-8") as f:
+            snapshot = SessionSnapshot.model_validate_json(f.read())
+    except Exception as e:
+        utils.logger.warning(f"[session_snapshot] load {file_path} error: {e}")
+        return None
+    max_age = config.SESSION_SNAPSHOT_MAX_AGE if max_age is None else max_age
+    if snapshot.platform != platform or snapshot.is_expired(max_age):
+        return None
+    return snapshot
+
+
+async def save_browser_session(platform: str, browser_context: BrowserContext, page: Page) -> None:
+    """
+    开启免浏览器模式时，在浏览器登录完成之后保存会话快照，供下一次运行使用
+    :param platform:
+    :param browser_context:
+    :param page:
+    :return:
+    """
+    if not config.ENABLE_BROWSERLESS_MODE:
+        return
+    try:
+        save_session_snapshot(await capture_session_snapshot(platform, browser_context, page))
+    except Exception as e:
+        utils.logger.warning(f"[session_snapshot] save {platform} session snapshot error: {e}")
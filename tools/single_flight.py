@@ -0,0 +1,112 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 并发请求合并(single-flight)，相同 key 的调用在进行中时只执行一次，其余调用等待同一个结果
+import asyncio
+import copy
+import functools
+import inspect
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+import config
+
+
+class SingleFlight:
+    """
+    以 (平台, 接口, 客户端, 参数) 为 key 合并同时进行中的调用
+    - 第一个调用者创建共享任务，之后相同 key 的调用者直接等待该任务
+    - 共享任务完成后立即移除，不做结果缓存，缓存由 ResponseCache 负责
+    - 单个调用者被取消不会取消共享任务，其他等待者不受影响
+    - 其余等待者拿到的是结果的深拷贝，避免各自修改同一个 dict
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.shared_count = 0
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行或者加入 key 对应的调用
+        :param key:
+        :param fn: 无参的协程函数
+        :return:
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self.shared_count += 1
+            return copy.deepcopy(await asyncio.shield(task))
+
+        task = asyncio.ensure_future(fn())
+        self._calls[key] = task
+        task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(task)
+
+
+_group = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    return _group
+
+
+def build_key(platform: str, endpoint: str, signature: inspect.Signature, client: Any, args: Tuple,
+              kwargs: Dict) -> Tuple:
+    """
+    按函数签名归一化参数，位置参数、关键字参数和省略的默认参数得到同一个 key
+    客户端按 id 区分，不同账号(cookie)的客户端不会共享结果
+    :param platform:
+    :param endpoint:
+    :param signature: 被装饰方法的签名
+    :param client: 被装饰方法的 self
+    :param args:
+    :param kwargs:
+    :return:
+    """
+    bound = signature.bind(client, *args, **kwargs)
+    bound.apply_defaults()
+    arguments = []
+    for name, value in list(bound.arguments.items())[1:]:
+        if signature.parameters[name].kind == inspect.Parameter.VAR_KEYWORD:
+            value = tuple(sorted(value.items()))
+        arguments.append((name, value))
+    return platform, endpoint, id(client), tuple(arguments)
+
+
+def single_flight(platform: str, endpoint: str):
+    """
+    客户端方法装饰器，按 (平台, 接口, 客户端实例, 除 self 之外的参数) 合并并发调用
+    :param platform: 平台名称，与 config.PLATFORM 一致
+    :param endpoint: 接口名称
+    :return:
+    """
+
+    def decorator(func: Callable[..., Awaitable[Any]]):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            if not config.ENABLE_SINGLE_FLIGHT:
+                return await func(self, *args, **kwargs)
+            try:
+                key = build_key(platform, endpoint, signature, self, args, kwargs)
+                hash(key)
+            except TypeError:
+                # 参数与签名不匹配时让原方法抛出异常，不可哈希的参数不做合并
+                return await func(self, *args, **kwargs)
+            return await _group.do(key, lambda: func(self, *args, **kwargs))
+
+        return wrapper
+
+    return decorator
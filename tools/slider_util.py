@@ -17,15 +17,14 @@ import os
 from typing import List
 from urllib.parse import urlparse
 
-import cv2
 import httpx
-import numpy as np
 
 
 class Slide:
     """
     copy from https://blog.csdn.net/weixin_43582101 thanks for author
     update: relakkes
+    opencv 和 numpy 导入较慢，只有抖音滑块验证时才会用到，所以在方法内导入
     """
     def __init__(self, gap, bg, gap_size=None, bg_size=None, out=None):
         """
@@ -59,6 +58,8 @@ class Slide:
             }
             img_res = httpx.get(img, headers=headers)
             if img_res.status_code == 200:
+                import cv2
+                import numpy as np
                 img_path = f'./temp_image/{img_type}.jpg'
                 image = np.asarray(bytearray(img_res.content), dtype="uint8")
                 image = cv2.imdecode(image, cv2.IMREAD_COLOR)
@@ -74,6 +75,7 @@ class Slide:
     @staticmethod
     def clear_white(img):
         """清除图片的空白区域，这里主要清除滑块的空白"""
+        import cv2
         img = cv2.imread(img)
         rows, cols, channel = img.shape
         min_x = 255
@@ -97,6 +99,7 @@ class Slide:
         return img1
 
     def template_match(self, tpl, target):
+        import cv2
         th, tw = tpl.shape[:2]
         result = cv2.matchTemplate(target, tpl, cv2.TM_CCOEFF_NORMED)
         # 寻找矩阵(一维数组当作向量,用Mat定义) 中最小值和最大值的位置
@@ -115,10 +118,12 @@ class Slide:
 
     @staticmethod
     def image_edge_detection(img):
+        import cv2
         edges = cv2.Canny(img, 100, 200)
         return edges
 
     def discern(self):
+        import cv2
         img1 = self.clear_white(self.gap)
         img1 = cv2.cvtColor(img1, cv2.COLOR_RGB2GRAY)
         slide = self.image_edge_detection(img1)
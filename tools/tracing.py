@@ -0,0 +1,240 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 请求级别的耗时 span 记录，输出 Chrome trace-event 格式(chrome://tracing、Perfetto 可直接打开)
+#            一次请求(如抖音的一页评论)从最外层 span 开始，签名、发送、解析、存储各自是它的子 span，
+#            最外层 span 结束时做尾部采样: 慢请求全部保留，其余按比例抽样
+import asyncio
+import functools
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+import config
+from tools import utils
+
+
+class Trace:
+    """一次请求内所有 span 的集合，同一个请求派生出的子任务共享这个对象"""
+
+    __slots__ = ("events", "tid")
+
+    def __init__(self, tid: int):
+        self.events: List[Dict] = []
+        self.tid = tid
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+class Tracer:
+    """
+    负责采样决策和写 trace 文件
+    保留的 event 先放进内存缓冲，攒够 flush_events 个之后交给后台线程写文件，事件循环线程上不做文件 IO，
+    退出前调用 flush 写入剩余的 event
+    """
+
+    def __init__(self, trace_file: str, slow_threshold_ms: float, sample_rate: float, flush_events: int = 1000):
+        self.trace_file = trace_file
+        self.slow_threshold_ms = slow_threshold_ms
+        self.sample_rate = sample_rate
+        self.flush_events = flush_events
+        self.kept = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._next_tid = 0
+        self._buffer: List[Dict] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def new_tid(self) -> int:
+        # trace 查看器里每个请求单独一行
+        with self._lock:
+            self._next_tid += 1
+            return self._next_tid
+
+    def should_keep(self, root_duration_ms: float) -> Optional[str]:
+        """
+        尾部采样
+        :param root_duration_ms: 最外层 span 的耗时
+        :return: 保留原因 slow | sampled，不保留返回 None
+        """
+        if root_duration_ms >= self.slow_threshold_ms:
+            return "slow"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    def finish(self, trace: Trace, root_duration_ms: float) -> bool:
+        reason = self.should_keep(root_duration_ms)
+        if reason is None:
+            self.dropped += 1
+            return False
+        # 最外层 span 最后一个结束，排在最后
+        trace.events[-1]["args"]["sampling"] = reason
+        with self._lock:
+            self._buffer.extend(trace.events)
+            batch = None
+            if len(self._buffer) >= self.flush_events:
+                batch, self._buffer = self._buffer, []
+        if batch:
+            self._submit(batch)
+        self.kept += 1
+        return True
+
+    def _submit(self, events: List[Dict]) -> None:
+        with self._lock:
+            if self._executor is None:
+                # 单个写线程，保证批次按提交顺序写入
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trace-writer")
+            self._executor.submit(self._write_quietly, events)
+
+    def _write_quietly(self, events: List[Dict]) -> None:
+        try:
+            self.write(events)
+        except OSError as e:
+            utils.logger.error(f"[Tracer.write] write trace file error: {e}")
+
+    def flush(self) -> None:
+        """
+        写入缓冲中剩余的 event 并等待后台写入完成，会阻塞调用线程，在退出前调用
+        :return:
+        """
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if batch:
+            self._submit(batch)
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def write(self, events: List[Dict]) -> None:
+        """
+        追加写入 trace 文件，使用 JSON Array 格式且不写结尾的 ]，Chrome trace 规范允许这种写法，便于持续追加
+        :param events:
+        :return:
+        """
+        lines = "".join(json.dumps(event, ensure_ascii=False) + ",\n" for event in events)
+        with self._write_lock:
+            directory = os.path.dirname(self.trace_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            is_new = not os.path.exists(self.trace_file) or os.path.getsize(self.trace_file) == 0
+            with open(self.trace_file, "a", encoding="utf-8") as f:
+                if is_new:
+                    f.write("[\n")
+                f.write(lines)
+
+
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(config.TRACE_FILE, config.TRACE_SLOW_THRESHOLD_MS, config.TRACE_SAMPLE_RATE)
+    return _tracer
+
+
+def set_tracer(tracer: Optional[Tracer]) -> None:
+    global _tracer
+    if _tracer is not None and _tracer is not tracer:
+        _tracer.flush()
+    _tracer = tracer
+
+
+def flush() -> None:
+    """写入全局 tracer 缓冲中的 event，爬虫退出前调用"""
+    if _tracer is not None:
+        _tracer.flush()
+
+
+def load_trace(trace_file: str) -> List[Dict]:
+    """
+    读取 trace 文件，兼容没有结尾 ] 的写法
+    :param trace_file:
+    :return: trace event 列表
+    """
+    with open(trace_file, "r", encoding="utf-8") as f:
+        content = f.read().strip()
+    if not content:
+        return []
+    if not content.endswith("]"):
+        content = content.rstrip(",") + "]"
+    return json.loads(content)
+
+
+@contextmanager
+def span(name: str, cat: str = "crawler", **args: Any):
+    """
+    记录一个 span，当前没有进行中的 trace 时它就是最外层 span
+    :param name: span 名称，如 dy.sign、http.send
+    :param cat: 分类，trace 查看器里可以按分类过滤
+    :param args: 附加信息，会展示在 span 详情里
+    :return:
+    """
+    if not config.ENABLE_TRACING:
+        yield
+        return
+
+    trace = _current_trace.get()
+    token = None
+    if trace is None:
+        trace = Trace(get_tracer().new_tid())
+        token = _current_trace.set(trace)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        trace.events.append({
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": round(start * 1e6, 3),
+            "dur": round((end - start) * 1e6, 3),
+            "pid": os.getpid(),
+            "tid": trace.tid,
+            "args": args,
+        })
+        if token is not None:
+            _current_trace.reset(token)
+            get_tracer().finish(trace, (end - start) * 1000)
+
+
+def traced(name: str, cat: str = "crawler"):
+    """
+    异步函数的 span 装饰器
+    :param name:
+    :param cat:
+    :return:
+    """
+
+    def decorator(func: Callable):
+        if not asyncio.iscoroutinefunction(func):
+            raise TypeError(f"traced only supports async functions, got {func!r}")
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name, cat):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
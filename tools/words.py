@@ -10,35 +10,50 @@
 
 
 import asyncio
-import json
 import logging
 from collections import Counter
 
 import aiofiles
-import jieba
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
 
 import config
-from tools import utils
+from tools import json_codec, utils
 
 plot_lock = asyncio.Lock()
 
 class AsyncWordCloudGenerator:
+    """
+    jieba、matplotlib、wordcloud 导入很慢，各平台的 store 在类定义时就会创建该对象，
+    所以这些依赖和停用词都推迟到第一次生成词云时再加载
+    """
+
     def __init__(self):
-        logging.getLogger('jieba').setLevel(logging.WARNING)
         self.stop_words_file = config.STOP_WORDS_FILE
         self.lock = asyncio.Lock()
-        self.stop_words = self.load_stop_words()
         self.custom_words = config.CUSTOM_WORDS
-        for word, group in self.custom_words.items():
-            jieba.add_word(word)
+        self._stop_words = None
+        self._custom_words_loaded = False
+
+    @property
+    def stop_words(self):
+        if self._stop_words is None:
+            self._stop_words = self.load_stop_words()
+        return self._stop_words
 
     def load_stop_words(self):
         with open(self.stop_words_file, 'r', encoding='utf-8') as f:
             return set(f.read().strip().split('\n'))
 
+    def _load_jieba(self):
+        import jieba
+        if not self._custom_words_loaded:
+            logging.getLogger('jieba').setLevel(logging.WARNING)
+            for word, group in self.custom_words.items():
+                jieba.add_word(word)
+            self._custom_words_loaded = True
+        return jieba
+
     async def generate_word_frequency_and_cloud(self, data, save_words_prefix):
+        jieba = self._load_jieba()
         all_text = ' '.join(item['content'] for item in data)
         words = [word for word in jieba.lcut(all_text) if word not in self.stop_words and len(word.strip()) > 0]
         word_freq = Counter(words)
@@ -46,7 +61,7 @@ class AsyncWordCloudGenerator:
         # Save word frequency to file
         freq_file = f"{save_words_prefix}_word_freq.json"
         async with aiofiles.open(freq_file, 'w', encoding='utf-8') as file:
-            await file.write(json.dumps(word_freq, ensure_ascii=False, indent=4))
+            await file.write(json_codec.dumps(word_freq, indent=2))
 
         # Try to acquire the plot lock without waiting
         if plot_lock.locked():
@@ -56,6 +71,9 @@ class AsyncWordCloudGenerator:
         await self.generate_word_cloud(word_freq, save_words_prefix)
 
     async def generate_word_cloud(self, word_freq, save_words_prefix):
+        import matplotlib.pyplot as plt
+        from wordcloud import WordCloud
+
         await plot_lock.acquire()
         top_20_word_freq = {word: freq for word, freq in
                             sorted(word_freq.items(), key=lambda item: item[1], reverse=True)[:20]}
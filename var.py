@@ -11,7 +11,7 @@
 
 from asyncio.tasks import Task
 from contextvars import ContextVar
-from typing import List
+from typing import List, Optional, Tuple
 
 import aiomysql
 
@@ -22,4 +22,6 @@ crawler_type_var: ContextVar[str] = ContextVar("crawler_type", default="")
 comment_tasks_var: ContextVar[List[Task]] = ContextVar("comment_tasks", default=[])
 media_crawler_db_var: ContextVar[AsyncMysqlDB] = ContextVar("media_crawler_db_var")
 db_conn_pool_var: ContextVar[aiomysql.Pool] = ContextVar("db_conn_pool_var")
-source_keyword_var: ContextVar[str] = ContextVar("source_keyword", default="")
\ No newline at end of file
+source_keyword_var: ContextVar[str] = ContextVar("source_keyword", default="")
+# 当前请求使用的 (代理池, 代理IP, 成功上报的撤销快照), 由 tools.http_transport 在按请求轮换代理时设置
+current_proxy_var: ContextVar[Optional[Tuple]] = ContextVar("current_proxy", default=None)